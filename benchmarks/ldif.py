@@ -0,0 +1,119 @@
+"""
+Compare the LDIF reader and writer with the implementation of an earlier
+revision of the module, on the same synthetic entries:
+
+    python benchmarks/ldif.py --against 6730d1b --entries 20000
+
+The earlier `ldif.py` is loaded from git, and before measuring, the
+output of the two writers is checked to be byte-identical at several
+line lengths.
+"""
+import argparse
+import io
+import random
+import statistics
+import subprocess
+import sys
+import time
+import types
+
+import bonsai.ldif
+from bonsai import LDAPEntry
+from bonsai.ldif import LDIFWriter
+
+MAX_LENGTHS = (20, 76, 1000)
+
+
+def load_revision(revision):
+    """Load the `ldif` module of a git revision."""
+    source = subprocess.run(
+        ["git", "show", f"{revision}:src/bonsai/ldif.py"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    module = types.ModuleType(f"bonsai.ldif_{revision}")
+    module.__package__ = "bonsai"
+    exec(compile(source, f"{revision}:ldif.py", "exec"), module.__dict__)
+    return module
+
+
+def random_value(rnd):
+    kind = rnd.random()
+    if kind < 0.1:
+        return bytes(rnd.randrange(256) for _ in range(rnd.randrange(1, 200)))
+    if kind < 0.15:
+        return " leading"
+    if kind < 0.2:
+        return "trailing "
+    if kind < 0.25:
+        return "ünï😊"
+    if kind < 0.3:
+        return ":colon"
+    if kind < 0.35:
+        return "line\nbreak"
+    if kind < 0.4:
+        return rnd.randrange(10**6)
+    return "x" * rnd.randrange(1, 150)
+
+
+def synthetic_entries(size, seed=1):
+    """Create entries with values that need every kind of encoding."""
+    rnd = random.Random(seed)
+    entries = []
+    for num in range(size):
+        entry = LDAPEntry(f"cn=user{num},ou=people,dc=bonsai,dc=test")
+        for name in ("cn", "sn", "mail", "description", "jpegPhoto", "member"):
+            values = [random_value(rnd) for _ in range(rnd.randrange(1, 4))]
+            entry[name] = list({repr(value): value for value in values}.values())
+        entries.append(entry)
+    return entries
+
+
+def write(writer_cls, entries, max_length=76):
+    output = io.StringIO()
+    writer_cls(output, max_length).write_entries(entries)
+    return output.getvalue()
+
+
+def measure(func, iterations):
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times), statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--against", default="HEAD~1", help="git revision")
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("-n", "--iterations", type=int, default=3)
+    args = parser.parse_args()
+
+    previous = load_revision(args.against)
+    entries = synthetic_entries(args.entries)
+    for max_length in MAX_LENGTHS:
+        if write(previous.LDIFWriter, entries, max_length) != write(
+            LDIFWriter, entries, max_length
+        ):
+            print(f"The output differs with max_length={max_length}.")
+            sys.exit(1)
+    print(f"The output is identical on {args.entries} entries.")
+
+    data = write(LDIFWriter, entries)
+    cases = (
+        ("write", "LDIFWriter", lambda cls: write(cls, entries)),
+        # The folded lines of the writer are longer than the reader's default.
+        ("read", "LDIFReader", lambda cls: list(cls(io.StringIO(data), max_length=80))),
+    )
+    for name, cls_name, func in cases:
+        for label, module in ((args.against, previous), ("current", bonsai.ldif)):
+            cls = getattr(module, cls_name)
+            best, median = measure(lambda: func(cls), args.iterations)
+            print(f"{name:<6} {label:<12} best: {best:8.3f} s  median: {median:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Compare the latency of searches answered by a LocalReplica with the
+round trips of the same searches to the server.
+
+    python benchmarks/replica.py ldap://localhost/dc=bonsai,dc=test \
+        -D cn=admin,dc=bonsai,dc=test -w p@ssword -f "(cn=chuck)"
+
+Without a URL the replica is filled with synthetic entries and only the
+local latency is measured. With the --snapshot option the time of saving
+and restoring a snapshot of the replica is measured too.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from bonsai import LDAPClient, LDAPEntry
+from bonsai.replica import LocalReplica
+
+
+def measure(func, iterations):
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return (
+        statistics.median(times) * 1e6,
+        times[int(len(times) * 0.95) - 1] * 1e6,
+    )
+
+
+def report(name, median, p95):
+    print(f"{name:<10} median: {median:10.1f} us   p95: {p95:10.1f} us")
+
+
+def snapshot(replica, path):
+    if path is None:
+        return
+    start = time.perf_counter()
+    replica.save(path)
+    print(f"Saved snapshot in {time.perf_counter() - start:.2f}s")
+    start = time.perf_counter()
+    restored = LocalReplica.restore(path)
+    print(
+        f"Restored {len(restored)} entries in {time.perf_counter() - start:.2f}s "
+        f"({os.path.getsize(path) / 1024 / 1024:.1f} MiB)"
+    )
+
+
+def synthetic_replica(size, indexes):
+    replica = LocalReplica(indexes)
+    base = "dc=bonsai,dc=test"
+    for num in range(size):
+        entry = LDAPEntry(f"cn=user{num},ou=ou{num % 10},{base}")
+        entry["objectClass"] = ["top", "inetOrgPerson"]
+        entry["cn"] = f"user{num}"
+        entry["uid"] = f"user{num}"
+        entry["sn"] = f"Sn{num % 100}"
+        replica.add(entry)
+    return replica, base
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("url", nargs="?", help="LDAP URL with the base DN")
+    parser.add_argument("-D", "--user", help="bind DN")
+    parser.add_argument("-w", "--password", help="bind password")
+    parser.add_argument("-f", "--filter", dest="filter_exp", default="(uid=user42)")
+    parser.add_argument("-n", "--iterations", type=int, default=1000)
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--index", action="append", default=["objectClass", "uid"])
+    parser.add_argument("--snapshot", nargs="?", const="", help="snapshot file path")
+    args = parser.parse_args()
+    if args.snapshot == "":
+        args.snapshot = os.path.join(tempfile.mkdtemp(), "replica.db")
+
+    if args.url is None:
+        start = time.perf_counter()
+        replica, base = synthetic_replica(args.entries, args.index)
+        print(f"Loaded {len(replica)} entries in {time.perf_counter() - start:.2f}s")
+        snapshot(replica, args.snapshot)
+        local = lambda: replica.search(base, 2, args.filter_exp)
+        report("replica", *measure(local, args.iterations))
+        return
+
+    client = LDAPClient(args.url)
+    if args.user:
+        client.set_credentials("SIMPLE", user=args.user, password=args.password)
+    base = client.url.basedn
+    with client.connect() as conn:
+        replica = LocalReplica(args.index)
+        start = time.perf_counter()
+        count = replica.populate(conn, base, 2)
+        print(f"Loaded {count} entries in {time.perf_counter() - start:.2f}s")
+        snapshot(replica, args.snapshot)
+        remote = lambda: conn.search(base, 2, args.filter_exp)
+        local = lambda: replica.search(base, 2, args.filter_exp)
+        report("server", *measure(remote, args.iterations))
+        report("replica", *measure(local, args.iterations))
+
+
+if __name__ == "__main__":
+    main()
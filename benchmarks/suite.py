@@ -0,0 +1,388 @@
+"""
+Benchmark the hot paths of the module on synthetic datasets, and
+optionally the end-to-end scenarios against a server.
+
+    python benchmarks/suite.py -o results.json
+    python benchmarks/suite.py ldap://localhost/dc=bonsai,dc=test \
+        -D cn=admin,dc=bonsai,dc=test -w p@ssword -o results.json
+
+Without a server, the scenarios can run against the in-process stand-in
+server of `bonsai.testing` with the given number of synthetic entries:
+
+    python benchmarks/suite.py --stand-in 1000 -k server.
+
+The results are stored as JSON together with the commit, the module and
+the Python version. Comparing them with an earlier run reports the
+relative change of the median times, and exits with error if any of the
+benchmarks is slower than the threshold:
+
+    python benchmarks/suite.py --compare baseline.json --threshold 0.1
+
+Benchmarks can be selected by name prefixes, e.g. `-k dn. -k ldif.`.
+The client-side filter evaluation over a million entries:
+
+    python benchmarks/suite.py -k filter. --entries 1000000 -n 5
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bonsai
+from bonsai import LDAPDN, LDAPClient, LDAPEntry, LDAPFilter, LDAPValueList
+from bonsai.active_directory import SecurityDescriptor
+from bonsai.ldif import LDIFReader, LDIFWriter
+from bonsai.pool import ThreadedConnectionPool
+from bonsai.asyncio import AIOConnectionPool
+from bonsai.testing import StandInServer, synthetic_entries
+
+BASE = "ou=bench,dc=bonsai,dc=test"
+CURDIR = os.path.abspath(os.path.dirname(__file__))
+SD_SAMPLE = os.path.join(CURDIR, "..", "tests", "testenv", "sd-sample1.bin")
+
+MICRO = {}
+SCENARIOS = {}
+
+
+def benchmark(registry, name):
+    """
+    Register a benchmark. The decorated function prepares the data and
+    returns the callable that is measured.
+    """
+
+    def decorator(func):
+        registry[name] = func
+        return func
+
+    return decorator
+
+
+def synthetic_entry(num, base=BASE):
+    """Create an entry with the size of a typical user object."""
+    entry = LDAPEntry(f"cn=user{num:06d},ou=ou{num % 10},{base}")
+    entry["objectClass"] = ["top", "person", "organizationalPerson", "inetOrgPerson"]
+    entry["cn"] = f"user{num:06d}"
+    entry["sn"] = f"Surname{num % 100}"
+    entry["givenName"] = f"Given{num % 50}"
+    entry["uid"] = f"user{num:06d}"
+    entry["mail"] = [f"user{num}@bonsai.test", f"user{num}@alias.bonsai.test"]
+    entry["telephoneNumber"] = f"+36 1 555 {num:04d}"
+    entry["title"] = "Senior Software Engineer"
+    entry["description"] = "A synthetic entry for benchmarking. " * 4
+    entry["employeeNumber"] = str(num)
+    entry["departmentNumber"] = f"D{num % 20:03d}"
+    entry["jpegPhoto"] = bytes(range(256)) * 8
+    return entry
+
+
+def synthetic_ldif(size):
+    output = io.StringIO()
+    writer = LDIFWriter(output)
+    writer.write_entries(synthetic_entry(num) for num in range(size))
+    return output.getvalue()
+
+
+@benchmark(MICRO, "dn.parse")
+def dn_parse(args):
+    dns = [f"cn=user{num},ou=ou{num % 10},ou=people,{BASE}" for num in range(1000)]
+    return lambda: [LDAPDN(dn) for dn in dns]
+
+
+@benchmark(MICRO, "dn.escaped")
+def dn_escaped(args):
+    dns = [
+        f"cn=Doe\\, John {num}+uid=jd{num},ou=R\\C3\\A9sum\\C3\\A9s,{BASE}"
+        for num in range(1000)
+    ]
+    return lambda: [LDAPDN(dn) for dn in dns]
+
+
+@benchmark(MICRO, "dn.compare")
+def dn_compare(args):
+    dns = [LDAPDN(f"CN=User{num},OU=People,{BASE}") for num in range(1000)]
+    others = [LDAPDN(f"cn=user{num},ou=people,{BASE}") for num in range(1000)]
+    return lambda: [dn == other for dn, other in zip(dns, others)]
+
+
+@benchmark(MICRO, "entry.create")
+def entry_create(args):
+    return lambda: [synthetic_entry(num) for num in range(100)]
+
+
+@benchmark(MICRO, "entry.access")
+def entry_access(args):
+    entries = [synthetic_entry(num) for num in range(100)]
+    names = ["cn", "MAIL", "sn", "missing", "objectclass", "jpegPhoto"]
+
+    def access():
+        for entry in entries:
+            for name in names:
+                entry.get(name)
+            _ = entry.dn
+            _ = len(entry.keys())
+
+    return access
+
+
+@benchmark(MICRO, "entry.modify")
+def entry_modify(args):
+    def modify():
+        entry = synthetic_entry(0)
+        for num in range(100):
+            entry["description"] = f"Changed {num}"
+            entry["mail"].append(f"extra{num}@bonsai.test")
+        del entry["title"]
+        entry.clear()
+
+    return modify
+
+
+@benchmark(MICRO, "valuelist.append")
+def valuelist_append(args):
+    values = [f"member{num}" for num in range(1000)]
+
+    def append():
+        vlist = LDAPValueList()
+        for value in values:
+            vlist.append(value)
+
+    return append
+
+
+@benchmark(MICRO, "valuelist.contains")
+def valuelist_contains(args):
+    vlist = LDAPValueList(f"Member{num}" for num in range(1000))
+    values = [f"member{num}" for num in range(0, 2000, 20)]
+    return lambda: [value in vlist for value in values]
+
+
+@benchmark(MICRO, "valuelist.extend_remove")
+def valuelist_extend_remove(args):
+    values = [f"member{num}" for num in range(500)]
+
+    def extend_remove():
+        vlist = LDAPValueList()
+        vlist.extend(values)
+        for value in values[::5]:
+            vlist.remove(value)
+
+    return extend_remove
+
+
+@benchmark(MICRO, "ldif.read")
+def ldif_read(args):
+    data = synthetic_ldif(args.entries)
+    # The folded lines of the writer are longer than the reader's default.
+    return lambda: list(LDIFReader(io.StringIO(data), max_length=80))
+
+
+@benchmark(MICRO, "ldif.write")
+def ldif_write(args):
+    entries = [synthetic_entry(num) for num in range(args.entries)]
+    return lambda: LDIFWriter(io.StringIO()).write_entries(entries)
+
+
+def filter_entries(size):
+    """Repeat a thousand distinct entries without the photos to the size."""
+    entries = []
+    for num in range(min(size, 1000)):
+        entry = synthetic_entry(num)
+        del entry["jpegPhoto"]
+        entries.append(entry)
+    return (entries * (size // len(entries) + 1))[:size]
+
+
+@benchmark(MICRO, "filter.equality")
+def filter_equality(args):
+    flt = LDAPFilter("(uid=user000042)")
+    entries = filter_entries(args.entries)
+    return lambda: sum(1 for _ in flt.filter(entries))
+
+
+@benchmark(MICRO, "filter.compound")
+def filter_compound(args):
+    flt = LDAPFilter(
+        "(&(objectClass=person)(|(sn=Surname1*)(departmentNumber=D007))"
+        "(!(employeeNumber<=100))(mail=*@bonsai.test))"
+    )
+    entries = filter_entries(args.entries)
+    return lambda: sum(1 for _ in flt.filter(entries))
+
+
+@benchmark(MICRO, "sd.from_binary")
+def sd_from_binary(args):
+    with open(SD_SAMPLE, "rb") as data:
+        sample = data.read()
+    return lambda: SecurityDescriptor.from_binary(sample)
+
+
+@benchmark(SCENARIOS, "server.search")
+def server_search(args, client):
+    conn = client.connect()
+    return lambda: conn.search(client.url.basedn, 2, args.filter_exp)
+
+
+@benchmark(SCENARIOS, "server.paged_search")
+def server_paged_search(args, client):
+    conn = client.connect()
+
+    def paged_search():
+        return list(
+            conn.paged_search(client.url.basedn, 2, args.filter_exp, page_size=100)
+        )
+
+    return paged_search
+
+
+@benchmark(SCENARIOS, "server.pool_contention")
+def server_pool_contention(args, client):
+    pool = ThreadedConnectionPool(client, 1, max(1, args.concurrency // 4))
+    pool.open()
+    executor = ThreadPoolExecutor(args.concurrency)
+
+    def search():
+        with pool.spawn() as conn:
+            return conn.search(client.url.basedn, 2, args.filter_exp)
+
+    return lambda: list(executor.map(lambda _: search(), range(args.concurrency)))
+
+
+@benchmark(SCENARIOS, "server.async_fanout")
+def server_async_fanout(args, client):
+    loop = asyncio.new_event_loop()
+    pool = AIOConnectionPool(client, 1, max(1, args.concurrency // 4))
+    loop.run_until_complete(pool.open())
+
+    async def search():
+        async with pool.spawn() as conn:
+            return await conn.search(client.url.basedn, 2, args.filter_exp)
+
+    async def fanout():
+        return await asyncio.gather(*(search() for _ in range(args.concurrency)))
+
+    return lambda: loop.run_until_complete(fanout())
+
+
+def measure(func, iterations, warmup):
+    for _ in range(warmup):
+        func()
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return {
+        "iterations": iterations,
+        "min": times[0],
+        "median": statistics.median(times),
+        "p95": times[max(0, int(len(times) * 0.95) - 1)],
+        "mean": statistics.fmean(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+    }
+
+
+def report(name, stats, change=None):
+    line = (
+        f"{name:<28} median: {stats['median'] * 1e6:12.1f} us"
+        f"   p95: {stats['p95'] * 1e6:12.1f} us"
+    )
+    if change is not None:
+        line += f"   {change:+7.1%}"
+    print(line)
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=CURDIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "bonsai": bonsai.__version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def selected(names, prefixes):
+    return [name for name in names if not prefixes or name.startswith(tuple(prefixes))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("url", nargs="?", help="LDAP URL with the base DN")
+    parser.add_argument("-D", "--user", help="bind DN")
+    parser.add_argument("-w", "--password", help="bind password")
+    parser.add_argument("-f", "--filter", dest="filter_exp", default="(objectClass=*)")
+    parser.add_argument("-n", "--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--entries", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--stand-in", type=int, help="entries of a stand-in server")
+    parser.add_argument("-k", dest="prefixes", action="append", help="name prefix")
+    parser.add_argument("-o", "--output", help="JSON file for the results")
+    parser.add_argument("--compare", help="JSON file of an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as data:
+            baseline = json.load(data)["benchmarks"]
+    results = {}
+    regressions = []
+
+    def run(name, func):
+        stats = measure(func, args.iterations, args.warmup)
+        results[name] = stats
+        change = None
+        if name in baseline:
+            change = stats["median"] / baseline[name]["median"] - 1
+            if change > args.threshold:
+                regressions.append(name)
+        report(name, stats, change)
+
+    for name in selected(MICRO, args.prefixes):
+        run(name, MICRO[name](args))
+    server = None
+    if args.url is None and args.stand_in is not None:
+        server = StandInServer(synthetic_entries(args.stand_in))
+        server.start()
+        args.url = f"{server.url}/ou=people,dc=bonsai,dc=test"
+    if args.url is not None:
+        client = LDAPClient(args.url)
+        if args.user:
+            client.set_credentials("SIMPLE", user=args.user, password=args.password)
+        for name in selected(SCENARIOS, args.prefixes):
+            run(name, SCENARIOS[name](args, client))
+    if server is not None:
+        server.close()
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(
+                {"environment": environment(), "benchmarks": results}, output, indent=2
+            )
+    if regressions:
+        print(f"Slower than {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -89,6 +89,7 @@ SOURCES = [
     "ldapmodlist.c",
     "ldap-xplat.c",
     "ldapsearchiter.c",
+    "ldapsearchplan.c",
     "utils.c",
 ]
 
@@ -98,6 +99,7 @@ DEPENDS = [
     "ldapconnectiter.h",
     "ldapmodlist.h",
     "ldapsearchiter.h",
+    "ldapsearchplan.h",
     "ldap-xplat.h",
     "utils.h",
 ]
@@ -149,6 +151,7 @@ setup(
         "bonsai.active_directory",
         "bonsai.asyncio",
         "bonsai.gevent",
+        "bonsai.testing",
         "bonsai.tornado",
         "bonsai.trio",
     ],
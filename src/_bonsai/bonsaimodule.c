@@ -5,6 +5,7 @@
 #include "ldapconnection.h"
 #include "ldapentry.h"
 #include "ldapsearchiter.h"
+#include "ldapsearchplan.h"
 #include "ldapmodlist.h"
 #include "ldapconnectiter.h"
 #include "utils.h"
@@ -162,6 +163,7 @@ PyInit__bonsai(void) {
 
     if (PyType_Ready(&LDAPConnectionType) < 0) return NULL;
     if (PyType_Ready(&LDAPSearchIterType) < 0) return NULL;
+    if (PyType_Ready(&LDAPSearchPlanType) < 0) return NULL;
     if (PyType_Ready(&LDAPConnectIterType) < 0) return NULL;
     if (PyType_Ready(&LDAPEntryType) < 0) return NULL;
     if (PyType_Ready(&LDAPModListType) < 0) return NULL;
@@ -876,3 +876,30 @@ int _ldap_create_sd_flags_control(LDAP *ld, int flags, LDAPControl **edn_ctrl) {
     *edn_ctrl = ctrl;
     return LDAP_SUCCESS;
 }
+
+/* Create a paged results control with zero size to discard the result
+   set of the cookie. (The ldap_create_page_control rejects zero size.) */
+int _ldap_create_release_page_control(LDAP *ld, struct berval *cookie,
+        LDAPControl **page_ctrl) {
+    int rc = -1;
+    BerElement *ber = NULL;
+    struct berval *value = NULL;
+    LDAPControl *ctrl = NULL;
+
+    ber = ber_alloc_t(LBER_USE_DER);
+    if (ber == NULL) return LDAP_NO_MEMORY;
+
+    /* Transcode the data into a berval struct. */
+    ber_printf(ber, "{iO}", 0, cookie);
+    rc = ber_flatten(ber, &value);
+    ber_free(ber, 1);
+    if (rc != 0) return rc;
+
+    rc = ldap_control_create(LDAP_CONTROL_PAGEDRESULTS, 0, value, 1, &ctrl);
+    ber_bvfree(value);
+
+    if (rc != LDAP_SUCCESS) return rc;
+
+    *page_ctrl = ctrl;
+    return LDAP_SUCCESS;
+}
@@ -97,6 +97,8 @@ int _ldap_finish_init_thread(char async, XTHREAD thread, int *timeout, void *mis
 int _ldap_bind(LDAP *ld, ldap_conndata_t *info, char ppolicy, LDAPMessage *result, int *msgid);
 int _ldap_create_extended_dn_control(LDAP *ld, int format, LDAPControl **edn_ctrl);
 int _ldap_create_sd_flags_control(LDAP *ld, int flags, LDAPControl **edn_ctrl);
+int _ldap_create_release_page_control(LDAP *ld, struct berval *cookie,
+        LDAPControl **page_ctrl);
 void _ldap_control_free(LDAPControl *ctrl);
 
 int create_init_thread(void *param, ldap_conndata_t *info, XTHREAD *thread);
@@ -1,6 +1,7 @@
 #include "ldapconnection.h"
 #include "ldapentry.h"
 #include "ldapsearchiter.h"
+#include "ldapsearchplan.h"
 #include "ldapconnectiter.h"
 
 /*  Dealloc the LDAPConnection object. */
@@ -14,6 +15,8 @@ ldapconnection_dealloc(LDAPConnection* self) {
     }
     Py_XDECREF(self->client);
     Py_XDECREF(self->pending_ops);
+    Py_XDECREF(self->op_info);
+    Py_XDECREF(self->connect_times);
     Py_XDECREF(self->socketpair);
 
     Py_TYPE(self)->tp_free((PyObject*)self);
@@ -23,6 +26,8 @@ static int
 ldapconnection_traverse(LDAPConnection *self, visitproc visit, void *arg) {
     DEBUG("ldapconnection_traverse (self:%p)", self);
     Py_VISIT(self->pending_ops);
+    Py_VISIT(self->op_info);
+    Py_VISIT(self->connect_times);
     return 0;
 }
 
@@ -30,6 +35,8 @@ static int
 ldapconnection_clear(LDAPConnection *self) {
     DEBUG("ldapconnection_clear (self:%p)", self);
     Py_CLEAR(self->pending_ops);
+    Py_CLEAR(self->op_info);
+    Py_CLEAR(self->connect_times);
     return 0;
 }
 
@@ -49,6 +56,8 @@ ldapconnection_new(PyTypeObject *type, PyObject *args, PyObject *kwds) {
     if (self != NULL) {
         self->client = NULL;
         self->pending_ops = NULL;
+        self->op_info = NULL;
+        self->connect_times = NULL;
         self->ld = NULL;
         /* The connection should be closed. */
         self->closed = 1;
@@ -91,6 +100,10 @@ ldapconnection_init(LDAPConnection *self, PyObject *args, PyObject *kwds) {
     self->pending_ops = PyDict_New();
     if (self->pending_ops == NULL) return -1;
 
+    /* Create a dict for the details of the pending operations. */
+    self->op_info = PyDict_New();
+    if (self->op_info == NULL) return -1;
+
     /* Convert PyBool to char and set to async. */
     self->async = (char)PyObject_IsTrue(async);
 
@@ -368,6 +381,8 @@ ldapconnection_delentry(LDAPConnection *self, PyObject *args) {
     if (add_to_pending_ops(self->pending_ops, msgid, Py_None) != 0) {
         return NULL;
     }
+    record_pending_op(self->op_info, self->pending_ops, msgid, "delete", dnstr,
+            -1, NULL);
 
     return PyLong_FromLong((long int)msgid);
 }
@@ -394,6 +409,7 @@ LDAPConnection_Searching(LDAPConnection *self, ldapsearchparams *params_in,
     struct timeval timeout;
     struct timeval *timeout_p;
     int tout_ms = 0;
+    int i = 0;
     PyObject *value = NULL;
 
     DEBUG("LDAPConnection_Searching (self:%p, params_in:%p, iterator:%p)",
@@ -431,8 +447,11 @@ LDAPConnection_Searching(LDAPConnection *self, ldapsearchparams *params_in,
     if (sd_flags != -1) num_of_ctrls++;
     if (self->managedsait == 1) num_of_ctrls++;
     if (params->sort_list != NULL) num_of_ctrls++;
-    if (search_iter != NULL && search_iter->page_size > 0) num_of_ctrls++;
+    if (search_iter != NULL && search_iter->cookie != NULL) num_of_ctrls++;
     if (search_iter != NULL && search_iter->vlv_info != NULL) num_of_ctrls++;
+    if (params->server_ctrls != NULL) {
+        for (i = 0; params->server_ctrls[i] != NULL; i++) num_of_ctrls++;
+    }
     if (num_of_ctrls > 0) {
         server_ctrls = (LDAPControl **)malloc(sizeof(LDAPControl *) *
                                               (num_of_ctrls + 1));
@@ -444,10 +463,16 @@ LDAPConnection_Searching(LDAPConnection *self, ldapsearchparams *params_in,
     }
 
     if (server_ctrls != NULL) {
-        if (search_iter != NULL && search_iter->page_size > 0) {
+        if (search_iter != NULL && search_iter->cookie != NULL) {
             /* Create page control and add to the server controls. */
-            rc = ldap_create_page_control(self->ld, search_iter->page_size,
-                    search_iter->cookie, 0, &page_ctrl);
+            if (search_iter->page_size > 0) {
+                rc = ldap_create_page_control(self->ld, search_iter->page_size,
+                        search_iter->cookie, 0, &page_ctrl);
+            } else {
+                /* Discard the result set on the server. */
+                rc = _ldap_create_release_page_control(self->ld,
+                        search_iter->cookie, &page_ctrl);
+            }
             if (rc != LDAP_SUCCESS) {
                 PyErr_BadInternalCall();
                 msgid = -1;
@@ -519,6 +544,13 @@ LDAPConnection_Searching(LDAPConnection *self, ldapsearchparams *params_in,
             server_ctrls[num_of_ctrls] = NULL;
         }
 
+        if (params->server_ctrls != NULL) {
+            /* Add the additional controls, they are owned by the params. */
+            for (i = 0; params->server_ctrls[i] != NULL; i++) {
+                server_ctrls[num_of_ctrls++] = params->server_ctrls[i];
+            }
+            server_ctrls[num_of_ctrls] = NULL;
+        }
     }
 
     if (params == NULL) {
@@ -556,9 +588,15 @@ LDAPConnection_Searching(LDAPConnection *self, ldapsearchparams *params_in,
         msgid = -1;
         goto end;
     }
+    record_pending_op(self->op_info, self->pending_ops, msgid, "search",
+            params->base, params->scope, params->filter);
+    if (search_iter != NULL) search_iter->msgid = msgid;
 end:
     /* Cleanup. */
-    if (page_ctrl != NULL) ldap_control_free(page_ctrl);
+    if (page_ctrl != NULL) {
+        if (search_iter->page_size > 0) ldap_control_free(page_ctrl);
+        else _ldap_control_free(page_ctrl);
+    }
     if (sort_ctrl != NULL) ldap_control_free(sort_ctrl);
     if (vlv_ctrl != NULL) ldap_control_free(vlv_ctrl);
     if (edn_ctrl != NULL) _ldap_control_free(edn_ctrl);
@@ -576,6 +614,7 @@ ldapconnection_search(LDAPConnection *self, PyObject *args, PyObject *kwds) {
     int msgid = -1;
     int sizelimit = 0, attrsonly = 0;
     int page_size = 0;
+    int stream = 0;
     int offset = 0, after_count = 0, before_count = 0, list_count = 0;
     Py_ssize_t len = 0;
     double timeout = 0;
@@ -587,28 +626,37 @@ ldapconnection_search(LDAPConnection *self, PyObject *args, PyObject *kwds) {
     PyObject *attrsonlyo = NULL;
     PyObject *sort_order = NULL;
     PyObject *attrvalue_obj = NULL;
+    PyObject *ctrl_list = NULL;
     ldapsearchparams params;
     LDAPSortKey **sort_list = NULL;
     LDAPSearchIter *search_iter = NULL;
     static char *kwlist[] = {"base", "scope", "filter", "attrlist", "timeout",
             "sizelimit", "attrsonly", "sort_order", "page_size", "offset",
-            "before_count", "after_count", "est_list_count", "attrvalue", NULL};
+            "before_count", "after_count", "est_list_count", "attrvalue",
+            "server_ctrls", "stream", NULL};
 
     DEBUG("ldapconnection_search (self:%p, args:%p, kwds:%p)",
             self, args, kwds);
     if (LDAPConnection_IsClosed(self) != 0) return NULL;
 
-    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|ziz#O!diO!O!iiiiiO", kwlist,
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|ziz#O!diO!O!iiiiiOOp", kwlist,
             &basestr, &scope, &filterstr, &len, &PyList_Type, &attrlist, &timeout,
             &sizelimit, &PyBool_Type, &attrsonlyo, &PyList_Type, &sort_order,
             &page_size, &offset, &before_count, &after_count, &list_count,
-            &attrvalue_obj)) {
+            &attrvalue_obj, &ctrl_list, &stream)) {
         PyErr_SetString(PyExc_TypeError,
                 "Wrong parameters (base<str|LDAPDN>, scope<int>, filter<str>,"
                 " attrlist<List>, timeout<float>, attrsonly<bool>,"
                 " sort_order<List>, page_size<int>, offset<int>,"
                 " before_count<int>, after_count<int>, est_list_count<int>,"
-                " attrvalue<object>).");
+                " attrvalue<object>, server_ctrls<List>, stream<bool>).");
+        return NULL;
+    }
+
+    /* If ctrl_list is None, then it is not set.*/
+    if (ctrl_list == Py_None) ctrl_list = NULL;
+    if (ctrl_list != NULL && !PyList_Check(ctrl_list)) {
+        PyErr_SetString(PyExc_TypeError, "The server_ctrls must be a list.");
         return NULL;
     }
 
@@ -621,6 +669,12 @@ ldapconnection_search(LDAPConnection *self, PyObject *args, PyObject *kwds) {
     /* If attrvalue_obj is None, then it is not set.*/
     if (attrvalue_obj == Py_None) attrvalue_obj = NULL;
 
+    if (stream && (page_size > 0 || offset != 0 || attrvalue_obj != NULL)) {
+        PyErr_SetString(PyExc_ValueError, "Streaming is not supported for "
+                "paged and virtual list view searches.");
+        return NULL;
+    }
+
     if (sort_order != NULL && PyList_Size(sort_order) > 0) {
         /* Convert the attribute, reverse order pairs to LDAPSortKey struct. */
         sort_list = PyList2LDAPSortKeyList(sort_order);
@@ -639,6 +693,20 @@ ldapconnection_search(LDAPConnection *self, PyObject *args, PyObject *kwds) {
         return NULL;
     }
 
+    if (ctrl_list != NULL && PyList_Size(ctrl_list) > 0) {
+        /* Convert the (oid, criticality, value) tuples to LDAPControls. */
+        params.server_ctrls = PyList2LDAPControlList(ctrl_list);
+        if (params.server_ctrls == NULL) {
+            free_search_params(&params);
+            if (!PyErr_Occurred()) {
+                PyErr_SetString(PyExc_ValueError, "Invalid server controls, "
+                        "(oid<str>, critical<bool>, value<bytes|None>) "
+                        "tuples are expected.");
+            }
+            return NULL;
+        }
+    }
+
     if (page_size > 0 || offset != 0 || attrvalue_obj != NULL) {
         /* Create a SearchIter for storing the search params and result. */
         search_iter = LDAPSearchIter_New(self);
@@ -696,6 +764,131 @@ ldapconnection_search(LDAPConnection *self, PyObject *args, PyObject *kwds) {
 
     if (msgid < 0) return NULL;
 
+    if (stream) {
+        /* Mark the operation to get its messages one by one. */
+        Py_INCREF(Py_True);
+        if (add_to_pending_ops(self->pending_ops, msgid, Py_True) != 0) {
+            return NULL;
+        }
+        record_pending_op(self->op_info, self->pending_ops, msgid,
+                "stream_search", basestr, scope, filterstr);
+    }
+
+    return PyLong_FromLong((long int)msgid);
+}
+
+/* Get an optional integer attribute of the LDAPClient, -1 if it's None. */
+static int
+get_client_option(LDAPConnection *self, const char *name, int *option) {
+    PyObject *value = PyObject_GetAttrString(self->client, name);
+
+    if (value == NULL) return -1;
+    if (value == Py_None) {
+        *option = -1;
+    } else {
+        *option = PyLong_AsLong(value);
+    }
+    Py_DECREF(value);
+    return 0;
+}
+
+/* Create the parameters and the server controls of a search once, that
+   can be started repeatedly with different filters. */
+static PyObject *
+ldapconnection_preparesearch(LDAPConnection *self, PyObject *args) {
+    int scope = -1;
+    int sizelimit = 0, attrsonly = 0;
+    int extdn_format = -1;
+    int sd_flags = -1;
+    double timeout = 0;
+    char *basestr = NULL;
+    char **attrs = NULL;
+    PyObject *attrlist = NULL;
+    PyObject *attrsonlyo = NULL;
+    PyObject *sort_order = NULL;
+    ldapsearchparams *params = NULL;
+    LDAPSortKey **sort_list = NULL;
+
+    DEBUG("ldapconnection_preparesearch (self:%p, args:%p)", self, args);
+    if (LDAPConnection_IsClosed(self) != 0) return NULL;
+
+    if (!PyArg_ParseTuple(args, "ziO!diO!O!", &basestr, &scope, &PyList_Type,
+            &attrlist, &timeout, &sizelimit, &PyBool_Type, &attrsonlyo,
+            &PyList_Type, &sort_order)) {
+        PyErr_SetString(PyExc_TypeError,
+                "Wrong parameters (base<str>, scope<int>, attrlist<List>,"
+                " timeout<float>, sizelimit<int>, attrsonly<bool>,"
+                " sort_order<List>).");
+        return NULL;
+    }
+    if (basestr == NULL) basestr = "";
+
+    if (get_client_option(self, "extended_dn_format", &extdn_format) != 0) {
+        return NULL;
+    }
+    if (get_client_option(self, "sd_flags", &sd_flags) != 0) return NULL;
+
+    if (PyList_Size(sort_order) > 0) {
+        sort_list = PyList2LDAPSortKeyList(sort_order);
+        if (sort_list == NULL) {
+            PyErr_BadInternalCall();
+            return NULL;
+        }
+    }
+
+    attrsonly = PyObject_IsTrue(attrsonlyo);
+    if (PyList_Size(attrlist) > 0) attrs = PyList2StringList(attrlist);
+
+    params = (ldapsearchparams *)malloc(sizeof(ldapsearchparams));
+    if (params == NULL) return PyErr_NoMemory();
+    /* The filter is set by every search. */
+    if (set_search_params(params, attrs, attrsonly, basestr, NULL, 0, scope,
+            sizelimit, timeout, sort_list) != 0) {
+        free(params);
+        return NULL;
+    }
+
+    return (PyObject *)LDAPSearchPlan_New(self->ld, params, extdn_format,
+            sd_flags, self->managedsait);
+}
+
+/* Start a search with the prepared parameters and server controls of an
+   LDAPSearchPlan, only the filter is converted. */
+static PyObject *
+ldapconnection_searchprepared(LDAPConnection *self, PyObject *args) {
+    int rc = 0;
+    int msgid = -1;
+    Py_ssize_t len = 0;
+    char *filterstr = NULL;
+    LDAPSearchPlan *plan = NULL;
+    ldapsearchparams *params = NULL;
+
+    DEBUG("ldapconnection_searchprepared (self:%p, args:%p)", self, args);
+    if (LDAPConnection_IsClosed(self) != 0) return NULL;
+
+    if (!PyArg_ParseTuple(args, "O!z#", &LDAPSearchPlanType, &plan,
+            &filterstr, &len)) {
+        return NULL;
+    }
+    /* Empty filter string is the same as no filter. */
+    if (len == 0) filterstr = NULL;
+    params = plan->params;
+
+    rc = ldap_search_ext(self->ld, params->base, params->scope, filterstr,
+            params->attrs, params->attrsonly, plan->server_ctrls, NULL,
+            plan->has_timeout ? &(plan->timeout) : NULL, params->sizelimit,
+            &msgid);
+    if (rc != LDAP_SUCCESS) {
+        set_exception(self->ld, rc);
+        return NULL;
+    }
+
+    if (add_to_pending_ops(self->pending_ops, msgid, Py_None) != 0) {
+        return NULL;
+    }
+    record_pending_op(self->op_info, self->pending_ops, msgid, "search",
+            params->base, params->scope, filterstr);
+
     return PyLong_FromLong((long int)msgid);
 }
 
@@ -722,6 +915,8 @@ ldapconnection_whoami(LDAPConnection *self) {
     if (add_to_pending_ops(self->pending_ops, msgid, oid) != 0) {
         return NULL;
     }
+    record_pending_op(self->op_info, self->pending_ops, msgid, "whoami", NULL,
+            -1, NULL);
 
     return PyLong_FromLong((long int)msgid);
 }
@@ -813,6 +1008,8 @@ ldapconnection_modpasswd(LDAPConnection *self, PyObject *args, PyObject *kwds) {
     if (add_to_pending_ops(self->pending_ops, msgid, oid) != 0) {
        return NULL;
     }
+    record_pending_op(self->op_info, self->pending_ops, msgid,
+            "modify_password", user.bv_val, -1, NULL);
 
     return PyLong_FromLong((long int)msgid);
 }
@@ -882,7 +1079,11 @@ parse_search_result(LDAPConnection *self, LDAPMessage *res, PyObject *obj) {
 
     DEBUG("parse_search_result (self:%p, res:%p, obj:%p)", self, res, obj);
 
-    if (obj != Py_None) search_iter = (LDAPSearchIter *)obj;
+    if (obj != Py_None) {
+        search_iter = (LDAPSearchIter *)obj;
+        /* The requested page is received. */
+        search_iter->msgid = -1;
+    }
     buffer = PyList_New(0);
     if (buffer == NULL) return PyErr_NoMemory();
 
@@ -1124,12 +1325,118 @@ parse_extended_result(LDAPConnection *self, LDAPMessage *res, PyObject *oid) {
     return retval;
 }
 
+/* Process one message of a streamed search. Returns a (type, object,
+   controls) tuple, where the controls are the list of the server
+   controls that are attached to the message. */
+static PyObject *
+parse_stream_message(LDAPConnection *self, LDAPMessage *res, int msgtype,
+        int msgid) {
+    int rc = -1;
+    int err = 0;
+    char *type = NULL;
+    char **referrals = NULL;
+    LDAPControl **ctrls = NULL;
+    PyObject *obj = NULL;
+    PyObject *ctrl_list = NULL;
+    PyObject *retval = NULL;
+#ifndef WIN32
+    char *retoid = NULL;
+    struct berval *retdata = NULL;
+#endif
+
+    DEBUG("parse_stream_message (self:%p, res:%p, msgtype:%d, msgid:%d)",
+        self, res, msgtype, msgid);
+    switch (msgtype) {
+    case LDAP_RES_SEARCH_ENTRY:
+        type = "entry";
+#ifndef WIN32
+        rc = ldap_get_entry_controls(self->ld, res, &ctrls);
+        if (rc != LDAP_SUCCESS) {
+            set_exception(self->ld, rc);
+            goto end;
+        }
+#endif
+        obj = (PyObject *)LDAPEntry_FromLDAPMessage(res, self);
+        break;
+    case LDAP_RES_SEARCH_REFERENCE:
+        type = "reference";
+        rc = ldap_parse_reference(self->ld, res, &referrals, &ctrls, 0);
+        if (rc != LDAP_SUCCESS) {
+            set_exception(self->ld, rc);
+            goto end;
+        }
+        if (referrals != NULL) {
+            obj = create_reference_object(self, referrals);
+            free(referrals);
+        } else {
+            obj = Py_None;
+            Py_INCREF(obj);
+        }
+        break;
+#ifndef WIN32
+    case LDAP_RES_INTERMEDIATE:
+        type = "intermediate";
+        rc = ldap_parse_intermediate(self->ld, res, &retoid, &retdata, &ctrls,
+                0);
+        if (rc != LDAP_SUCCESS) {
+            set_exception(self->ld, rc);
+            goto end;
+        }
+        /* Create (oid, value) tuple. */
+        if (retdata != NULL) {
+            obj = Py_BuildValue("(zy#)", retoid, retdata->bv_val,
+                    (Py_ssize_t)retdata->bv_len);
+            ber_bvfree(retdata);
+        } else {
+            obj = Py_BuildValue("(zO)", retoid, Py_None);
+        }
+        ldap_memfree(retoid);
+        break;
+#endif
+    case LDAP_RES_SEARCH_RESULT:
+        type = "result";
+        /* The search is finished, the message is freed by the parsing. */
+        rc = ldap_parse_result(self->ld, res, &err, NULL, NULL, NULL, &ctrls, 1);
+        res = NULL;
+        if (del_from_pending_ops(self->pending_ops, msgid) != 0) goto end;
+        if (rc != LDAP_SUCCESS) {
+            set_exception(self->ld, rc);
+            goto end;
+        }
+        if (err != LDAP_SUCCESS && err != LDAP_NO_SUCH_OBJECT
+                && err != LDAP_PARTIAL_RESULTS && err != LDAP_REFERRAL) {
+            set_exception(self->ld, err);
+            goto end;
+        }
+        obj = Py_None;
+        Py_INCREF(obj);
+        break;
+    default:
+        /* Skip any other message. */
+        ldap_msgfree(res);
+        Py_RETURN_NONE;
+    }
+    if (obj == NULL) goto end;
+
+    ctrl_list = LDAPControlList2PyList(ctrls);
+    if (ctrl_list == NULL) goto end;
+
+    retval = Py_BuildValue("(sOO)", type, obj, ctrl_list);
+    Py_DECREF(ctrl_list);
+end:
+    Py_XDECREF(obj);
+    if (ctrls != NULL) ldap_controls_free(ctrls);
+    if (res != NULL) ldap_msgfree(res);
+    return retval;
+}
+
 /* Poll and process the result of an ongoing asynchronous LDAP operation. */
 PyObject *
 LDAPConnection_Result(LDAPConnection *self, int msgid, int millisec) {
     int rc = -1;
     int err = 0;
     int ppres = 0;
+    int all = LDAP_MSG_ALL;
     unsigned int pperr = 0;
     LDAPMessage *res;
     LDAPControl **returned_ctrls = NULL;
@@ -1174,6 +1481,9 @@ LDAPConnection_Result(LDAPConnection *self, int msgid, int millisec) {
         }
     }
 
+    /* The messages of a streamed search are returned one by one. */
+    if (obj == Py_True) all = LDAP_MSG_ONE;
+
     if (millisec >= 0) {
         timeout.tv_sec = millisec / 1000;
         timeout.tv_usec = (millisec % 1000) * 1000;
@@ -1182,18 +1492,28 @@ LDAPConnection_Result(LDAPConnection *self, int msgid, int millisec) {
         timeout.tv_usec = 0L;
     }
 
-    if (self->async == 0) {
-        /* The ldap_result will block, and wait for server response or timeout. */
-        Py_BEGIN_ALLOW_THREADS
-        if (millisec >= 0) {
-            rc = ldap_result(self->ld, msgid, LDAP_MSG_ALL, &timeout, &res);
-        } else {
-            /* Wait until response or global timeout. */
-            rc = ldap_result(self->ld, msgid, LDAP_MSG_ALL, NULL, &res);
-        }
-        Py_END_ALLOW_THREADS
+    /* The ldap_result can block: synchronous connections wait for the
+       server's response, and reading a partially received message blocks
+       for asynchronous connections too, therefore release the GIL. */
+    Py_BEGIN_ALLOW_THREADS
+    if (self->async == 0 && millisec < 0) {
+        /* Wait until response or global timeout. */
+        rc = ldap_result(self->ld, msgid, all, NULL, &res);
     } else {
-        rc = ldap_result(self->ld, msgid, LDAP_MSG_ALL, &timeout, &res);
+        rc = ldap_result(self->ld, msgid, all, &timeout, &res);
+    }
+    Py_END_ALLOW_THREADS
+
+    if (rc > 0 && obj == Py_True) {
+        return parse_stream_message(self, res, rc, msgid);
+    }
+
+    if (all == LDAP_MSG_ALL && (rc == LDAP_RES_SEARCH_ENTRY
+            || rc == LDAP_RES_SEARCH_REFERENCE)) {
+        /* The complete search result is already queued by an earlier call
+           for another message ID, then the type of the chain's first
+           message is returned. */
+        rc = LDAP_RES_SEARCH_RESULT;
     }
 
     switch (rc) {
@@ -1205,15 +1525,7 @@ LDAPConnection_Result(LDAPConnection *self, int msgid, int millisec) {
     case 0:
         /* Timeout exceeded.*/
         if (self->async == 0) {
-            /* Set TimeoutError. */
-            set_exception(self->ld, -5);
-            /* Abandon the operation on the server. */
-            rc = ldap_abandon_ext(self->ld, msgid, NULL, NULL);
-            if (rc != LDAP_SUCCESS) {
-                set_exception(self->ld, rc);
-            }
-            
-            if (obj != Py_None && !PyUnicode_Check(obj)) {
+            if (PyObject_IsInstance(obj, (PyObject *)&LDAPModListType)) {
                 mods = (LDAPModList *)obj;
                 /* LDAP add or modify operation is failed,
                    then rollback the changes. */
@@ -1222,8 +1534,17 @@ LDAPConnection_Result(LDAPConnection *self, int msgid, int millisec) {
                 }
             }
             /* Remove operations from pending_ops. */
-            del_from_pending_ops(self->pending_ops, msgid);
-
+            if (del_from_pending_ops(self->pending_ops, msgid) != 0) {
+                return NULL;
+            }
+            /* Abandon the operation on the server. */
+            rc = ldap_abandon_ext(self->ld, msgid, NULL, NULL);
+            if (rc != LDAP_SUCCESS) {
+                set_exception(self->ld, rc);
+            } else {
+                /* Set TimeoutError. */
+                set_exception(self->ld, -5);
+            }
             return NULL;
         }
         break;
@@ -1251,6 +1572,10 @@ LDAPConnection_Result(LDAPConnection *self, int msgid, int millisec) {
         /* Rename an LDAP entry. */
         rc = ldap_parse_result(self->ld, res, &err, NULL, NULL, NULL, NULL, 1);
         if (rc != LDAP_SUCCESS || err != LDAP_SUCCESS) {
+           /* The operation is finished, remove it from pending_ops. */
+           if (del_from_pending_ops(self->pending_ops, msgid) != 0) {
+               return NULL;
+           }
            set_exception(self->ld, err);
            return NULL;
         }
@@ -1280,10 +1605,16 @@ LDAPConnection_Result(LDAPConnection *self, int msgid, int millisec) {
         }
 
         if (rc != LDAP_SUCCESS || err != LDAP_SUCCESS) {
-            mods = (LDAPModList *)obj;
-            /* LDAP add or modify operation is failed,
-               then rollback the changes. */
-            if (LDAPEntry_Rollback((LDAPEntry *)mods->entry, mods) != 0) {
+            if (PyObject_IsInstance(obj, (PyObject *)&LDAPModListType)) {
+                mods = (LDAPModList *)obj;
+                /* LDAP add or modify operation is failed,
+                   then rollback the changes. */
+                if (LDAPEntry_Rollback((LDAPEntry *)mods->entry, mods) != 0) {
+                    return NULL;
+                }
+            }
+            /* The operation is finished, remove it from pending_ops. */
+            if (del_from_pending_ops(self->pending_ops, msgid) != 0) {
                 return NULL;
             }
             /* Set Python error. */
@@ -1346,6 +1677,8 @@ static PyObject *
 ldapconnection_abandon(LDAPConnection *self, PyObject *args) {
     int msgid = -1;
     int rc = 0;
+    PyObject *obj = NULL;
+    LDAPModList *mods = NULL;
 
     if (!PyArg_ParseTuple(args, "i", &msgid)) {
         return NULL;
@@ -1359,6 +1692,19 @@ ldapconnection_abandon(LDAPConnection *self, PyObject *args) {
         return NULL;
     }
 
+    obj = get_from_pending_ops(self->pending_ops, msgid);
+    /* The operation might be already finished. */
+    if (obj == NULL) Py_RETURN_NONE;
+
+    if (PyObject_IsInstance(obj, (PyObject *)&LDAPModListType)) {
+        mods = (LDAPModList *)obj;
+        /* The LDAP add or modify operation is abandoned,
+           then rollback the changes. */
+        if (LDAPEntry_Rollback((LDAPEntry *)mods->entry, mods) != 0) {
+            return NULL;
+        }
+    }
+
     /* Remove message id from the pending_ops. */
     if (del_from_pending_ops(self->pending_ops, msgid) != 0) {
         return NULL;
@@ -1367,6 +1713,41 @@ ldapconnection_abandon(LDAPConnection *self, PyObject *args) {
     Py_RETURN_NONE;
 }
 
+/* Get the details of the pending operations as a dict of msgid keys and
+   (kind, dn, started, scope, filter) tuple values. The records of the
+   finished operations are removed. */
+static PyObject *
+ldapconnection_get_operations(LDAPConnection *self) {
+    Py_ssize_t pos = 0;
+    PyObject *key = NULL;
+    PyObject *value = NULL;
+    PyObject *result = NULL;
+    PyObject *finished = NULL;
+
+    DEBUG("ldapconnection_get_operations (self:%p)", self);
+    result = PyDict_New();
+    finished = PyList_New(0);
+    if (result == NULL || finished == NULL) goto error;
+
+    while (PyDict_Next(self->op_info, &pos, &key, &value)) {
+        if (PyDict_GetItem(self->pending_ops, key) != NULL) {
+            if (PyDict_SetItem(result, key, value) != 0) goto error;
+        } else if (PyList_Append(finished, key) != 0) {
+            goto error;
+        }
+    }
+    for (pos = 0; pos < PyList_GET_SIZE(finished); pos++) {
+        if (PyDict_DelItem(self->op_info,
+                PyList_GET_ITEM(finished, pos)) != 0) goto error;
+    }
+    Py_DECREF(finished);
+    return result;
+error:
+    Py_XDECREF(result);
+    Py_XDECREF(finished);
+    return NULL;
+}
+
 /* Get the underlying socket descriptor of the LDAP connection. */
 static PyObject *
 ldapconnection_fileno(LDAPConnection *self) {
@@ -1394,10 +1775,14 @@ static PyMemberDef ldapconnection_members[] = {
      "Asynchronous connection"},
     {"closed", T_BOOL, offsetof(LDAPConnection, closed), READONLY,
      "Connection is closed"},
+    {"_connect_times", T_OBJECT, offsetof(LDAPConnection, connect_times),
+     READONLY, "Durations of the connection's init, TLS and bind phases"},
     {NULL}  /* Sentinel */
 };
 
 static PyMethodDef ldapconnection_methods[] = {
+    {"_get_operations", (PyCFunction)ldapconnection_get_operations, METH_NOARGS,
+            "Get the details of the pending operations."},
     {"abandon", (PyCFunction)ldapconnection_abandon, METH_VARARGS,
             "Abandon ongoing operation associated with the given message id." },
     {"add", (PyCFunction)ldapconnection_add, METH_VARARGS,
@@ -1414,8 +1799,12 @@ static PyMethodDef ldapconnection_methods[] = {
             "Open connection with the LDAP Server."},
     {"modify_password", (PyCFunction)ldapconnection_modpasswd, METH_VARARGS | METH_KEYWORDS,
             "Modify password for the user."},
+    {"prepare_search", (PyCFunction)ldapconnection_preparesearch, METH_VARARGS,
+            "Create the parameters and the server controls of a search once."},
     {"search", (PyCFunction)ldapconnection_search, METH_VARARGS | METH_KEYWORDS,
             "Search for LDAP entries."},
+    {"search_prepared", (PyCFunction)ldapconnection_searchprepared, METH_VARARGS,
+            "Search for LDAP entries with the parameters of a prepared search."},
     {"whoami", (PyCFunction)ldapconnection_whoami, METH_NOARGS,
             "LDAPv3 Who Am I operation."},
     {NULL, NULL, 0, NULL}  /* Sentinel */
@@ -12,6 +12,8 @@ typedef struct {
     PyObject_HEAD
     PyObject *client;
     PyObject *pending_ops;
+    PyObject *op_info;
+    PyObject *connect_times;
     LDAP *ld;
     char closed;
     char async;
@@ -26,5 +28,6 @@ extern PyTypeObject LDAPConnectionType;
 
 int LDAPConnection_IsClosed(LDAPConnection *self);
 int LDAPConnection_Searching(LDAPConnection *self, ldapsearchparams *params, PyObject *iterator);
+PyObject *LDAPConnection_Result(LDAPConnection *self, int msgid, int millisec);
 
 #endif /* LDAPCONNECTION_H_ */
@@ -172,17 +172,16 @@ binding(LDAPConnectIter *self) {
         self->state = 4;
         Py_RETURN_NONE;
     } else {
-        if (self->conn->async == 0) {
+        Py_BEGIN_ALLOW_THREADS
+        if (self->conn->async == 0 && self->timeout == -1) {
             /* Block until the server response. */
-            if (self->timeout == -1) {
-                rc = ldap_result(self->conn->ld, self->message_id, LDAP_MSG_ALL, NULL, &res);
-            } else {
-                rc = ldap_result(self->conn->ld, self->message_id, LDAP_MSG_ALL, &polltime, &res);
-            }
+            rc = ldap_result(self->conn->ld, self->message_id, LDAP_MSG_ALL, NULL, &res);
         } else {
-            /* Binding is already in progress, poll result from the server. */
+            /* Wait until the timeout, or poll the result of the binding that
+               is already in progress for asynchronous connections. */
             rc = ldap_result(self->conn->ld, self->message_id, LDAP_MSG_ALL, &polltime, &res);
         }
+        Py_END_ALLOW_THREADS
         switch (rc) {
         case -1:
             /* Error occurred during the operation. */
@@ -437,6 +436,8 @@ ldapconnectiter_new(PyTypeObject *type, PyObject *args, PyObject *kwds) {
         self->init_thread = 0;
         self->timeout = -1;
         self->tls = 0;
+        self->phase_start = -1.0;
+        self->phase_times[0] = self->phase_times[1] = self->phase_times[2] = 0.0;
     }
 
     Py_DECREF(ts_empty_tuple);
@@ -533,11 +534,34 @@ LDAPConnectIter_New(LDAPConnection *conn, ldap_conndata_t *info, SOCKET sock) {
                 != 0) return NULL;
 
         self->timeout = -1;
+        self->phase_start = monotonic_time();
     }
 
     return self;
 }
 
+/* Finish the current phase of the connection process, and store its
+   duration at the given index. */
+static void
+finish_phase(LDAPConnectIter *self, int index) {
+    double now = monotonic_time();
+
+    if (now < 0 || self->phase_start < 0) return;
+    self->phase_times[index] = now - self->phase_start;
+    self->phase_start = now;
+}
+
+/* Store the durations of the phases in the LDAPConnection object. */
+static void
+set_connect_times(LDAPConnectIter *self) {
+    PyObject *tmp = self->conn->connect_times;
+
+    self->conn->connect_times = Py_BuildValue("(ddd)", self->phase_times[0],
+            self->phase_times[1], self->phase_times[2]);
+    if (self->conn->connect_times == NULL) PyErr_Clear();
+    Py_XDECREF(tmp);
+}
+
 /* Step the connection process into the next stage. */
 PyObject *
 LDAPConnectIter_Next(LDAPConnectIter *self, int timeout) {
@@ -564,6 +588,7 @@ LDAPConnectIter_Next(LDAPConnectIter *self, int timeout) {
         if (rc == 1) {
             /* Initialisation is finished. */
             self->state = 1;
+            finish_phase(self, 0);
             if (self->conn->csock != -1) {
                 /* Read and drop the data from the dummy socket. */
                 if (recv(self->conn->csock, buff, 1, 0) == -1) return NULL;
@@ -589,6 +614,7 @@ LDAPConnectIter_Next(LDAPConnectIter *self, int timeout) {
         } else {
             /* TLS connection is not needed. */
             self->state = 3;
+            finish_phase(self, 1);
         }
     }
 
@@ -599,6 +625,7 @@ LDAPConnectIter_Next(LDAPConnectIter *self, int timeout) {
         if (rc == -1) return NULL;
         if (rc == 1) {
             self->state = 3;
+            finish_phase(self, 1);
         }
     }
 
@@ -606,7 +633,12 @@ LDAPConnectIter_Next(LDAPConnectIter *self, int timeout) {
     if (self->state > 2) {
         val = binding(self);
         if (val == NULL) return NULL; /* It is an error. */
-        if (val != Py_None) return val;
+        if (val != Py_None) {
+            /* The binding is finished. */
+            finish_phase(self, 2);
+            set_connect_times(self);
+            return val;
+        }
         Py_DECREF(val);
     }
 
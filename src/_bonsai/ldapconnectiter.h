@@ -35,6 +35,10 @@ typedef struct {
 #endif
     void *init_thread_data;
     int timeout;
+    /* The start time of the current phase, and the durations of the
+       initialisation, the TLS negotiation and the binding phases. */
+    double phase_start;
+    double phase_times[3];
 } LDAPConnectIter;
 
 extern PyTypeObject LDAPConnectIterType;
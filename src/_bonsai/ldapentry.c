@@ -387,7 +387,6 @@ LDAPEntry_AddOrModify(LDAPEntry *self, int mod) {
     }
 
     /* Clear the mess. */
-    free(dnstr);
     if (ppolicy_ctrl != NULL) ldap_control_free(ppolicy_ctrl);
     if (mdi_ctrl != NULL) _ldap_control_free(mdi_ctrl);
     free(server_ctrls);
@@ -395,14 +394,19 @@ LDAPEntry_AddOrModify(LDAPEntry *self, int mod) {
     if (rc != LDAP_SUCCESS) {
         set_exception(self->conn->ld, rc);
         Py_DECREF(mods);
+        free(dnstr);
         return NULL;
     }
     /* Add new add or modify operation to the pending_ops with mod_dict. */
     if (add_to_pending_ops(self->conn->pending_ops, msgid,
             (PyObject *)mods) != 0) {
         Py_DECREF(mods);
+        free(dnstr);
         return NULL;
     }
+    record_pending_op(self->conn->op_info, self->conn->pending_ops, msgid,
+            mod == 0 ? "add" : "modify", dnstr, -1, NULL);
+    free(dnstr);
 
 
     return PyLong_FromLong((long int)msgid);
@@ -610,10 +614,10 @@ ldapentry_rename(LDAPEntry *self, PyObject *args, PyObject *kwds) {
     rc = ldap_rename(self->conn->ld, olddn_str, newrdn_str, newparent_str,
         PyObject_IsTrue(deleteold), NULL, NULL, &msgid);
     /* Clean up strings. */
-    free(olddn_str);
     free(newrdn_str);
     free(newparent_str);
     if (rc != LDAP_SUCCESS) {
+        free(olddn_str);
         set_exception(self->conn->ld, rc);
         return NULL;
     }
@@ -622,11 +626,18 @@ ldapentry_rename(LDAPEntry *self, PyObject *args, PyObject *kwds) {
        with a tuple of the entry and the new DN. */
     tmp = Py_BuildValue("(O,O)", (PyObject *)self, new_ldapdn);
     Py_DECREF(new_ldapdn);
-    if (tmp == NULL) return NULL;
+    if (tmp == NULL) {
+        free(olddn_str);
+        return NULL;
+    }
     if (add_to_pending_ops(self->conn->pending_ops, msgid, tmp) != 0) {
+        free(olddn_str);
         Py_DECREF(tmp);
         return NULL;
     }
+    record_pending_op(self->conn->op_info, self->conn->pending_ops, msgid,
+            "rename", olddn_str, -1, NULL);
+    free(olddn_str);
 
     return PyLong_FromLong((long int)msgid);
 }
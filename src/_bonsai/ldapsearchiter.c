@@ -1,10 +1,80 @@
 #include "ldapsearchiter.h"
 #include "ldapconnection.h"
 
+/* Free the cookie of the paged LDAP search. */
+static void
+free_cookie(LDAPSearchIter *self) {
+    if (self->cookie != NULL) {
+        if (self->cookie->bv_val != NULL) {
+            ber_bvfree(self->cookie);
+        } else {
+            free(self->cookie);
+        }
+        self->cookie = NULL;
+    }
+}
+
+/* Release the server-side resources of an unfinished search: abandon the
+   requested page that is not received yet, or send a page request with
+   zero size and the current cookie to discard the paged result set. */
+static int
+release_search(LDAPSearchIter *self) {
+    int msgid = -1;
+    PyObject *res = NULL;
+
+    DEBUG("release_search (self:%p) msgid:%d", self, self->msgid);
+    if (self->conn == NULL || self->conn->closed) goto end;
+
+    if (self->msgid >= 0) {
+        if (get_from_pending_ops(self->conn->pending_ops,
+                self->msgid) == (PyObject *)self) {
+            res = PyObject_CallMethod((PyObject *)self->conn, "abandon", "(i)",
+                    self->msgid);
+            if (res == NULL) return -1;
+            Py_DECREF(res);
+        }
+        goto end;
+    }
+
+    if (self->cookie == NULL || self->cookie->bv_val == NULL
+            || self->cookie->bv_len == 0) goto end;
+
+    self->page_size = 0;
+    msgid = LDAPConnection_Searching(self->conn, NULL, (PyObject *)self);
+    if (msgid < 0) return -1;
+    /* The pending_ops holds a reference until the result is processed. */
+    Py_INCREF(self);
+    /* The release might run in a finalizer that must not block, therefore
+       the reply is not waited for. The request is already sent, the
+       abandon only makes the client library discard the response. */
+    res = PyObject_CallMethod((PyObject *)self->conn, "abandon", "(i)", msgid);
+    if (res == NULL) return -1;
+    Py_DECREF(res);
+end:
+    self->msgid = -1;
+    free_cookie(self);
+    return 0;
+}
+
+/* Release the search before the LDAPSearchIter object is destroyed. */
+static void
+ldapsearchiter_finalize(LDAPSearchIter *self) {
+    PyObject *type, *value, *traceback;
+
+    DEBUG("ldapsearchiter_finalize (self:%p)", self);
+    PyErr_Fetch(&type, &value, &traceback);
+    if (release_search(self) != 0) PyErr_Clear();
+    PyErr_Restore(type, value, traceback);
+}
+
 /* Dealloc the LDAPSearchIter object. */
 static void
 ldapsearchiter_dealloc(LDAPSearchIter* self) {
     DEBUG("ldapsearchiter_dealloc (self:%p)", self);
+    if (PyObject_CallFinalizerFromDealloc((PyObject *)self) < 0) {
+        /* The object is resurrected. */
+        return;
+    }
     PyObject_GC_UnTrack(self);
     Py_XDECREF(self->buffer);
     Py_XDECREF(self->conn);
@@ -19,13 +89,7 @@ ldapsearchiter_dealloc(LDAPSearchIter* self) {
         }
         free(self->vlv_info);
     }
-    if (self->cookie != NULL) {
-        if (self->cookie->bv_val != NULL) {
-            ber_bvfree(self->cookie);
-        } else {
-            free(self->cookie);
-        }
-    }
+    free_cookie(self);
     Py_TYPE(self)->tp_free((PyObject*)self);
 }
 
@@ -57,6 +121,7 @@ ldapsearchiter_new(PyTypeObject *type, PyObject *args, PyObject *kwds) {
         self->buffer = NULL;
         self->cookie = NULL;
         self->page_size = 0;
+        self->msgid = -1;
         self->params = NULL;
         self->vlv_info = NULL;
         self->auto_acquire = 0;
@@ -201,9 +266,37 @@ static PySequenceMethods ldapsearchiter_sequence = {
     0,                          /* sq_inplace_repeat */
 };
 
+/* Get the cookie of the next page of a paged LDAP search. */
+static PyObject *
+ldapsearchiter_getcookie(LDAPSearchIter *self, void *closure) {
+    if (self->cookie == NULL || self->cookie->bv_val == NULL
+            || self->cookie->bv_len == 0) {
+        Py_RETURN_NONE;
+    }
+    return PyBytes_FromStringAndSize(self->cookie->bv_val,
+            (Py_ssize_t)self->cookie->bv_len);
+}
+
+static PyGetSetDef ldapsearchiter_getsetters[] = {
+    {"cookie", (getter)ldapsearchiter_getcookie, NULL,
+            "Cookie of the next page of a paged LDAP search.", NULL},
+    {NULL}  /* Sentinel */
+};
+
+/* Stop the search and release its resources on the server. */
+static PyObject *
+ldapsearchiter_close(LDAPSearchIter *self) {
+    DEBUG("ldapsearchiter_close (self:%p)", self);
+    if (release_search(self) != 0) return NULL;
+    Py_CLEAR(self->buffer);
+    Py_RETURN_NONE;
+}
+
 static PyMethodDef ldapsearchiter_methods[] = {
     {"acquire_next_page", (PyCFunction)ldapsearchiter_acquirenextpage,
             METH_NOARGS, "Get next page of paged LDAP search."},
+    {"close", (PyCFunction)ldapsearchiter_close, METH_NOARGS,
+            "Stop the search and release its resources on the server."},
     {NULL, NULL, 0, NULL}  /* Sentinel */
 };
 
@@ -239,7 +332,7 @@ PyTypeObject LDAPSearchIterType = {
     (iternextfunc)ldapsearchiter_iternext,/* tp_iternext */
     ldapsearchiter_methods,    /* tp_methods */
     0,                         /* tp_members */
-    0,                         /* tp_getset */
+    ldapsearchiter_getsetters, /* tp_getset */
     0,                         /* tp_base */
     0,                         /* tp_dict */
     0,                         /* tp_descr_get */
@@ -248,4 +341,14 @@ PyTypeObject LDAPSearchIterType = {
     0,                         /* tp_init */
     0,                         /* tp_alloc */
     ldapsearchiter_new,        /* tp_new */
+    0,                         /* tp_free */
+    0,                         /* tp_is_gc */
+    0,                         /* tp_bases */
+    0,                         /* tp_mro */
+    0,                         /* tp_cache */
+    0,                         /* tp_subclasses */
+    0,                         /* tp_weaklist */
+    0,                         /* tp_del */
+    0,                         /* tp_version_tag */
+    (destructor)ldapsearchiter_finalize, /* tp_finalize */
 };
@@ -14,6 +14,7 @@ typedef struct {
     ldapsearchparams *params;
     struct berval *cookie;
     int page_size;
+    int msgid;
     LDAPVLVInfo *vlv_info;
     char auto_acquire;
 } LDAPSearchIter;
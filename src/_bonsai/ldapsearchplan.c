@@ -0,0 +1,148 @@
+#include "ldapsearchplan.h"
+
+/*  Dealloc the LDAPSearchPlan object. */
+static void
+ldapsearchplan_dealloc(LDAPSearchPlan *self) {
+    DEBUG("ldapsearchplan_dealloc (self:%p)", self);
+    if (self->sort_ctrl != NULL) ldap_control_free(self->sort_ctrl);
+    if (self->edn_ctrl != NULL) _ldap_control_free(self->edn_ctrl);
+    if (self->sd_ctrl != NULL) _ldap_control_free(self->sd_ctrl);
+    if (self->mdi_ctrl != NULL) _ldap_control_free(self->mdi_ctrl);
+    /* The list only refers to the controls above. */
+    free(self->server_ctrls);
+    if (self->params != NULL) {
+        free_search_params(self->params);
+        free(self->params);
+    }
+    Py_TYPE(self)->tp_free((PyObject*)self);
+}
+
+/*  Create a new LDAPSearchPlan object. */
+static PyObject *
+ldapsearchplan_new(PyTypeObject *type, PyObject *args, PyObject *kwds) {
+    LDAPSearchPlan *self = NULL;
+
+    self = (LDAPSearchPlan *)type->tp_alloc(type, 0);
+    if (self != NULL) {
+        self->params = NULL;
+        self->server_ctrls = NULL;
+        self->sort_ctrl = NULL;
+        self->edn_ctrl = NULL;
+        self->sd_ctrl = NULL;
+        self->mdi_ctrl = NULL;
+        self->has_timeout = 0;
+    }
+
+    DEBUG("ldapsearchplan_new [self:%p]", self);
+    return (PyObject *)self;
+}
+
+/*  Create a new LDAPSearchPlan object for internal use, that takes the
+    ownership of the search `params` (without a filter) and creates the
+    server controls of the search in advance. */
+LDAPSearchPlan *
+LDAPSearchPlan_New(LDAP *ld, ldapsearchparams *params, int extdn_format,
+        int sd_flags, int managedsait) {
+    int rc = 0;
+    int tout_ms = 0;
+    unsigned short num_of_ctrls = 0;
+    struct berval ctrl_null_value = {0, NULL};
+    LDAPSearchPlan *self = (LDAPSearchPlan *)LDAPSearchPlanType.tp_new(
+            &LDAPSearchPlanType, NULL, NULL);
+
+    DEBUG("LDAPSearchPlan_New (ld:%p, params:%p)", ld, params);
+    if (self == NULL) {
+        free_search_params(params);
+        free(params);
+        return NULL;
+    }
+    self->params = params;
+
+    self->server_ctrls = (LDAPControl **)malloc(sizeof(LDAPControl *) * 5);
+    if (self->server_ctrls == NULL) goto nomem;
+
+    if (params->sort_list != NULL) {
+        rc = ldap_create_sort_control(ld, params->sort_list, 0,
+                &(self->sort_ctrl));
+        if (rc != LDAP_SUCCESS) goto error;
+        self->server_ctrls[num_of_ctrls++] = self->sort_ctrl;
+    }
+    if (extdn_format != -1) {
+        rc = _ldap_create_extended_dn_control(ld, extdn_format,
+                &(self->edn_ctrl));
+        if (rc != LDAP_SUCCESS) goto error;
+        self->server_ctrls[num_of_ctrls++] = self->edn_ctrl;
+    }
+    if (sd_flags != -1) {
+        rc = _ldap_create_sd_flags_control(ld, sd_flags, &(self->sd_ctrl));
+        if (rc != LDAP_SUCCESS) goto error;
+        self->server_ctrls[num_of_ctrls++] = self->sd_ctrl;
+    }
+    if (managedsait == 1) {
+        rc = ldap_control_create(LDAP_CONTROL_MANAGEDSAIT, 0,
+                &ctrl_null_value, 1, &(self->mdi_ctrl));
+        if (rc != LDAP_SUCCESS) goto error;
+        self->server_ctrls[num_of_ctrls++] = self->mdi_ctrl;
+    }
+    self->server_ctrls[num_of_ctrls] = NULL;
+    if (num_of_ctrls == 0) {
+        free(self->server_ctrls);
+        self->server_ctrls = NULL;
+    }
+
+    tout_ms = (int)(params->timeout * 1000);
+    if (tout_ms > 0) {
+        self->timeout.tv_sec = tout_ms / 1000;
+        self->timeout.tv_usec = (tout_ms % 1000) * 1000;
+        self->has_timeout = 1;
+    }
+    return self;
+nomem:
+    Py_DECREF(self);
+    return (LDAPSearchPlan *)PyErr_NoMemory();
+error:
+    Py_DECREF(self);
+    PyErr_BadInternalCall();
+    return NULL;
+}
+
+PyTypeObject LDAPSearchPlanType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "_bonsai.ldapsearchplan",       /* tp_name */
+    sizeof(LDAPSearchPlan),        /* tp_basicsize */
+    0,                         /* tp_itemsize */
+    (destructor)ldapsearchplan_dealloc, /* tp_dealloc */
+    0,                         /* tp_print */
+    0,                         /* tp_getattr */
+    0,                         /* tp_setattr */
+    0,                         /* tp_reserved */
+    0,                         /* tp_repr */
+    0,                         /* tp_as_number */
+    0,                         /* tp_as_sequence */
+    0,                         /* tp_as_mapping */
+    0,                         /* tp_hash  */
+    0,                         /* tp_call */
+    0,                         /* tp_str */
+    0,                         /* tp_getattro */
+    0,                         /* tp_setattro */
+    0,                         /* tp_as_buffer */
+    Py_TPFLAGS_DEFAULT,        /* tp_flags */
+    "Search parameters and server controls of a prepared search.", /* tp_doc */
+    0,                         /* tp_traverse */
+    0,                         /* tp_clear */
+    0,                         /* tp_richcompare */
+    0,                         /* tp_weaklistoffset */
+    0,                         /* tp_iter */
+    0,                         /* tp_iternext */
+    0,                         /* tp_methods */
+    0,                         /* tp_members */
+    0,                         /* tp_getset */
+    0,                         /* tp_base */
+    0,                         /* tp_dict */
+    0,                         /* tp_descr_get */
+    0,                         /* tp_descr_set */
+    0,                         /* tp_dictoffset */
+    0,                         /* tp_init */
+    0,                         /* tp_alloc */
+    ldapsearchplan_new,        /* tp_new */
+};
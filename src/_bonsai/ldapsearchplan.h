@@ -0,0 +1,27 @@
+#ifndef LDAPSEARCHPLAN_H_
+#define LDAPSEARCHPLAN_H_
+
+#define PY_SSIZE_T_CLEAN
+
+#include <Python.h>
+
+#include "utils.h"
+
+typedef struct {
+    PyObject_HEAD
+    ldapsearchparams *params;
+    LDAPControl **server_ctrls;
+    LDAPControl *sort_ctrl;
+    LDAPControl *edn_ctrl;
+    LDAPControl *sd_ctrl;
+    LDAPControl *mdi_ctrl;
+    struct timeval timeout;
+    int has_timeout;
+} LDAPSearchPlan;
+
+extern PyTypeObject LDAPSearchPlanType;
+
+LDAPSearchPlan *LDAPSearchPlan_New(LDAP *ld, ldapsearchparams *params,
+        int extdn_format, int sd_flags, int managedsait);
+
+#endif /* LDAPSEARCHPLAN_H_ */
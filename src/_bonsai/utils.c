@@ -219,6 +219,135 @@ PyList2StringList(PyObject *list) {
     return strlist;
 }
 
+/*  Create a null delimitered LDAPControl list from a Python list which
+    contains tuples of OID, criticality and value (bytes or None). */
+LDAPControl **
+PyList2LDAPControlList(PyObject *list) {
+    int i = 0;
+    int rc = 0;
+    char *oid = NULL;
+    char *value = NULL;
+    Py_ssize_t len = 0;
+    struct berval bval;
+    LDAPControl **ctrls;
+    PyObject *iter;
+    PyObject *item;
+    PyObject *tmp = NULL;
+
+    if (list == NULL || !PyList_Check(list)) return NULL;
+
+    ctrls = malloc(sizeof(LDAPControl*) * ((int)PyList_Size(list) + 1));
+    if (ctrls == NULL) return NULL;
+
+    iter = PyObject_GetIter(list);
+    if (iter == NULL) {
+        free(ctrls);
+        return NULL;
+    }
+
+    for (item = PyIter_Next(iter); item != NULL; item = PyIter_Next(iter)) {
+        /* Mark the end of the list first, it's important for error-handling. */
+        ctrls[i] = NULL;
+        if (!PyTuple_Check(item) || PyTuple_Size(item) != 3) goto error;
+
+        /* Get the OID and the value of the control from the tuple. */
+        oid = PyObject2char(PyTuple_GET_ITEM(item, 0));
+        if (oid == NULL) goto error;
+        tmp = PyTuple_GET_ITEM(item, 2);
+        if (tmp != Py_None) {
+            if (PyObject2char_withlength(tmp, &value, &len) != 0) {
+                free(oid);
+                goto error;
+            }
+            bval.bv_val = value;
+            bval.bv_len = len;
+        }
+
+        rc = ldap_control_create(oid, PyObject_IsTrue(PyTuple_GET_ITEM(item, 1)),
+                (tmp != Py_None) ? &bval : NULL, 1, &ctrls[i]);
+#ifndef WIN32
+        /* WinLDAP control keeps the OID, it's freed with the control. */
+        free(oid);
+#endif
+        free(value);
+        value = NULL;
+        if (rc != LDAP_SUCCESS) {
+#ifdef WIN32
+            free(oid);
+#endif
+            ctrls[i] = NULL;
+            goto error;
+        }
+        ctrls[++i] = NULL;
+
+        Py_DECREF(item);
+    }
+    Py_DECREF(iter);
+    ctrls[i] = NULL;
+    if (PyErr_Occurred()) {
+        free_control_list(ctrls);
+        return NULL;
+    }
+    return ctrls;
+error:
+    Py_DECREF(iter);
+    Py_XDECREF(item);
+    /* Free all successfully created controls. */
+    free_control_list(ctrls);
+    return NULL;
+}
+
+/* Free a null delimitered LDAPControl list created by PyList2LDAPControlList. */
+void
+free_control_list(LDAPControl **ctrls) {
+    int i = 0;
+
+    if (ctrls == NULL) return;
+    for (i = 0; ctrls[i] != NULL; i++) {
+#ifdef WIN32
+        free(ctrls[i]->ldctl_oid);
+#endif
+        _ldap_control_free(ctrls[i]);
+    }
+    free(ctrls);
+}
+
+/* Create a Python list of (OID, criticality, value) tuples from an
+   LDAPControl list. The value is None if the control has no value. */
+PyObject *
+LDAPControlList2PyList(LDAPControl **ctrls) {
+    int i = 0;
+    PyObject *list = NULL;
+    PyObject *value = NULL;
+    PyObject *tup = NULL;
+
+    list = PyList_New(0);
+    if (list == NULL || ctrls == NULL) return list;
+
+    for (i = 0; ctrls[i] != NULL; i++) {
+        if (ctrls[i]->ldctl_value.bv_val == NULL) {
+            value = Py_None;
+            Py_INCREF(value);
+        } else {
+            value = PyBytes_FromStringAndSize(ctrls[i]->ldctl_value.bv_val,
+                    ctrls[i]->ldctl_value.bv_len);
+            if (value == NULL) goto error;
+        }
+        tup = Py_BuildValue("(sNN)", ctrls[i]->ldctl_oid,
+                PyBool_FromLong(ctrls[i]->ldctl_iscritical), value);
+        if (tup == NULL) goto error;
+        if (PyList_Append(list, tup) != 0) {
+            Py_DECREF(tup);
+            goto error;
+        }
+        Py_DECREF(tup);
+    }
+    return list;
+error:
+    Py_DECREF(list);
+    return NULL;
+}
+
 /*  Create a null delimitered LDAPSortKey list from a Python list which
     contains tuples of attribute name aad reverse order. */
 LDAPSortKey **
@@ -461,6 +590,81 @@ del_from_pending_ops(PyObject *pending_ops, int msgid) {
     return 0;
 }
 
+/* Get the current time of the monotonic clock (time.monotonic) in seconds,
+ * or -1.0 if it is failed. */
+double
+monotonic_time(void) {
+    static PyObject *monotonic = NULL;
+    PyObject *now = NULL;
+    double retval = -1.0;
+
+    if (monotonic == NULL) {
+        monotonic = load_python_object("time", "monotonic");
+        if (monotonic == NULL) {
+            PyErr_Clear();
+            return -1.0;
+        }
+    }
+    now = PyObject_CallObject(monotonic, NULL);
+    if (now == NULL) {
+        PyErr_Clear();
+        return -1.0;
+    }
+    retval = PyFloat_AsDouble(now);
+    Py_DECREF(now);
+    return retval;
+}
+
+/* Record the kind, the DN, the (monotonic) start time, and for searches the
+ * scope and the filter of a pending LDAP operation in the `op_info`
+ * dictionary for introspection and tracing. The records of
+ * the finished operations are removed lazily, when the dictionary grows
+ * larger than the `pending_ops`. It is best effort, the failures are
+ * ignored, because the operation is already sent to the server. */
+void
+record_pending_op(PyObject *op_info, PyObject *pending_ops, int msgid,
+        const char *kind, const char *dn, int scope, const char *filter) {
+    double now = -1.0;
+    PyObject *key = NULL;
+    PyObject *scope_obj = NULL;
+    PyObject *item = NULL;
+    PyObject *keys = NULL;
+    Py_ssize_t i = 0;
+
+    if (op_info == NULL) return;
+    if (PyDict_Size(op_info) > 2 * PyDict_Size(pending_ops) + 64) {
+        /* Remove the records of the finished operations. */
+        keys = PyDict_Keys(op_info);
+        if (keys == NULL) goto end;
+        for (i = 0; i < PyList_GET_SIZE(keys); i++) {
+            key = PyList_GET_ITEM(keys, i);
+            if (PyDict_GetItem(pending_ops, key) != NULL) continue;
+            if (PyDict_DelItem(op_info, key) != 0) goto end;
+        }
+        key = NULL;
+    }
+    now = monotonic_time();
+    if (now < 0) goto end;
+    if (scope < 0) {
+        Py_INCREF(Py_None);
+        scope_obj = Py_None;
+    } else {
+        scope_obj = PyLong_FromLong((long int)scope);
+        if (scope_obj == NULL) goto end;
+    }
+    item = Py_BuildValue("(szdOz)", kind, dn, now, scope_obj, filter);
+    if (item == NULL) goto end;
+    key = PyLong_FromLong((long int)msgid);
+    if (key == NULL) goto end;
+    PyDict_SetItem(op_info, key, item);
+    Py_DECREF(key);
+end:
+    Py_XDECREF(keys);
+    Py_XDECREF(scope_obj);
+    Py_XDECREF(item);
+    if (PyErr_Occurred()) PyErr_Clear();
+}
+
 /* Get a socketpair in `tup` by calling socket.socketpair(). The socket
    descriptors are set to `csock` and `ssock` parameters respectively.
    If the function call is failed, it returns with -1. */
@@ -550,6 +754,7 @@ set_search_params(ldapsearchparams *params, char **attrs, int attrsonly,
     params->timeout = timeout;
 
     params->sort_list = sort_list;
+    params->server_ctrls = NULL;
 
     return 0;
 }
@@ -576,6 +781,8 @@ free_search_params(ldapsearchparams *params) {
             }
             free(params->sort_list);
         }
+        /* Free the additional server controls. */
+        free_control_list(params->server_ctrls);
     }
 }
 
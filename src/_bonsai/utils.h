@@ -16,6 +16,7 @@ typedef struct {
     int attrsonly;
     int sizelimit;
     LDAPSortKey **sort_list;
+    LDAPControl **server_ctrls;
 } ldapsearchparams;
 
 extern PyObject *LDAPDNObj;
@@ -38,6 +39,9 @@ char *PyObject2char(PyObject *obj);
 struct berval **PyList2BervalList(PyObject *list);
 char **PyList2StringList(PyObject *list);
 LDAPSortKey **PyList2LDAPSortKeyList(PyObject *list);
+LDAPControl **PyList2LDAPControlList(PyObject *list);
+void free_control_list(LDAPControl **ctrls);
+PyObject *LDAPControlList2PyList(LDAPControl **ctrls);
 int lower_case_match(PyObject *o1, PyObject *o2);
 PyObject *load_python_object(char *module_name, char *object_name);
 PyObject *get_error_by_code(int code);
@@ -45,6 +49,9 @@ void set_exception(LDAP *ld, int code);
 int add_to_pending_ops(PyObject *pending_ops, int msgid, PyObject *item);
 PyObject *get_from_pending_ops(PyObject *pending_ops, int msgid);
 int del_from_pending_ops(PyObject *pending_ops, int msgid);
+double monotonic_time(void);
+void record_pending_op(PyObject *op_info, PyObject *pending_ops, int msgid,
+        const char *kind, const char *dn, int scope, const char *filter);
 int get_socketpair(PyObject **tup, SOCKET *csock, SOCKET *ssock);
 void close_socketpair(PyObject *tup);
 int set_search_params(ldapsearchparams *params, char **attrs, int attrsonly,
@@ -1,9 +1,11 @@
 from .ldapdn import LDAPDN
 from .ldapurl import LDAPURL
+from .ldapchange import LDAPChange, LDAPChangeType
 from .ldapconnection import LDAPConnection
 from .ldapconnection import LDAPSearchScope
 from .ldapentry import LDAPEntry
 from .ldapentry import LDAPModOp
+from .ldapfilter import LDAPFilter
 from .ldapclient import LDAPClient
 from .ldapreference import LDAPReference
 from .ldapvaluelist import LDAPValueList
@@ -14,10 +16,13 @@ from .utils import *
 __version__ = "1.5.5"
 
 __all__ = [
+    "LDAPChange",
+    "LDAPChangeType",
     "LDAPClient",
     "LDAPConnection",
     "LDAPDN",
     "LDAPEntry",
+    "LDAPFilter",
     "LDAPModOp",
     "LDAPReference",
     "LDAPSearchScope",
@@ -30,6 +35,7 @@ __all__ = [
     "LDAPError",
     "InvalidDN",
     "ConnectionError",
+    "FilterError",
     "AuthenticationError",
     "AuthMethodNotSupported",
     "ObjectClassViolation",
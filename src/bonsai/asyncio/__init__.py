@@ -1,5 +1,7 @@
 from .aioconnection import AIOLDAPConnection
 from .aiopool import AIOConnectionPool
+from .aioloader import AIOEntryLoader
+from .aiocrawler import AIOCrawler
 
 
-__all__ = ["AIOLDAPConnection", "AIOConnectionPool"]
+__all__ = ["AIOLDAPConnection", "AIOConnectionPool", "AIOEntryLoader", "AIOCrawler"]
@@ -1,7 +1,7 @@
 import asyncio
 
 from ..ldapconnection import BaseLDAPConnection, LDAPSearchScope
-from ..errors import LDAPError, NotAllowedOnNonleaf
+from ..errors import LDAPError, NotAllowedOnNonleaf, NoSuchObjectError
 
 
 class AIOLDAPConnection(BaseLDAPConnection):
@@ -18,6 +18,8 @@ class AIOLDAPConnection(BaseLDAPConnection):
     def __init__(self, client, loop=None):
         self._loop = loop or asyncio.get_running_loop()
         self.__open_coro = None
+        self.__waiters = {}
+        self.__fileno = None
         super().__init__(client, is_async=True)
 
     async def __aenter__(self):
@@ -33,33 +35,53 @@ class AIOLDAPConnection(BaseLDAPConnection):
 
     __iter__ = __await__
 
-    def _ready(self, msg_id, fut):
-        self._loop.remove_reader(self.fileno())
-        self._loop.remove_writer(self.fileno())
-        try:
-            res = super().get_result(msg_id)
-            if res is not None:
-                fut.set_result(res)
-            else:
-                self._loop.add_reader(self.fileno(), self._ready, msg_id, fut)
-                self._loop.add_writer(self.fileno(), self._ready, msg_id, fut)
-        except LDAPError as exc:
-            fut.set_exception(exc)
+    def __watch(self):
+        self.__fileno = self.fileno()
+        self._loop.add_reader(self.__fileno, self._ready)
+        self._loop.add_writer(self.__fileno, self._ready)
+
+    def __unwatch(self):
+        if self.__fileno is not None and self.__fileno > -1:
+            self._loop.remove_reader(self.__fileno)
+            self._loop.remove_writer(self.__fileno)
+        self.__fileno = None
+
+    def _ready(self):
+        # Poll every operation in progress, the socket is shared between them.
+        self.__unwatch()
+        for msg_id, fut in list(self.__waiters.items()):
+            if fut.done():
+                del self.__waiters[msg_id]
+                continue
+            try:
+                res = super().get_result(msg_id)
+                if res is not None:
+                    del self.__waiters[msg_id]
+                    fut.set_result(res)
+            except LDAPError as exc:
+                del self.__waiters[msg_id]
+                fut.set_exception(exc)
+        if self.__waiters:
+            self.__watch()
 
     async def _poll(self, msg_id, timeout=None):
-        fut = asyncio.Future()
-        self._loop.add_reader(self.fileno(), self._ready, msg_id, fut)
-        self._loop.add_writer(self.fileno(), self._ready, msg_id, fut)
+        fut = self._loop.create_future()
+        self.__waiters[msg_id] = fut
+        if self.__fileno is None:
+            self.__watch()
         try:
             return await asyncio.wait_for(fut, timeout)
-        except Exception as exc:
-            if self.fileno() > -1:
-                self._loop.remove_reader(self.fileno())
-                self._loop.remove_writer(self.fileno())
-            raise exc
+        except BaseException:
+            self.__waiters.pop(msg_id, None)
+            if not self.__waiters:
+                self.__unwatch()
+            if not fut.done() or fut.cancelled():
+                # Timed out or cancelled, the operation is still in progress.
+                self._abandon_all((msg_id,))
+            raise
 
     def _evaluate(self, msg_id, timeout=None):
-        return self._poll(msg_id, timeout)
+        return self._poll(msg_id, self._watchdog_timeout(msg_id, timeout))
 
     def open(self, timeout=None):
         self.__open_coro = super().open(timeout)
@@ -79,6 +101,41 @@ class AIOLDAPConnection(BaseLDAPConnection):
             else:
                 raise exc
 
+    def _get_entries(self, dns, attrlist, timeout, max_pending, ordered):
+        if ordered:
+            return self._aiter_entries(dns, attrlist, timeout, max_pending)
+        return self.__iter_entries_completed(dns, attrlist, timeout, max_pending)
+
+    async def __get_entry(self, dname, msg_id, timeout):
+        try:
+            return dname, self._first_entry(await self._evaluate(msg_id, timeout))
+        except NoSuchObjectError:
+            return dname, None
+
+    async def __iter_entries_completed(self, dns, attrlist, timeout, max_pending):
+        pending = {}
+        try:
+            for dname in dns:
+                while len(pending) >= max_pending:
+                    done, _ = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        del pending[task]
+                        yield task.result()
+                msg_id = self._send_get_entry(dname, attrlist, timeout)
+                task = asyncio.ensure_future(self.__get_entry(dname, msg_id, timeout))
+                pending[task] = msg_id
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    del pending[task]
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            self._abandon_all(pending.values())
+
     async def _search_iter_anext(self, search_iter):
         try:
             return next(search_iter)
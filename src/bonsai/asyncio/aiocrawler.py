@@ -0,0 +1,132 @@
+import asyncio
+from typing import AsyncIterator, Iterable, List, Optional
+
+from ..crawl import Shard
+from ..ldapentry import LDAPEntry
+
+from .aiopool import AIOConnectionPool
+
+
+class AIOCrawler:
+    """
+    Parallel crawler of a partitioned subtree for asyncio. The shards are
+    searched concurrently with paged searches on the connections of an
+    :class:`AIOConnectionPool`, and the entries are merged into a single
+    stream in the order of their arrival. The crawler is an asynchronous
+    iterable of the entries, every iteration starts a new crawl. See
+    :class:`bonsai.crawl.Crawler` for the synchronous version.
+
+    :param AIOConnectionPool pool: the pool of the connections.
+    :param shards: the :class:`bonsai.crawl.Shard` objects of the crawl.
+    :param list attrlist: the list of the attributes of the entries.
+    :param int page_size: the size of the pages of the searches.
+    :param float timeout: time limit in seconds of waiting for the next \
+    message of a search.
+    :param bool dedup: skip the entries that are already returned by \
+    another shard (the shards might overlap).
+    :param int max_workers: the number of the concurrent searches, \
+    by default the maximal number of connections of the pool.
+    :param int buffer_size: the maximal number of entries that are \
+    received, but not processed yet.
+    :raises ValueError: if `page_size`, `max_workers` or `buffer_size` is \
+    not positive.
+    """
+
+    def __init__(
+        self,
+        pool: AIOConnectionPool,
+        shards: Iterable[Shard],
+        attrlist: Optional[List[str]] = None,
+        page_size: int = 500,
+        timeout: Optional[float] = None,
+        dedup: bool = True,
+        max_workers: Optional[int] = None,
+        buffer_size: int = 1000,
+    ) -> None:
+        if max_workers is None:
+            max_workers = pool.max_connection
+        for name, value in (
+            ("page_size", page_size),
+            ("max_workers", max_workers),
+            ("buffer_size", buffer_size),
+        ):
+            if not isinstance(value, int) or value < 1:
+                raise ValueError(f"The {name} must be a positive int.")
+        self.__pool = pool
+        self.__shards = list(shards)
+        self.__attrlist = attrlist
+        self.__page_size = page_size
+        self.__timeout = timeout
+        self.__dedup = dedup
+        self.__max_workers = max_workers
+        self.__buffer_size = buffer_size
+        self.__duplicates = 0
+
+    @property
+    def shards(self) -> List[Shard]:
+        """The list of the shards of the crawl."""
+        return self.__shards
+
+    @property
+    def duplicates(self) -> int:
+        """The number of the skipped duplicated entries of the last crawl."""
+        return self.__duplicates
+
+    async def __worker(self, shards: List[Shard], results: asyncio.Queue) -> None:
+        async with self.__pool.spawn() as conn:
+            while shards:
+                shard = shards.pop(0)
+                search = conn.resumable_paged_search(
+                    shard.base,
+                    shard.scope,
+                    shard.filter_exp,
+                    self.__attrlist,
+                    self.__timeout,
+                    self.__page_size,
+                )
+                try:
+                    async for entry in search:
+                        await results.put(entry)
+                finally:
+                    await search.close()
+
+    async def __crawl(self) -> AsyncIterator[LDAPEntry]:
+        shards = list(self.__shards)
+        results: asyncio.Queue = asyncio.Queue(self.__buffer_size)
+        num = min(self.__max_workers, len(shards))
+        workers = [
+            asyncio.ensure_future(self.__worker(shards, results)) for _ in range(num)
+        ]
+        pending = set(workers)
+        seen = set()
+        self.__duplicates = 0
+        try:
+            while pending or not results.empty():
+                getter = asyncio.ensure_future(results.get())
+                await asyncio.wait(
+                    {getter, *pending}, return_when=asyncio.FIRST_COMPLETED
+                )
+                for worker in [worker for worker in pending if worker.done()]:
+                    pending.discard(worker)
+                    exc = worker.exception()
+                    if exc is not None:
+                        getter.cancel()
+                        raise exc
+                if not getter.done():
+                    getter.cancel()
+                    continue
+                entry = getter.result()
+                if self.__dedup:
+                    key = str(entry.dn).lower()
+                    if key in seen:
+                        self.__duplicates += 1
+                        continue
+                    seen.add(key)
+                yield entry
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    def __aiter__(self) -> AsyncIterator[LDAPEntry]:
+        return self.__crawl()
@@ -0,0 +1,234 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from ..ldapconnection import LDAPSearchScope
+from ..ldapdn import LDAPDN
+from ..ldapentry import LDAPEntry
+from ..searchcache import freeze_result, thaw_result
+from ..utils import escape_filter_exp
+
+from .aioconnection import AIOLDAPConnection
+from .aiopool import AIOConnectionPool
+
+GroupKey = Tuple[str, str]
+
+
+def _normalise(value: Any) -> Any:
+    return value.lower() if isinstance(value, str) else value
+
+
+class AIOEntryLoader:
+    """
+    Batch loader of entries by an attribute value for asyncio. The lookups
+    that are requested in the same iteration of the event loop with the
+    same attribute and search base are collected and sent as one search
+    with an OR filter (e.g. ``(|(uid=chuck)(uid=morgan))``), instead of
+    sending a separate search for every lookup. Every caller gets its own
+    :class:`LDAPEntry` object.
+
+    The attribute that is used for the lookups is expected to have unique
+    values that are matched case-insensitively (e.g. uid, mail or
+    sAMAccountName).
+
+    :param conn: an open :class:`AIOLDAPConnection`, or an \
+    :class:`AIOConnectionPool`. With a pool, every search is sent on a \
+    connection that is acquired from the pool.
+    :param str|LDAPDN base: the default base of the searches, if it's \
+    None the base DN of the client's URL is used.
+    :param int scope: the scope of the searches.
+    :param str filter_exp: an additional filter expression that is \
+    combined with the lookups with an AND operator.
+    :param list attrlist: the list of the attributes of the entries, the \
+    lookup attributes are always requested.
+    :param int max_batch_size: the maximal number of lookups in one search.
+    :param int max_filter_length: the maximal length of the filter \
+    expression of one search.
+    :param float timeout: time limit in seconds for the searches.
+    :raises TypeError: if `conn` is not an AIOLDAPConnection or \
+    AIOConnectionPool.
+    :raises ValueError: if `max_batch_size` or `max_filter_length` is not \
+    positive.
+    """
+
+    def __init__(
+        self,
+        conn: Union[AIOLDAPConnection, AIOConnectionPool],
+        base: Optional[Union[str, LDAPDN]] = None,
+        scope: Union[LDAPSearchScope, int] = LDAPSearchScope.SUBTREE,
+        filter_exp: Optional[str] = None,
+        attrlist: Optional[List[str]] = None,
+        max_batch_size: int = 100,
+        max_filter_length: int = 8192,
+        timeout: Optional[float] = None,
+    ) -> None:
+        if not isinstance(conn, (AIOLDAPConnection, AIOConnectionPool)):
+            raise TypeError(
+                "The conn must be an AIOLDAPConnection or AIOConnectionPool."
+            )
+        if not isinstance(max_batch_size, int) or max_batch_size < 1:
+            raise ValueError("The max_batch_size must be a positive int.")
+        if not isinstance(max_filter_length, int) or max_filter_length < 1:
+            raise ValueError("The max_filter_length must be a positive int.")
+        self.__conn = conn
+        self.__base = str(base) if base is not None else None
+        self.__scope = scope
+        self.__filter_exp = filter_exp
+        self.__attrlist = attrlist
+        self.__max_batch_size = max_batch_size
+        self.__max_filter_length = max_filter_length
+        self.__timeout = timeout
+        self.__pending: Dict[GroupKey, Dict[Any, List[asyncio.Future]]] = {}
+        self.__scheduled = False
+        self.__tasks: set = set()
+        self.__loads = 0
+        self.__searches = 0
+
+    async def load(
+        self, attribute: str, value: str, base: Optional[Union[str, LDAPDN]] = None
+    ) -> Optional[LDAPEntry]:
+        """
+        Load the entry that has the `value` in its `attribute`.
+
+        :param str attribute: the name of the attribute.
+        :param str value: the unescaped value of the attribute.
+        :param str|LDAPDN base: the base of the search, if it's None the \
+        default base of the loader is used.
+        :return: the entry, or None if there is no matching entry.
+        :rtype: LDAPEntry
+        """
+        loop = asyncio.get_running_loop()
+        if base is None:
+            base = self.__base
+        key = (str(base) if base is not None else "", attribute.lower())
+        fut = loop.create_future()
+        waiters = self.__pending.setdefault(key, {})
+        waiters.setdefault(_normalise(value), []).append(fut)
+        self.__loads += 1
+        if not self.__scheduled:
+            self.__scheduled = True
+            loop.call_soon(self.__dispatch)
+        return await fut
+
+    async def load_many(
+        self,
+        attribute: str,
+        values: List[str],
+        base: Optional[Union[str, LDAPDN]] = None,
+    ) -> List[Optional[LDAPEntry]]:
+        """
+        Load the entries of the `values` in one batch.
+
+        :param str attribute: the name of the attribute.
+        :param list values: the list of unescaped attribute values.
+        :param str|LDAPDN base: the base of the searches, if it's None \
+        the default base of the loader is used.
+        :return: the list of entries in the order of `values`, None for \
+        the missing ones.
+        :rtype: list
+        """
+        return list(
+            await asyncio.gather(*(self.load(attribute, val, base) for val in values))
+        )
+
+    def __dispatch(self) -> None:
+        self.__scheduled = False
+        pending, self.__pending = self.__pending, {}
+        for (base, attribute), waiters in pending.items():
+            for chunk in self.__split(attribute, waiters):
+                task = asyncio.ensure_future(self.__fetch(base, attribute, chunk))
+                self.__tasks.add(task)
+                task.add_done_callback(self.__tasks.discard)
+
+    def __split(
+        self, attribute: str, waiters: Dict[Any, List[asyncio.Future]]
+    ) -> List[Dict[Any, List[asyncio.Future]]]:
+        """Split the lookups into chunks that fit into the limits."""
+        chunks: List[Dict[Any, List[asyncio.Future]]] = [{}]
+        length = 3
+        for value, futures in waiters.items():
+            term_len = len(attribute) + len(escape_filter_exp(str(value))) + 3
+            if chunks[-1] and (
+                len(chunks[-1]) >= self.__max_batch_size
+                or length + term_len > self.__max_filter_length
+            ):
+                chunks.append({})
+                length = 3
+            chunks[-1][value] = futures
+            length += term_len
+        return chunks
+
+    def __get_filter(self, attribute: str, values: List[Any]) -> str:
+        terms = "".join(
+            f"({attribute}={escape_filter_exp(str(val))})" for val in values
+        )
+        if len(values) > 1:
+            terms = f"(|{terms})"
+        if self.__filter_exp:
+            flt = self.__filter_exp
+            if not flt.startswith("("):
+                flt = f"({flt})"
+            return f"(&{flt}{terms})"
+        return terms
+
+    async def __fetch(
+        self, base: str, attribute: str, chunk: Dict[Any, List[asyncio.Future]]
+    ) -> None:
+        attrlist = self.__attrlist
+        if attrlist and "*" not in attrlist:
+            if attribute.lower() not in (attr.lower() for attr in attrlist):
+                attrlist = list(attrlist) + [attribute]
+        args = (
+            base or None,
+            self.__scope,
+            self.__get_filter(attribute, list(chunk)),
+            attrlist,
+            self.__timeout,
+        )
+        self.__searches += 1
+        try:
+            if isinstance(self.__conn, AIOConnectionPool):
+                async with self.__conn.spawn() as conn:
+                    result = await conn.search(*args)
+            else:
+                result = await self.__conn.search(*args)
+        except asyncio.CancelledError:
+            # Do not leave the callers waiting for a cancelled search.
+            for futures in chunk.values():
+                for fut in futures:
+                    fut.cancel()
+            raise
+        except Exception as exc:
+            for futures in chunk.values():
+                for fut in futures:
+                    if not fut.done():
+                        fut.set_exception(exc)
+            return
+        found: Dict[Any, LDAPEntry] = {}
+        for entry in result:
+            if not isinstance(entry, LDAPEntry):
+                continue
+            for val in entry.get(attribute, []):
+                found.setdefault(_normalise(val), entry)
+        given = set()
+        for value, futures in chunk.items():
+            entry = found.get(value)
+            for fut in futures:
+                if fut.done():
+                    continue
+                if entry is not None and id(entry) in given:
+                    # Every caller gets its own copy of the same entry.
+                    copy = thaw_result(freeze_result([entry]), entry.connection)
+                    fut.set_result(copy[0])
+                else:
+                    fut.set_result(entry)
+                    given.add(id(entry))
+
+    @property
+    def loads(self) -> int:
+        """The number of requested lookups."""
+        return self.__loads
+
+    @property
+    def searches(self) -> int:
+        """The number of searches that are sent to serve the lookups."""
+        return self.__searches
@@ -62,7 +62,7 @@ class AIOConnectionPool(ConnectionPool[AIOLDAPConnection]):
                 raise ClosedPool("The pool is closed.")
             await self._lock.wait_for(lambda: not self.empty or self._closed)
             try:
-                conn = self._idles.pop()
+                conn = self._pop_idle()
             except KeyError:
                 if len(self._used) < self._maxconn:
                     conn = await self._client.connect(
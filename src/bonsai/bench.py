@@ -0,0 +1,618 @@
+"""
+Generate load on a directory server with configurable workloads, and
+report the throughput and the latency percentiles in JSON:
+
+    python -m bonsai.bench ldap://localhost/ou=people,dc=bonsai,dc=test \
+        -D cn=admin,dc=bonsai,dc=test -w p@ssword \
+        --workload base=70,search=20,modify=10 -c 16 -t 60
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .asyncio import AIOConnectionPool
+from .errors import ConnectionError, LDAPError
+from .ldapclient import LDAPClient
+from .ldapconnection import BaseLDAPConnection
+from .ldapentry import LDAPEntry, LDAPModOp
+from .pool import ThreadedConnectionPool
+
+#: The kinds of the operations that a workload can consist of.
+OPERATIONS = ("bind", "base", "search", "paged", "modify")
+
+#: The reported latency percentiles.
+PERCENTILES = (50, 90, 95, 99, 99.9)
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """
+    Parse the weights of the operations in a workload.
+
+    :param str text: comma-separated operation names with optional \
+    weights, e.g. `base=70,search=20,modify=10` or `search`.
+    :return: the weights by the operation names.
+    :rtype: dict
+    :raises ValueError: if an operation is unknown or a weight is invalid.
+    """
+    mix: Dict[str, float] = {}
+    for item in text.split(","):
+        name, _, weight = item.strip().partition("=")
+        if name not in OPERATIONS:
+            names = ", ".join(OPERATIONS)
+            raise ValueError(f"Unknown operation '{name}', it must be one of {names}.")
+        value = float(weight) if weight else 1.0
+        if value <= 0:
+            raise ValueError(f"The weight of '{name}' must be positive.")
+        mix[name] = mix.get(name, 0.0) + value
+    return mix
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """
+    Get a percentile of sorted values with the nearest-rank method.
+
+    :param values: the sorted values.
+    :param float pct: the percentile between 0 and 100.
+    :return: the value of the percentile, or 0.0 if there are no values.
+    :rtype: float
+    """
+    if not values:
+        return 0.0
+    rank = max(1, min(len(values), int(-(-pct * len(values) // 100))))
+    return values[rank - 1]
+
+
+def _summary(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    latencies.sort()
+    count = len(latencies) + errors
+    latency: Dict[str, float] = {
+        "min": latencies[0] if latencies else 0.0,
+        "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+    }
+    for pct in PERCENTILES:
+        latency[f"p{pct:g}"] = percentile(latencies, pct)
+    latency["max"] = latencies[-1] if latencies else 0.0
+    return {
+        "count": count,
+        "errors": errors,
+        "throughput": count / elapsed if elapsed > 0 else 0.0,
+        "latency": latency,
+    }
+
+
+class Recorder:
+    """
+    Collect the latencies and the errors of the operations. The
+    operations that start before the end of the warm-up period are not
+    recorded.
+
+    :param float warmup: the length of the warm-up period in seconds.
+    """
+
+    def __init__(self, warmup: float = 0.0) -> None:
+        self.__lock = threading.Lock()
+        self.__latencies: Dict[str, List[float]] = {}
+        self.__failures: Counter = Counter()
+        self.__errors: Counter = Counter()
+        self.__start = time.perf_counter() + warmup
+        self.__end: Optional[float] = None
+
+    @property
+    def count(self) -> int:
+        """The number of the recorded operations."""
+        return sum(map(len, self.__latencies.values())) + sum(
+            self.__failures.values()
+        )
+
+    def record(
+        self, kind: str, start: float, end: float, error: Optional[Exception] = None
+    ) -> None:
+        """
+        Record the outcome of an operation.
+
+        :param str kind: the kind of the operation.
+        :param float start: the start of the operation by `perf_counter`.
+        :param float end: the end of the operation by `perf_counter`.
+        :param Exception error: the raised error, if the operation failed.
+        """
+        if start < self.__start:
+            return
+        with self.__lock:
+            if error is None:
+                self.__latencies.setdefault(kind, []).append(end - start)
+            else:
+                self.__failures[kind] += 1
+                self.__errors[type(error).__name__] += 1
+
+    def stop(self) -> None:
+        """Mark the end of the measurement."""
+        self.__end = time.perf_counter()
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Summarise the recorded operations.
+
+        :return: a dictionary with the `duration` of the measurement, the \
+        `total` and the per-kind `operations` summaries (`count`, \
+        `errors`, `throughput` in operations per second, and `latency` \
+        statistics in seconds), and the number of `errors` by type.
+        :rtype: dict
+        """
+        end = self.__end if self.__end is not None else time.perf_counter()
+        elapsed = max(0.0, end - self.__start)
+        with self.__lock:
+            kinds = sorted(set(self.__latencies) | set(self.__failures))
+            operations = {
+                kind: _summary(
+                    list(self.__latencies.get(kind, [])),
+                    self.__failures[kind],
+                    elapsed,
+                )
+                for kind in kinds
+            }
+            total = _summary(
+                [value for values in self.__latencies.values() for value in values],
+                sum(self.__failures.values()),
+                elapsed,
+            )
+            return {
+                "duration": elapsed,
+                "total": total,
+                "operations": operations,
+                "errors": dict(self.__errors),
+            }
+
+
+class Workload:
+    """
+    A random mix of operations against a directory server.
+
+    :param LDAPClient client: the client of the server.
+    :param dict mix: the weights of the operations, see :func:`parse_mix`.
+    :param list dns: the DNs of the entries for the `base` lookups and \
+    the `modify` operations.
+    :param str base: the base DN of the `search` and `paged` operations, \
+    the client URL's base DN by default.
+    :param int scope: the scope of the `search` and `paged` operations.
+    :param str filter_exp: the filter of the `search` and `paged` operations.
+    :param list attrlist: the requested attributes, every attribute if None.
+    :param int page_size: the page size of the `paged` operations.
+    :param str modify_attr: the attribute that the `modify` operations \
+    replace with a random value.
+    :param float timeout: the time limit of the operations in seconds.
+    :raises ValueError: if the mix needs DNs and none is given.
+    """
+
+    def __init__(
+        self,
+        client: LDAPClient,
+        mix: Dict[str, float],
+        dns: Sequence[str] = (),
+        base: Optional[str] = None,
+        scope: int = 2,
+        filter_exp: str = "(objectClass=*)",
+        attrlist: Optional[List[str]] = None,
+        page_size: int = 100,
+        modify_attr: str = "description",
+        timeout: Optional[float] = None,
+    ) -> None:
+        if not dns and ("base" in mix or "modify" in mix):
+            raise ValueError("The base and modify operations need a list of DNs.")
+        self.client = client
+        self.mix = dict(mix)
+        self.dns = list(dns)
+        self.base = str(client.url.basedn) if base is None else base
+        self.scope = scope
+        self.filter_exp = filter_exp
+        self.attrlist = attrlist
+        self.page_size = page_size
+        self.modify_attr = modify_attr
+        self.timeout = timeout
+        self.__kinds = list(self.mix)
+        self.__weights = list(self.mix.values())
+
+    @property
+    def needs_connection(self) -> bool:
+        """True, if any of the operations uses a pooled connection."""
+        return any(kind != "bind" for kind in self.mix)
+
+    def choose(self, rnd: random.Random) -> str:
+        """Choose the kind of the next operation randomly by the weights."""
+        return rnd.choices(self.__kinds, self.__weights)[0]
+
+    def __entry(self, rnd: random.Random, conn: BaseLDAPConnection) -> LDAPEntry:
+        entry = LDAPEntry(rnd.choice(self.dns), conn)
+        entry.change_attribute(
+            self.modify_attr, LDAPModOp.REPLACE, f"bonsai.bench {rnd.random()}"
+        )
+        return entry
+
+    def execute(
+        self, kind: str, rnd: random.Random, conn: Optional[BaseLDAPConnection]
+    ) -> None:
+        """
+        Execute an operation with a synchronous connection.
+
+        :param str kind: the kind of the operation.
+        :param rnd: the random generator of the worker.
+        :param conn: the connection, it's None for the `bind` operations.
+        """
+        if kind == "bind":
+            self.client.connect(timeout=self.timeout).close()
+            return
+        assert conn is not None
+        if kind == "base":
+            conn.search(
+                rnd.choice(self.dns), 0, attrlist=self.attrlist, timeout=self.timeout
+            )
+        elif kind == "search":
+            conn.search(
+                self.base,
+                self.scope,
+                self.filter_exp,
+                self.attrlist,
+                timeout=self.timeout,
+            )
+        elif kind == "paged":
+            for _ in conn.paged_search(
+                self.base,
+                self.scope,
+                self.filter_exp,
+                self.attrlist,
+                timeout=self.timeout,
+                page_size=self.page_size,
+            ):
+                pass
+        elif kind == "modify":
+            self.__entry(rnd, conn).modify(timeout=self.timeout)
+
+    async def execute_async(
+        self, kind: str, rnd: random.Random, conn: Optional[BaseLDAPConnection]
+    ) -> None:
+        """
+        Execute an operation with an asynchronous connection.
+
+        :param str kind: the kind of the operation.
+        :param rnd: the random generator of the worker.
+        :param conn: the connection, it's None for the `bind` operations.
+        """
+        if kind == "bind":
+            new_conn = await self.client.connect(True, timeout=self.timeout)
+            new_conn.close()
+            return
+        assert conn is not None
+        if kind == "base":
+            await conn.search(
+                rnd.choice(self.dns), 0, attrlist=self.attrlist, timeout=self.timeout
+            )
+        elif kind == "search":
+            await conn.search(
+                self.base,
+                self.scope,
+                self.filter_exp,
+                self.attrlist,
+                timeout=self.timeout,
+            )
+        elif kind == "paged":
+            result = await conn.paged_search(
+                self.base,
+                self.scope,
+                self.filter_exp,
+                self.attrlist,
+                timeout=self.timeout,
+                page_size=self.page_size,
+            )
+            async for _ in result:
+                pass
+        elif kind == "modify":
+            await self.__entry(rnd, conn).modify(timeout=self.timeout)
+
+
+def collect_dns(
+    client: LDAPClient,
+    base: Optional[str] = None,
+    scope: int = 2,
+    filter_exp: str = "(objectClass=*)",
+    limit: int = 1000,
+) -> List[str]:
+    """
+    Collect DNs from the directory for the `base` and `modify` operations.
+
+    :param LDAPClient client: the client of the server.
+    :param str base: the base DN of the search, the client URL's base DN \
+    by default.
+    :param int scope: the scope of the search.
+    :param str filter_exp: the filter of the search.
+    :param int limit: the maximum number of the collected DNs.
+    :return: the list of DNs.
+    :rtype: list
+    """
+    base = str(client.url.basedn) if base is None else base
+    dns: List[str] = []
+    with client.connect() as conn:
+        for entry in conn.paged_search(
+            base, scope, filter_exp, ["1.1"], page_size=min(limit, 500)
+        ):
+            dns.append(str(entry.dn))
+            if len(dns) >= limit:
+                break
+    return dns
+
+
+def _deadline(duration: Optional[float], warmup: float) -> Optional[float]:
+    if duration is None:
+        return None
+    if duration <= 0:
+        raise ValueError("The duration must be positive.")
+    return time.perf_counter() + warmup + duration
+
+
+def _finished(
+    recorder: Recorder, deadline: Optional[float], requests: Optional[int]
+) -> bool:
+    if deadline is not None and time.perf_counter() >= deadline:
+        return True
+    return requests is not None and recorder.count >= requests
+
+
+def run_threads(
+    workload: Workload,
+    concurrency: int = 8,
+    duration: Optional[float] = 10.0,
+    requests: Optional[int] = None,
+    warmup: float = 0.0,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Run a workload with threads that share a
+    :class:`~bonsai.pool.ThreadedConnectionPool`.
+
+    :param Workload workload: the workload.
+    :param int concurrency: the number of the threads.
+    :param float duration: the length of the measurement in seconds, \
+    without the warm-up. Unlimited, if it's None.
+    :param int requests: stop after this number of measured operations, \
+    the operations in progress are still finished.
+    :param float warmup: the length of the warm-up period in seconds.
+    :param int seed: the seed of the random generators.
+    :return: the report of the :class:`Recorder`.
+    :rtype: dict
+    :raises ValueError: if the duration is not positive.
+
+    An error of a thread, other than the recorded LDAPErrors of the
+    operations, stops all the threads and it is raised.
+    """
+    deadline = _deadline(duration, warmup)
+    recorder = Recorder(warmup)
+    errors: List[Exception] = []
+    pool = None
+    if workload.needs_connection:
+        pool = ThreadedConnectionPool(workload.client, concurrency, concurrency)
+        pool.open()
+
+    def worker(num: int) -> None:
+        try:
+            work(num)
+        except Exception as exc:
+            errors.append(exc)
+
+    def work(num: int) -> None:
+        rnd = random.Random(None if seed is None else seed + num)
+        while not errors and not _finished(recorder, deadline, requests):
+            kind = workload.choose(rnd)
+            conn = pool.get() if pool is not None and kind != "bind" else None
+            start = time.perf_counter()
+            try:
+                workload.execute(kind, rnd, conn)
+            except LDAPError as exc:
+                recorder.record(kind, start, time.perf_counter(), exc)
+                if conn is not None and isinstance(exc, ConnectionError):
+                    # A broken connection is replaced by the pool.
+                    conn.close()
+            else:
+                recorder.record(kind, start, time.perf_counter())
+            finally:
+                if conn is not None and pool is not None:
+                    pool.put(conn)
+
+    threads = [
+        threading.Thread(target=worker, args=(num,), daemon=True)
+        for num in range(concurrency)
+    ]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        recorder.stop()
+        if pool is not None:
+            pool.close()
+    if errors:
+        raise errors[0]
+    return recorder.report()
+
+
+async def run_tasks(
+    workload: Workload,
+    concurrency: int = 8,
+    duration: Optional[float] = 10.0,
+    requests: Optional[int] = None,
+    warmup: float = 0.0,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Run a workload with asyncio tasks that share an
+    :class:`~bonsai.asyncio.AIOConnectionPool`. The parameters are the
+    same as the :func:`run_threads` function's, but the `concurrency` is
+    the number of the tasks.
+    """
+    deadline = _deadline(duration, warmup)
+    recorder = Recorder(warmup)
+    pool = None
+    if workload.needs_connection:
+        pool = AIOConnectionPool(workload.client, concurrency, concurrency)
+        await pool.open()
+
+    async def worker(num: int) -> None:
+        rnd = random.Random(None if seed is None else seed + num)
+        while not _finished(recorder, deadline, requests):
+            kind = workload.choose(rnd)
+            conn = await pool.get() if pool is not None and kind != "bind" else None
+            start = time.perf_counter()
+            try:
+                await workload.execute_async(kind, rnd, conn)
+            except (LDAPError, asyncio.TimeoutError) as exc:
+                recorder.record(kind, start, time.perf_counter(), exc)
+                if conn is not None and isinstance(exc, ConnectionError):
+                    conn.close()
+            else:
+                recorder.record(kind, start, time.perf_counter())
+            finally:
+                if conn is not None and pool is not None:
+                    await pool.put(conn)
+
+    try:
+        await asyncio.gather(*(worker(num) for num in range(concurrency)))
+    finally:
+        recorder.stop()
+        if pool is not None:
+            await pool.close()
+    return recorder.report()
+
+
+def _read_dns(lines: Iterable[str]) -> List[str]:
+    return [
+        line.strip() for line in lines if line.strip() and not line.startswith("#")
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m bonsai.bench",
+        description="Generate load on a directory server, and report the "
+        "throughput and the latency percentiles in JSON.",
+    )
+    parser.add_argument("url", nargs="?", help="LDAP URL with the base DN")
+    parser.add_argument("-D", "--user", help="bind DN or user name")
+    parser.add_argument("-w", "--password", help="bind password")
+    parser.add_argument("-Y", "--mechanism", default="SIMPLE", help="bind mechanism")
+    parser.add_argument("-Z", "--starttls", action="store_true", help="use StartTLS")
+    parser.add_argument(
+        "--workload",
+        default="search",
+        type=parse_mix,
+        help="weighted operations, e.g. base=70,search=20,modify=10 "
+        f"(operations: {', '.join(OPERATIONS)})",
+    )
+    parser.add_argument("-c", "--concurrency", type=int, default=8)
+    parser.add_argument(
+        "-m", "--mode", choices=("thread", "asyncio"), default="thread"
+    )
+    parser.add_argument(
+        "-t", "--duration", type=float, help="in seconds (default: 10)"
+    )
+    parser.add_argument("-n", "--requests", type=int, help="number of operations")
+    parser.add_argument("--warmup", type=float, default=0.0, help="in seconds")
+    parser.add_argument("-f", "--filter", dest="filter_exp", help="search filter")
+    parser.add_argument(
+        "-s", "--scope", choices=("base", "one", "sub"), default="sub"
+    )
+    parser.add_argument(
+        "-a", "--attribute", dest="attrlist", action="append", help="attribute"
+    )
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--modify-attr", default="description")
+    parser.add_argument("--dn-file", help="file of DNs for base and modify")
+    parser.add_argument("--sample", type=int, default=1000, help="DNs to collect")
+    parser.add_argument("--timeout", type=float, help="operation time limit")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument(
+        "--stand-in", type=int, help="run against a stand-in server with N entries"
+    )
+    parser.add_argument("-o", "--output", help="JSON file for the report")
+    args = parser.parse_args(argv)
+
+    if args.concurrency <= 0:
+        parser.error("the --concurrency must be positive")
+    if args.duration is not None and args.duration <= 0:
+        parser.error("the --duration must be positive")
+    if args.requests is not None and args.requests <= 0:
+        parser.error("the --requests must be positive")
+
+    server = None
+    if args.url is None:
+        if args.stand_in is None:
+            parser.error("the url or the --stand-in option is required")
+        from .testing import StandInServer, synthetic_entries
+
+        server = StandInServer(synthetic_entries(args.stand_in))
+        server.start()
+        args.url = f"{server.url}/ou=people,dc=bonsai,dc=test"
+    try:
+        client = LDAPClient(args.url, args.starttls)
+        if args.user or args.mechanism != "SIMPLE":
+            client.set_credentials(
+                args.mechanism, user=args.user, password=args.password
+            )
+        scope = {"base": 0, "one": 1, "sub": 2}[args.scope]
+        filter_exp = args.filter_exp or client.url.filter_exp or "(objectClass=*)"
+        dns: List[str] = []
+        if "base" in args.workload or "modify" in args.workload:
+            if args.dn_file:
+                with open(args.dn_file) as dn_file:
+                    dns = _read_dns(dn_file)
+            else:
+                dns = collect_dns(client, None, scope, filter_exp, args.sample)
+        workload = Workload(
+            client,
+            args.workload,
+            dns,
+            scope=scope,
+            filter_exp=filter_exp,
+            attrlist=args.attrlist,
+            page_size=args.page_size,
+            modify_attr=args.modify_attr,
+            timeout=args.timeout,
+        )
+        duration = args.duration
+        if duration is None and args.requests is None:
+            duration = 10.0
+        params = dict(
+            concurrency=args.concurrency,
+            duration=duration,
+            requests=args.requests,
+            warmup=args.warmup,
+            seed=args.seed,
+        )
+        if args.mode == "asyncio":
+            report = asyncio.run(run_tasks(workload, **params))
+        else:
+            report = run_threads(workload, **params)
+    finally:
+        if server is not None:
+            server.close()
+    report = {
+        "url": args.url,
+        "mode": args.mode,
+        "concurrency": args.concurrency,
+        "workload": args.workload,
+        **report,
+    }
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
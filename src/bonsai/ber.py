@@ -0,0 +1,132 @@
+"""
+Minimal BER encoding and decoding of the values of LDAP controls and
+intermediate responses that are not handled by the C extension.
+"""
+from typing import Iterator, List, Optional, Tuple, Union
+
+TAG_BOOLEAN = 0x01
+TAG_INTEGER = 0x02
+TAG_OCTET_STRING = 0x04
+TAG_ENUMERATED = 0x0A
+TAG_SEQUENCE = 0x30
+TAG_SET = 0x31
+
+
+class BERDecodingError(ValueError):
+    """Raised when a BER encoded value is malformed."""
+
+
+def encode_length(length: int) -> bytes:
+    """Encode the length of a value in definite form."""
+    if length < 0x80:
+        return bytes((length,))
+    octets = length.to_bytes((length.bit_length() + 7) // 8, "big")
+    return bytes((0x80 | len(octets),)) + octets
+
+
+def encode_tlv(tag: int, content: bytes) -> bytes:
+    """Encode a tag-length-value triplet."""
+    return bytes((tag,)) + encode_length(len(content)) + content
+
+
+def encode_integer(value: int, tag: int = TAG_INTEGER) -> bytes:
+    """Encode an INTEGER (or ENUMERATED with the proper tag)."""
+    length = (value + (value < 0)).bit_length() // 8 + 1
+    return encode_tlv(tag, value.to_bytes(length, "big", signed=True))
+
+
+def encode_boolean(value: bool, tag: int = TAG_BOOLEAN) -> bytes:
+    """Encode a BOOLEAN."""
+    return encode_tlv(tag, b"\xff" if value else b"\x00")
+
+
+def encode_octet_string(
+    value: Union[str, bytes], tag: int = TAG_OCTET_STRING
+) -> bytes:
+    """Encode an OCTET STRING, a str is encoded with UTF-8."""
+    if isinstance(value, str):
+        value = value.encode("UTF-8")
+    return encode_tlv(tag, bytes(value))
+
+
+def encode_sequence(*items: bytes, tag: int = TAG_SEQUENCE) -> bytes:
+    """Encode a SEQUENCE of already encoded items."""
+    return encode_tlv(tag, b"".join(items))
+
+
+def decode_tlv(data: bytes, offset: int = 0) -> Tuple[int, bytes, int]:
+    """
+    Decode a tag-length-value triplet that starts at the `offset`.
+
+    :return: the tag, the content and the offset after the triplet.
+    :raises BERDecodingError: if the data is malformed.
+    """
+    try:
+        tag = data[offset]
+        if tag & 0x1F == 0x1F:
+            raise BERDecodingError("Multi-byte tags are not supported.")
+        length = data[offset + 1]
+        offset += 2
+        if length & 0x80:
+            num = length & 0x7F
+            if num == 0:
+                raise BERDecodingError("Indefinite length is not supported.")
+            length = int.from_bytes(data[offset : offset + num], "big")
+            offset += num
+    except IndexError:
+        raise BERDecodingError("Unexpected end of data.") from None
+    end = offset + length
+    if end > len(data):
+        raise BERDecodingError("Unexpected end of data.")
+    return tag, bytes(data[offset:end]), end
+
+
+def iter_tlv(data: bytes) -> Iterator[Tuple[int, bytes]]:
+    """Iterate over the (tag, content) pairs of the encoded items."""
+    offset = 0
+    while offset < len(data):
+        tag, content, offset = decode_tlv(data, offset)
+        yield tag, content
+
+
+def decode_sequence(data: bytes, tag: int = TAG_SEQUENCE) -> List[Tuple[int, bytes]]:
+    """
+    Decode a SEQUENCE (or a value with the given constructed tag).
+
+    :return: the list of (tag, content) pairs of the items.
+    :raises BERDecodingError: if the data is malformed or the tag differs.
+    """
+    seq_tag, content, end = decode_tlv(data)
+    if seq_tag != tag:
+        raise BERDecodingError(f"Unexpected tag: 0x{seq_tag:02x}.")
+    if end != len(data):
+        raise BERDecodingError("Trailing data after the value.")
+    return list(iter_tlv(content))
+
+
+def decode_integer(content: bytes) -> int:
+    """Decode the content of an INTEGER or ENUMERATED."""
+    if not content:
+        raise BERDecodingError("Empty integer.")
+    return int.from_bytes(content, "big", signed=True)
+
+
+def decode_boolean(content: bytes) -> bool:
+    """Decode the content of a BOOLEAN."""
+    if len(content) != 1:
+        raise BERDecodingError("Invalid boolean.")
+    return content != b"\x00"
+
+
+def find_control(
+    ctrls: List[Tuple[str, bool, Optional[bytes]]], oid: str
+) -> Optional[bytes]:
+    """
+    Find a control in the list of (oid, criticality, value) tuples of the
+    received controls. Returns the value of the control, or None if it is
+    not found.
+    """
+    for ctrl_oid, _, value in ctrls:
+        if ctrl_oid == oid:
+            return value if value is not None else b""
+    return None
@@ -0,0 +1,378 @@
+import base64
+import json
+import os
+from typing import Any, List, NamedTuple, Optional, Tuple, Union
+
+from .ber import (
+    TAG_INTEGER,
+    TAG_OCTET_STRING,
+    BERDecodingError,
+    decode_integer,
+    decode_sequence,
+    encode_boolean,
+    encode_integer,
+    encode_octet_string,
+    encode_sequence,
+    find_control,
+)
+from .errors import LDAPError
+from .ldapdn import LDAPDN
+from .ldapentry import LDAPEntry
+from .utils import escape_filter_exp
+
+MYPY = False
+
+if MYPY:
+    from .ldapconnection import BaseLDAPConnection
+
+PAGED_RESULTS_OID = "1.2.840.113556.1.4.319"
+SORT_REQUEST_OID = "1.2.840.113556.1.4.473"
+
+#: The result codes of the servers rejecting a paged results cookie that
+#: is not issued on the same connection (operations, protocol error and
+#: unwilling to perform).
+INVALID_COOKIE_CODES = (0x01, 0x02, 0x35)
+
+Control = Tuple[str, bool, Optional[bytes]]
+
+
+def encode_paged_results(page_size: int, cookie: Optional[bytes]) -> bytes:
+    """Encode the value of a paged results control."""
+    return encode_sequence(
+        encode_integer(page_size), encode_octet_string(cookie or b"")
+    )
+
+
+def decode_paged_results(value: bytes) -> Tuple[int, bytes]:
+    """
+    Decode the value of a paged results response control.
+
+    :return: the estimated size of the result and the cookie.
+    """
+    items = decode_sequence(value)
+    if (
+        len(items) != 2
+        or items[0][0] != TAG_INTEGER
+        or items[1][0] != TAG_OCTET_STRING
+    ):
+        raise BERDecodingError("Invalid paged results control.")
+    return decode_integer(items[0][1]), items[1][1]
+
+
+def encode_sort_request(attr: str, reverse: bool) -> bytes:
+    """Encode the value of a server side sort control with a single key."""
+    key = [encode_octet_string(attr)]
+    if reverse:
+        key.append(encode_boolean(True, 0x81))
+    return encode_sequence(encode_sequence(*key))
+
+
+def _assertion_value(value: Any) -> str:
+    """Format an attribute value as an escaped assertion value of a filter."""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (bytes, bytearray)):
+        return "".join(f"\\{byte:02x}" for byte in value)
+    return escape_filter_exp(str(value))
+
+
+class SearchCheckpoint(NamedTuple):
+    """
+    The state of a :class:`ResumablePagedSearch` to continue it later,
+    even on a new connection. It can be persisted with :meth:`save` or
+    :meth:`dumps`.
+    """
+
+    #: The base DN of the search.
+    base: Optional[str]
+    #: The scope of the search.
+    scope: Optional[int]
+    #: The filter expression of the search.
+    filter_exp: Optional[str]
+    #: The list of the attributes.
+    attrlist: Optional[List[str]]
+    #: The size of the pages.
+    page_size: int
+    #: The attribute the search is sorted by (`-` prefix for reverse order).
+    sort_key: Optional[str]
+    #: The sort value the current search starts from, if it is restarted.
+    bound: Optional[str]
+    #: The cookie of the current page, None for the first page.
+    cookie: Optional[bytes]
+    #: The number of the processed entries of the current page.
+    offset: int
+    #: The number of the returned entries.
+    consumed: int
+    #: The sort value of the last returned entry.
+    last_value: Optional[str]
+    #: The DNs of the returned entries with the last sort value.
+    last_dns: Tuple[str, ...]
+
+    def dumps(self) -> str:
+        """Serialise the checkpoint to a JSON string."""
+        data = self._asdict()
+        if self.cookie is not None:
+            data["cookie"] = base64.b64encode(self.cookie).decode("ASCII")
+        data["last_dns"] = list(self.last_dns)
+        return json.dumps(data)
+
+    @classmethod
+    def loads(cls, data: str) -> "SearchCheckpoint":
+        """
+        Deserialise a checkpoint from a JSON string.
+
+        :param str data: the string created by :meth:`dumps`.
+        :return: the checkpoint.
+        :rtype: SearchCheckpoint
+        :raises ValueError: if the data is not a valid checkpoint.
+        """
+        try:
+            fields = json.loads(data)
+            if fields["cookie"] is not None:
+                fields["cookie"] = base64.b64decode(fields["cookie"])
+            fields["last_dns"] = tuple(fields["last_dns"])
+            return cls(**fields)
+        except (TypeError, KeyError, AttributeError, ValueError) as exc:
+            raise ValueError(f"Invalid checkpoint: {exc}.") from None
+
+    def save(self, path: Union[str, os.PathLike]) -> None:
+        """
+        Save the checkpoint to a file. The file is replaced atomically, an
+        interrupted saving leaves the previous checkpoint intact.
+
+        :param str path: the path of the file.
+        """
+        tmp_path = f"{os.fspath(path)}.tmp"
+        with open(tmp_path, "w", encoding="UTF-8") as fileobj:
+            fileobj.write(self.dumps())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Union[str, os.PathLike]) -> "SearchCheckpoint":
+        """
+        Load a checkpoint from a file created by :meth:`save`.
+
+        :param str path: the path of the file.
+        :return: the checkpoint.
+        :rtype: SearchCheckpoint
+        :raises ValueError: if the file is not a valid checkpoint.
+        """
+        with open(path, encoding="UTF-8") as fileobj:
+            return cls.loads(fileobj.read())
+
+
+class ResumablePagedSearch:
+    """
+    A paged search that can be continued from its :attr:`checkpoint`
+    after a failure, created by :meth:`LDAPConnection.resumable_paged_search`
+    or :meth:`resume`. It is an iterator of the entries, or an asynchronous
+    iterator for the asynchronous connections. The pages are requested
+    automatically.
+
+    A resumed search continues with the cookie of the interrupted page,
+    which might be rejected by the server on a new connection (e.g. by
+    OpenLDAP). If the search is sorted by a `sort_key`, it is restarted
+    with a filter bounded by the last returned sort value instead,
+    skipping the already returned entries. This requires server side
+    sorting, and an attribute that has ordering matching rule and
+    preferably unique values.
+    """
+
+    def __init__(
+        self,
+        conn: "BaseLDAPConnection",
+        checkpoint: SearchCheckpoint,
+        timeout: Optional[float] = None,
+    ) -> None:
+        if checkpoint.page_size < 1:
+            raise ValueError("The page_size must be a positive int.")
+        self.__conn = conn
+        self.__timeout = timeout
+        self.__params = checkpoint[:6]
+        sort_attr = None
+        self.__reverse = False
+        if checkpoint.sort_key is not None:
+            self.__reverse = checkpoint.sort_key.startswith("-")
+            sort_attr = checkpoint.sort_key.lstrip("-")
+        self.__sort_attr = sort_attr
+        self.__bound = checkpoint.bound
+        self.__cookie = checkpoint.cookie
+        self.__offset = 0
+        self.__consumed = checkpoint.consumed
+        self.__last_value = checkpoint.last_value
+        self.__last_dns = [LDAPDN(dn) for dn in checkpoint.last_dns]
+        # The already processed entries of the first page.
+        self.__skip = checkpoint.offset
+        self.__skip_dns: List[LDAPDN] = []
+        self.__resumed = checkpoint.cookie is not None
+        self.__received = False
+        self.__finished = False
+        self.__messages: Any = None
+        self.__start()
+
+    @classmethod
+    def resume(
+        cls,
+        conn: "BaseLDAPConnection",
+        checkpoint: SearchCheckpoint,
+        timeout: Optional[float] = None,
+    ) -> "ResumablePagedSearch":
+        """
+        Continue a search from its checkpoint with the given connection.
+
+        :param BaseLDAPConnection conn: the connection to the server.
+        :param SearchCheckpoint checkpoint: the checkpoint of the search.
+        :param float timeout: time limit in seconds of waiting for the \
+        next message from the server.
+        :return: the iterator of the rest of the entries.
+        :rtype: ResumablePagedSearch
+        """
+        return cls(conn, checkpoint, timeout)
+
+    def __start(self) -> None:
+        base, scope, filter_exp, attrlist, page_size, _ = self.__params
+        value = encode_paged_results(page_size, self.__cookie)
+        ctrls: List[Tuple[str, bool, Optional[bytes]]] = [
+            (PAGED_RESULTS_OID, False, value)
+        ]
+        if self.__sort_attr is not None:
+            value = encode_sort_request(self.__sort_attr, self.__reverse)
+            ctrls.append((SORT_REQUEST_OID, True, value))
+            if attrlist is not None and "*" not in attrlist:
+                attrlist = attrlist + [self.__sort_attr]
+            if self.__bound is not None:
+                if filter_exp is None:
+                    filter_exp = "(objectClass=*)"
+                elif not filter_exp.startswith("("):
+                    filter_exp = f"({filter_exp})"
+                operator = "<=" if self.__reverse else ">="
+                filter_exp = (
+                    f"(&{filter_exp}({self.__sort_attr}{operator}{self.__bound}))"
+                )
+        msg_id = self.__conn._send_stream_search(
+            base, scope, filter_exp, attrlist, self.__timeout, ctrls
+        )
+        self.__messages = self.__conn._stream_messages(msg_id, self.__timeout)
+        self.__received = False
+
+    def __restart(self, exc: LDAPError) -> bool:
+        """
+        Restart the search bounded by the last sort value, if the cookie
+        of the resumed search is rejected.
+        """
+        if (
+            not self.__resumed
+            or self.__received
+            or self.__sort_attr is None
+            or exc.code not in INVALID_COOKIE_CODES
+        ):
+            return False
+        self.__resumed = False
+        if self.__last_value is not None:
+            self.__bound = self.__last_value
+            self.__skip_dns = self.__last_dns.copy()
+        self.__cookie = None
+        self.__offset = 0
+        self.__skip = 0
+        self.__start()
+        return True
+
+    def __process(self, msg: Tuple[str, Any, List[Control]]) -> Optional[LDAPEntry]:
+        msgtype, obj, ctrls = msg
+        self.__received = True
+        if msgtype == "entry":
+            self.__offset += 1
+            if self.__skip > 0:
+                self.__skip -= 1
+                return None
+            if self.__skip_dns and obj.dn in self.__skip_dns:
+                return None
+            self.__consumed += 1
+            if self.__sort_attr is not None:
+                self.__set_last_value(self.__sort_attr, obj)
+            return obj
+        elif msgtype == "result":
+            self.__resumed = False
+            value = find_control(ctrls, PAGED_RESULTS_OID)
+            cookie = decode_paged_results(value)[1] if value else b""
+            if cookie:
+                self.__cookie = cookie
+                self.__offset = 0
+                self.__skip = 0
+                self.__start()
+            else:
+                self.__finished = True
+        return None
+
+    def __set_last_value(self, sort_attr: str, entry: LDAPEntry) -> None:
+        values = entry.get(sort_attr)
+        if not values:
+            return
+        value = _assertion_value(values[0])
+        if self.__last_value is not None and (
+            value.casefold() == self.__last_value.casefold()
+        ):
+            self.__last_dns.append(entry.dn)
+        else:
+            self.__last_value = value
+            self.__last_dns = [entry.dn]
+
+    @property
+    def checkpoint(self) -> SearchCheckpoint:
+        """
+        The current state of the search, that can be used to continue it
+        from the next entry with :meth:`resume`.
+        """
+        return SearchCheckpoint(
+            *self.__params,
+            self.__bound,
+            self.__cookie,
+            self.__offset,
+            self.__consumed,
+            self.__last_value,
+            tuple(str(dn) for dn in self.__last_dns),
+        )
+
+    def __iter__(self) -> "ResumablePagedSearch":
+        if not hasattr(self.__messages, "__next__"):
+            raise TypeError("Use async for with an asynchronous connection.")
+        return self
+
+    def __next__(self) -> LDAPEntry:
+        while not self.__finished:
+            try:
+                entry = self.__process(next(self.__messages))
+            except LDAPError as exc:
+                if not self.__restart(exc):
+                    raise
+                continue
+            if entry is not None:
+                return entry
+        raise StopIteration
+
+    def __aiter__(self) -> "ResumablePagedSearch":
+        if not hasattr(self.__messages, "__anext__"):
+            raise TypeError("Use for with a synchronous connection.")
+        return self
+
+    async def __anext__(self) -> LDAPEntry:
+        while not self.__finished:
+            try:
+                entry = self.__process(await self.__messages.__anext__())
+            except LDAPError as exc:
+                if not self.__restart(exc):
+                    raise
+                continue
+            if entry is not None:
+                return entry
+        raise StopAsyncIteration
+
+    def close(self) -> Any:
+        """
+        Stop the search, and abandon it on the server. For asynchronous
+        iterators it returns an awaitable.
+        """
+        self.__finished = True
+        if hasattr(self.__messages, "aclose"):
+            return self.__messages.aclose()
+        return self.__messages.close()
@@ -0,0 +1,236 @@
+import queue
+import threading
+from typing import Any, Iterable, Iterator, List, NamedTuple, Optional, Union
+
+from .ldapconnection import LDAPSearchScope
+from .ldapdn import LDAPDN
+from .ldapentry import LDAPEntry
+from .pool import ThreadedConnectionPool
+from .utils import escape_filter_exp
+
+
+class Shard(NamedTuple):
+    """ A part of a crawled subtree that is searched separately. """
+
+    #: The base DN of the search.
+    base: Union[str, LDAPDN]
+    #: The scope of the search.
+    scope: Union[LDAPSearchScope, int] = LDAPSearchScope.SUBTREE
+    #: The filter expression of the search.
+    filter_exp: Optional[str] = None
+
+
+def _combine(filter_exp: Optional[str], *parts: str) -> str:
+    items = list(parts)
+    if filter_exp is not None:
+        if not filter_exp.startswith("("):
+            filter_exp = f"({filter_exp})"
+        items.insert(0, filter_exp)
+    if len(items) == 1:
+        return items[0]
+    return f"(&{''.join(items)})"
+
+
+def child_shards(
+    base: Union[str, LDAPDN],
+    children: Iterable[Union[str, LDAPDN, LDAPEntry]],
+    filter_exp: Optional[str] = None,
+) -> List[Shard]:
+    """
+    Partition a subtree by the one-level children of its base: a shard
+    for the base entry itself, and a subtree shard for every child.
+
+    :param str|LDAPDN base: the base DN of the subtree.
+    :param children: the DNs or the entries of the children of the base \
+    (e.g. the result of a one-level search with `["1.1"]` attrlist).
+    :param str filter_exp: the filter expression of the crawl.
+    :return: the list of the shards.
+    :rtype: list
+    """
+    shards = [Shard(base, LDAPSearchScope.BASE, filter_exp)]
+    for child in children:
+        dn = child.dn if isinstance(child, LDAPEntry) else child
+        shards.append(Shard(dn, LDAPSearchScope.SUBTREE, filter_exp))
+    return shards
+
+
+def range_shards(
+    base: Union[str, LDAPDN],
+    attribute: str,
+    bounds: Iterable[Any],
+    filter_exp: Optional[str] = None,
+    scope: Union[LDAPSearchScope, int] = LDAPSearchScope.SUBTREE,
+) -> List[Shard]:
+    """
+    Partition a subtree by value ranges of an (indexed) attribute that has
+    ordering matching rule (e.g. uSNChanged, or sAMAccountName with
+    letters as bounds). The ranges are split at the sorted `bounds`, a
+    range contains the values that are greater than or equal to its lower
+    bound and less than its upper bound. The entries without the attribute
+    are in a separate shard.
+
+    :param str|LDAPDN base: the base DN of the subtree.
+    :param str attribute: the name of the attribute.
+    :param bounds: the values that split the ranges.
+    :param str filter_exp: the filter expression of the crawl.
+    :param int scope: the scope of the crawl.
+    :return: the list of the shards.
+    :rtype: list
+    """
+    values = [escape_filter_exp(str(bound)) for bound in bounds]
+    shards = [Shard(base, scope, _combine(filter_exp, f"(!({attribute}=*))"))]
+    lower = f"({attribute}=*)"
+    for value in values:
+        upper = f"(!({attribute}>={value}))"
+        shards.append(Shard(base, scope, _combine(filter_exp, lower, upper)))
+        lower = f"({attribute}>={value})"
+    shards.append(Shard(base, scope, _combine(filter_exp, lower)))
+    return shards
+
+
+class _Failure(NamedTuple):
+    exc: BaseException
+
+
+class Crawler:
+    """
+    Parallel crawler of a partitioned subtree. The shards are searched
+    concurrently with paged searches on the connections of a
+    :class:`ThreadedConnectionPool`, and the entries are merged into a
+    single stream in the order of their arrival. The crawler is an
+    iterable of the entries, every iteration starts a new crawl.
+
+    :param ThreadedConnectionPool pool: the pool of the connections.
+    :param shards: the :class:`Shard` objects of the crawl (e.g. from \
+    :func:`child_shards` or :func:`range_shards`).
+    :param list attrlist: the list of the attributes of the entries.
+    :param int page_size: the size of the pages of the searches.
+    :param float timeout: time limit in seconds of waiting for the next \
+    message of a search.
+    :param bool dedup: skip the entries that are already returned by \
+    another shard (the shards might overlap).
+    :param int max_workers: the number of the concurrent searches, \
+    by default the maximal number of connections of the pool.
+    :param int buffer_size: the maximal number of entries that are \
+    received, but not processed yet.
+    :raises ValueError: if `page_size`, `max_workers` or `buffer_size` is \
+    not positive.
+    """
+
+    def __init__(
+        self,
+        pool: ThreadedConnectionPool,
+        shards: Iterable[Shard],
+        attrlist: Optional[List[str]] = None,
+        page_size: int = 500,
+        timeout: Optional[float] = None,
+        dedup: bool = True,
+        max_workers: Optional[int] = None,
+        buffer_size: int = 1000,
+    ) -> None:
+        if max_workers is None:
+            max_workers = pool.max_connection
+        for name, value in (
+            ("page_size", page_size),
+            ("max_workers", max_workers),
+            ("buffer_size", buffer_size),
+        ):
+            if not isinstance(value, int) or value < 1:
+                raise ValueError(f"The {name} must be a positive int.")
+        self.__pool = pool
+        self.__shards = list(shards)
+        self.__attrlist = attrlist
+        self.__page_size = page_size
+        self.__timeout = timeout
+        self.__dedup = dedup
+        self.__max_workers = max_workers
+        self.__buffer_size = buffer_size
+        self.__duplicates = 0
+
+    @property
+    def shards(self) -> List[Shard]:
+        """The list of the shards of the crawl."""
+        return self.__shards
+
+    @property
+    def duplicates(self) -> int:
+        """The number of the skipped duplicated entries of the last crawl."""
+        return self.__duplicates
+
+    def __worker(
+        self, shards: "queue.Queue[Shard]", results: queue.Queue, stop: threading.Event
+    ) -> None:
+        try:
+            with self.__pool.spawn() as conn:
+                while not stop.is_set():
+                    try:
+                        shard = shards.get_nowait()
+                    except queue.Empty:
+                        break
+                    search = conn.resumable_paged_search(
+                        shard.base,
+                        shard.scope,
+                        shard.filter_exp,
+                        self.__attrlist,
+                        self.__timeout,
+                        self.__page_size,
+                    )
+                    try:
+                        for entry in search:
+                            while not stop.is_set():
+                                try:
+                                    results.put(entry, timeout=0.1)
+                                    break
+                                except queue.Full:
+                                    continue
+                            if stop.is_set():
+                                break
+                    finally:
+                        search.close()
+        except BaseException as exc:
+            results.put(_Failure(exc))
+        finally:
+            results.put(None)
+
+    def __iter__(self) -> Iterator[LDAPEntry]:
+        shards: "queue.Queue[Shard]" = queue.Queue()
+        for shard in self.__shards:
+            shards.put(shard)
+        results: queue.Queue = queue.Queue(self.__buffer_size)
+        stop = threading.Event()
+        num = min(self.__max_workers, len(self.__shards))
+        workers = [
+            threading.Thread(target=self.__worker, args=(shards, results, stop))
+            for _ in range(num)
+        ]
+        seen = set()
+        self.__duplicates = 0
+        for worker in workers:
+            worker.start()
+        try:
+            running = num
+            while running:
+                item = results.get()
+                if item is None:
+                    running -= 1
+                elif isinstance(item, _Failure):
+                    raise item.exc
+                elif self.__dedup:
+                    key = str(item.dn).lower()
+                    if key in seen:
+                        self.__duplicates += 1
+                        continue
+                    seen.add(key)
+                    yield item
+                else:
+                    yield item
+        finally:
+            stop.set()
+            for worker in workers:
+                while worker.is_alive():
+                    # Unblock the workers that are waiting for free space.
+                    try:
+                        results.get_nowait()
+                    except queue.Empty:
+                        pass
+                    worker.join(0.01)
@@ -0,0 +1,281 @@
+import heapq
+import pickle
+import tempfile
+from operator import itemgetter
+from typing import (
+    Any,
+    BinaryIO,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from .ldapchange import LDAPChange, LDAPChangeType
+from .ldapdn import LDAPDN
+from .ldapentry import LDAPEntry, LDAPModOp
+
+DNKey = Tuple[Tuple[Tuple[str, str], ...], ...]
+Record = Tuple[DNKey, str, Dict[str, List[Any]]]
+
+
+def dn_sort_key(dn: Union[str, LDAPDN]) -> DNKey:
+    """
+    Create a normalised sort key from a distinguished name. The attribute
+    types and values are lower-cased and the RDNs are reversed, therefore
+    sorting by this key places every entry before its descendants.
+
+    :param str|LDAPDN dn: the distinguished name.
+    :return: the sort key of the DN.
+    :rtype: tuple
+    """
+    if not isinstance(dn, LDAPDN):
+        dn = LDAPDN(dn)
+    if str(dn) == "":
+        return ()
+    return tuple(
+        tuple(sorted((atype.lower(), value.lower()) for atype, value in rdn))
+        for rdn in reversed(dn.rdns)
+    )
+
+
+def dn_key(dn: Union[str, LDAPDN]) -> str:
+    """
+    Create a normalised lookup key from a distinguished name. The RDNs are
+    reversed and separated by NUL characters, therefore the key of an
+    entry starts with the keys of its ancestors. Unlike tuples, strings
+    cache their hashes, which makes the lookups of the keys cheap.
+
+    :param str|LDAPDN dn: the distinguished name.
+    :return: the lookup key of the DN.
+    :rtype: str
+    """
+    return "\0".join(
+        "\1".join(f"{atype}={value}" for atype, value in rdn)
+        for rdn in dn_sort_key(dn)
+    )
+
+
+def parent_key(key: str) -> str:
+    """
+    Get the lookup key of the parent from a key created by :func:`dn_key`.
+
+    :param str key: the lookup key of a distinguished name.
+    :return: the lookup key of the parent, empty for the root.
+    :rtype: str
+    """
+    return key[: max(key.rfind("\0"), 0)]
+
+
+class _ExternalSorter:
+    """
+    Sort records by their DN keys with a limited number of records kept
+    in memory. Sorted runs are spilled into temporary files and merged
+    during iteration.
+    """
+
+    def __init__(
+        self, buffer_size: int, tmpdir: Optional[str] = None, reverse: bool = False
+    ) -> None:
+        self.__buffer: List[Record] = []
+        self.__runs: List[BinaryIO] = []
+        self.__buffer_size = buffer_size
+        self.__tmpdir = tmpdir
+        self.__reverse = reverse
+
+    def __spill(self) -> None:
+        self.__buffer.sort(key=itemgetter(0), reverse=self.__reverse)
+        run = tempfile.TemporaryFile(dir=self.__tmpdir)
+        for record in self.__buffer:
+            pickle.dump(record, run, pickle.HIGHEST_PROTOCOL)
+        run.seek(0)
+        self.__runs.append(run)
+        self.__buffer = []
+
+    @staticmethod
+    def __read_run(run: BinaryIO) -> Iterator[Record]:
+        try:
+            while True:
+                yield pickle.load(run)
+        except EOFError:
+            return
+        finally:
+            run.close()
+
+    def push(self, record: Record) -> None:
+        self.__buffer.append(record)
+        if len(self.__buffer) >= self.__buffer_size:
+            self.__spill()
+
+    def __iter__(self) -> Iterator[Record]:
+        try:
+            if not self.__runs:
+                self.__buffer.sort(key=itemgetter(0), reverse=self.__reverse)
+                yield from self.__buffer
+                return
+            if self.__buffer:
+                self.__spill()
+            yield from heapq.merge(
+                *(self.__read_run(run) for run in self.__runs),
+                key=itemgetter(0),
+                reverse=self.__reverse,
+            )
+        finally:
+            for run in self.__runs:
+                run.close()
+            self.__runs = []
+            self.__buffer = []
+
+
+def _to_records(
+    entries: Iterable[Any], presorted: bool, buffer_size: int, tmpdir: Optional[str]
+) -> Iterator[Record]:
+    records: Iterator[Record] = (
+        (
+            dn_sort_key(ent.dn),
+            str(ent.dn),
+            {attr: list(vals) for attr, vals in ent.items(exclude_dn=True)},
+        )
+        for ent in entries
+        # Skip LDAPReference objects of a search result.
+        if isinstance(ent, LDAPEntry)
+    )
+    if not presorted:
+        sorter = _ExternalSorter(buffer_size, tmpdir)
+        for rec in records:
+            sorter.push(rec)
+        records = iter(sorter)
+    last_key = None
+    for rec in records:
+        if last_key is not None and rec[0] <= last_key:
+            raise ValueError(
+                f"Entries are not sorted by DN or the DN '{rec[1]}' is not unique."
+            )
+        last_key = rec[0]
+        yield rec
+
+
+def _normalise_value(value: Any, ignore_case: bool) -> Any:
+    if isinstance(value, (bytes, bytearray)):
+        try:
+            value = bytes(value).decode("UTF-8")
+        except UnicodeDecodeError:
+            return bytes(value)
+    return str(value).lower() if ignore_case else str(value)
+
+
+def _create_entry(dn: str, attrs: Dict[str, List[Any]]) -> LDAPEntry:
+    entry = LDAPEntry(dn)
+    for attr, vals in attrs.items():
+        if vals:
+            entry[attr] = vals
+    return entry
+
+
+def _diff_attributes(
+    dn: str,
+    source: Dict[str, List[Any]],
+    target: Dict[str, List[Any]],
+    ignore_case: Set[str],
+) -> Optional[LDAPChange]:
+    entry = LDAPEntry(dn)
+    changed = False
+    old_attrs = {attr.lower(): vals for attr, vals in source.items()}
+    for attr, vals in target.items():
+        fold = attr.lower() in ignore_case
+        old_vals = {
+            _normalise_value(val, fold): val
+            for val in old_attrs.pop(attr.lower(), [])
+        }
+        new_vals = {_normalise_value(val, fold): val for val in vals}
+        if not new_vals:
+            if old_vals:
+                entry.change_attribute(attr, LDAPModOp.DELETE)
+                changed = True
+            continue
+        added = [val for key, val in new_vals.items() if key not in old_vals]
+        deleted = [val for key, val in old_vals.items() if key not in new_vals]
+        if not old_vals:
+            entry.change_attribute(attr, LDAPModOp.ADD, *added)
+        elif added and len(deleted) == len(old_vals):
+            # None of the previous values are kept, one replace is enough.
+            entry.change_attribute(attr, LDAPModOp.REPLACE, *new_vals.values())
+        else:
+            if added:
+                entry.change_attribute(attr, LDAPModOp.ADD, *added)
+            if deleted:
+                entry.change_attribute(attr, LDAPModOp.DELETE, *deleted)
+        changed = changed or bool(added or deleted)
+    for attr, vals in source.items():
+        if attr.lower() in old_attrs and vals:
+            entry.change_attribute(attr, LDAPModOp.DELETE)
+            changed = True
+    return LDAPChange(LDAPChangeType.MODIFY, entry) if changed else None
+
+
+def diff_entries(
+    source: Iterable[LDAPEntry],
+    target: Iterable[LDAPEntry],
+    presorted: bool = False,
+    buffer_size: int = 10000,
+    tmpdir: Optional[str] = None,
+    ignore_case: Iterable[str] = (),
+) -> Iterator[LDAPChange]:
+    """
+    Compare two streams of LDAP entries (e.g. an :class:`LDIFReader` and
+    the result of a :meth:`LDAPConnection.paged_search`) and generate the
+    change records that transform the `source` into the `target`.
+
+    The entries are joined by their normalised DNs. Unless the streams are
+    already ordered by :func:`bonsai.diff.dn_sort_key` (`presorted` is
+    True), they are sorted with an external sort that keeps at most
+    `buffer_size` entries in memory and spills the rest into temporary
+    files.
+
+    The add and modify records are generated in DN order (parents first),
+    while the delete records are generated at the end of the stream in
+    reversed DN order (children first), so that the records can be applied
+    in the generated order. The attribute values are compared by their
+    string representations exactly, except for the attributes listed in
+    `ignore_case` that are compared case-insensitively (e.g. the ones with
+    caseIgnoreMatch equality rule in the schema, like `cn` or `mail`).
+
+    :param source: the iterable of the original entries.
+    :param target: the iterable of the desired entries.
+    :param bool presorted: set True if both iterables are already sorted.
+    :param int buffer_size: the maximal number of entries that are sorted \
+    in memory.
+    :param str tmpdir: the directory of the temporary files.
+    :param ignore_case: the names of the attributes whose values are \
+    compared case-insensitively.
+    :return: a generator of :class:`LDAPChange` objects.
+    :raises ValueError: if a DN is not unique in one of the streams or \
+    the streams are not sorted while `presorted` is True.
+    """
+    if not isinstance(buffer_size, int) or buffer_size < 1:
+        raise ValueError("The buffer_size must be a positive int.")
+    old_records = _to_records(source, presorted, buffer_size, tmpdir)
+    new_records = _to_records(target, presorted, buffer_size, tmpdir)
+    deletes = _ExternalSorter(buffer_size, tmpdir, reverse=True)
+    folded = {attr.lower() for attr in ignore_case}
+    old = next(old_records, None)
+    new = next(new_records, None)
+    while old is not None or new is not None:
+        if old is not None and (new is None or old[0] < new[0]):
+            deletes.push((old[0], old[1], {}))
+            old = next(old_records, None)
+        elif new is not None and (old is None or new[0] < old[0]):
+            yield LDAPChange(LDAPChangeType.ADD, _create_entry(new[1], new[2]))
+            new = next(new_records, None)
+        elif old is not None and new is not None:
+            change = _diff_attributes(new[1], old[2], new[2], folded)
+            if change is not None:
+                yield change
+            old = next(old_records, None)
+            new = next(new_records, None)
+    for _, dn, _ in deletes:
+        yield LDAPChange(LDAPChangeType.DELETE, LDAPEntry(dn))
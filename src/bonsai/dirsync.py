@@ -0,0 +1,231 @@
+import uuid
+from collections import deque
+from enum import IntFlag
+from typing import Any, Deque, List, NamedTuple, Optional, Tuple, Union
+
+from .ber import (
+    TAG_INTEGER,
+    TAG_OCTET_STRING,
+    BERDecodingError,
+    decode_integer,
+    decode_sequence,
+    encode_integer,
+    encode_octet_string,
+    encode_sequence,
+    find_control,
+)
+from .ldapdn import LDAPDN
+from .ldapentry import LDAPEntry, LDAPModOp
+
+MYPY = False
+
+if MYPY:
+    from .ldapconnection import BaseLDAPConnection
+
+#: The OID of Active Directory's directory synchronization control.
+LDAP_SERVER_DIRSYNC_OID = "1.2.840.113556.1.4.841"
+
+Control = Tuple[str, bool, Optional[bytes]]
+
+
+class DirSyncFlag(IntFlag):
+    """ Flags of the directory synchronization control. """
+
+    #: Return only the objects and attributes that are readable by the
+    #: user, without the need of the replicating directory changes right.
+    OBJECT_SECURITY = 0x1
+    #: Return the parent objects before their children.
+    ANCESTORS_FIRST_ORDER = 0x800
+    #: Do not return the secret data (e.g. password hashes).
+    PUBLIC_DATA_ONLY = 0x2000
+    #: Return only the added and removed values of the multi-valued
+    #: linked attributes (e.g. member) instead of every value.
+    INCREMENTAL_VALUES = 0x80000000
+
+
+class DirSyncChange(NamedTuple):
+    """ A changed object returned by a directory synchronization. """
+
+    #: The changed attributes of the object as modifications: the values
+    #: of a changed attribute are replaced, the incrementally returned
+    #: values are added to or deleted from the attribute.
+    entry: LDAPEntry
+    #: The objectGUID of the object (not listed in the `entry`), if it's
+    #: returned.
+    guid: Optional[uuid.UUID]
+    #: True, if the object is deleted.
+    deleted: bool
+
+
+def encode_dirsync_request(
+    flags: DirSyncFlag, max_bytes: int, cookie: Optional[bytes]
+) -> bytes:
+    """Encode the value of a directory synchronization control."""
+    value = int(flags)
+    if value >= 0x80000000:
+        # The flags are a signed 32-bit integer.
+        value -= 0x100000000
+    return encode_sequence(
+        encode_integer(value),
+        encode_integer(max_bytes),
+        encode_octet_string(cookie or b""),
+    )
+
+
+def decode_dirsync_response(value: bytes) -> Tuple[bool, bytes]:
+    """
+    Decode the value of a directory synchronization response control.
+
+    :return: whether there are more changes to return and the cookie.
+    """
+    items = decode_sequence(value)
+    if (
+        len(items) != 3
+        or items[0][0] != TAG_INTEGER
+        or items[2][0] != TAG_OCTET_STRING
+    ):
+        raise BERDecodingError("Invalid directory synchronization control.")
+    return decode_integer(items[0][1]) != 0, items[2][1]
+
+
+def _parse_range(name: str) -> Tuple[str, Optional[int]]:
+    """
+    Split the attribute name of an incrementally returned linked attribute
+    (e.g. `member;range=1-1`) into the attribute name and the modification
+    type of its values.
+    """
+    attr, _, option = name.partition(";")
+    if option.lower() == "range=1-1":
+        return attr, LDAPModOp.ADD
+    elif option.lower() == "range=0-0":
+        return attr, LDAPModOp.DELETE
+    return name, None
+
+
+def _is_true(values: List[Any]) -> bool:
+    return bool(values) and (values[0] is True or str(values[0]).upper() == "TRUE")
+
+
+class DirSync:
+    """
+    Active Directory's directory synchronization, created by
+    :meth:`LDAPConnection.dirsync_search`. It is an iterator of
+    :class:`DirSyncChange` objects, or an asynchronous iterator for the
+    asynchronous connections. While the server reports that there are more
+    changes, the search is continued automatically with the new cookie.
+
+    The :attr:`cookie` represents the state of the synchronized objects,
+    store it after the iteration is finished to get only the changes that
+    happened since with a later synchronization.
+    """
+
+    def __init__(
+        self,
+        conn: "BaseLDAPConnection",
+        base: Optional[Union[str, LDAPDN]],
+        filter_exp: Optional[str],
+        attrlist: Optional[List[str]],
+        flags: DirSyncFlag,
+        cookie: Optional[bytes],
+        max_bytes: int,
+        timeout: Optional[float],
+    ) -> None:
+        self.__conn = conn
+        self.__search_args = (base, 2, filter_exp, attrlist)
+        self.__flags = DirSyncFlag(flags)
+        self.__cookie = cookie
+        self.__max_bytes = max_bytes
+        self.__timeout = timeout
+        self.__finished = False
+        self.__buffer: Deque[DirSyncChange] = deque()
+        self.__messages: Any = None
+        self.__start()
+
+    def __start(self) -> None:
+        value = encode_dirsync_request(self.__flags, self.__max_bytes, self.__cookie)
+        msg_id = self.__conn._send_stream_search(
+            *self.__search_args,
+            self.__timeout,
+            [(LDAP_SERVER_DIRSYNC_OID, True, value)],
+        )
+        self.__messages = self.__conn._stream_messages(msg_id, self.__timeout)
+
+    def __process(self, msg: Tuple[str, Any, List[Control]]) -> None:
+        msgtype, obj, ctrls = msg
+        if msgtype == "entry":
+            self.__buffer.append(self.__create_change(obj))
+        elif msgtype == "result":
+            value = find_control(ctrls, LDAP_SERVER_DIRSYNC_OID)
+            if value is None:
+                raise BERDecodingError(
+                    "Missing directory synchronization response control."
+                )
+            more_data, self.__cookie = decode_dirsync_response(value)
+            if more_data:
+                self.__start()
+            else:
+                self.__finished = True
+
+    @staticmethod
+    def __create_change(obj: LDAPEntry) -> DirSyncChange:
+        entry = LDAPEntry(obj.dn)
+        guid = None
+        deleted = False
+        for name, values in obj.items():
+            if name.lower() == "dn":
+                continue
+            attr, optype = _parse_range(name)
+            if optype is not None:
+                entry.change_attribute(attr, optype, *values)
+                continue
+            if attr.lower() == "objectguid":
+                if values:
+                    guid = uuid.UUID(bytes_le=bytes(values[0]))
+                continue
+            elif attr.lower() == "isdeleted":
+                deleted = _is_true(values)
+            if values:
+                entry.change_attribute(attr, LDAPModOp.REPLACE, *values)
+            else:
+                # The attribute is removed from the object.
+                entry.change_attribute(attr, LDAPModOp.DELETE)
+        return DirSyncChange(entry, guid, deleted)
+
+    @property
+    def cookie(self) -> Optional[bytes]:
+        """The cookie of the last finished page of changes."""
+        return self.__cookie
+
+    def __iter__(self) -> "DirSync":
+        if not hasattr(self.__messages, "__next__"):
+            raise TypeError("Use async for with an asynchronous connection.")
+        return self
+
+    def __next__(self) -> DirSyncChange:
+        while not self.__buffer:
+            if self.__finished:
+                raise StopIteration
+            self.__process(next(self.__messages))
+        return self.__buffer.popleft()
+
+    def __aiter__(self) -> "DirSync":
+        if not hasattr(self.__messages, "__anext__"):
+            raise TypeError("Use for with a synchronous connection.")
+        return self
+
+    async def __anext__(self) -> DirSyncChange:
+        while not self.__buffer:
+            if self.__finished:
+                raise StopAsyncIteration
+            self.__process(await self.__messages.__anext__())
+        return self.__buffer.popleft()
+
+    def close(self) -> Any:
+        """
+        Stop the synchronization, and abandon the search on the server.
+        For asynchronous iterators it returns an awaitable.
+        """
+        self.__finished = True
+        if hasattr(self.__messages, "aclose"):
+            return self.__messages.aclose()
+        return self.__messages.close()
@@ -10,6 +10,7 @@ __all__ = [
     "ChangeAfterReset",
     "ClosedConnection",
     "ConnectionError",
+    "FilterError",
     "InsufficientAccess",
     "InsufficientPasswordQuality",
     "InvalidDN",
@@ -62,6 +63,12 @@ class InvalidDN(LDAPError):
     code = 0x22
 
 
+class FilterError(LDAPError):
+    """Raised, when a search filter expression is invalid."""
+
+    code = -7
+
+
 class ConnectionError(LDAPError):
     """Raised, when client is not able to connect to the server."""
 
@@ -313,6 +320,8 @@ def _get_error(code: int) -> type:
         return AffectsMultipleDSA
     elif code == -5 or code == 0x55:
         return TimeoutError.create(code)
+    elif code == -7:
+        return FilterError
     elif code == -100:
         return InvalidMessageID
     elif code == -101:
@@ -1,4 +1,4 @@
-from typing import Any, Optional, Union
+from typing import Any, Iterable, List, Optional, Union
 from gevent.socket import wait_readwrite
 
 from ..ldapconnection import BaseLDAPConnection, LDAPSearchScope
@@ -26,10 +26,30 @@ class GeventLDAPConnection(BaseLDAPConnection):
             res = self.get_result(msg_id)
             if res is not None:
                 return res
-            wait_readwrite(self.fileno(), timeout=timeout)
+            try:
+                wait_readwrite(self.fileno(), timeout=timeout)
+            except BaseException:
+                # Timed out or the greenlet is killed, the operation is
+                # still in progress.
+                self._abandon_all((msg_id,))
+                raise
 
     def _evaluate(self, msg_id: int, timeout: Optional[float] = None) -> Any:
-        return self._poll(msg_id, timeout)
+        return self._poll(msg_id, self._watchdog_timeout(msg_id, timeout))
+
+    def _cached_result(self, result: Any) -> Any:
+        return result
+
+    def _get_entries(self, dns: Iterable[Union[str, LDAPDN]],
+                     attrlist: Optional[List[str]], timeout: Optional[float],
+                     max_pending: int, ordered: bool) -> Any:
+        if not ordered:
+            raise ValueError("Only AIOLDAPConnection returns the entries in "
+                             "completion order.")
+        return self._iter_entries(dns, attrlist, timeout, max_pending)
+
+    def _stream_messages(self, msg_id: int, timeout: Optional[float]) -> Any:
+        return self._iter_messages(msg_id, timeout)
 
     def delete(self, dname: Union[str, LDAPDN], timeout: Optional[float] = None,
                recursive: bool = False) -> bool:
@@ -0,0 +1,130 @@
+from enum import IntEnum
+from typing import Any, Optional, Union
+
+from .ldapconnection import BaseLDAPConnection
+from .ldapdn import LDAPDN
+from .ldapentry import LDAPEntry
+
+
+class LDAPChangeType(IntEnum):
+    """Enumeration for the types of LDAP change records."""
+
+    ADD = 0  #: For adding a new entry to the directory.
+    DELETE = 1  #: For removing an existing entry from the directory.
+    MODIFY = 2  #: For modifying the attributes of an existing entry.
+    MODDN = 3  #: For renaming or moving an existing entry.
+
+
+class LDAPChange:
+    """
+    A change record that describes a single modification of the directory.
+
+    The `entry` parameter holds the data of the change: the entire new entry
+    for :attr:`LDAPChangeType.ADD`, an entry with attribute changes (made
+    by :meth:`LDAPEntry.change_attribute` for instance) for
+    :attr:`LDAPChangeType.MODIFY`, while only the DN is used for
+    :attr:`LDAPChangeType.DELETE` and :attr:`LDAPChangeType.MODDN`.
+
+    :param LDAPChangeType changetype: the type of the change.
+    :param LDAPEntry entry: the entry of the change.
+    :param str|LDAPDN newdn: the new DN of the entry, mandatory for \
+    :attr:`LDAPChangeType.MODDN`.
+    :param bool delete_old_rdn: remove the old RDN with renaming.
+    :raises TypeError: if the `changetype` is not an LDAPChangeType or \
+    the `entry` is not an LDAPEntry.
+    :raises ValueError: if the `newdn` is missing for a \
+    :attr:`LDAPChangeType.MODDN` or set for another type of change.
+    """
+
+    __slots__ = ("__changetype", "__entry", "__newdn", "__delete_old_rdn")
+
+    def __init__(
+        self,
+        changetype: LDAPChangeType,
+        entry: LDAPEntry,
+        newdn: Optional[Union[str, LDAPDN]] = None,
+        delete_old_rdn: bool = True,
+    ) -> None:
+        if not isinstance(changetype, LDAPChangeType):
+            raise TypeError("The changetype must be an LDAPChangeType.")
+        if not isinstance(entry, LDAPEntry):
+            raise TypeError("The entry must be an LDAPEntry.")
+        if (newdn is None) == (changetype == LDAPChangeType.MODDN):
+            raise ValueError("The newdn must be set for MODDN changes only.")
+        if newdn is not None and not isinstance(newdn, LDAPDN):
+            newdn = LDAPDN(newdn)
+        self.__changetype = changetype
+        self.__entry = entry
+        self.__newdn = newdn
+        self.__delete_old_rdn = bool(delete_old_rdn)
+
+    def apply(
+        self, conn: "BaseLDAPConnection", timeout: Optional[float] = None
+    ) -> Any:
+        """
+        Send the change to the directory server using the given connection.
+        With an asynchronous connection the return value has to be awaited.
+
+        :param BaseLDAPConnection conn: an open LDAP connection.
+        :param float timeout: time limit in seconds for the operation.
+        :return: True, if the operation is finished.
+        :rtype: bool
+        """
+        if self.__changetype == LDAPChangeType.ADD:
+            return conn.add(self.__entry, timeout)
+        elif self.__changetype == LDAPChangeType.DELETE:
+            return conn.delete(self.__entry.dn, timeout)
+        self.__entry.connection = conn
+        if self.__newdn is not None:
+            # Only the MODDN changes have a new DN.
+            return self.__entry.rename(self.__newdn, timeout, self.__delete_old_rdn)
+        return self.__entry.modify(timeout)
+
+    def _send(self, conn: BaseLDAPConnection) -> int:
+        """
+        Start the operation on the connection without waiting for its
+        result.
+
+        :param BaseLDAPConnection conn: an open LDAP connection.
+        :return: the message ID of the operation.
+        :rtype: int
+        """
+        if self.__changetype == LDAPChangeType.ADD:
+            return super(BaseLDAPConnection, conn).add(self.__entry)
+        elif self.__changetype == LDAPChangeType.DELETE:
+            return super(BaseLDAPConnection, conn).delete(str(self.__entry.dn))
+        self.__entry.connection = conn
+        if self.__changetype == LDAPChangeType.MODDN:
+            return super(LDAPEntry, self.__entry).rename(
+                str(self.__newdn), self.__delete_old_rdn
+            )
+        return super(LDAPEntry, self.__entry).modify()
+
+    def __repr__(self) -> str:
+        """The representation of LDAPChange class."""
+        return f"<LDAPChange {self.__changetype.name} {self.__entry.dn}>"
+
+    @property
+    def changetype(self) -> LDAPChangeType:
+        """The type of the change. The attribute is read-only."""
+        return self.__changetype
+
+    @property
+    def entry(self) -> LDAPEntry:
+        """The entry of the change. The attribute is read-only."""
+        return self.__entry
+
+    @property
+    def dn(self) -> LDAPDN:
+        """The distinguished name of the changed entry."""
+        return self.__entry.dn
+
+    @property
+    def newdn(self) -> Optional[LDAPDN]:
+        """The new distinguished name of a MODDN change, otherwise None."""
+        return self.__newdn
+
+    @property
+    def delete_old_rdn(self) -> bool:
+        """Whether the old RDN is removed with a MODDN change."""
+        return self.__delete_old_rdn
@@ -10,6 +10,10 @@ from .ldapurl import LDAPURL
 from .ldapconnection import BaseLDAPConnection, LDAPConnection
 from .ldapconnection import LDAPSearchScope
 from .ldapentry import LDAPEntry
+from .searchcache import SearchCache, SearchCoalescer
+from .metrics import MetricsRegistry
+from .tracing import Tracer, _TracerGroup
+from .watchdog import Watchdog
 from .asyncio import AIOLDAPConnection
 
 
@@ -44,6 +48,12 @@ class LDAPClient:
         self.__ignore_referrals = True
         self.__managedsait_ctrl = False
         self.__sasl_sec_props: Optional[str] = None
+        self.__search_cache: Optional[SearchCache] = None
+        self.__search_coalescer: Optional[SearchCoalescer] = None
+        self.__watchdog: Optional[Watchdog] = None
+        self.__tracer: Optional[Tracer] = None
+        self.__metrics: Optional[MetricsRegistry] = None
+        self.__hooks: Optional[Tracer] = None
 
     def set_raw_attributes(self, raw_list: List[str]) -> None:
         """
@@ -359,6 +369,90 @@ class LDAPClient:
             raise TypeError("Parameter's type must be bool.")
         self.__managedsait_ctrl = val
 
+    def set_search_cache(self, cache: Optional[SearchCache]) -> None:
+        """
+        Set a cache for the results of :meth:`LDAPConnection.search` on
+        every connection created by this client. The cached results are
+        invalidated by the add, delete, modify and rename operations of
+        these connections. Paged and virtual list view searches are not
+        cached.
+
+        :param SearchCache|None cache: the cache object, or None to \
+        disable caching.
+        :raises TypeError: if the parameter is not a SearchCache or None.
+        """
+        if cache is not None and not isinstance(cache, SearchCache):
+            raise TypeError("Parameter's type must be SearchCache or None.")
+        self.__search_cache = cache
+
+    def set_search_coalescer(self, coalescer: Optional[SearchCoalescer]) -> None:
+        """
+        Set a single-flight layer for :meth:`LDAPConnection.search` on
+        every connection created by this client. Identical searches that
+        are started while one of them is in progress share a single
+        operation on the server.
+
+        :param SearchCoalescer|None coalescer: the coalescer object, or \
+        None to disable coalescing.
+        :raises TypeError: if the parameter is not a SearchCoalescer or None.
+        """
+        if coalescer is not None and not isinstance(coalescer, SearchCoalescer):
+            raise TypeError("Parameter's type must be SearchCoalescer or None.")
+        self.__search_coalescer = coalescer
+
+    def set_watchdog(self, watchdog: Optional[Watchdog]) -> None:
+        """
+        Set a watchdog for the in-flight operations of every connection
+        created by this client. The operations that are older than the
+        deadline of the watchdog are abandoned and fail with timeout
+        error, and the connection pools close the connections that have
+        stuck operations.
+
+        :param Watchdog|None watchdog: the watchdog object, or None to \
+        disable it.
+        :raises TypeError: if the parameter is not a Watchdog or None.
+        """
+        if watchdog is not None and not isinstance(watchdog, Watchdog):
+            raise TypeError("Parameter's type must be Watchdog or None.")
+        self.__watchdog = watchdog
+
+    def set_tracer(self, tracer: Optional[Tracer]) -> None:
+        """
+        Set tracing hooks for the operations of every connection created
+        by this client. The hooks get the type, the parameters, the
+        timing and the result of the operations.
+
+        :param Tracer|None tracer: the tracer object, or None to disable \
+        tracing.
+        :raises TypeError: if the parameter is not a Tracer or None.
+        """
+        if tracer is not None and not isinstance(tracer, Tracer):
+            raise TypeError("Parameter's type must be Tracer or None.")
+        self.__tracer = tracer
+        self.__update_hooks()
+
+    def set_metrics(self, metrics: Optional[MetricsRegistry]) -> None:
+        """
+        Set a registry that aggregates the metrics of the operations of
+        every connection created by this client. It can be used together
+        with the tracer that is set by :meth:`set_tracer`.
+
+        :param MetricsRegistry|None metrics: the registry object, or None \
+        to disable collecting metrics.
+        :raises TypeError: if the parameter is not a MetricsRegistry or None.
+        """
+        if metrics is not None and not isinstance(metrics, MetricsRegistry):
+            raise TypeError("Parameter's type must be MetricsRegistry or None.")
+        self.__metrics = metrics
+        self.__update_hooks()
+
+    def __update_hooks(self) -> None:
+        hooks = [hook for hook in (self.__tracer, self.__metrics) if hook is not None]
+        if len(hooks) > 1:
+            self.__hooks = _TracerGroup(*hooks)
+        else:
+            self.__hooks = hooks[0] if hooks else None
+
     def set_url(self, url: Union[LDAPURL, str]) -> None:
         """
         Set LDAP url for the client.
@@ -609,6 +703,56 @@ class LDAPClient:
     def managedsait(self, value: bool) -> None:
         self.set_managedsait(value)
 
+    @property
+    def search_cache(self) -> Optional[SearchCache]:
+        """The cache of search results, None if caching is disabled."""
+        return self.__search_cache
+
+    @search_cache.setter
+    def search_cache(self, value: Optional[SearchCache]) -> None:
+        self.set_search_cache(value)
+
+    @property
+    def search_coalescer(self) -> Optional[SearchCoalescer]:
+        """The single-flight layer of searches, None if it's disabled."""
+        return self.__search_coalescer
+
+    @search_coalescer.setter
+    def search_coalescer(self, value: Optional[SearchCoalescer]) -> None:
+        self.set_search_coalescer(value)
+
+    @property
+    def metrics(self) -> Optional[MetricsRegistry]:
+        """The registry of the aggregated metrics, None if it's disabled."""
+        return self.__metrics
+
+    @metrics.setter
+    def metrics(self, value: Optional[MetricsRegistry]) -> None:
+        self.set_metrics(value)
+
+    @property
+    def _hooks(self) -> Optional[Tracer]:
+        """The tracer and the metrics registry combined."""
+        return self.__hooks
+
+    @property
+    def tracer(self) -> Optional[Tracer]:
+        """The tracing hooks of the operations, None if tracing is disabled."""
+        return self.__tracer
+
+    @tracer.setter
+    def tracer(self, value: Optional[Tracer]) -> None:
+        self.set_tracer(value)
+
+    @property
+    def watchdog(self) -> Optional[Watchdog]:
+        """The watchdog of the in-flight operations, None if it's disabled."""
+        return self.__watchdog
+
+    @watchdog.setter
+    def watchdog(self, value: Optional[Watchdog]) -> None:
+        self.set_watchdog(value)
+
     @property
     def sasl_security_properties(self) -> Optional[str]:
         """The SASL security properties."""
@@ -1,11 +1,39 @@
+import inspect
+import time
 from abc import ABCMeta, abstractmethod
+from collections import deque
 from enum import IntEnum
-from typing import Union, Any, List, Tuple, Optional
+from typing import (
+    Union,
+    Any,
+    AsyncIterator,
+    Deque,
+    Iterable,
+    Iterator,
+    Dict,
+    List,
+    Tuple,
+    Optional,
+    Hashable,
+)
 
 from bonsai._bonsai import ldapconnection, ldapsearchiter
 from .ldapdn import LDAPDN
 from .ldapentry import LDAPEntry
-from .errors import UnwillingToPerform, NotAllowedOnNonleaf
+from .errors import LDAPError, UnwillingToPerform, NotAllowedOnNonleaf, NoSuchObjectError
+from .checkpoint import ResumablePagedSearch, SearchCheckpoint
+from .dirsync import DirSync, DirSyncFlag
+from .preparedsearch import PreparedSearch
+from .psearch import (
+    LDAP_SERVER_NOTIFICATION_OID,
+    PSEARCH_OID,
+    ChangeType,
+    PersistentSearch,
+    encode_psearch_request,
+)
+from .syncrepl import SyncMode, SyncReplConsumer
+from .tracing import OperationTrace, Tracer, _end_trace, _start_trace
+from .watchdog import OperationInfo
 
 MYPY = False
 
@@ -26,6 +54,7 @@ class LDAPSearchScope(IntEnum):
 class BaseLDAPConnection(ldapconnection, metaclass=ABCMeta):
     def __init__(self, client: "LDAPClient", is_async: bool = False) -> None:
         self.__client = client
+        self.__traces: Dict[int, OperationTrace] = {}
         super().__init__(client, is_async)
 
     def __enter__(self) -> "BaseLDAPConnection":
@@ -37,7 +66,7 @@ class BaseLDAPConnection(ldapconnection, metaclass=ABCMeta):
         self.close()
 
     def add(self, entry: LDAPEntry, timeout: Optional[float] = None) -> Any:
-        return self._evaluate(super().add(entry), timeout)
+        return self._evaluate_write(super().add(entry), timeout, str(entry.dn))
 
     def delete(
         self,
@@ -47,7 +76,7 @@ class BaseLDAPConnection(ldapconnection, metaclass=ABCMeta):
     ) -> Any:
         if isinstance(dname, LDAPDN):
             dname = str(dname)
-        return self._evaluate(super().delete(dname, recursive), timeout)
+        return self._evaluate_write(super().delete(dname, recursive), timeout, dname)
 
     def open(self, timeout: Optional[float] = None) -> "BaseLDAPConnection":
         return self._evaluate(super().open(), timeout)
@@ -147,10 +176,178 @@ class BaseLDAPConnection(ldapconnection, metaclass=ABCMeta):
         attrsonly: bool = False,
         sort_order: Optional[List[str]] = None,
     ) -> Any:
-        return self.__base_search(
-            base, scope, filter_exp, attrlist, timeout, sizelimit, attrsonly, sort_order
+        cache = self.__client.search_cache
+        coalescer = self.__client.search_coalescer
+        if cache is None and coalescer is None:
+            return self.__base_search(
+                base,
+                scope,
+                filter_exp,
+                attrlist,
+                timeout,
+                sizelimit,
+                attrsonly,
+                sort_order,
+            )
+        _base = str(base) if base is not None else str(self.__client.url.basedn)
+        _scope = scope if scope is not None else self.__client.url.scope_num
+        key = self.__get_cache_key(
+            _base, _scope, filter_exp, attrlist, sizelimit, attrsonly, sort_order
+        )
+        if cache is not None:
+            result = cache._get(key, self)
+            if result is not None:
+                return self._cached_result(result)
+            generation = cache._generation
+
+        def run_search() -> Any:
+            result = self.__base_search(
+                _base,
+                _scope,
+                filter_exp,
+                attrlist,
+                timeout,
+                sizelimit,
+                attrsonly,
+                sort_order,
+            )
+            if cache is None:
+                return result
+            if inspect.isawaitable(result):
+                return self.__store_async(result, key, _base, _scope, generation)
+            cache._put(key, _base, _scope, result, generation)
+            return result
+
+        if coalescer is not None:
+            return coalescer._run(key, self, run_search, timeout)
+        return run_search()
+
+    @property
+    def _uses_search_layers(self) -> bool:
+        """True if the client has a search cache or coalescer."""
+        client = self.__client
+        return client.search_cache is not None or client.search_coalescer is not None
+
+    def prepare_search(
+        self,
+        base: Optional[Union[str, LDAPDN]] = None,
+        scope: Optional[Union[LDAPSearchScope, int]] = None,
+        filter_exp: Optional[str] = None,
+        attrlist: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+        sizelimit: int = 0,
+        attrsonly: bool = False,
+        sort_order: Optional[List[str]] = None,
+    ) -> PreparedSearch:
+        url = self.__client.url
+        return PreparedSearch(
+            self,
+            str(base) if base is not None else str(url.basedn),
+            int(scope) if scope is not None else url.scope_num,
+            filter_exp if filter_exp is not None else url.filter_exp,
+            attrlist if attrlist is not None else url.attributes,
+            timeout,
+            sizelimit,
+            attrsonly,
+            sort_order,
+            self.__create_sort_list(sort_order) if sort_order is not None else [],
         )
 
+    def __get_cache_key(
+        self,
+        base: str,
+        scope: Union[LDAPSearchScope, int],
+        filter_exp: Optional[str],
+        attrlist: Optional[List[str]],
+        sizelimit: int,
+        attrsonly: bool,
+        sort_order: Optional[List[str]],
+    ) -> Hashable:
+        client = self.__client
+        if filter_exp is None:
+            filter_exp = client.url.filter_exp
+        if attrlist is None:
+            attrlist = client.url.attributes
+        creds = client.credentials or {}
+        return (
+            base.lower(),
+            int(scope),
+            filter_exp,
+            tuple(sorted(attr.lower() for attr in attrlist)) if attrlist else None,
+            sizelimit,
+            attrsonly,
+            tuple(sort_order) if sort_order else None,
+            client.mechanism,
+            creds.get("user"),
+            creds.get("authz_id"),
+            client.sd_flags,
+            client.extended_dn_format,
+            tuple(sorted(attr.lower() for attr in client.raw_attributes)),
+            client.managedsait,
+            client.server_chase_referrals,
+            client.ignore_referrals,
+        )
+
+    async def __store_async(
+        self,
+        result: Any,
+        key: Hashable,
+        base: str,
+        scope: Union[LDAPSearchScope, int],
+        generation: int,
+    ) -> Any:
+        result = await result
+        cache = self.__client.search_cache
+        if cache is not None:
+            cache._put(key, base, scope, result, generation)
+        return result
+
+    def _cached_result(self, result: List[LDAPEntry]) -> Any:
+        """
+        Return a search result from the cache in the same form as the
+        :meth:`_evaluate` method would return it.
+        """
+        if not self.is_async:
+            return result
+
+        async def cached() -> List[LDAPEntry]:
+            return result
+
+        return cached()
+
+    def _evaluate_write(
+        self, msg_id: int, timeout: Optional[float], *dns: Union[str, LDAPDN]
+    ) -> Any:
+        """
+        Evaluate a write operation and invalidate the cached search
+        results of the affected DNs when the operation is finished.
+        """
+        cache = self.__client.search_cache
+        if cache is None:
+            return self._evaluate(msg_id, timeout)
+        try:
+            result = self._evaluate(msg_id, timeout)
+        except Exception:
+            for dn in dns:
+                cache.invalidate(dn)
+            raise
+        if inspect.isawaitable(result):
+            return self.__invalidate_async(result, dns)
+        for dn in dns:
+            cache.invalidate(dn)
+        return result
+
+    async def __invalidate_async(
+        self, result: Any, dns: Tuple[Union[str, LDAPDN], ...]
+    ) -> Any:
+        try:
+            return await result
+        finally:
+            cache = self.__client.search_cache
+            if cache is not None:
+                for dn in dns:
+                    cache.invalidate(dn)
+
     def paged_search(
         self,
         base: Optional[Union[str, LDAPDN]] = None,
@@ -180,6 +377,32 @@ class BaseLDAPConnection(ldapconnection, metaclass=ABCMeta):
         finally:
             self.__client.set_server_chase_referrals(chase_referrals)
 
+    def resumable_paged_search(
+        self,
+        base: Optional[Union[str, LDAPDN]] = None,
+        scope: Optional[Union[LDAPSearchScope, int]] = None,
+        filter_exp: Optional[str] = None,
+        attrlist: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+        page_size: int = 500,
+        sort_key: Optional[str] = None,
+    ) -> ResumablePagedSearch:
+        checkpoint = SearchCheckpoint(
+            str(base) if base is not None else None,
+            int(scope) if scope is not None else None,
+            filter_exp,
+            attrlist,
+            page_size,
+            sort_key,
+            None,
+            None,
+            0,
+            0,
+            None,
+            (),
+        )
+        return ResumablePagedSearch(self, checkpoint, timeout)
+
     def virtual_list_search(
         self,
         base: Optional[Union[str, LDAPDN]] = None,
@@ -220,6 +443,368 @@ class BaseLDAPConnection(ldapconnection, metaclass=ABCMeta):
     def whoami(self, timeout: Optional[float] = None) -> Any:
         return self._evaluate(super().whoami(), timeout)
 
+    def get_entries(
+        self,
+        dns: Iterable[Union[str, LDAPDN]],
+        attrlist: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+        max_pending: int = 64,
+        ordered: bool = True,
+    ) -> Any:
+        if not isinstance(max_pending, int) or max_pending < 1:
+            raise ValueError("The max_pending must be a positive int.")
+        return self._get_entries(dns, attrlist, timeout, max_pending, ordered)
+
+    def _get_entries(
+        self,
+        dns: Iterable[Union[str, LDAPDN]],
+        attrlist: Optional[List[str]],
+        timeout: Optional[float],
+        max_pending: int,
+        ordered: bool,
+    ) -> Any:
+        if not ordered:
+            raise ValueError(
+                "Only AIOLDAPConnection returns the entries in completion order."
+            )
+        if self.is_async:
+            return self._aiter_entries(dns, attrlist, timeout, max_pending)
+        return self._iter_entries(dns, attrlist, timeout, max_pending)
+
+    def _send_get_entry(
+        self,
+        dname: Union[str, LDAPDN],
+        attrlist: Optional[List[str]],
+        timeout: Optional[float],
+    ) -> int:
+        """Start a base search for the entry of `dname`, return its msgid."""
+        _attrlist = attrlist if attrlist is not None else self.__client.url.attributes
+        return super().search(
+            str(dname),
+            LDAPSearchScope.BASE,
+            "(objectClass=*)",
+            _attrlist,
+            timeout if timeout is not None else 0.0,
+            0,
+            False,
+            [],
+            0,
+            0,
+            0,
+            0,
+            0,
+            None,
+        )
+
+    @staticmethod
+    def _first_entry(result: List[LDAPEntry]) -> Optional[LDAPEntry]:
+        return result[0] if result else None
+
+    def get_result(self, msg_id: int, timeout: Optional[float] = None) -> Any:
+        """
+        Poll the result of an operation, and report it to the client's
+        tracer and metrics registry, if they are set.
+        """
+        tracer = self.__client._hooks
+        if tracer is None:
+            return super().get_result(msg_id, timeout)
+        trace = self.__traces.get(msg_id)
+        if trace is None:
+            trace = self.__start_trace(tracer, msg_id)
+        start = time.perf_counter()
+        try:
+            result = super().get_result(msg_id, timeout)
+        except BaseException as exc:
+            if trace is not None:
+                trace.c_time += time.perf_counter() - start
+                _end_trace(tracer, self.__traces.pop(msg_id, trace), exc)
+            raise
+        if trace is not None:
+            trace.c_time += time.perf_counter() - start
+            if result is not None:
+                trace._add_result(result)
+                if trace.kind != "stream_search" or result[0] == "result":
+                    _end_trace(tracer, self.__traces.pop(msg_id, trace))
+        return result
+
+    def __start_trace(self, tracer: Tracer, msg_id: int) -> Optional[OperationTrace]:
+        operations = self._get_operations()
+        if len(self.__traces) > 1024:
+            # Drop the traces of the operations that are finished without
+            # collecting their results.
+            for key in [key for key in self.__traces if key not in operations]:
+                del self.__traces[key]
+        info = operations.get(msg_id)
+        if info is not None:
+            info = OperationInfo(msg_id, *info)
+        elif self.closed:
+            # Opening the connection, the msg_id is a socket descriptor.
+            info = OperationInfo(msg_id, "open", None, time.monotonic())
+        else:
+            return None
+        trace = _start_trace(tracer, self, info)
+        self.__traces[msg_id] = trace
+        return trace
+
+    def abandon(self, msg_id: int) -> None:
+        """
+        Abandon an ongoing operation associated with the given message id.
+
+        :param int msg_id: the ID of the operation.
+        """
+        super().abandon(msg_id)
+        trace = self.__traces.pop(msg_id, None)
+        tracer = self.__client._hooks
+        if trace is not None and tracer is not None:
+            _end_trace(tracer, trace, abandoned=True)
+
+    def _abandon_all(self, msg_ids: Iterable[int]) -> None:
+        """Abandon the unfinished operations, e.g. after an early exit."""
+        if self.closed:
+            return
+        for msg_id in msg_ids:
+            try:
+                self.abandon(msg_id)
+            except LDAPError:
+                pass
+
+    @property
+    def pending_operations(self) -> List[OperationInfo]:
+        """
+        A snapshot of the in-flight operations of the connection, ordered
+        by their message IDs.
+        """
+        return [
+            OperationInfo(msg_id, *info)
+            for msg_id, info in sorted(self._get_operations().items())
+        ]
+
+    def _watchdog_timeout(
+        self, msg_id: int, timeout: Optional[float]
+    ) -> Optional[float]:
+        """
+        Cap the time limit of waiting for the result of an operation to
+        the remaining time until its deadline set by the client's watchdog.
+        """
+        watchdog = self.__client.watchdog
+        if watchdog is None:
+            return timeout
+        info = self._get_operations().get(msg_id)
+        if info is None:
+            return timeout
+        remaining = watchdog.remaining(OperationInfo(msg_id, *info))
+        if remaining is None or (timeout is not None and timeout <= remaining):
+            return timeout
+        return remaining
+
+    def _iter_entries(
+        self,
+        dns: Iterable[Union[str, LDAPDN]],
+        attrlist: Optional[List[str]],
+        timeout: Optional[float],
+        max_pending: int,
+    ) -> Iterator[Tuple[Union[str, LDAPDN], Optional[LDAPEntry]]]:
+        pending: Deque[Tuple[Union[str, LDAPDN], int]] = deque()
+
+        def collect() -> Tuple[Union[str, LDAPDN], Optional[LDAPEntry]]:
+            dname, msg_id = pending.popleft()
+            try:
+                return dname, self._first_entry(self._evaluate(msg_id, timeout))
+            except NoSuchObjectError:
+                return dname, None
+
+        try:
+            for dname in dns:
+                if len(pending) >= max_pending:
+                    yield collect()
+                pending.append((dname, self._send_get_entry(dname, attrlist, timeout)))
+            while pending:
+                yield collect()
+        finally:
+            self._abandon_all(msg_id for _, msg_id in pending)
+
+    async def _aiter_entries(
+        self,
+        dns: Iterable[Union[str, LDAPDN]],
+        attrlist: Optional[List[str]],
+        timeout: Optional[float],
+        max_pending: int,
+    ) -> AsyncIterator[Tuple[Union[str, LDAPDN], Optional[LDAPEntry]]]:
+        pending: Deque[Tuple[Union[str, LDAPDN], int]] = deque()
+
+        async def collect() -> Tuple[Union[str, LDAPDN], Optional[LDAPEntry]]:
+            dname, msg_id = pending.popleft()
+            try:
+                return dname, self._first_entry(await self._evaluate(msg_id, timeout))
+            except NoSuchObjectError:
+                return dname, None
+
+        try:
+            for dname in dns:
+                if len(pending) >= max_pending:
+                    yield await collect()
+                pending.append((dname, self._send_get_entry(dname, attrlist, timeout)))
+            while pending:
+                yield await collect()
+        finally:
+            self._abandon_all(msg_id for _, msg_id in pending)
+
+    def sync_search(
+        self,
+        base: Optional[Union[str, LDAPDN]] = None,
+        scope: Optional[Union[LDAPSearchScope, int]] = None,
+        filter_exp: Optional[str] = None,
+        attrlist: Optional[List[str]] = None,
+        mode: SyncMode = SyncMode.REFRESH_AND_PERSIST,
+        cookie: Optional[bytes] = None,
+        reload_hint: bool = False,
+        timeout: Optional[float] = None,
+    ) -> SyncReplConsumer:
+        return SyncReplConsumer(
+            self, base, scope, filter_exp, attrlist, mode, cookie, reload_hint, timeout
+        )
+
+    def persistent_search(
+        self,
+        base: Optional[Union[str, LDAPDN]] = None,
+        scope: Optional[Union[LDAPSearchScope, int]] = None,
+        filter_exp: Optional[str] = None,
+        attrlist: Optional[List[str]] = None,
+        change_types: ChangeType = ChangeType.ALL,
+        changes_only: bool = True,
+        return_ecs: bool = True,
+        timeout: Optional[float] = None,
+    ) -> PersistentSearch:
+        value = encode_psearch_request(change_types, changes_only, return_ecs)
+        return PersistentSearch(
+            self,
+            base,
+            scope,
+            filter_exp,
+            attrlist,
+            [(PSEARCH_OID, True, value)],
+            timeout,
+        )
+
+    def notification_search(
+        self,
+        base: Optional[Union[str, LDAPDN]] = None,
+        scope: Optional[Union[LDAPSearchScope, int]] = None,
+        attrlist: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+    ) -> PersistentSearch:
+        return PersistentSearch(
+            self,
+            base,
+            scope,
+            "(objectClass=*)",
+            attrlist,
+            [(LDAP_SERVER_NOTIFICATION_OID, True, None)],
+            timeout,
+        )
+
+    def dirsync_search(
+        self,
+        base: Optional[Union[str, LDAPDN]] = None,
+        filter_exp: Optional[str] = None,
+        attrlist: Optional[List[str]] = None,
+        flags: DirSyncFlag = DirSyncFlag.INCREMENTAL_VALUES,
+        cookie: Optional[bytes] = None,
+        max_bytes: int = 0,
+        timeout: Optional[float] = None,
+    ) -> DirSync:
+        return DirSync(
+            self, base, filter_exp, attrlist, flags, cookie, max_bytes, timeout
+        )
+
+    def _send_stream_search(
+        self,
+        base: Optional[Union[str, LDAPDN]],
+        scope: Optional[Union[LDAPSearchScope, int]],
+        filter_exp: Optional[str],
+        attrlist: Optional[List[str]],
+        timeout: Optional[float],
+        server_ctrls: List[Tuple[str, bool, Optional[bytes]]],
+    ) -> int:
+        """
+        Start a search with additional server controls, whose messages are
+        received one by one (see :meth:`_stream_messages`). Return its msgid.
+        """
+        url = self.__client.url
+        return super().search(
+            str(base) if base is not None else str(url.basedn),
+            scope if scope is not None else url.scope_num,
+            filter_exp if filter_exp is not None else url.filter_exp,
+            attrlist if attrlist is not None else url.attributes,
+            # The timeout limits the waiting for the messages, not the
+            # whole search that might run indefinitely.
+            0.0,
+            0,
+            False,
+            [],
+            0,
+            0,
+            0,
+            0,
+            0,
+            None,
+            server_ctrls,
+            True,
+        )
+
+    def _stream_messages(self, msg_id: int, timeout: Optional[float]) -> Any:
+        """
+        Get the messages of a search started by :meth:`_send_stream_search`
+        as an iterator (or an async iterator for asynchronous connections)
+        of (type, object, controls) tuples. The type is `entry`,
+        `reference`, `intermediate` or `result`, the controls are the list
+        of (oid, criticality, value) tuples of the message's controls. The
+        `timeout` is the time limit of waiting for the next message.
+        """
+        if self.is_async:
+            return self._aiter_messages(msg_id, timeout)
+        return self._iter_messages(msg_id, timeout)
+
+    def _iter_messages(
+        self, msg_id: int, timeout: Optional[float]
+    ) -> Iterator[Tuple[str, Any, List[Tuple[str, bool, Optional[bytes]]]]]:
+        finished = False
+        try:
+            while not finished:
+                try:
+                    msg = self._evaluate(msg_id, timeout)
+                except LDAPError:
+                    # The operation is already removed by the extension.
+                    finished = True
+                    raise
+                finished = msg[0] == "result"
+                yield msg
+        finally:
+            if not finished:
+                self._abandon_all((msg_id,))
+
+    async def _aiter_messages(
+        self, msg_id: int, timeout: Optional[float]
+    ) -> AsyncIterator[Tuple[str, Any, List[Tuple[str, bool, Optional[bytes]]]]]:
+        finished = False
+        try:
+            while not finished:
+                # The message might be already received with the previous one,
+                # therefore check it before waiting for the socket.
+                try:
+                    msg = BaseLDAPConnection.get_result(self, msg_id)
+                    if msg is None:
+                        msg = await self._evaluate(msg_id, timeout)
+                except LDAPError:
+                    # The operation is already removed by the extension.
+                    finished = True
+                    raise
+                finished = msg[0] == "result"
+                yield msg
+        finally:
+            if not finished:
+                self._abandon_all((msg_id,))
+
     @abstractmethod
     def _evaluate(self, msg_id: int, timeout: Optional[float] = None) -> Any:
         pass
@@ -243,7 +828,7 @@ class LDAPConnection(BaseLDAPConnection):
         :param float timeout: time limit in seconds for the operation.
         :return: the result of the operation.
         """
-        return self.get_result(msg_id, timeout)
+        return self.get_result(msg_id, self._watchdog_timeout(msg_id, timeout))
 
     def add(self, entry: LDAPEntry, timeout: Optional[float] = None) -> bool:
         """
@@ -338,6 +923,41 @@ class LDAPConnection(BaseLDAPConnection):
             page_size,
         )
 
+    def resumable_paged_search(
+        self,
+        base: Optional[Union[str, LDAPDN]] = None,
+        scope: Optional[Union[LDAPSearchScope, int]] = None,
+        filter_exp: Optional[str] = None,
+        attrlist: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+        page_size: int = 500,
+        sort_key: Optional[str] = None,
+    ) -> ResumablePagedSearch:
+        """
+        Start a paged search whose checkpoint can be saved while the
+        entries are processed, and used to continue the search from the
+        next entry (even on a new connection) with
+        :meth:`bonsai.checkpoint.ResumablePagedSearch.resume` after a
+        failure.
+
+        :param str|LDAPDN base: the base DN of the search.
+        :param int scope: the scope of the search.
+        :param str filter_exp: string to filter the entries.
+        :param list attrlist: the list of attributes.
+        :param float timeout: time limit in seconds of waiting for the next \
+        message from the server.
+        :param int page_size: the number of entries on a page.
+        :param str sort_key: an attribute to sort the entries by on the \
+        server side (with `-` prefix in reverse order). If it's set, the \
+        search can be restarted from the last returned sort value when the \
+        server rejects the saved cookie.
+        :return: the iterator of the entries.
+        :rtype: :class:`bonsai.checkpoint.ResumablePagedSearch`
+        """
+        return super().resumable_paged_search(
+            base, scope, filter_exp, attrlist, timeout, page_size, sort_key
+        )
+
     def virtual_list_search(
         self,
         base: Optional[Union[str, LDAPDN]] = None,
@@ -393,6 +1013,220 @@ class LDAPConnection(BaseLDAPConnection):
         """
         return super().modify_password(user, new_password, old_password, timeout)
 
+    def get_entries(
+        self,
+        dns: Iterable[Union[str, LDAPDN]],
+        attrlist: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+        max_pending: int = 64,
+        ordered: bool = True,
+    ) -> Iterator[Tuple[Union[str, LDAPDN], Optional[LDAPEntry]]]:
+        """
+        Get the entries of a list of DNs. The base searches of the entries
+        are pipelined: up to `max_pending` searches are sent to the server
+        before waiting for their results. A missing entry does not raise
+        an error, it is returned with None instead.
+
+        If the iteration is stopped early, the searches in progress are
+        abandoned.
+
+        :param dns: the iterable of DNs.
+        :param list attrlist: the list of attributes to get.
+        :param float timeout: time limit in seconds for waiting the result \
+        of a search.
+        :param int max_pending: the maximal number of searches in progress.
+        :param bool ordered: return the entries in the order of the `dns`. \
+        Only :class:`bonsai.asyncio.AIOLDAPConnection` can return them in \
+        the order of completion, other connections must keep the order.
+        :return: an iterator of tuples of the DN and its entry, or None if \
+        the entry does not exist.
+        :raises ValueError: if `max_pending` is not a positive int, or \
+        `ordered` is False for a connection that keeps the order.
+        """
+        return super().get_entries(dns, attrlist, timeout, max_pending, ordered)
+
+    def prepare_search(
+        self,
+        base: Optional[Union[str, LDAPDN]] = None,
+        scope: Optional[Union[LDAPSearchScope, int]] = None,
+        filter_exp: Optional[str] = None,
+        attrlist: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+        sizelimit: int = 0,
+        attrsonly: bool = False,
+        sort_order: Optional[List[str]] = None,
+    ) -> PreparedSearch:
+        """
+        Create a search object that can be executed repeatedly with the
+        same parameters. The filter expression can contain named
+        placeholders in curly braces, that are set by keyword arguments
+        when the search is executed. The parameters and the server controls
+        are created when the search is prepared, with the current settings
+        of the client.
+
+        :param str|LDAPDN base: the base DN of the search.
+        :param int scope: the scope of the search.
+        :param str filter_exp: the filter template of the search.
+        :param list attrlist: the list of attributes.
+        :param float timeout: time limit in seconds for the search.
+        :param int sizelimit: the maximum number of entries to return.
+        :param bool attrsonly: if it's set, return only the attribute names.
+        :param list sort_order: the list of attribute names to sort by.
+        :return: the prepared search.
+        :rtype: :class:`bonsai.preparedsearch.PreparedSearch`
+        :raises ValueError: if the filter template or the sort order is \
+        invalid.
+        :raises FilterError: if the parentheses of the filter expression \
+        are unbalanced.
+        """
+        return super().prepare_search(
+            base, scope, filter_exp, attrlist, timeout, sizelimit, attrsonly, sort_order
+        )
+
+    def sync_search(
+        self,
+        base: Optional[Union[str, LDAPDN]] = None,
+        scope: Optional[Union[LDAPSearchScope, int]] = None,
+        filter_exp: Optional[str] = None,
+        attrlist: Optional[List[str]] = None,
+        mode: SyncMode = SyncMode.REFRESH_AND_PERSIST,
+        cookie: Optional[bytes] = None,
+        reload_hint: bool = False,
+        timeout: Optional[float] = None,
+    ) -> SyncReplConsumer:
+        """
+        Start a content synchronization (RFC 4533, syncrepl) of the entries
+        that match the search parameters. The server has to support the
+        LDAP Content Synchronization Operation (e.g. OpenLDAP with the
+        syncprov overlay).
+
+        With :attr:`bonsai.syncrepl.SyncMode.REFRESH_ONLY` the iteration
+        stops after the changes since the `cookie` are returned. With
+        :attr:`bonsai.syncrepl.SyncMode.REFRESH_AND_PERSIST` it continues with
+        the changes as they happen, until the consumer is closed.
+
+        If the server refuses the `cookie` (e-syncRefreshRequired), the
+        synchronization restarts automatically without a cookie.
+
+        :param str|LDAPDN base: the base DN of the search.
+        :param int scope: the scope of the search.
+        :param str filter_exp: string to filter the entries.
+        :param list attrlist: the list of attributes.
+        :param SyncMode mode: the mode of the synchronization.
+        :param bytes cookie: the cookie of a previous synchronization to \
+        get only the changes that happened since.
+        :param bool reload_hint: ask the server to send the full content \
+        instead of the changes, if it's not able to determine them.
+        :param float timeout: time limit in seconds of waiting for the next \
+        message from the server.
+        :return: the consumer that iterates over the notifications.
+        :rtype: :class:`bonsai.syncrepl.SyncReplConsumer`
+        """
+        return super().sync_search(
+            base, scope, filter_exp, attrlist, mode, cookie, reload_hint, timeout
+        )
+
+    def persistent_search(
+        self,
+        base: Optional[Union[str, LDAPDN]] = None,
+        scope: Optional[Union[LDAPSearchScope, int]] = None,
+        filter_exp: Optional[str] = None,
+        attrlist: Optional[List[str]] = None,
+        change_types: ChangeType = ChangeType.ALL,
+        changes_only: bool = True,
+        return_ecs: bool = True,
+        timeout: Optional[float] = None,
+    ) -> PersistentSearch:
+        """
+        Start a persistent search (draft-ietf-ldapext-psearch) that returns
+        the entries matching the search parameters as they change. It's
+        supported by 389 Directory Server, Oracle/Sun directory servers
+        and others, but not by OpenLDAP (use :meth:`sync_search` instead).
+
+        :param str|LDAPDN base: the base DN of the search.
+        :param int scope: the scope of the search.
+        :param str filter_exp: string to filter the entries.
+        :param list attrlist: the list of attributes.
+        :param ChangeType change_types: the types of changes to return.
+        :param bool changes_only: if it's False, the entries that match \
+        the search are returned first as with a normal search.
+        :param bool return_ecs: ask the server to return the type of the \
+        changes with the entries.
+        :param float timeout: time limit in seconds of waiting for the next \
+        message from the server.
+        :return: the iterator of the changed entries.
+        :rtype: :class:`bonsai.psearch.PersistentSearch`
+        """
+        return super().persistent_search(
+            base,
+            scope,
+            filter_exp,
+            attrlist,
+            change_types,
+            changes_only,
+            return_ecs,
+            timeout,
+        )
+
+    def notification_search(
+        self,
+        base: Optional[Union[str, LDAPDN]] = None,
+        scope: Optional[Union[LDAPSearchScope, int]] = None,
+        attrlist: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+    ) -> PersistentSearch:
+        """
+        Start a search with Active Directory's change notification control
+        (LDAP_SERVER_NOTIFICATION_OID) that returns the entries as they
+        change. The filter is always `(objectClass=*)` and the server does
+        not report the type of the changes.
+
+        :param str|LDAPDN base: the base DN of the search.
+        :param int scope: the scope of the search.
+        :param list attrlist: the list of attributes.
+        :param float timeout: time limit in seconds of waiting for the next \
+        message from the server.
+        :return: the iterator of the changed entries.
+        :rtype: :class:`bonsai.psearch.PersistentSearch`
+        """
+        return super().notification_search(base, scope, attrlist, timeout)
+
+    def dirsync_search(
+        self,
+        base: Optional[Union[str, LDAPDN]] = None,
+        filter_exp: Optional[str] = None,
+        attrlist: Optional[List[str]] = None,
+        flags: DirSyncFlag = DirSyncFlag.INCREMENTAL_VALUES,
+        cookie: Optional[bytes] = None,
+        max_bytes: int = 0,
+        timeout: Optional[float] = None,
+    ) -> DirSync:
+        """
+        Start a directory synchronization with Active Directory's DirSync
+        control (LDAP_SERVER_DIRSYNC_OID) that returns the objects changed
+        since the state of the `cookie` (without a cookie every object is
+        returned). The search scope is always subtree, and the `base` has
+        to be the root of a naming context. The search is continued
+        automatically while the server has more changes to return. The
+        user needs the replicating directory changes right, unless the
+        :attr:`bonsai.dirsync.DirSyncFlag.OBJECT_SECURITY` flag is set.
+
+        :param str|LDAPDN base: the root of the naming context.
+        :param str filter_exp: string to filter the objects.
+        :param list attrlist: the list of attributes.
+        :param DirSyncFlag flags: the flags of the DirSync control.
+        :param bytes cookie: the cookie of an earlier synchronization.
+        :param int max_bytes: the maximal size of a page of changes in \
+        bytes, 0 means the server's default.
+        :param float timeout: time limit in seconds of waiting for the next \
+        message from the server.
+        :return: the iterator of the changed objects.
+        :rtype: :class:`bonsai.dirsync.DirSync`
+        """
+        return super().dirsync_search(
+            base, filter_exp, attrlist, flags, cookie, max_bytes, timeout
+        )
+
     def whoami(self, timeout: Optional[float] = None) -> str:
         """
         This method can be used to obtain authorization identity.
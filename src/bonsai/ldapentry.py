@@ -73,7 +73,7 @@ class LDAPEntry(ldapentry):
         :return: True, if the operation is finished.
         :rtype: bool
         """
-        return self.connection._evaluate(super().modify(), timeout)
+        return self.connection._evaluate_write(super().modify(), timeout, str(self.dn))
 
     def rename(
         self,
@@ -92,7 +92,10 @@ class LDAPEntry(ldapentry):
         """
         if isinstance(newdn, LDAPDN):
             newdn = str(newdn)
-        return self.connection._evaluate(super().rename(newdn, delete_old_rdn), timeout)
+        olddn = str(self.dn)
+        return self.connection._evaluate_write(
+            super().rename(newdn, delete_old_rdn), timeout, olddn, newdn
+        )
 
     def update(self, *args: Tuple, **kwds: Dict[str, Any]) -> None:
         """
@@ -206,7 +209,7 @@ class LDAPEntry(ldapentry):
         """
         return self.__extended_dn
 
-    def change_attribute(self, name: str, optype: int, *values: Tuple) -> None:
+    def change_attribute(self, name: str, optype: int, *values: Any) -> None:
         """
         Change an attribute of the entry with explicit LDAP modification type
         by listing the values as parameters.
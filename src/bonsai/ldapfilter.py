@@ -0,0 +1,559 @@
+import re
+from functools import lru_cache
+from typing import (
+    Any,
+    Callable,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from .errors import FilterError
+from .ldapentry import LDAPEntry
+
+Matcher = Callable[[Mapping[str, Any]], bool]
+Value = Union[str, bytes]
+
+_ATTR_REGEX = re.compile(
+    r"^([A-Za-z][A-Za-z0-9-]*|[0-9]+(\.[0-9]+)*)(;[A-Za-z0-9-]+)*$"
+)
+_RULE_REGEX = re.compile(r"^([A-Za-z][A-Za-z0-9-]*|[0-9]+(\.[0-9]+)*)$")
+_ESCAPE_REGEX = re.compile(rb"\\([0-9A-Fa-f]{2})?")
+# Number of compiled filter expressions that are kept in the cache.
+_CACHE_SIZE = 512
+
+_CASE_IGNORE_MATCH = "2.5.13.2"
+_CASE_EXACT_MATCH = "2.5.13.5"
+_INTEGER_MATCH = "2.5.13.14"
+_BIT_AND_MATCH = "1.2.840.113556.1.4.803"
+_BIT_OR_MATCH = "1.2.840.113556.1.4.804"
+_MATCHING_RULES = {
+    "caseignorematch": _CASE_IGNORE_MATCH,
+    "caseignoreia5match": _CASE_IGNORE_MATCH,
+    "caseexactmatch": _CASE_EXACT_MATCH,
+    "caseexactia5match": _CASE_EXACT_MATCH,
+    "integermatch": _INTEGER_MATCH,
+    "2.5.13.2": _CASE_IGNORE_MATCH,
+    "1.3.6.1.4.1.1466.109.114.2": _CASE_IGNORE_MATCH,
+    "2.5.13.5": _CASE_EXACT_MATCH,
+    "1.3.6.1.4.1.1466.109.114.1": _CASE_EXACT_MATCH,
+    "2.5.13.14": _INTEGER_MATCH,
+    "1.2.840.113556.1.4.803": _BIT_AND_MATCH,
+    "1.2.840.113556.1.4.804": _BIT_OR_MATCH,
+}
+
+
+def normalise_value(value: Any) -> Any:
+    """
+    Normalise a value for case-insensitive comparison.
+
+    :param value: the attribute value.
+    :return: the lower-cased string (or the bytes that are not valid \
+    UTF-8) of the value.
+    """
+    if value.__class__ is str:
+        return value.lower()
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, (bytes, bytearray)):
+        try:
+            return bytes(value).decode("UTF-8").lower()
+        except UnicodeDecodeError:
+            return bytes(value)
+    return str(value).lower()
+
+
+def _to_int(value: Any) -> Optional[int]:
+    if value is True or value is False:
+        return None
+    if isinstance(value, int):
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _get_values(entry: Mapping[str, Any], attr: str) -> Any:
+    """
+    Get the values of an attribute, after the lookup with the exact name
+    is failed. LDAPEntry's lookup is case-insensitive already, but other
+    mappings have to be checked key by key.
+    """
+    if isinstance(entry, LDAPEntry):
+        return None
+    lower_attr = attr.lower()
+    for key, vals in entry.items():
+        if key.lower() == lower_attr:
+            return vals
+    return None
+
+
+def _unescape(raw: str, filter_exp: str) -> Value:
+    """Replace the escaped characters of an assertion value."""
+    if "(" in raw:
+        raise FilterError(f"Unescaped '(' in filter expression: '{filter_exp}'.")
+    if "\\" not in raw:
+        return raw
+
+    def replace(match: Any) -> bytes:
+        if match.group(1) is None:
+            raise FilterError(f"Invalid escape sequence in '{filter_exp}'.")
+        return bytes((int(match.group(1), 16),))
+
+    value = _ESCAPE_REGEX.sub(replace, raw.encode("UTF-8"))
+    try:
+        return value.decode("UTF-8")
+    except UnicodeDecodeError:
+        return value
+
+
+def _check_attr(attr: str, filter_exp: str) -> str:
+    if not _ATTR_REGEX.match(attr):
+        raise FilterError(f"Invalid attribute '{attr}' in '{filter_exp}'.")
+    return attr
+
+
+class _Parser:
+    """Recursive descent parser of string filter representations (RFC 4515)."""
+
+    def __init__(self, filter_exp: str) -> None:
+        self.filter_exp = filter_exp
+        self.pos = 0
+        self.attributes: List[str] = []
+
+    def error(self, msg: str) -> FilterError:
+        return FilterError(f"{msg} at position {self.pos} in '{self.filter_exp}'.")
+
+    def parse(self) -> tuple:
+        exp = self.filter_exp.strip()
+        if not exp.startswith("("):
+            # Accept a single item without enclosing parentheses.
+            exp = f"({exp})"
+        self.filter_exp = exp
+        node = self.parse_filter()
+        if self.pos != len(exp):
+            raise self.error("Unexpected characters")
+        return node
+
+    def parse_filter(self) -> tuple:
+        exp = self.filter_exp
+        if exp[self.pos : self.pos + 1] != "(":
+            raise self.error("Missing '('")
+        self.pos += 1
+        oper = exp[self.pos : self.pos + 1]
+        if oper in ("&", "|"):
+            self.pos += 1
+            children = []
+            while exp[self.pos : self.pos + 1] == "(":
+                children.append(self.parse_filter())
+            node: tuple = ("and" if oper == "&" else "or", tuple(children))
+        elif oper == "!":
+            self.pos += 1
+            node = ("not", self.parse_filter())
+        else:
+            end = exp.find(")", self.pos)
+            if end == -1:
+                raise self.error("Missing ')'")
+            node = self.parse_item(exp[self.pos : end])
+            self.pos = end
+        if exp[self.pos : self.pos + 1] != ")":
+            raise self.error("Missing ')'")
+        self.pos += 1
+        return node
+
+    def parse_item(self, item: str) -> tuple:
+        idx = item.find("=")
+        if idx < 1:
+            raise self.error("Invalid filter item")
+        raw = item[idx + 1 :]
+        oper = item[idx - 1]
+        if oper == ":":
+            return self.parse_extensible(item[: idx - 1], raw)
+        if oper in ("~", ">", "<"):
+            attr = _check_attr(item[: idx - 1], self.filter_exp)
+            kind = {"~": "approx", ">": "ge", "<": "le"}[oper]
+            self.attributes.append(attr)
+            return (kind, attr, _unescape(raw, self.filter_exp))
+        attr = _check_attr(item[:idx], self.filter_exp)
+        self.attributes.append(attr)
+        if raw == "*":
+            return ("present", attr)
+        if "*" in raw:
+            parts = [_unescape(part, self.filter_exp) for part in raw.split("*")]
+            return (
+                "substring",
+                attr,
+                parts[0] or None,
+                tuple(part for part in parts[1:-1] if part),
+                parts[-1] or None,
+            )
+        return ("equal", attr, _unescape(raw, self.filter_exp))
+
+    def parse_extensible(self, desc: str, raw: str) -> tuple:
+        attr, *params = desc.split(":")
+        dnattrs = False
+        if params and params[0].lower() == "dn":
+            dnattrs = True
+            params.pop(0)
+        if len(params) > 1 or (not attr and not params):
+            raise self.error("Invalid extensible match")
+        rule = None
+        if params:
+            if not _RULE_REGEX.match(params[0]):
+                raise self.error("Invalid matching rule")
+            try:
+                rule = _MATCHING_RULES[params[0].lower()]
+            except KeyError:
+                raise self.error(f"Unsupported matching rule '{params[0]}'") from None
+        if attr:
+            self.attributes.append(_check_attr(attr, self.filter_exp))
+        return ("extensible", attr or None, rule, dnattrs, _unescape(raw, self.filter_exp))
+
+
+def _compile_equal(attr: str, value: Value) -> Matcher:
+    norm = normalise_value(value)
+
+    def match(entry: Mapping[str, Any]) -> bool:
+        try:
+            vals = entry[attr]
+        except KeyError:
+            vals = _get_values(entry, attr)
+        if vals:
+            for val in vals:
+                if (
+                    val.lower() if val.__class__ is str else normalise_value(val)
+                ) == norm:
+                    return True
+        return False
+
+    return match
+
+
+def _compile_approx(attr: str, value: Value) -> Matcher:
+    # Approximate matching ignores the whitespaces besides the case.
+    norm = normalise_value(value)
+    if isinstance(norm, str):
+        norm = "".join(norm.split())
+
+    def match(entry: Mapping[str, Any]) -> bool:
+        try:
+            vals = entry[attr]
+        except KeyError:
+            vals = _get_values(entry, attr)
+        if vals:
+            for val in vals:
+                val = normalise_value(val)
+                if isinstance(val, str):
+                    val = "".join(val.split())
+                if val == norm:
+                    return True
+        return False
+
+    return match
+
+
+def _compile_ordering(attr: str, value: Value, greater: bool) -> Matcher:
+    norm = normalise_value(value)
+    num = _to_int(value)
+
+    def compare(val: Any) -> bool:
+        if num is not None:
+            val_num = val if val.__class__ is int else _to_int(val)
+            if val_num is not None:
+                return val_num >= num if greater else val_num <= num
+        val = normalise_value(val)
+        if type(val) is not type(norm):
+            return False
+        return val >= norm if greater else val <= norm
+
+    def match(entry: Mapping[str, Any]) -> bool:
+        try:
+            vals = entry[attr]
+        except KeyError:
+            vals = _get_values(entry, attr)
+        if vals:
+            for val in vals:
+                if compare(val):
+                    return True
+        return False
+
+    return match
+
+
+def _compile_present(attr: str) -> Matcher:
+    def match(entry: Mapping[str, Any]) -> bool:
+        try:
+            return bool(entry[attr])
+        except KeyError:
+            return bool(_get_values(entry, attr))
+
+    return match
+
+
+def _compile_substring(
+    attr: str, initial: Optional[Value], anys: Tuple[Value, ...], final: Optional[Value]
+) -> Matcher:
+    init_norm = normalise_value(initial) if initial is not None else ""
+    any_norms = tuple(normalise_value(part) for part in anys)
+    final_norm = normalise_value(final) if final is not None else ""
+    if not all(isinstance(part, str) for part in (init_norm, final_norm) + any_norms):
+        # Binary assertion values cannot match a string representation.
+        return lambda entry: False
+
+    if not any_norms and not final_norm:
+        # Fast path for the most common prefix search.
+        compare = lambda val: val.startswith(init_norm)
+    else:
+        pattern = re.compile(
+            "".join(
+                (
+                    re.escape(init_norm),
+                    *(f".*?{re.escape(part)}" for part in any_norms),
+                    f".*{re.escape(final_norm)}",
+                )
+            ),
+            re.DOTALL,
+        )
+        compare = lambda val: pattern.fullmatch(val) is not None
+
+    def match(entry: Mapping[str, Any]) -> bool:
+        try:
+            vals = entry[attr]
+        except KeyError:
+            vals = _get_values(entry, attr)
+        if vals:
+            for val in vals:
+                val = val.lower() if val.__class__ is str else normalise_value(val)
+                if val.__class__ is str and compare(val):
+                    return True
+        return False
+
+    return match
+
+
+def _create_rule_comparator(rule: Optional[str], value: Value) -> Callable[[Any], bool]:
+    if rule in (_INTEGER_MATCH, _BIT_AND_MATCH, _BIT_OR_MATCH):
+        num = _to_int(value)
+        if num is None:
+            raise FilterError(f"The assertion value '{value!r}' must be an integer.")
+        if rule in (_BIT_AND_MATCH, _BIT_OR_MATCH):
+            bit_and = rule == _BIT_AND_MATCH
+
+            def compare(val: Any) -> bool:
+                bits = _to_int(val)
+                if bits is None:
+                    return False
+                return bits & num == num if bit_and else bits & num != 0
+
+            return compare
+        return lambda val: _to_int(val) == num
+    elif rule == _CASE_EXACT_MATCH:
+        return lambda val: val == value
+    norm = normalise_value(value)
+    return lambda val: normalise_value(val) == norm
+
+
+def _compile_extensible(
+    attr: Optional[str], rule: Optional[str], dnattrs: bool, value: Value
+) -> Matcher:
+    compare = _create_rule_comparator(rule, value)
+    lower_attr = attr.lower() if attr else None
+
+    def match(entry: Mapping[str, Any]) -> bool:
+        if attr is not None:
+            try:
+                vals = entry[attr]
+            except KeyError:
+                vals = _get_values(entry, attr) or ()
+        else:
+            vals = [
+                val
+                for key, attr_vals in entry.items()
+                if key.lower() != "dn"
+                for val in attr_vals
+            ]
+        if any(compare(val) for val in vals):
+            return True
+        if dnattrs:
+            dn = entry.get("dn")
+            if dn is None:
+                return False
+            rdns = dn.rdns if hasattr(dn, "rdns") else ()
+            return any(
+                compare(rdn_val)
+                for rdn in rdns
+                for rdn_attr, rdn_val in rdn
+                if lower_attr is None or rdn_attr.lower() == lower_attr
+            )
+        return False
+
+    return match
+
+
+def _compile_node(node: tuple) -> Matcher:
+    kind = node[0]
+    if kind in ("and", "or"):
+        matchers = tuple(_compile_node(child) for child in node[1])
+        if kind == "and":
+
+            def match_and(entry: Mapping[str, Any]) -> bool:
+                for matcher in matchers:
+                    if not matcher(entry):
+                        return False
+                return True
+
+            return match_and
+
+        def match_or(entry: Mapping[str, Any]) -> bool:
+            for matcher in matchers:
+                if matcher(entry):
+                    return True
+            return False
+
+        return match_or
+    elif kind == "not":
+        matcher = _compile_node(node[1])
+        return lambda entry: not matcher(entry)
+    elif kind == "equal":
+        return _compile_equal(node[1], node[2])
+    elif kind == "approx":
+        return _compile_approx(node[1], node[2])
+    elif kind in ("ge", "le"):
+        return _compile_ordering(node[1], node[2], kind == "ge")
+    elif kind == "present":
+        return _compile_present(node[1])
+    elif kind == "substring":
+        return _compile_substring(*node[1:])
+    return _compile_extensible(*node[1:])
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _compile(filter_exp: str) -> Tuple[tuple, Matcher, FrozenSet[str]]:
+    parser = _Parser(filter_exp)
+    tree = parser.parse()
+    return (
+        tree,
+        _compile_node(tree),
+        frozenset(attr.lower() for attr in parser.attributes),
+    )
+
+
+def _lower_attrs(node: tuple) -> tuple:
+    """Lower-case the attribute names in a parsed filter tree."""
+    kind = node[0]
+    if kind in ("and", "or"):
+        return (kind, tuple(_lower_attrs(child) for child in node[1]))
+    elif kind == "not":
+        return (kind, _lower_attrs(node[1]))
+    elif kind == "extensible":
+        attr = node[1].lower() if node[1] is not None else None
+        return (kind, attr) + node[2:]
+    return (kind, node[1].lower()) + node[2:]
+
+
+def _uses_dn(node: tuple) -> bool:
+    """Check that the filter tree has an extensible match with :dn flag."""
+    kind = node[0]
+    if kind in ("and", "or"):
+        return any(_uses_dn(child) for child in node[1])
+    elif kind == "not":
+        return _uses_dn(node[1])
+    return kind == "extensible" and node[3]
+
+
+@lru_cache(maxsize=128)
+def compile_record_filter(filter_exp: str) -> Tuple[tuple, Matcher, bool]:
+    """
+    Compile a filter for records that are plain dicts with lower-cased
+    attribute names, instead of LDAP entries.
+
+    :param str filter_exp: the string representation of the filter.
+    :return: the parsed filter tree, its matcher function and whether \
+    the filter uses the DN of the entry (the `dn` key of the record).
+    :raises FilterError: if the filter is invalid.
+    """
+    tree = _lower_attrs(_compile(filter_exp)[0])
+    return tree, _compile_node(tree), _uses_dn(tree)
+
+
+class LDAPFilter:
+    """
+    A compiled LDAP search filter that can be evaluated on the client
+    side. The string representation of the filter is parsed as described
+    in RFC 4515 and compiled to a matcher function. Compiled filters are
+    cached, therefore creating the same filter again is cheap.
+
+    The attribute names are looked up case-insensitively and the values
+    are compared by the following basic rules:
+
+    - equality, approximate and substring assertions are case-insensitive \
+    (the approximate match ignores whitespaces too),
+    - ordering assertions compare integers numerically, other values by \
+    their lower-cased strings,
+    - the extensible match supports the `caseIgnoreMatch`, \
+    `caseExactMatch`, `integerMatch` rules, the bitwise AND and OR rules of \
+    Active Directory and the `:dn` flag.
+
+    :param str filter_exp: the string representation of the filter.
+    :raises TypeError: if the `filter_exp` is not a string.
+    :raises FilterError: if the `filter_exp` is not a valid filter or \
+    uses an unsupported matching rule.
+    """
+
+    __slots__ = ("__filter_exp", "__tree", "__match", "__attributes")
+
+    def __init__(self, filter_exp: str) -> None:
+        if not isinstance(filter_exp, str):
+            raise TypeError("The filter_exp must be a string.")
+        self.__filter_exp = filter_exp
+        self.__tree, self.__match, self.__attributes = _compile(filter_exp)
+
+    def match(self, entry: Mapping[str, Any]) -> bool:
+        """
+        Evaluate the filter on an entry.
+
+        :param LDAPEntry entry: the entry (or any mapping of attribute \
+        names to value lists).
+        :return: True, if the entry matches the filter.
+        :rtype: bool
+        """
+        return self.__match(entry)
+
+    def filter(self, entries: Iterable[Any]) -> Iterator[Mapping[str, Any]]:
+        """
+        Filter an iterable of entries (e.g. an :class:`LDIFReader` or
+        a search result), skipping the objects that are not mappings like
+        :class:`LDAPReference`.
+
+        :param entries: an iterable of LDAP entries.
+        :return: a generator of the matching entries.
+        """
+        match = self.__match
+        for entry in entries:
+            if (isinstance(entry, LDAPEntry) or isinstance(entry, Mapping)) and match(
+                entry
+            ):
+                yield entry
+
+    def __str__(self) -> str:
+        """Return the string representation of the filter."""
+        return self.__filter_exp
+
+    def __repr__(self) -> str:
+        """The representation of LDAPFilter class."""
+        return f"<LDAPFilter {self.__filter_exp}>"
+
+    @property
+    def attributes(self) -> FrozenSet[str]:
+        """The lower-cased names of the attributes used by the filter."""
+        return self.__attributes
@@ -17,11 +17,24 @@ from typing import (
     KeysView
 )
 
+from .ldapchange import LDAPChange, LDAPChangeType
+from .ldapdn import LDAPDN
 from .ldapentry import LDAPEntry, LDAPModOp
 from .ldapvaluelist import LDAPValueList
 
 from .errors import LDAPError
 
+_UNSAFE_INIT_CHARS = (" ", ":", "<")
+_CHANGE_TYPES = {
+    "add": LDAPChangeType.ADD,
+    "delete": LDAPChangeType.DELETE,
+    "modify": LDAPChangeType.MODIFY,
+    "modrdn": LDAPChangeType.MODDN,
+    "moddn": LDAPChangeType.MODDN,
+}
+# Number of lines collected before writing them out in write_entries.
+_WRITE_BATCH_SIZE = 4096
+
 
 class LDIFError(LDAPError):
     """General exception that is raised during reading or writing an LDIF file."""
@@ -125,8 +138,31 @@ class LDIFReader:
         return self
 
     def __next__(self) -> LDAPEntry:
+        return self.__read_record().entry
+
+    def read_changes(self) -> Iterator[LDAPChange]:
+        """
+        Read the remaining records of the LDIF file as change records.
+        Every change type of RFC 2849 is supported: records without a
+        `changetype` and with `add` are returned as
+        :attr:`LDAPChangeType.ADD`, `delete` as :attr:`LDAPChangeType.DELETE`,
+        `modify` as :attr:`LDAPChangeType.MODIFY`, and `modrdn` and `moddn`
+        as :attr:`LDAPChangeType.MODDN`.
+
+        :return: a generator of :class:`LDAPChange` objects.
+        :raises LDIFError: if a record is invalid.
+        """
+        while True:
+            try:
+                record = self.__read_record()
+            except StopIteration:
+                return
+            yield record
+
+    def __read_record(self) -> LDAPChange:
         entry = LDAPEntry("")
         change_type = "add"
+        modrdn_attrs: Dict[str, Any] = {}
         attr_blocks = [
             list(group)
             for key, group in groupby(next(self.__entries), lambda line: line == "-")
@@ -164,10 +200,17 @@ class LDIFReader:
                     ) from err
                 if attr.lower() == "changetype":
                     change_type = val.lower()
+                    if change_type not in _CHANGE_TYPES:
+                        raise LDIFError(
+                            f"Unsupported change type: '{val}'"
+                            f" for entry #{self.__num_of_entries}."
+                        )
                 elif attr.lower() == "dn":
                     entry.dn = self.__convert(val)
                 elif attr.lower() == "version":
                     self.version = self.__convert(val)
+                elif change_type in ("modrdn", "moddn"):
+                    modrdn_attrs[attr.lower()] = self.__convert(val)
                 else:
                     attr_dict[attr].append(self.__convert(val))
             if change_type == "modify":
@@ -195,7 +238,30 @@ class LDIFReader:
             raise LDIFError(
                 f"Missing distinguished name for entry #{self.__num_of_entries}."
             )
-        return entry
+        if change_type in ("modrdn", "moddn"):
+            return self.__create_moddn_change(entry, modrdn_attrs)
+        return LDAPChange(_CHANGE_TYPES[change_type], entry)
+
+    def __create_moddn_change(
+        self, entry: LDAPEntry, attrs: Dict[str, Any]
+    ) -> LDAPChange:
+        try:
+            newrdn = attrs["newrdn"]
+            delete_old_rdn = attrs["deleteoldrdn"]
+        except KeyError as err:
+            raise LDIFError(
+                f"Missing attribute: '{err.args[0]}' for entry #{self.__num_of_entries}."
+            ) from None
+        if delete_old_rdn not in (0, 1):
+            raise LDIFError(
+                f"Invalid deleteoldrdn value: '{delete_old_rdn}'"
+                f" for entry #{self.__num_of_entries}."
+            )
+        superior = attrs.get("newsuperior", entry.dn[1:])
+        newdn = f"{newrdn},{superior}" if superior else str(newrdn)
+        return LDAPChange(
+            LDAPChangeType.MODDN, entry, newdn, delete_old_rdn=bool(delete_old_rdn)
+        )
 
     @property
     def input_file(self) -> TextIO:
@@ -249,32 +315,39 @@ class LDIFWriter:
         self.max_length = max_length
 
     def _get_attr_lines(self, attrname: str, attrvalue: Iterable[Any]) -> Iterator[str]:
+        max_length = self.max_length
         for val in attrvalue:
             if isinstance(val, (bytes, bytearray)):
                 # If it's a binary has to be base64 encoded anyway.
-                has_not_safe_char = True
-                has_not_safe_init_char = True
+                line = f"{attrname}:: {base64.b64encode(val).decode('ASCII')}"
             else:
                 val = str(val)
-                has_not_safe_char = any(
-                    char
-                    for char in val
-                    if ord(char) > 127 or ord(char) in (0x0A, 0x0D, 0x00)
-                ) or val.endswith(" ")
-                has_not_safe_init_char = val[0] in (" ", ":", "<")
-                val = val.encode("UTF-8")
-            if has_not_safe_char or has_not_safe_init_char:
-                val = base64.b64encode(val)
-                name = f"{attrname}:"  # Add extra colon.
-            else:
-                name = attrname
-            line = f"{name}: {val.decode('UTF-8')}"
-            for i in range(0, len(line), self.max_length):
-                # Split the line into self.max_length.
-                if i != 0:
-                    yield f" {line[i : i + self.max_length]}\n"
+                if (
+                    val[0] in _UNSAFE_INIT_CHARS
+                    or val[-1] == " "
+                    or not val.isascii()
+                    or "\n" in val
+                    or "\r" in val
+                    or "\0" in val
+                ):
+                    # Not a SAFE-STRING as described in RFC 2849.
+                    val = base64.b64encode(val.encode("UTF-8")).decode("ASCII")
+                    line = f"{attrname}:: {val}"  # Add extra colon.
                 else:
-                    yield f"{line[i : i + self.max_length]}\n"
+                    line = f"{attrname}: {val}"
+            if len(line) <= max_length:
+                yield f"{line}\n"
+                continue
+            # Split the line into self.max_length.
+            yield f"{line[:max_length]}\n"
+            for i in range(max_length, len(line), max_length):
+                yield f" {line[i : i + max_length]}\n"
+
+    def _get_entry_lines(self, entry: LDAPEntry) -> List[str]:
+        lines = list(self._get_attr_lines("dn", (entry.dn,)))
+        for attrname, attrvalue in entry.items(exclude_dn=True):
+            lines.extend(self._get_attr_lines(attrname, attrvalue))
+        return lines
 
     def write_entry(self, entry: LDAPEntry) -> None:
         """
@@ -282,11 +355,7 @@ class LDIFWriter:
 
         :param LDAPEntry entry: the LDAP entry to serialise.
         """
-        for line in self._get_attr_lines("dn", (entry.dn,)):
-            self.__file.write(line)
-        for attrname, attrvalue in entry.items(exclude_dn=True):
-            for line in self._get_attr_lines(attrname, attrvalue):
-                self.__file.write(line)
+        self.__file.write("".join(self._get_entry_lines(entry)))
 
     def write_entries(
         self, entries: Iterable[LDAPEntry], write_version: bool = True
@@ -298,43 +367,92 @@ class LDIFWriter:
         :param list entries: list of LDAP entries.
         :param bool write_version: if it's True, write version header.
         """
+        buffer: List[str] = []
+        size = 0
         if write_version:
-            self.__file.write(next(self._get_attr_lines("version", (1,))))
-        for ent in entries:
-            self.write_entry(ent)
-            self.__file.write("\n")
+            buffer.extend(self._get_attr_lines("version", (1,)))
+        try:
+            for ent in entries:
+                lines = self._get_entry_lines(ent)
+                lines.append("\n")
+                buffer.extend(lines)
+                size += len(lines)
+                if size >= _WRITE_BATCH_SIZE:
+                    # Write the collected lines with a single call.
+                    self.__file.write("".join(buffer))
+                    buffer.clear()
+                    size = 0
+        finally:
+            if buffer:
+                self.__file.write("".join(buffer))
 
-    def write_changes(self, entry: LDAPEntry) -> None:
+    def write_changes(self, entry: Union[LDAPEntry, LDAPChange]) -> None:
         """
         Write an LDAP entry's changes to file in an LDIF-CHANGE format.
-        Only attribute modifications are serialised.
+        For an LDAP entry only attribute modifications are serialised,
+        while an :class:`LDAPChange` is serialised with its change type.
 
-        :param LDAPEntry entry: the LDAP entry to serialise.
+        :param LDAPEntry|LDAPChange entry: the LDAP entry or change record \
+        to serialise.
         """
-        self.__file.write(next(self._get_attr_lines("dn", (entry.dn,))))
-        self.__file.write(next(self._get_attr_lines("changetype", ("modify",))))
+        newdn = None
+        delete_old_rdn = True
+        if isinstance(entry, LDAPChange):
+            changetype = entry.changetype
+            newdn = entry.newdn
+            delete_old_rdn = entry.delete_old_rdn
+            entry = entry.entry
+        else:
+            changetype = LDAPChangeType.MODIFY
+        lines = list(self._get_attr_lines("dn", (entry.dn,)))
+        if newdn is not None:
+            # Only the MODDN changes have a new DN.
+            lines.extend(self._get_attr_lines("changetype", ("modrdn",)))
+            lines.extend(self.__get_moddn_lines(entry.dn, newdn, delete_old_rdn))
+        else:
+            lines.extend(
+                self._get_attr_lines("changetype", (changetype.name.lower(),))
+            )
+        if changetype == LDAPChangeType.ADD:
+            for attrname, attrvalue in entry.items(exclude_dn=True):
+                lines.extend(self._get_attr_lines(attrname, attrvalue))
+        elif changetype == LDAPChangeType.MODIFY:
+            lines.extend(self.__get_modify_lines(entry))
+        lines.append("\n")
+        self.__file.write("".join(lines))
+
+    def __get_moddn_lines(
+        self, dn: LDAPDN, newdn: LDAPDN, delete_old_rdn: bool
+    ) -> List[str]:
+        lines = list(self._get_attr_lines("newrdn", (newdn[0],)))
+        lines.extend(self._get_attr_lines("deleteoldrdn", (int(delete_old_rdn),)))
+        superior = newdn[1:]
+        if LDAPDN(superior) != dn[1:]:
+            lines.extend(self._get_attr_lines("newsuperior", (superior,)))
+        return lines
+
+    def __get_modify_lines(self, entry: LDAPEntry) -> List[str]:
+        lines: List[str] = []
         changes = dict(entry._status())
         deleted_keys = changes.pop("@deleted_keys")
         for attrname, stat in sorted(changes.items(), key=lambda s: s[1]["@status"]):
-            if stat["@status"] == 1 and stat["@added"]:
-                self.__file.write(next(self._get_attr_lines("add", (attrname,))))
-                for line in self._get_attr_lines(attrname, stat["@added"]):
-                    self.__file.write(line)
-                self.__file.write("-\n")
-            elif stat["@status"] == 1 and stat["@deleted"]:
-                self.__file.write(next(self._get_attr_lines("delete", (attrname,))))
-                for line in self._get_attr_lines(attrname, stat["@deleted"]):
-                    self.__file.write(line)
-                self.__file.write("-\n")
+            if stat["@status"] == 1:
+                if stat["@added"]:
+                    lines.extend(self._get_attr_lines("add", (attrname,)))
+                    lines.extend(self._get_attr_lines(attrname, stat["@added"]))
+                    lines.append("-\n")
+                if stat["@deleted"]:
+                    lines.extend(self._get_attr_lines("delete", (attrname,)))
+                    lines.extend(self._get_attr_lines(attrname, stat["@deleted"]))
+                    lines.append("-\n")
             elif stat["@status"] == 2:
-                self.__file.write(next(self._get_attr_lines("replace", (attrname,))))
-                for line in self._get_attr_lines(attrname, stat["@added"]):
-                    self.__file.write(line)
-                self.__file.write("-\n")
+                lines.extend(self._get_attr_lines("replace", (attrname,)))
+                lines.extend(self._get_attr_lines(attrname, stat["@added"]))
+                lines.append("-\n")
         for key in deleted_keys:
-            self.__file.write(next(self._get_attr_lines("delete", (key,))))
-            self.__file.write("-\n")
-        self.__file.write("\n")
+            lines.extend(self._get_attr_lines("delete", (key,)))
+            lines.append("-\n")
+        return lines
 
     @property
     def output_file(self) -> TextIO:
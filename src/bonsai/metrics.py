@@ -0,0 +1,265 @@
+import math
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .tracing import OperationTrace, Tracer
+
+#: The default upper bounds of the duration histograms in seconds.
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+#: The names of the phases of opening a connection.
+CONNECT_PHASES = ("init", "tls", "bind")
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    items = []
+    for name, value in labels:
+        value = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        items.append(f'{name}="{value}"')
+    return "{" + ",".join(items) + "}" if items else ""
+
+
+class Histogram:
+    """
+    A histogram of observed values with fixed bucket boundaries.
+
+    :param buckets: the sorted upper bounds of the buckets, the `+Inf` \
+    bucket is always added.
+    :raises ValueError: if the boundaries are not sorted or empty.
+    """
+
+    __slots__ = ("__bounds", "__counts", "__sum", "__count")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        bounds = [float(bound) for bound in buckets]
+        if not bounds or bounds != sorted(set(bounds)):
+            raise ValueError("The buckets must be a sorted list of unique numbers.")
+        if bounds[-1] != math.inf:
+            bounds.append(math.inf)
+        self.__bounds = tuple(bounds)
+        self.__counts = [0] * len(bounds)
+        self.__sum = 0.0
+        self.__count = 0
+
+    def observe(self, value: float) -> None:
+        """
+        Add a value to the histogram.
+
+        :param float value: the observed value.
+        """
+        for idx, bound in enumerate(self.__bounds):
+            if value <= bound:
+                self.__counts[idx] += 1
+                break
+        self.__sum += value
+        self.__count += 1
+
+    @property
+    def buckets(self) -> List[Tuple[float, int]]:
+        """The upper bounds and the cumulative counts of the buckets."""
+        result = []
+        total = 0
+        for bound, count in zip(self.__bounds, self.__counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    @property
+    def count(self) -> int:
+        """The number of the observed values."""
+        return self.__count
+
+    @property
+    def sum(self) -> float:
+        """The sum of the observed values."""
+        return self.__sum
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Get the state of the histogram as a dictionary.
+
+        :return: a dictionary with `buckets` (the list of upper bounds and \
+        cumulative counts), `count` and `sum` keys.
+        :rtype: dict
+        """
+        return {"buckets": self.buckets, "count": self.__count, "sum": self.__sum}
+
+
+class MetricsRegistry(Tracer):
+    """
+    Aggregated metrics of the operations of the connections that can be
+    attached to an :class:`LDAPClient` with :meth:`LDAPClient.set_metrics`.
+    The registry collects the number of operations and a histogram of their
+    durations by the kind of the operation, the durations of the phases of
+    opening the connections (initialisation, TLS negotiation and binding),
+    the number and the approximate size of the received entries, the time
+    spent in the extension module processing the results, and the number
+    of errors by their type. The metrics can be exported as a dictionary
+    with :meth:`snapshot` or in the Prometheus text exposition format with
+    :meth:`to_prometheus`. The registry is thread-safe, and it can be
+    shared by multiple clients.
+
+    :param buckets: the upper bounds of the duration histograms' buckets \
+    in seconds.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.__buckets = tuple(bound for bound, _ in Histogram(buckets).buckets)
+        self.__lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Reset every metric to zero."""
+        with self.__lock:
+            self.__operations: Dict[Tuple[str, str], int] = {}
+            self.__durations: Dict[str, Histogram] = {}
+            self.__phases = {name: Histogram(self.__buckets) for name in CONNECT_PHASES}
+            self.__errors: Dict[str, int] = {}
+            self.__received_entries = 0
+            self.__received_bytes = 0
+            self.__processing_time = 0.0
+
+    def on_end(self, trace: OperationTrace) -> None:
+        if trace.abandoned:
+            outcome = "abandoned"
+        elif trace.error is not None:
+            outcome = "error"
+        else:
+            outcome = "success"
+        phases: Optional[Tuple[float, float, float]] = None
+        if trace.kind == "open" and outcome == "success" and trace.conn is not None:
+            phases = getattr(trace.conn, "_connect_times", None)
+        with self.__lock:
+            key = (trace.kind, outcome)
+            self.__operations[key] = self.__operations.get(key, 0) + 1
+            hist = self.__durations.get(trace.kind)
+            if hist is None:
+                hist = self.__durations[trace.kind] = Histogram(self.__buckets)
+            hist.observe(trace.elapsed or 0.0)
+            if trace.error is not None:
+                name = type(trace.error).__name__
+                self.__errors[name] = self.__errors.get(name, 0) + 1
+            if phases is not None:
+                for name, value in zip(CONNECT_PHASES, phases):
+                    self.__phases[name].observe(value)
+            self.__received_entries += trace.entries or 0
+            self.__received_bytes += trace.size or 0
+            self.__processing_time += trace.c_time
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the current state of the metrics.
+
+        :return: a dictionary with the `operations` (the counts of the \
+        outcomes and the duration histogram by the kind of the operation), \
+        `connect_phases`, `errors`, `received_entries`, `received_bytes` \
+        and `processing_time` keys.
+        :rtype: dict
+        """
+        with self.__lock:
+            operations: Dict[str, Dict[str, Any]] = {}
+            for kind, hist in self.__durations.items():
+                operations[kind] = {
+                    "success": self.__operations.get((kind, "success"), 0),
+                    "error": self.__operations.get((kind, "error"), 0),
+                    "abandoned": self.__operations.get((kind, "abandoned"), 0),
+                    "duration": hist.as_dict(),
+                }
+            return {
+                "operations": operations,
+                "connect_phases": {
+                    name: hist.as_dict() for name, hist in self.__phases.items()
+                },
+                "errors": dict(self.__errors),
+                "received_entries": self.__received_entries,
+                "received_bytes": self.__received_bytes,
+                "processing_time": self.__processing_time,
+            }
+
+    def to_prometheus(self, prefix: str = "bonsai") -> str:
+        """
+        Export the metrics in the Prometheus text exposition format.
+
+        :param str prefix: the prefix of the metric names.
+        :return: the metrics as text.
+        :rtype: str
+        """
+        snapshot = self.snapshot()
+        lines: List[str] = []
+
+        def metric(name: str, mtype: str, doc: str) -> str:
+            name = f"{prefix}_{name}"
+            lines.append(f"# HELP {name} {doc}")
+            lines.append(f"# TYPE {name} {mtype}")
+            return name
+
+        def histogram(name: str, labels: List[Tuple[str, str]], hist: Dict) -> None:
+            for bound, count in hist["buckets"]:
+                bucket_labels = _format_labels(labels + [("le", _format_value(bound))])
+                lines.append(f"{name}_bucket{bucket_labels} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {hist['sum']!r}")
+            lines.append(f"{name}_count{_format_labels(labels)} {hist['count']}")
+
+        operations = snapshot["operations"]
+        name = metric("operations_total", "counter", "The number of LDAP operations.")
+        for kind, stats in sorted(operations.items()):
+            for outcome in ("success", "error", "abandoned"):
+                if stats[outcome]:
+                    labels = _format_labels([("operation", kind), ("outcome", outcome)])
+                    lines.append(f"{name}{labels} {stats[outcome]}")
+        name = metric(
+            "operation_duration_seconds",
+            "histogram",
+            "The duration of the LDAP operations.",
+        )
+        for kind, stats in sorted(operations.items()):
+            histogram(name, [("operation", kind)], stats["duration"])
+        name = metric(
+            "connect_phase_duration_seconds",
+            "histogram",
+            "The duration of the phases of opening the connections.",
+        )
+        for phase, hist in snapshot["connect_phases"].items():
+            histogram(name, [("phase", phase)], hist)
+        name = metric("errors_total", "counter", "The number of errors by type.")
+        for error, count in sorted(snapshot["errors"].items()):
+            lines.append(f"{name}{_format_labels([('error', error)])} {count}")
+        for key, suffix, doc in (
+            ("received_entries", "total", "The number of the received entries."),
+            (
+                "received_bytes",
+                "total",
+                "The approximate size of the received entries' data.",
+            ),
+            (
+                "processing_time",
+                "seconds_total",
+                "The time spent in the extension module processing the results.",
+            ),
+        ):
+            name = metric(f"{key}_{suffix}", "counter", doc)
+            lines.append(f"{name} {_format_value(snapshot[key])}")
+        return "\n".join(lines) + "\n"
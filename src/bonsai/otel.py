@@ -0,0 +1,74 @@
+import time
+from typing import Any, Dict, Optional
+
+from opentelemetry import trace as otel_trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+
+from .tracing import OperationTrace, Tracer
+
+
+def _wall_clock_ns(monotonic: float) -> int:
+    """Convert a time.monotonic value to nanoseconds since the epoch."""
+    return time.time_ns() - int((time.monotonic() - monotonic) * 1e9)
+
+
+class OpenTelemetryTracer(Tracer):
+    """
+    Tracing hooks that create an OpenTelemetry client span for every LDAP
+    operation. It requires the `opentelemetry-api` package (and an SDK
+    for exporting the spans).
+
+    >>> from bonsai.otel import OpenTelemetryTracer
+    >>> client.set_tracer(OpenTelemetryTracer())
+
+    The span's name is `LDAP <kind>`, and it has the following
+    attributes: `ldap.operation`, `ldap.msg_id`, `ldap.dn`, `ldap.scope`,
+    `ldap.filter`, `ldap.entries`, `ldap.response_size`,
+    `ldap.result_code`, `ldap.c_time` and `ldap.wait_time` (the ones that
+    are not set for the operation are omitted).
+
+    :param tracer_provider: the tracer provider, the global one is used \
+    by default.
+    """
+
+    def __init__(self, tracer_provider: Optional[Any] = None) -> None:
+        self.__tracer = otel_trace.get_tracer("bonsai", tracer_provider=tracer_provider)
+
+    def on_start(self, trace: OperationTrace) -> None:
+        attributes: Dict[str, Any] = {
+            "ldap.operation": trace.kind,
+            "ldap.msg_id": trace.msg_id,
+        }
+        for key, value in (
+            ("ldap.dn", trace.dn),
+            ("ldap.scope", trace.scope),
+            ("ldap.filter", trace.filter_exp),
+        ):
+            if value is not None:
+                attributes[key] = value
+        trace.data["otel_span"] = self.__tracer.start_span(
+            f"LDAP {trace.kind}",
+            kind=SpanKind.CLIENT,
+            attributes=attributes,
+            start_time=_wall_clock_ns(trace.started),
+        )
+
+    def on_end(self, trace: OperationTrace) -> None:
+        span = trace.data.pop("otel_span", None)
+        if span is None:
+            return
+        for key, value in (
+            ("ldap.entries", trace.entries),
+            ("ldap.response_size", trace.size),
+            ("ldap.result_code", trace.result_code),
+            ("ldap.c_time", trace.c_time),
+            ("ldap.wait_time", trace.wait_time),
+        ):
+            if value is not None:
+                span.set_attribute(key, value)
+        if trace.error is not None:
+            span.record_exception(trace.error)
+            span.set_status(Status(StatusCode.ERROR, str(trace.error)))
+        elif trace.abandoned:
+            span.set_status(Status(StatusCode.ERROR, "The operation is abandoned."))
+        span.end(end_time=_wall_clock_ns(trace.finished or time.monotonic()))
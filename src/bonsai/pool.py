@@ -65,6 +65,7 @@ class ConnectionPool(Generic[T]):
         self._closed = True
         self._idles: Set[T] = set()
         self._used: Set[T] = set()
+        self._quarantined = 0
 
     def open(self) -> None:
         """
@@ -86,7 +87,7 @@ class ConnectionPool(Generic[T]):
         if self._closed:
             raise ClosedPool("The pool is closed.")
         try:
-            conn = self._idles.pop()
+            conn = self._pop_idle()
         except KeyError:
             if len(self._used) < self._maxconn:
                 conn = self._client.connect(**self._kwargs)
@@ -111,10 +112,41 @@ class ConnectionPool(Generic[T]):
             raise ClosedPool("The pool is closed.")
         try:
             self._used.remove(conn)
-            if not conn.closed:
-                self._idles.add(conn)
         except KeyError:
             raise PoolError("The %r is not managed by this pool." % conn) from None
+        if not conn.closed and not self._quarantine(conn):
+            self._idles.add(conn)
+
+    def _pop_idle(self) -> T:
+        """
+        Remove and return an idle connection, skipping the quarantined
+        ones. Raise KeyError, if there's no idle connection.
+        """
+        while True:
+            conn = self._idles.pop()
+            if not self._quarantine(conn):
+                return conn
+
+    def _quarantine(self, conn: T) -> bool:
+        """
+        Close the connection, if it has stuck operations according to the
+        client's watchdog. Return True, if the connection is closed.
+        """
+        watchdog = self._client.watchdog
+        if watchdog is None or not watchdog.is_stuck(conn):
+            return False
+        stale = ", ".join(
+            f"{op.kind} (msgid: {op.msg_id})" for op in watchdog.stale_operations(conn)
+        )
+        logger.warning(f"Closing connection with stuck operations: {stale}")
+        try:
+            conn.close()
+        except Exception as exc:
+            logger.warning(
+                f"Exception is raised during closing stuck connection: {exc}"
+            )
+        self._quarantined += 1
+        return True
 
     def close(self) -> None:
         """Close the pool and all of its managed connections."""
@@ -184,6 +216,14 @@ class ConnectionPool(Generic[T]):
         """the number of idle connection."""
         return len(self._idles)
 
+    @property
+    def quarantined(self) -> int:
+        """
+        The number of connections that are closed by the pool, because
+        they had stuck operations according to the client's watchdog.
+        """
+        return self._quarantined
+
     @property
     def max_connection(self) -> int:
         """The maximal number of connections that the pool can have."""
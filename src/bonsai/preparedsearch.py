@@ -0,0 +1,165 @@
+from string import Formatter
+from typing import Any, List, Optional, Tuple
+
+from bonsai._bonsai import ldapconnection
+from .errors import FilterError
+
+MYPY = False
+
+if MYPY:
+    from .ldapconnection import BaseLDAPConnection
+
+
+_ESCAPE_TABLE = str.maketrans(
+    {"\\": "\\5c", "*": "\\2a", "(": "\\28", ")": "\\29", "\0": "\\00"}
+)
+
+
+def _escape_value(value: Any) -> str:
+    """Escape a parameter value to be inserted into a filter expression."""
+    if type(value) is str:
+        return value.translate(_ESCAPE_TABLE)
+    if isinstance(value, (bytes, bytearray)):
+        return "".join(f"\\{byte:02x}" for byte in value)
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    return str(value).translate(_ESCAPE_TABLE)
+
+
+def _check_parentheses(filter_exp: str) -> None:
+    """
+    Check that the parentheses of a filter expression are balanced. The
+    parentheses in the assertion values are escaped, therefore every one
+    of them is part of the structure of the filter.
+    """
+    depth = 0
+    for char in filter_exp:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth < 0:
+                break
+    if depth != 0:
+        raise FilterError(f"Unbalanced parentheses in the filter: '{filter_exp}'.")
+
+
+class PreparedSearch:
+    """
+    A search with fixed parameters that can be executed repeatedly, created
+    by :meth:`LDAPConnection.prepare_search`. The default values of the
+    client's URL and the filter template are processed, the parameters
+    are converted for the client library, and the server controls (of the
+    sort order and the client's extended DN format, SD flags and
+    ManageDsaIT settings) are created only once, therefore only the
+    filter expression is converted when the search is executed. The
+    changes of the client's settings after preparing the search do not
+    affect it.
+
+    The filter expression can contain named placeholders in curly braces
+    (e.g. ``(&(objectClass=person)(uid={uid}))``). The values of the
+    placeholders are passed as keyword arguments when the search is
+    executed, and they are escaped based on RFC 4515. Literal curly braces
+    have to be doubled.
+    """
+
+    def __init__(
+        self,
+        conn: "BaseLDAPConnection",
+        base: str,
+        scope: int,
+        filter_exp: str,
+        attrlist: List[str],
+        timeout: Optional[float],
+        sizelimit: int,
+        attrsonly: bool,
+        sort_order: Optional[List[str]],
+        sort_list: List[Tuple[str, bool]],
+    ) -> None:
+        self.__conn = conn
+        self.__base = base
+        self.__scope = scope
+        self.__filter_exp = filter_exp
+        self.__attrlist = attrlist
+        self.__timeout = timeout
+        self.__sizelimit = sizelimit
+        self.__attrsonly = attrsonly
+        self.__sort_order = sort_order
+        params = []
+        try:
+            for _, field, spec, conv in Formatter().parse(filter_exp):
+                if field is not None and (not field.isidentifier() or spec or conv):
+                    raise ValueError(f"Invalid placeholder: '{{{field}}}'.")
+                if field is not None:
+                    params.append(field)
+        except ValueError as exc:
+            raise ValueError(
+                f"Invalid filter template: '{filter_exp}' ({exc})."
+            ) from None
+        self.__params = frozenset(params)
+        self.__template = filter_exp
+        # The rest of the syntax is checked by the server.
+        _check_parentheses(filter_exp)
+        self.__search = ldapconnection.search_prepared
+        self.__plan = ldapconnection.prepare_search(
+            conn,
+            base,
+            scope,
+            list(attrlist) if attrlist else [],
+            timeout if timeout is not None else 0.0,
+            sizelimit,
+            attrsonly,
+            sort_list,
+        )
+
+    def __call__(self, **params: Any) -> Any:
+        """
+        Execute the search.
+
+        :param \\*\\*params: the values of the placeholders of the filter.
+        :return: the search result, like :meth:`LDAPConnection.search`.
+        :raises TypeError: if a placeholder is missing, or an unknown \
+        parameter is given.
+        """
+        try:
+            if len(params) != len(self.__params):
+                raise KeyError
+            filter_exp = self.__template.format_map(
+                {key: _escape_value(val) for key, val in params.items()}
+            )
+        except KeyError:
+            missing = self.__params - params.keys()
+            if missing:
+                raise TypeError(
+                    f"Missing parameters: {', '.join(sorted(missing))}."
+                ) from None
+            unknown = params.keys() - self.__params
+            raise TypeError(
+                f"Unknown parameters: {', '.join(sorted(unknown))}."
+            ) from None
+        conn = self.__conn
+        if conn._uses_search_layers:
+            # Let the cache and the coalescer see the search.
+            return conn.search(
+                self.__base,
+                self.__scope,
+                filter_exp,
+                self.__attrlist,
+                self.__timeout,
+                self.__sizelimit,
+                self.__attrsonly,
+                self.__sort_order,
+            )
+        return conn._evaluate(
+            self.__search(conn, self.__plan, filter_exp), self.__timeout
+        )
+
+    execute = __call__
+
+    def __repr__(self) -> str:
+        return f"<PreparedSearch {self.__base} {self.__scope} {self.__filter_exp}>"
+
+    @property
+    def parameters(self) -> frozenset:
+        """The names of the placeholders of the filter expression."""
+        return self.__params
@@ -0,0 +1,163 @@
+from enum import IntFlag
+from typing import Any, List, NamedTuple, Optional, Tuple, Union
+
+from .ber import (
+    TAG_ENUMERATED,
+    TAG_INTEGER,
+    TAG_OCTET_STRING,
+    BERDecodingError,
+    decode_integer,
+    decode_sequence,
+    encode_boolean,
+    encode_integer,
+    encode_sequence,
+    find_control,
+)
+from .ldapdn import LDAPDN
+from .ldapentry import LDAPEntry
+
+MYPY = False
+
+if MYPY:
+    from .ldapconnection import BaseLDAPConnection, LDAPSearchScope
+
+PSEARCH_OID = "2.16.840.1.113730.3.4.3"
+ENTRY_CHANGE_OID = "2.16.840.1.113730.3.4.7"
+#: The OID of Active Directory's change notification control.
+LDAP_SERVER_NOTIFICATION_OID = "1.2.840.113556.1.4.528"
+
+Control = Tuple[str, bool, Optional[bytes]]
+
+
+class ChangeType(IntFlag):
+    """ Flags for the types of changes of a persistent search. """
+
+    ADD = 1  #: The entry is added.
+    DELETE = 2  #: The entry is deleted.
+    MODIFY = 4  #: The entry is modified.
+    MODDN = 8  #: The entry is renamed or moved.
+    ALL = 15  #: Every type of changes.
+
+
+class ChangeNotification(NamedTuple):
+    """ A notification of a changed entry. """
+
+    #: The entry with its current attributes (or the last attributes for
+    #: a deleted entry).
+    entry: LDAPEntry
+    #: The type of the change, None if the server did not report it
+    #: (e.g. Active Directory or for the initial entries of the search).
+    change_type: Optional[ChangeType]
+    #: The DN of the entry before it is renamed or moved.
+    previous_dn: Optional[LDAPDN]
+    #: The change number of the change, if the server reported it.
+    change_number: Optional[int]
+
+
+def encode_psearch_request(
+    change_types: ChangeType, changes_only: bool, return_ecs: bool
+) -> bytes:
+    """Encode the value of a persistent search control."""
+    return encode_sequence(
+        encode_integer(int(change_types)),
+        encode_boolean(changes_only),
+        encode_boolean(return_ecs),
+    )
+
+
+def decode_entry_change(
+    value: bytes,
+) -> Tuple[ChangeType, Optional[str], Optional[int]]:
+    """Decode the value of an entry change notification control."""
+    items = decode_sequence(value)
+    if not items or items[0][0] != TAG_ENUMERATED:
+        raise BERDecodingError("Invalid entry change notification control.")
+    change_type = decode_integer(items[0][1])
+    if change_type not in (1, 2, 4, 8):
+        raise BERDecodingError(f"Invalid change type: {change_type}.")
+    previous_dn = None
+    change_number = None
+    for tag, content in items[1:]:
+        if tag == TAG_OCTET_STRING:
+            previous_dn = content.decode("UTF-8")
+        elif tag == TAG_INTEGER:
+            change_number = decode_integer(content)
+    return ChangeType(change_type), previous_dn, change_number
+
+
+class PersistentSearch:
+    """
+    A long-lived search that returns the entries as they change, created
+    by :meth:`LDAPConnection.persistent_search` or
+    :meth:`LDAPConnection.notification_search`. It is an iterator of
+    :class:`ChangeNotification` objects, or an asynchronous iterator for
+    the asynchronous connections. The search runs until it's closed or
+    the server ends it.
+    """
+
+    def __init__(
+        self,
+        conn: "BaseLDAPConnection",
+        base: Optional[Union[str, LDAPDN]],
+        scope: Optional[Union["LDAPSearchScope", int]],
+        filter_exp: Optional[str],
+        attrlist: Optional[List[str]],
+        server_ctrls: List[Control],
+        timeout: Optional[float],
+    ) -> None:
+        msg_id = conn._send_stream_search(
+            base, scope, filter_exp, attrlist, timeout, server_ctrls
+        )
+        self.__messages = conn._stream_messages(msg_id, timeout)
+        self.__finished = False
+
+    def __process(self, msg: Tuple[str, Any, List[Control]]) -> Optional[Any]:
+        msgtype, obj, ctrls = msg
+        if msgtype == "entry":
+            value = find_control(ctrls, ENTRY_CHANGE_OID)
+            if value is None:
+                return ChangeNotification(obj, None, None, None)
+            change_type, previous_dn, change_number = decode_entry_change(value)
+            return ChangeNotification(
+                obj,
+                change_type,
+                LDAPDN(previous_dn) if previous_dn is not None else None,
+                change_number,
+            )
+        elif msgtype == "result":
+            self.__finished = True
+        return None
+
+    def __iter__(self) -> "PersistentSearch":
+        if not hasattr(self.__messages, "__next__"):
+            raise TypeError("Use async for with an asynchronous connection.")
+        return self
+
+    def __next__(self) -> ChangeNotification:
+        while not self.__finished:
+            ntf = self.__process(next(self.__messages))
+            if ntf is not None:
+                return ntf
+        raise StopIteration
+
+    def __aiter__(self) -> "PersistentSearch":
+        if not hasattr(self.__messages, "__anext__"):
+            raise TypeError("Use for with a synchronous connection.")
+        return self
+
+    async def __anext__(self) -> ChangeNotification:
+        while not self.__finished:
+            ntf = self.__process(await self.__messages.__anext__())
+            if ntf is not None:
+                return ntf
+        raise StopAsyncIteration
+
+    def close(self) -> Any:
+        """
+        Stop the search, and abandon it on the server. For asynchronous
+        iterators it returns an awaitable.
+        """
+        self.__finished = True
+        if hasattr(self.__messages, "aclose"):
+            return self.__messages.aclose()
+        return self.__messages.close()
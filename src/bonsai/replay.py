@@ -0,0 +1,226 @@
+import inspect
+import logging
+from collections import deque
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from .diff import DNKey, dn_sort_key
+from .errors import LDAPError
+from .ldapchange import LDAPChange
+from .ldapconnection import BaseLDAPConnection
+from .pool import ConnectionPool, EmptyPool
+
+logger = logging.getLogger("bonsai.replay")
+
+ErrorHandler = Callable[[LDAPChange, LDAPError], None]
+PendingOp = Tuple[LDAPChange, BaseLDAPConnection, int, Tuple[DNKey, ...]]
+
+
+def _get_keys(change: LDAPChange) -> Tuple[DNKey, ...]:
+    if change.newdn is not None:
+        return (dn_sort_key(change.dn), dn_sort_key(change.newdn))
+    return (dn_sort_key(change.dn),)
+
+
+def _get_dns(change: LDAPChange) -> Tuple[str, ...]:
+    if change.newdn is not None:
+        return (str(change.dn), str(change.newdn))
+    return (str(change.dn),)
+
+
+def _is_blocked(keys: Tuple[DNKey, ...], pending: Deque[PendingOp]) -> bool:
+    """
+    Check that any of the pending operations affects the same entry as
+    the new change, or one of its ancestors or descendants.
+    """
+    for *_, pending_keys in pending:
+        for key in keys:
+            for other in pending_keys:
+                size = min(len(key), len(other))
+                if key[:size] == other[:size]:
+                    return True
+    return False
+
+
+def _check_max_pending(max_pending: int) -> None:
+    if not isinstance(max_pending, int) or max_pending < 1:
+        raise ValueError("The max_pending must be a positive int.")
+
+
+def _handle_error(
+    change: LDAPChange, exc: LDAPError, on_error: Optional[ErrorHandler]
+) -> None:
+    if on_error is None:
+        raise exc
+    on_error(change, exc)
+
+
+def _acquire_connections(
+    pool: ConnectionPool, max_pending: int
+) -> List[BaseLDAPConnection]:
+    if pool.closed:
+        pool.open()
+    conns = [pool.get()]
+    try:
+        while len(conns) < min(max_pending, pool.max_connection) and not pool.empty:
+            conns.append(pool.get())
+    except EmptyPool:
+        pass
+    return conns
+
+
+def replay_changes(
+    changes: Iterable[LDAPChange],
+    conn: Union[BaseLDAPConnection, ConnectionPool],
+    max_pending: int = 16,
+    timeout: Optional[float] = None,
+    on_error: Optional[ErrorHandler] = None,
+) -> int:
+    """
+    Apply change records (e.g. from :meth:`LDIFReader.read_changes` or
+    :func:`bonsai.diff.diff_entries`) to the directory server. The
+    operations are pipelined: up to `max_pending` operations are sent
+    before waiting for their results. With a connection pool the
+    operations are distributed between the idle connections of the pool.
+
+    A change is not sent while an earlier operation on the same entry, on
+    one of its ancestors or on one of its descendants (considering both
+    the old and the new DN of renames) is still in progress. Therefore,
+    the dependent changes are applied in the order of the input.
+
+    :param changes: the iterable of :class:`LDAPChange` objects.
+    :param conn: an open synchronous :class:`LDAPConnection` or a \
+    :class:`bonsai.pool.ConnectionPool` of synchronous connections.
+    :param int max_pending: the maximal number of operations in progress.
+    :param float timeout: time limit in seconds for waiting the result \
+    of an operation.
+    :param on_error: a callable that is called with the change and the \
+    raised :class:`LDAPError` when a change is failed. If it's not set, \
+    the error is raised after the operations in progress are finished.
+    :return: the number of successfully applied changes.
+    :rtype: int
+    :raises ValueError: if `max_pending` is not a positive int.
+    :raises TypeError: if the connection is asynchronous.
+    """
+    _check_max_pending(max_pending)
+    if isinstance(conn, ConnectionPool):
+        if inspect.iscoroutinefunction(conn.get):
+            raise TypeError(
+                "Asynchronous pools are not supported, use async_replay_changes."
+            )
+        conns = _acquire_connections(conn, max_pending)
+    else:
+        conns = [conn]
+    if any(cnn.is_async for cnn in conns):
+        if isinstance(conn, ConnectionPool):
+            for cnn in conns:
+                conn.put(cnn)
+        raise TypeError(
+            "Asynchronous connections are not supported, use async_replay_changes."
+        )
+    pending: Deque[PendingOp] = deque()
+    applied = 0
+
+    def collect() -> None:
+        nonlocal applied
+        change, cnn, msg_id, _ = pending.popleft()
+        try:
+            cnn._evaluate_write(msg_id, timeout, *_get_dns(change))
+            applied += 1
+        except LDAPError as exc:
+            _handle_error(change, exc, on_error)
+
+    try:
+        for idx, change in enumerate(changes):
+            keys = _get_keys(change)
+            while pending and (len(pending) >= max_pending or _is_blocked(keys, pending)):
+                collect()
+            cnn = conns[idx % len(conns)]
+            pending.append((change, cnn, change._send(cnn), keys))
+        while pending:
+            collect()
+    finally:
+        # Wait for the operations that are still in progress after an error.
+        while pending:
+            change, cnn, msg_id, _ = pending.popleft()
+            try:
+                cnn._evaluate_write(msg_id, timeout, *_get_dns(change))
+            except LDAPError as exc:
+                logger.warning(f"Failed to apply {change!r} after an error: {exc}")
+        if isinstance(conn, ConnectionPool):
+            for cnn in conns:
+                conn.put(cnn)
+    return applied
+
+
+async def async_replay_changes(
+    changes: Iterable[LDAPChange],
+    conn: BaseLDAPConnection,
+    max_pending: int = 16,
+    timeout: Optional[float] = None,
+    on_error: Optional[ErrorHandler] = None,
+) -> int:
+    """
+    The asynchronous version of :func:`bonsai.replay.replay_changes`. The
+    changes are pipelined on a single asynchronous connection of any
+    supported event loop, the results are awaited in the order of sending.
+
+    :param changes: the iterable of :class:`LDAPChange` objects.
+    :param BaseLDAPConnection conn: an open asynchronous connection.
+    :param int max_pending: the maximal number of operations in progress.
+    :param float timeout: time limit in seconds for waiting the result \
+    of an operation.
+    :param on_error: a callable that is called with the change and the \
+    raised :class:`LDAPError` when a change is failed. If it's not set, \
+    the error is raised after the operations in progress are finished.
+    :return: the number of successfully applied changes.
+    :rtype: int
+    :raises ValueError: if `max_pending` is not a positive int.
+    :raises TypeError: if the connection is synchronous.
+    """
+    _check_max_pending(max_pending)
+    if not conn.is_async:
+        raise TypeError("Synchronous connections are not supported, use replay_changes.")
+    pending: Deque[PendingOp] = deque()
+    applied = 0
+
+    async def wait(change: LDAPChange, msg_id: int) -> Any:
+        res = conn._evaluate_write(msg_id, timeout, *_get_dns(change))
+        if inspect.isawaitable(res):
+            res = await res
+        return res
+
+    async def collect() -> None:
+        nonlocal applied
+        change, _, msg_id, _ = pending.popleft()
+        try:
+            await wait(change, msg_id)
+            applied += 1
+        except LDAPError as exc:
+            _handle_error(change, exc, on_error)
+
+    try:
+        for change in changes:
+            keys = _get_keys(change)
+            while pending and (len(pending) >= max_pending or _is_blocked(keys, pending)):
+                await collect()
+            pending.append((change, conn, change._send(conn), keys))
+        while pending:
+            await collect()
+    finally:
+        # Wait for the operations that are still in progress after an error.
+        while pending:
+            change, _, msg_id, _ = pending.popleft()
+            try:
+                await wait(change, msg_id)
+            except LDAPError as exc:
+                logger.warning(f"Failed to apply {change!r} after an error: {exc}")
+    return applied
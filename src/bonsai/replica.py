@@ -0,0 +1,738 @@
+import gc
+import os
+import pickle
+import sqlite3
+import threading
+import uuid
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from .diff import dn_key, parent_key
+from .errors import SizeLimitError
+from .ldapchange import LDAPChange, LDAPChangeType
+from .ldapconnection import LDAPSearchScope
+from .ldapdn import LDAPDN
+from .ldapentry import LDAPEntry
+from .ldapfilter import compile_record_filter, normalise_value
+from .searchcache import thaw_result
+from .syncrepl import SyncMode, SyncNotification, SyncState
+
+MYPY = False
+
+if MYPY:
+    from .ldapconnection import LDAPConnection
+
+# The stored form of an entry: the DN string and the attribute values
+# keyed by the lower-cased attribute names.
+Record = Tuple[str, Dict[str, Tuple[Any, ...]]]
+SearchParams = Tuple[Any, Any, Optional[str], Optional[List[str]]]
+
+# The version of the snapshot file format.
+_SNAPSHOT_VERSION = 1
+
+
+class LocalReplica:
+    """
+    An in-memory copy of a part of the directory that answers searches
+    locally with the same results as :meth:`LDAPConnection.search`. The
+    entries are stored in a DN tree, every attribute has a presence index
+    and the attributes listed in `indexes` have an equality index too.
+
+    The search filter is evaluated by :class:`LDAPFilter`. Equality and
+    presence assertions of the indexed attributes, and their AND and OR
+    combinations narrow the candidates before the filter is evaluated,
+    otherwise every entry in the search scope is checked.
+
+    The replica can be populated from a paged search with
+    :meth:`populate`, from any iterable of entries (e.g. a search result
+    or an :class:`LDIFReader`) with :meth:`load`, and kept up to date with
+    :meth:`apply` by :class:`LDAPChange` objects or the notifications of a
+    :class:`SyncReplConsumer`. The replica is thread-safe.
+
+    :param indexes: the names of the attributes with equality index.
+    """
+
+    def __init__(self, indexes: Iterable[str] = ("objectClass",)) -> None:
+        self.__lock = threading.RLock()
+        self.__entries: Dict[str, Record] = {}
+        # Parent key -> child keys, including the ancestors that are not
+        # stored, to be able to walk down from any of them.
+        self.__children: Dict[str, Set[str]] = {}
+        self.__names: Dict[str, str] = {}
+        self.__presence: Dict[str, Set[str]] = {}
+        self.__equality: Dict[str, Dict[Any, Set[str]]] = {
+            attr.lower(): {} for attr in indexes
+        }
+        self.__uuids: Dict[uuid.UUID, str] = {}
+        self.__key_uuids: Dict[str, uuid.UUID] = {}
+        self.__cookie: Optional[bytes] = None
+        self.__highest_usn: Optional[int] = None
+        self.__source: Optional[SearchParams] = None
+
+    def __index(self, key: str, attrs: Dict[str, Tuple[Any, ...]]) -> None:
+        for attr, vals in attrs.items():
+            self.__presence.setdefault(attr, set()).add(key)
+            index = self.__equality.get(attr)
+            if index is not None:
+                for val in vals:
+                    index.setdefault(normalise_value(val), set()).add(key)
+
+    def __unindex(self, key: str, attrs: Dict[str, Tuple[Any, ...]]) -> None:
+        for attr, vals in attrs.items():
+            keys = self.__presence[attr]
+            keys.discard(key)
+            if not keys:
+                del self.__presence[attr]
+            index = self.__equality.get(attr)
+            if index is not None:
+                for val in vals:
+                    norm = normalise_value(val)
+                    matched = index.get(norm)
+                    if matched is not None:
+                        matched.discard(key)
+                        if not matched:
+                            del index[norm]
+
+    def __store(self, key: str, record: Record) -> None:
+        old = self.__entries.get(key)
+        if old is not None:
+            self.__unindex(key, old[1])
+        self.__entries[key] = record
+        self.__index(key, record[1])
+        attrs = record[1]
+        if "entryuuid" in attrs:
+            try:
+                self.__set_uuid(key, uuid.UUID(str(attrs["entryuuid"][0])))
+            except ValueError:
+                pass
+        if "usnchanged" in attrs:
+            usn = max(int(val) for val in attrs["usnchanged"])
+            if self.__highest_usn is None or usn > self.__highest_usn:
+                self.__highest_usn = usn
+        child = key
+        while child:
+            parent = parent_key(child)
+            siblings = self.__children.setdefault(parent, set())
+            if child in siblings:
+                break
+            siblings.add(child)
+            child = parent
+
+    def __discard(self, key: str) -> Optional[Record]:
+        record = self.__entries.pop(key, None)
+        if record is None:
+            return None
+        self.__unindex(key, record[1])
+        entry_uuid = self.__key_uuids.pop(key, None)
+        if entry_uuid is not None:
+            del self.__uuids[entry_uuid]
+        child = key
+        while child and child not in self.__entries and not self.__children.get(child):
+            self.__children.pop(child, None)
+            parent = parent_key(child)
+            siblings = self.__children.get(parent)
+            if siblings is None:
+                break
+            siblings.discard(child)
+            child = parent
+        return record
+
+    def __set_uuid(self, key: str, entry_uuid: uuid.UUID) -> None:
+        old_key = self.__uuids.get(entry_uuid)
+        if old_key is not None and old_key != key:
+            self.__key_uuids.pop(old_key, None)
+        old_uuid = self.__key_uuids.get(key)
+        if old_uuid is not None and old_uuid != entry_uuid:
+            del self.__uuids[old_uuid]
+        self.__uuids[entry_uuid] = key
+        self.__key_uuids[key] = entry_uuid
+
+    def __subtree(self, key: str) -> List[str]:
+        entries = self.__entries
+        if not key:
+            return list(entries)
+        children = self.__children
+        result = [key] if key in entries else []
+        stack = [key]
+        while stack:
+            nodes = children.get(stack.pop())
+            if nodes:
+                result.extend(node for node in nodes if node in entries)
+                # Only the nodes with children need to be visited.
+                stack.extend(node for node in nodes if node in children)
+        return result
+
+    def __set_entry(self, entry: LDAPEntry) -> str:
+        attrs: Dict[str, Tuple[Any, ...]] = {}
+        for name, vals in entry.items(exclude_dn=True):
+            if not vals:
+                continue
+            attr = name.lower()
+            self.__names.setdefault(attr, name)
+            attrs[attr] = tuple(vals)
+        key = dn_key(entry.dn)
+        self.__store(key, (str(entry.dn), attrs))
+        return key
+
+    def add(self, entry: LDAPEntry) -> None:
+        """
+        Add an entry to the replica, or replace the stored entry with the
+        same DN.
+
+        :param LDAPEntry entry: the entry to add.
+        :raises TypeError: if `entry` is not an LDAPEntry.
+        """
+        if not isinstance(entry, LDAPEntry):
+            raise TypeError("The entry must be an LDAPEntry.")
+        with self.__lock:
+            self.__set_entry(entry)
+
+    def load(self, entries: Iterable[Any]) -> int:
+        """
+        Add the entries of an iterable (a search result, the iterator of
+        a paged search, an :class:`LDIFReader` etc.) to the replica. The
+        objects that are not LDAPEntry (e.g. :class:`LDAPReference`) are
+        skipped.
+
+        :param entries: the iterable of the entries.
+        :return: the number of the added entries.
+        :rtype: int
+        """
+        count = 0
+        for entry in entries:
+            if isinstance(entry, LDAPEntry):
+                with self.__lock:
+                    self.__set_entry(entry)
+                count += 1
+        return count
+
+    def populate(
+        self,
+        conn: "LDAPConnection",
+        base: Optional[Union[str, LDAPDN]] = None,
+        scope: Optional[Union[LDAPSearchScope, int]] = None,
+        filter_exp: Optional[str] = None,
+        attrlist: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+        page_size: int = 500,
+    ) -> int:
+        """
+        Add the result of a paged search to the replica. The search
+        parameters are the same as for :meth:`LDAPConnection.paged_search`.
+        The connection must be synchronous and the client's
+        :attr:`LDAPClient.auto_page_acquire` has to be enabled.
+
+        The search parameters are stored as the defaults of
+        :meth:`synchronize`.
+
+        :param LDAPConnection conn: the connection to search with.
+        :param int page_size: the number of entries on a page.
+        :return: the number of the added entries.
+        :rtype: int
+        """
+        self.__source = (base, scope, filter_exp, attrlist)
+        return self.load(
+            conn.paged_search(
+                base, scope, filter_exp, attrlist, timeout, page_size=page_size
+            )
+        )
+
+    def remove(self, dn: Union[str, LDAPDN]) -> bool:
+        """
+        Remove an entry from the replica.
+
+        :param str|LDAPDN dn: the DN of the entry.
+        :return: True if the entry was in the replica.
+        :rtype: bool
+        """
+        with self.__lock:
+            return self.__discard(dn_key(dn)) is not None
+
+    def __modify(self, change: LDAPChange) -> None:
+        key = dn_key(change.dn)
+        record = self.__entries.get(key)
+        if record is None:
+            return
+        attrs = dict(record[1])
+        status = change.entry._status()
+        for name in status.pop("@deleted_keys"):
+            attrs.pop(name.lower(), None)
+        for name, stat in status.items():
+            attr = name.lower()
+            self.__names.setdefault(attr, name)
+            if stat["@status"] == 2:
+                attrs[attr] = tuple(stat["@added"])
+            elif stat["@status"] == 1:
+                deleted = {normalise_value(val) for val in stat["@deleted"]}
+                vals = [
+                    val
+                    for val in attrs.get(attr, ())
+                    if normalise_value(val) not in deleted
+                ]
+                vals.extend(stat["@added"])
+                attrs[attr] = tuple(vals)
+            if not attrs.get(attr, True):
+                del attrs[attr]
+        self.__store(key, (record[0], attrs))
+
+    def __rename(self, change: LDAPChange) -> None:
+        old_dn = LDAPDN(str(change.dn))
+        new_dn = LDAPDN(str(change.newdn))
+        old_key = dn_key(old_dn)
+        new_key = dn_key(new_dn)
+        depth = old_key.count("\0")
+        records = [
+            (key, self.__key_uuids.get(key), self.__discard(key))
+            for key in self.__subtree(old_key)
+        ]
+        for key, entry_uuid, record in records:
+            if record is None:
+                continue
+            dn, attrs = record
+            if key == old_key:
+                attrs = dict(attrs)
+                new_rdn = new_dn.rdns[0]
+                if change.delete_old_rdn:
+                    for rdn_attr, rdn_val in old_dn.rdns[0]:
+                        attr = rdn_attr.lower()
+                        norm = normalise_value(rdn_val)
+                        vals = tuple(
+                            val
+                            for val in attrs.get(attr, ())
+                            if normalise_value(val) != norm
+                        )
+                        if vals:
+                            attrs[attr] = vals
+                        else:
+                            attrs.pop(attr, None)
+                for rdn_attr, rdn_val in new_rdn:
+                    attr = rdn_attr.lower()
+                    vals = attrs.get(attr, ())
+                    norm = normalise_value(rdn_val)
+                    if norm not in {normalise_value(val) for val in vals}:
+                        self.__names.setdefault(attr, rdn_attr)
+                        attrs[attr] = vals + (rdn_val,)
+                dn = str(new_dn)
+            else:
+                rel_dn = LDAPDN(dn)[0 : key.count("\0") - depth]
+                dn = f"{rel_dn},{new_dn}"
+            self.__store(new_key + key[len(old_key) :], (dn, attrs))
+            if entry_uuid is not None:
+                self.__set_uuid(new_key + key[len(old_key) :], entry_uuid)
+
+    def apply(self, change: Union[LDAPChange, SyncNotification]) -> None:
+        """
+        Apply a change to the replica. The change can be an
+        :class:`LDAPChange` (e.g. from :func:`bonsai.diff.diff_entries` or
+        an :class:`LDIFReader`) or a :class:`SyncNotification` of a
+        content synchronization. Changes of entries that are not in the
+        replica are ignored, except additions.
+
+        :param change: the change to apply.
+        :raises TypeError: if the type of the `change` is invalid.
+        :raises ValueError: if an added or modified notification has no \
+        entry.
+        """
+        with self.__lock:
+            if isinstance(change, LDAPChange):
+                if change.changetype == LDAPChangeType.ADD:
+                    self.__set_entry(change.entry)
+                elif change.changetype == LDAPChangeType.DELETE:
+                    self.__discard(dn_key(change.dn))
+                elif change.changetype == LDAPChangeType.MODIFY:
+                    self.__modify(change)
+                else:
+                    self.__rename(change)
+            elif isinstance(change, SyncNotification):
+                old_key = (
+                    self.__uuids.get(change.uuid) if change.uuid is not None else None
+                )
+                if change.state in (SyncState.ADD, SyncState.MODIFY):
+                    if change.entry is None:
+                        raise ValueError("The notification has no entry.")
+                    key = self.__set_entry(change.entry)
+                    if old_key is not None and old_key != key:
+                        # The entry is renamed.
+                        self.__discard(old_key)
+                    if change.uuid is not None:
+                        self.__set_uuid(key, change.uuid)
+                elif change.state == SyncState.DELETE:
+                    if change.dn is not None:
+                        self.__discard(dn_key(change.dn))
+                    elif old_key is not None:
+                        self.__discard(old_key)
+                if change.cookie is not None:
+                    self.__cookie = change.cookie
+            else:
+                raise TypeError("The change must be an LDAPChange or SyncNotification.")
+
+    def synchronize(
+        self,
+        conn: "LDAPConnection",
+        base: Optional[Union[str, LDAPDN]] = None,
+        scope: Optional[Union[LDAPSearchScope, int]] = None,
+        filter_exp: Optional[str] = None,
+        attrlist: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+    ) -> int:
+        """
+        Catch up with the changes of the directory since the replica's
+        last known state. Without search parameters the ones of the
+        earlier :meth:`populate` call are used.
+
+        If the server supports content synchronization (RFC 4533), a
+        refreshOnly :meth:`LDAPConnection.sync_search` is started with the
+        stored :attr:`cookie`, the changes are applied and the new cookie
+        is stored. Without a cookie the first synchronization reloads the
+        whole content. If there is no cookie, but the entries have
+        `uSNChanged` attributes (Active Directory), the entries with
+        greater USN than the :attr:`highest_usn` are searched instead.
+        Deleted entries cannot be detected this way, unless the server
+        returns them.
+
+        The connection must be synchronous.
+
+        :param LDAPConnection conn: the connection to the server.
+        :return: the number of the changed entries.
+        :rtype: int
+        """
+        if base is None and scope is None and filter_exp is None and attrlist is None:
+            base, scope, filter_exp, attrlist = self.__source or (None,) * 4
+        if self.__cookie is None and self.__highest_usn is not None:
+            if attrlist and not {"*", "usnchanged"} & {a.lower() for a in attrlist}:
+                attrlist = list(attrlist) + ["uSNChanged"]
+            filter_exp = filter_exp or "(objectClass=*)"
+            if not filter_exp.startswith("("):
+                filter_exp = f"({filter_exp})"
+            filter_exp = f"(&{filter_exp}(uSNChanged>={self.__highest_usn + 1}))"
+            return self.load(
+                conn.paged_search(
+                    base, scope, filter_exp, attrlist, timeout, page_size=500
+                )
+            )
+        consumer = conn.sync_search(
+            base,
+            scope,
+            filter_exp,
+            attrlist,
+            SyncMode.REFRESH_ONLY,
+            self.__cookie,
+            timeout=timeout,
+        )
+        count = 0
+        present: Set[str] = set()
+        for ntf in consumer:
+            if ntf.state == SyncState.REFRESH_DONE:
+                continue
+            if ntf.state != SyncState.PRESENT:
+                self.apply(ntf)
+                count += 1
+            if ntf.state != SyncState.DELETE:
+                with self.__lock:
+                    key: Optional[str] = None
+                    if ntf.dn is not None:
+                        key = dn_key(ntf.dn)
+                    elif ntf.uuid is not None:
+                        key = self.__uuids.get(ntf.uuid)
+                if key is not None:
+                    present.add(key)
+        with self.__lock:
+            if not consumer.refresh_deletes:
+                # The entries that are not reported as present, added or
+                # modified have to be deleted.
+                base_key = dn_key(base) if base is not None else ""
+                scope = LDAPSearchScope(scope if scope is not None else 2)
+                for key in self.__select(base_key, scope, None):
+                    if key not in present:
+                        self.__discard(key)
+                        count += 1
+            self.__cookie = consumer.cookie
+        return count
+
+    def clear(self) -> None:
+        """Remove every entry from the replica."""
+        with self.__lock:
+            self.__entries.clear()
+            self.__children.clear()
+            self.__presence.clear()
+            for index in self.__equality.values():
+                index.clear()
+            self.__uuids.clear()
+            self.__key_uuids.clear()
+            self.__cookie = None
+            self.__highest_usn = None
+
+    def __candidates(self, node: tuple) -> Optional[Set[str]]:
+        """
+        Collect the keys of the entries that can match the filter using
+        the indexes, or return None if every entry can match.
+        """
+        kind = node[0]
+        if kind == "equal":
+            index = self.__equality.get(node[1])
+            if index is None:
+                return None
+            return index.get(normalise_value(node[2]), set())
+        elif kind == "present":
+            return self.__presence.get(node[1], set())
+        elif kind == "and":
+            result: Optional[Set[str]] = None
+            for child in node[1]:
+                keys = self.__candidates(child)
+                if keys is not None:
+                    result = keys if result is None else result & keys
+                    if not result:
+                        break
+            return result
+        elif kind == "or":
+            result = set()
+            for child in node[1]:
+                keys = self.__candidates(child)
+                if keys is None:
+                    return None
+                result = result | keys
+            return result
+        return None
+
+    def __select(
+        self, base_key: str, scope: int, candidates: Optional[Set[str]]
+    ) -> Iterable[str]:
+        if scope == LDAPSearchScope.BASE:
+            return (base_key,) if base_key in self.__entries else ()
+        elif scope == LDAPSearchScope.ONELEVEL:
+            children = self.__children.get(base_key, ())
+            if candidates is not None and len(candidates) < len(children):
+                return [key for key in candidates if parent_key(key) == base_key]
+            return [key for key in children if key in self.__entries]
+        elif candidates is not None:
+            if not base_key:
+                return candidates
+            prefix = base_key + "\0"
+            return [
+                key
+                for key in candidates
+                if key == base_key or key.startswith(prefix)
+            ]
+        return self.__subtree(base_key)
+
+    def search(
+        self,
+        base: Optional[Union[str, LDAPDN]] = None,
+        scope: Optional[Union[LDAPSearchScope, int]] = None,
+        filter_exp: Optional[str] = None,
+        attrlist: Optional[List[str]] = None,
+        sizelimit: int = 0,
+    ) -> List[LDAPEntry]:
+        """
+        Search the entries of the replica. The parameters have the same
+        meaning as for :meth:`LDAPConnection.search`, but without the
+        defaults of the client's URL: the default base is the root, the
+        default scope is subtree and the default filter matches every
+        entry. The entries are returned in no particular order. The base
+        entry does not have to be in the replica, if there are entries
+        below it.
+
+        :param str base: the base DN of the search.
+        :param int scope: the scope of the search.
+        :param str filter_exp: the string representation of the filter.
+        :param list attrlist: the names of the attributes to return.
+        :param int sizelimit: the maximum number of entries to return.
+        :return: the list of the matching entries.
+        :rtype: list
+        :raises FilterError: if the `filter_exp` is invalid.
+        :raises SizeLimitError: if there are more matching entries than \
+        the `sizelimit`.
+        """
+        base_key = dn_key(base) if base is not None else ""
+        scope = LDAPSearchScope(scope if scope is not None else 2)
+        tree, match, with_dn = compile_record_filter(filter_exp or "(objectClass=*)")
+        if attrlist and "*" not in attrlist:
+            selected: Optional[Set[str]] = {attr.lower() for attr in attrlist}
+        else:
+            selected = None
+        frozen: List[Tuple[str, Dict[str, List[Any]]]] = []
+        with self.__lock:
+            for key in self.__select(base_key, scope, self.__candidates(tree)):
+                dn, attrs = self.__entries[key]
+                if not match(dict(attrs, dn=LDAPDN(dn)) if with_dn else attrs):
+                    continue
+                if sizelimit and len(frozen) == sizelimit:
+                    raise SizeLimitError("Size limit exceeded.")
+                frozen.append(
+                    (
+                        dn,
+                        {
+                            self.__names[attr]: list(vals)
+                            for attr, vals in attrs.items()
+                            if selected is None or attr in selected
+                        },
+                    )
+                )
+        return thaw_result(tuple(frozen), None)
+
+    def get(self, dn: Union[str, LDAPDN]) -> Optional[LDAPEntry]:
+        """
+        Get an entry of the replica.
+
+        :param str|LDAPDN dn: the DN of the entry.
+        :return: a copy of the entry or None if it's not in the replica.
+        :rtype: LDAPEntry
+        """
+        with self.__lock:
+            record = self.__entries.get(dn_key(dn))
+            if record is None:
+                return None
+            frozen = (
+                record[0],
+                {self.__names[attr]: list(vals) for attr, vals in record[1].items()},
+            )
+        return thaw_result((frozen,), None)[0]
+
+    def save(self, path: str) -> None:
+        """
+        Save a snapshot of the replica into an SQLite database file with
+        the entries, the indexed attributes, the :attr:`cookie`, the
+        :attr:`highest_usn` and the search parameters of :meth:`populate`.
+        The file is replaced atomically. The attribute values are stored
+        pickled, therefore only load snapshots that are written by
+        trusted processes.
+
+        :param str path: the path of the file.
+        """
+        with self.__lock:
+            rows = [
+                (key, dn, self.__key_uuids.get(key), attrs)
+                for key, (dn, attrs) in self.__entries.items()
+            ]
+            meta = {
+                "version": _SNAPSHOT_VERSION,
+                "indexes": self.indexes,
+                "names": dict(self.__names),
+                "cookie": self.__cookie,
+                "highest_usn": self.__highest_usn,
+                "source": self.__source,
+            }
+        tmp_path = f"{path}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        db = sqlite3.connect(tmp_path)
+        try:
+            with db:
+                db.execute("CREATE TABLE meta (name TEXT PRIMARY KEY, value BLOB)")
+                db.execute(
+                    "CREATE TABLE entries (key TEXT PRIMARY KEY, dn TEXT NOT NULL, "
+                    "uuid BLOB, attrs BLOB NOT NULL)"
+                )
+                db.executemany(
+                    "INSERT INTO meta VALUES (?, ?)",
+                    (
+                        (name, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+                        for name, value in meta.items()
+                    ),
+                )
+                db.executemany(
+                    "INSERT INTO entries VALUES (?, ?, ?, ?)",
+                    (
+                        (
+                            key,
+                            dn,
+                            entry_uuid.bytes if entry_uuid is not None else None,
+                            pickle.dumps(attrs, pickle.HIGHEST_PROTOCOL),
+                        )
+                        for key, dn, entry_uuid, attrs in rows
+                    ),
+                )
+        finally:
+            db.close()
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def restore(
+        cls, path: str, indexes: Optional[Iterable[str]] = None
+    ) -> "LocalReplica":
+        """
+        Create a replica from a snapshot file that is written by
+        :meth:`save`. Call :meth:`synchronize` afterwards to catch up with
+        the changes since the snapshot is taken.
+
+        :param str path: the path of the file.
+        :param indexes: the names of the attributes with equality index, \
+        the indexes of the saved replica are used by default.
+        :return: the restored replica.
+        :rtype: LocalReplica
+        :raises ValueError: if the file is not a valid snapshot.
+        """
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Snapshot file is not found: '{path}'.")
+        db = sqlite3.connect(path)
+        try:
+            try:
+                meta = {
+                    name: pickle.loads(value)
+                    for name, value in db.execute("SELECT name, value FROM meta")
+                }
+            except sqlite3.DatabaseError as exc:
+                raise ValueError(f"Invalid snapshot file: '{path}' ({exc}).") from None
+            if meta.get("version") != _SNAPSHOT_VERSION:
+                raise ValueError(f"Unsupported snapshot version: '{path}'.")
+            replica = cls(indexes if indexes is not None else meta["indexes"])
+            replica.__names.update(meta["names"])
+            replica.__source = meta["source"]
+            store = replica.__store
+            set_uuid = replica.__set_uuid
+            # Nothing to collect, while the many new containers would
+            # trigger the garbage collector repeatedly.
+            gc_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                for key, dn, entry_uuid, attrs in db.execute(
+                    "SELECT key, dn, uuid, attrs FROM entries"
+                ):
+                    store(key, (dn, pickle.loads(attrs)))
+                    if entry_uuid is not None:
+                        set_uuid(key, uuid.UUID(bytes=entry_uuid))
+            finally:
+                if gc_enabled:
+                    gc.enable()
+            replica.__cookie = meta["cookie"]
+            replica.__highest_usn = meta["highest_usn"]
+        finally:
+            db.close()
+        return replica
+
+    def __contains__(self, dn: object) -> bool:
+        if not isinstance(dn, (str, LDAPDN)):
+            return False
+        return dn_key(dn) in self.__entries
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __repr__(self) -> str:
+        return f"<LocalReplica entries={len(self.__entries)}>"
+
+    @property
+    def indexes(self) -> Tuple[str, ...]:
+        """The lower-cased names of the attributes with equality index."""
+        return tuple(self.__equality)
+
+    @property
+    def cookie(self) -> Optional[bytes]:
+        """
+        The cookie of the content synchronization that the replica is
+        up to date with.
+        """
+        return self.__cookie
+
+    @property
+    def highest_usn(self) -> Optional[int]:
+        """The highest `uSNChanged` value of the stored entries."""
+        return self.__highest_usn
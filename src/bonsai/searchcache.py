@@ -0,0 +1,360 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, Union
+
+from .diff import DNKey, dn_sort_key
+from .errors import TimeoutError
+from .ldapconnection import LDAPSearchScope
+from .ldapdn import LDAPDN
+from .ldapentry import LDAPEntry
+
+MYPY = False
+
+if MYPY:
+    from .ldapconnection import BaseLDAPConnection
+
+FrozenEntry = Tuple[str, Dict[str, List[Any]]]
+
+
+def freeze_result(result: List[Any]) -> tuple:
+    """
+    Create an immutable copy of a search result that can be shared
+    between threads and connections.
+
+    :param list result: the list of LDAPEntry and LDAPReference objects.
+    :return: the frozen copy of the search result.
+    :rtype: tuple
+    """
+    frozen: List[Union[FrozenEntry, Any]] = []
+    for item in result:
+        if isinstance(item, LDAPEntry):
+            frozen.append(
+                (
+                    item.extended_dn or str(item.dn),
+                    {key: list(vals) for key, vals in item.items(exclude_dn=True)},
+                )
+            )
+        else:
+            # LDAPReference objects are kept as they are.
+            frozen.append(item)
+    return tuple(frozen)
+
+
+def thaw_result(frozen: tuple, conn: Optional["BaseLDAPConnection"]) -> List[Any]:
+    """
+    Create new LDAPEntry objects from a search result that is frozen by
+    :func:`freeze_result`. The LDAPReference objects are kept as they are.
+
+    :param tuple frozen: the frozen search result.
+    :param BaseLDAPConnection conn: the connection of the new entries, \
+    None for unbound entries.
+    :return: the list of the new entries and the references.
+    :rtype: list
+    """
+    result = []
+    for item in frozen:
+        if isinstance(item, tuple):
+            dn, attrs = item
+            entry = LDAPEntry(dn, conn)
+            for key, vals in attrs.items():
+                entry[key] = list(vals)
+                entry.clear_attribute_changes(key)
+            result.append(entry)
+        else:
+            result.append(item)
+    return result
+
+
+class SearchCache:
+    """
+    A thread-safe cache of search results that can be attached to an
+    :class:`LDAPClient` with :meth:`LDAPClient.set_search_cache`. The
+    results of :meth:`LDAPConnection.search` are cached by the search
+    parameters and the client settings that affect the result (e.g. the
+    credentials, :attr:`LDAPClient.sd_flags` and
+    :attr:`LDAPClient.extended_dn_format`).
+
+    The least recently used results are evicted when the cache is full,
+    and every result expires after `ttl` seconds. When an add, delete,
+    modify or rename operation is finished on any connection of the
+    client, the results of the searches that could contain the affected
+    entry are removed from the cache. Changes that are made by other
+    clients are only noticed after the results expire.
+
+    :param int maxsize: the maximal number of cached search results.
+    :param float ttl: the time in seconds while a result is valid.
+    :raises ValueError: if `maxsize` or `ttl` is not positive.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0) -> None:
+        if not isinstance(maxsize, int) or maxsize < 1:
+            raise ValueError("The maxsize must be a positive int.")
+        if not isinstance(ttl, (int, float)) or ttl <= 0:
+            raise ValueError("The ttl must be a positive number.")
+        self.__maxsize = maxsize
+        self.__ttl = float(ttl)
+        self.__lock = threading.Lock()
+        self.__results: "OrderedDict[Hashable, Tuple[float, DNKey, int, tuple]]" = (
+            OrderedDict()
+        )
+        self.__generation = 0
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+    @property
+    def _generation(self) -> int:
+        """Counter that is increased by every invalidation."""
+        return self.__generation
+
+    def _get(self, key: Hashable, conn: "BaseLDAPConnection") -> Optional[List[Any]]:
+        """
+        Return a copy of the cached result bound to the `conn`, or None if
+        the result is not cached or expired.
+        """
+        with self.__lock:
+            try:
+                expires, _, _, frozen = self.__results[key]
+            except KeyError:
+                self.__misses += 1
+                return None
+            if expires <= time.monotonic():
+                del self.__results[key]
+                self.__misses += 1
+                return None
+            self.__results.move_to_end(key)
+            self.__hits += 1
+        return thaw_result(frozen, conn)
+
+    def _put(
+        self,
+        key: Hashable,
+        base: Union[str, LDAPDN],
+        scope: int,
+        result: List[Any],
+        generation: int,
+    ) -> None:
+        """
+        Store a search result, unless there has been an invalidation since
+        the search was started (at `generation`).
+        """
+        frozen = freeze_result(result)
+        base_key = dn_sort_key(base)
+        with self.__lock:
+            if generation != self.__generation:
+                return
+            self.__results[key] = (
+                time.monotonic() + self.__ttl,
+                base_key,
+                int(scope),
+                frozen,
+            )
+            self.__results.move_to_end(key)
+            while len(self.__results) > self.__maxsize:
+                self.__results.popitem(last=False)
+                self.__evictions += 1
+
+    def invalidate(self, dn: Union[str, LDAPDN]) -> None:
+        """
+        Remove the cached results that might contain the entry of `dn`, or
+        the entries of its subtree.
+
+        :param str|LDAPDN dn: the DN of the changed entry.
+        """
+        changed_key = dn_sort_key(dn)
+        with self.__lock:
+            self.__generation += 1
+            stale = []
+            for key, (_, base_key, scope, _) in self.__results.items():
+                depth = len(changed_key) - len(base_key)
+                if depth >= 0 and changed_key[: len(base_key)] == base_key:
+                    if (
+                        scope == LDAPSearchScope.SUBTREE
+                        or (scope == LDAPSearchScope.ONELEVEL and depth <= 1)
+                        or depth == 0
+                    ):
+                        stale.append(key)
+                elif base_key[: len(changed_key)] == changed_key:
+                    # The search base is in the changed subtree.
+                    stale.append(key)
+            for key in stale:
+                del self.__results[key]
+
+    def clear(self) -> None:
+        """Remove every result from the cache."""
+        with self.__lock:
+            self.__generation += 1
+            self.__results.clear()
+
+    def __len__(self) -> int:
+        """Return the number of cached results."""
+        return len(self.__results)
+
+    @property
+    def maxsize(self) -> int:
+        """The maximal number of cached search results."""
+        return self.__maxsize
+
+    @property
+    def ttl(self) -> float:
+        """The time in seconds while a cached result is valid."""
+        return self.__ttl
+
+    @property
+    def hits(self) -> int:
+        """The number of searches that are served from the cache."""
+        return self.__hits
+
+    @property
+    def misses(self) -> int:
+        """The number of searches that are not found in the cache."""
+        return self.__misses
+
+    @property
+    def evictions(self) -> int:
+        """The number of results that are evicted to keep the size limit."""
+        return self.__evictions
+
+
+class _Flight:
+    """A search in progress that is shared between identical requests."""
+
+    __slots__ = ("event", "task", "frozen", "error")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.task: Optional[asyncio.Future] = None
+        self.frozen: tuple = ()
+        self.error: Optional[BaseException] = None
+
+
+class SearchCoalescer:
+    """
+    A single-flight layer for :meth:`LDAPConnection.search` that can be
+    attached to an :class:`LDAPClient` with
+    :meth:`LDAPClient.set_search_coalescer`. If a search is started while
+    an identical one (with the same parameters and client settings) is in
+    progress on any connection of the client, then no new operation is
+    sent to the server, the request waits for the result of the search in
+    progress instead, at most for the timeout of its own search. Every
+    caller gets its own copy of the result, bound to its own connection.
+
+    The searches of synchronous connections are shared between threads
+    (e.g. using a :class:`bonsai.pool.ThreadedConnectionPool`), and the
+    searches of asynchronous connections are shared between the tasks of
+    the same asyncio event loop. The searches of connections that are not
+    running on an asyncio event loop (e.g. with trio or gevent) are not
+    coalesced.
+    """
+
+    def __init__(self) -> None:
+        self.__lock = threading.Lock()
+        self.__flights: Dict[Hashable, _Flight] = {}
+        self.__requests = 0
+        self.__coalesced = 0
+
+    def __join(self, key: Hashable) -> Tuple[_Flight, bool]:
+        """Return the flight of the `key` and whether it is a new one."""
+        with self.__lock:
+            self.__requests += 1
+            try:
+                flight = self.__flights[key]
+                self.__coalesced += 1
+                return flight, False
+            except KeyError:
+                flight = self.__flights[key] = _Flight()
+                return flight, True
+
+    def __land(self, key: Hashable) -> None:
+        with self.__lock:
+            del self.__flights[key]
+
+    def _run(
+        self,
+        key: Hashable,
+        conn: "BaseLDAPConnection",
+        search: Callable[[], Any],
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """
+        Call `search` on the `conn`, or share the result of an identical
+        search in progress, waiting for it at most `timeout` seconds.
+        """
+        if conn.is_async:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return search()
+            return self.__run_async((loop, key), conn, search, timeout)
+        key = (None, key)
+        flight, leader = self.__join(key)
+        if not leader:
+            if not flight.event.wait(timeout):
+                raise TimeoutError("Timed out while waiting for the shared search.")
+            if flight.error is not None:
+                raise flight.error
+            return thaw_result(flight.frozen, conn)
+        try:
+            result = search()
+            flight.frozen = freeze_result(result)
+            return result
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            self.__land(key)
+            flight.event.set()
+
+    async def __run_async(
+        self,
+        key: Hashable,
+        conn: "BaseLDAPConnection",
+        search: Callable[[], Any],
+        timeout: Optional[float],
+    ) -> Any:
+        flight, leader = self.__join(key)
+        if leader:
+
+            async def fly() -> Tuple[Any, tuple]:
+                try:
+                    result = await search()
+                    return result, freeze_result(result)
+                finally:
+                    self.__land(key)
+
+            task = flight.task = asyncio.ensure_future(fly())
+            # Retrieve the exception, even if every caller is cancelled.
+            task.add_done_callback(lambda task: task.cancelled() or task.exception())
+            # The search of the leader has its own time limit.
+            result, _ = await asyncio.shield(task)
+            return result
+        if flight.task is None:
+            # The leader is always set on the same loop before the others.
+            return await search()
+        try:
+            # Cancelling a caller must not cancel the search of the others.
+            _, frozen = await asyncio.wait_for(asyncio.shield(flight.task), timeout)
+        except asyncio.TimeoutError:
+            msg = "Timed out while waiting for the shared search."
+            raise TimeoutError(msg) from None
+        return thaw_result(frozen, conn)
+
+    @property
+    def in_flight(self) -> int:
+        """The number of searches in progress."""
+        return len(self.__flights)
+
+    @property
+    def requests(self) -> int:
+        """The number of searches that are passed through the coalescer."""
+        return self.__requests
+
+    @property
+    def coalesced(self) -> int:
+        """
+        The number of searches that are served by an identical search in
+        progress without sending a new operation.
+        """
+        return self.__coalesced
@@ -0,0 +1,315 @@
+import uuid
+from collections import deque
+from enum import IntEnum
+from typing import Any, Deque, List, NamedTuple, Optional, Tuple, Union
+
+from .ber import (
+    TAG_BOOLEAN,
+    TAG_ENUMERATED,
+    TAG_OCTET_STRING,
+    TAG_SET,
+    BERDecodingError,
+    decode_boolean,
+    decode_integer,
+    decode_sequence,
+    decode_tlv,
+    encode_boolean,
+    encode_integer,
+    encode_octet_string,
+    encode_sequence,
+    find_control,
+    iter_tlv,
+)
+from .errors import LDAPError
+from .ldapdn import LDAPDN
+from .ldapentry import LDAPEntry
+
+MYPY = False
+
+if MYPY:
+    from .ldapconnection import BaseLDAPConnection, LDAPSearchScope
+
+SYNC_REQUEST_OID = "1.3.6.1.4.1.4203.1.9.1.1"
+SYNC_STATE_OID = "1.3.6.1.4.1.4203.1.9.1.2"
+SYNC_DONE_OID = "1.3.6.1.4.1.4203.1.9.1.3"
+SYNC_INFO_OID = "1.3.6.1.4.1.4203.1.9.1.4"
+
+#: The result code of the e-syncRefreshRequired error.
+SYNC_REFRESH_REQUIRED = 4096
+
+Control = Tuple[str, bool, Optional[bytes]]
+
+
+class SyncMode(IntEnum):
+    """ Enumeration for the modes of content synchronization. """
+
+    REFRESH_ONLY = 1  #: Return the changes since the cookie and stop.
+    REFRESH_AND_PERSIST = 3  #: Keep returning the changes as they happen.
+
+
+class SyncState(IntEnum):
+    """ Enumeration for the states of the synchronization notifications. """
+
+    PRESENT = 0  #: The entry is unchanged since the cookie.
+    ADD = 1  #: The entry is added to the content.
+    MODIFY = 2  #: The entry is modified.
+    DELETE = 3  #: The entry is deleted from the content.
+    #: Not an entry, the refresh stage is finished. If the refresh is not
+    #: done with deletes, the entries that are not reported as present,
+    #: added or modified during the refresh stage are deleted.
+    REFRESH_DONE = 4
+
+
+class SyncNotification(NamedTuple):
+    """ A notification of a content synchronization. """
+
+    #: The state of the entry.
+    state: SyncState
+    #: The entryUUID of the entry, None for REFRESH_DONE.
+    uuid: Optional[uuid.UUID]
+    #: The DN of the entry, None if it is reported without an entry.
+    dn: Optional[LDAPDN]
+    #: The entry with its attributes for ADD and MODIFY, otherwise the
+    #: entry has only a DN or it is None.
+    entry: Optional[LDAPEntry]
+    #: The cookie of the content after the notification, if the server
+    #: sent one.
+    cookie: Optional[bytes]
+
+
+def encode_sync_request(
+    mode: SyncMode, cookie: Optional[bytes] = None, reload_hint: bool = False
+) -> bytes:
+    """Encode the value of a sync request control."""
+    items = [encode_integer(int(mode), TAG_ENUMERATED)]
+    if cookie is not None:
+        items.append(encode_octet_string(cookie))
+    if reload_hint:
+        items.append(encode_boolean(True))
+    return encode_sequence(*items)
+
+
+def decode_sync_state(value: bytes) -> Tuple[SyncState, uuid.UUID, Optional[bytes]]:
+    """Decode the value of a sync state control."""
+    items = decode_sequence(value)
+    if len(items) < 2 or items[0][0] != TAG_ENUMERATED:
+        raise BERDecodingError("Invalid sync state control.")
+    state = SyncState(decode_integer(items[0][1]))
+    entry_uuid = uuid.UUID(bytes=items[1][1])
+    cookie = items[2][1] if len(items) > 2 else None
+    return state, entry_uuid, cookie
+
+
+def decode_sync_done(value: bytes) -> Tuple[Optional[bytes], bool]:
+    """Decode the value of a sync done control."""
+    cookie = None
+    refresh_deletes = False
+    for tag, content in decode_sequence(value):
+        if tag == TAG_OCTET_STRING:
+            cookie = content
+        elif tag == TAG_BOOLEAN:
+            refresh_deletes = decode_boolean(content)
+    return cookie, refresh_deletes
+
+
+def decode_sync_info(
+    value: bytes,
+) -> Tuple[int, Optional[bytes], bool, List[uuid.UUID]]:
+    """
+    Decode the value of a sync info message.
+
+    :return: the choice (0: newcookie, 1: refreshDelete, 2: refreshPresent, \
+    3: syncIdSet), the cookie, the refreshDone or refreshDeletes flag and \
+    the list of UUIDs of a syncIdSet.
+    """
+    tag, content, end = decode_tlv(value)
+    if end != len(value):
+        raise BERDecodingError("Trailing data after the value.")
+    choice = tag & 0x1F
+    if tag == 0x80:
+        return choice, content, False, []
+    if tag not in (0xA1, 0xA2, 0xA3):
+        raise BERDecodingError(f"Invalid sync info message tag: 0x{tag:02x}.")
+    cookie = None
+    # The default of refreshDone is TRUE, the default of refreshDeletes is FALSE.
+    flag = choice != 3
+    uuids = []
+    for item_tag, item in iter_tlv(content):
+        if item_tag == TAG_OCTET_STRING:
+            cookie = item
+        elif item_tag == TAG_BOOLEAN:
+            flag = decode_boolean(item)
+        elif item_tag == TAG_SET and choice == 3:
+            uuids = [uuid.UUID(bytes=val) for _, val in iter_tlv(item)]
+    return choice, cookie, flag, uuids
+
+
+class SyncReplConsumer:
+    """
+    Content synchronization consumer (RFC 4533), created by
+    :meth:`LDAPConnection.sync_search`. It is an iterator of
+    :class:`SyncNotification` objects, or an asynchronous iterator for
+    the asynchronous connections.
+
+    The :attr:`cookie` represents the state of the synchronized content,
+    store it after processing the notifications to resume the
+    synchronization later with only the changes that happened since.
+    """
+
+    def __init__(
+        self,
+        conn: "BaseLDAPConnection",
+        base: Optional[Union[str, LDAPDN]],
+        scope: Optional[Union["LDAPSearchScope", int]],
+        filter_exp: Optional[str],
+        attrlist: Optional[List[str]],
+        mode: SyncMode,
+        cookie: Optional[bytes],
+        reload_hint: bool,
+        timeout: Optional[float],
+    ) -> None:
+        self.__conn = conn
+        self.__search_args = (base, scope, filter_exp, attrlist)
+        self.__mode = SyncMode(mode)
+        self.__cookie = cookie
+        self.__reload_hint = reload_hint
+        self.__timeout = timeout
+        self.__refresh_done = False
+        self.__refresh_deletes = False
+        self.__finished = False
+        self.__buffer: Deque[SyncNotification] = deque()
+        self.__messages: Any = None
+        self.__start()
+
+    def __start(self) -> None:
+        value = encode_sync_request(self.__mode, self.__cookie, self.__reload_hint)
+        msg_id = self.__conn._send_stream_search(
+            *self.__search_args,
+            self.__timeout,
+            [(SYNC_REQUEST_OID, True, value)],
+        )
+        self.__messages = self.__conn._stream_messages(msg_id, self.__timeout)
+
+    def __restart(self) -> bool:
+        """Restart the synchronization after an e-syncRefreshRequired error."""
+        if self.__cookie is None:
+            return False
+        self.__cookie = None
+        self.__refresh_done = False
+        self.__refresh_deletes = False
+        self.__start()
+        return True
+
+    def __process(self, msg: Tuple[str, Any, List[Control]]) -> None:
+        msgtype, obj, ctrls = msg
+        if msgtype == "entry":
+            value = find_control(ctrls, SYNC_STATE_OID)
+            if value is None:
+                return
+            state, entry_uuid, cookie = decode_sync_state(value)
+            self.__set_cookie(cookie)
+            self.__buffer.append(
+                SyncNotification(state, entry_uuid, obj.dn, obj, cookie)
+            )
+        elif msgtype == "intermediate":
+            oid, value = obj
+            if oid != SYNC_INFO_OID or value is None:
+                return
+            choice, cookie, flag, uuids = decode_sync_info(value)
+            self.__set_cookie(cookie)
+            if choice == 3:
+                state = SyncState.DELETE if flag else SyncState.PRESENT
+                for entry_uuid in uuids:
+                    self.__buffer.append(
+                        SyncNotification(state, entry_uuid, None, None, cookie)
+                    )
+            elif choice in (1, 2) and flag:
+                self.__set_refresh_done(choice == 1, cookie)
+        elif msgtype == "result":
+            self.__finished = True
+            value = find_control(ctrls, SYNC_DONE_OID)
+            if value is not None:
+                cookie, refresh_deletes = decode_sync_done(value)
+                self.__set_cookie(cookie)
+                if not self.__refresh_done:
+                    self.__set_refresh_done(refresh_deletes, cookie)
+
+    def __set_cookie(self, cookie: Optional[bytes]) -> None:
+        if cookie is not None:
+            self.__cookie = cookie
+
+    def __set_refresh_done(
+        self, refresh_deletes: bool, cookie: Optional[bytes]
+    ) -> None:
+        self.__refresh_done = True
+        self.__refresh_deletes = refresh_deletes
+        self.__buffer.append(
+            SyncNotification(SyncState.REFRESH_DONE, None, None, None, cookie)
+        )
+
+    def __iter__(self) -> "SyncReplConsumer":
+        if not hasattr(self.__messages, "__next__"):
+            raise TypeError("Use async for with an asynchronous connection.")
+        return self
+
+    def __next__(self) -> SyncNotification:
+        while not self.__buffer:
+            if self.__finished:
+                raise StopIteration
+            try:
+                self.__process(next(self.__messages))
+            except LDAPError as exc:
+                if exc.code != SYNC_REFRESH_REQUIRED or not self.__restart():
+                    raise
+        return self.__buffer.popleft()
+
+    def __aiter__(self) -> "SyncReplConsumer":
+        if not hasattr(self.__messages, "__anext__"):
+            raise TypeError("Use for with a synchronous connection.")
+        return self
+
+    async def __anext__(self) -> SyncNotification:
+        while not self.__buffer:
+            if self.__finished:
+                raise StopAsyncIteration
+            try:
+                self.__process(await self.__messages.__anext__())
+            except LDAPError as exc:
+                if exc.code != SYNC_REFRESH_REQUIRED or not self.__restart():
+                    raise
+        return self.__buffer.popleft()
+
+    def close(self) -> Any:
+        """
+        Stop the synchronization, and abandon the search on the server.
+        For asynchronous iterators it returns an awaitable.
+        """
+        self.__finished = True
+        self.__buffer.clear()
+        if hasattr(self.__messages, "aclose"):
+            return self.__messages.aclose()
+        return self.__messages.close()
+
+    @property
+    def cookie(self) -> Optional[bytes]:
+        """The cookie of the last received state of the content."""
+        return self.__cookie
+
+    @property
+    def mode(self) -> SyncMode:
+        """The mode of the synchronization."""
+        return self.__mode
+
+    @property
+    def refresh_done(self) -> bool:
+        """True if the refresh stage of the synchronization is finished."""
+        return self.__refresh_done
+
+    @property
+    def refresh_deletes(self) -> bool:
+        """
+        True if the refresh stage is finished with reporting the deleted
+        entries, otherwise the entries that are not reported as present
+        are deleted.
+        """
+        return self.__refresh_deletes
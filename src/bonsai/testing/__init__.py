@@ -0,0 +1,4 @@
+from .proxy import FaultProxy
+from .server import StandInServer, synthetic_entries
+
+__all__ = ["FaultProxy", "StandInServer", "synthetic_entries"]
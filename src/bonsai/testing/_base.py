@@ -0,0 +1,122 @@
+import asyncio
+import threading
+from abc import ABCMeta, abstractmethod
+from typing import Any, Coroutine, List, Optional, TypeVar
+
+T = TypeVar("T", bound="_BackgroundServer")
+
+
+class _BackgroundServer(metaclass=ABCMeta):
+    """
+    A TCP server that runs its own asyncio event loop on a background
+    thread, therefore it can serve both the synchronous and asynchronous
+    connections of the same process.
+
+    :param str host: the address to listen on.
+    :param int port: the port to listen on, a free one is chosen if zero.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.__host = host
+        self.__port = port
+        self.__server: Optional[asyncio.AbstractServer] = None
+        self.__loop: Optional[asyncio.AbstractEventLoop] = None
+        self.__thread: Optional[threading.Thread] = None
+
+    @abstractmethod
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serve a client connection, called on the server's loop."""
+
+    async def _shutdown(self) -> None:
+        """Close the client connections, called on the server's loop."""
+        pass
+
+    async def __serve(self) -> None:
+        self.__server = await asyncio.start_server(
+            self._handle, self.__host, self.__port
+        )
+        self.__port = self.__server.sockets[0].getsockname()[1]
+
+    async def __stop(self) -> None:
+        if self.__server is None:
+            return
+        self.__server.close()
+        await self._shutdown()
+        await self.__server.wait_closed()
+        self.__server = None
+
+    def __run(self, ready: threading.Event, errors: List[BaseException]) -> None:
+        loop = asyncio.new_event_loop()
+        self.__loop = loop
+        try:
+            loop.run_until_complete(self.__serve())
+        except Exception as exc:
+            errors.append(exc)
+            ready.set()
+            loop.close()
+            return
+        ready.set()
+        loop.run_forever()
+        loop.run_until_complete(self.__stop())
+        loop.close()
+
+    def _run(self, coro: Coroutine[Any, Any, Any]) -> Any:
+        """Run a coroutine on the server's loop, and wait for its result."""
+        if self.__loop is None:
+            coro.close()
+            raise RuntimeError("The server is not running.")
+        return asyncio.run_coroutine_threadsafe(coro, self.__loop).result()
+
+    def start(self) -> None:
+        """
+        Start listening on a background thread.
+
+        :raises RuntimeError: if the server is already running.
+        :raises OSError: if the server cannot listen on the address.
+        """
+        if self.__thread is not None:
+            raise RuntimeError("The server is already running.")
+        ready = threading.Event()
+        errors: List[BaseException] = []
+        self.__thread = threading.Thread(
+            target=self.__run, args=(ready, errors), daemon=True
+        )
+        self.__thread.start()
+        ready.wait()
+        if errors:
+            self.__thread.join()
+            self.__thread = None
+            raise errors[0]
+
+    def close(self) -> None:
+        """Stop listening, close the client connections and the thread."""
+        if self.__loop is None or self.__thread is None:
+            return
+        self.__loop.call_soon_threadsafe(self.__loop.stop)
+        self.__thread.join()
+        self.__thread = None
+        self.__loop = None
+
+    def __enter__(self: T) -> T:
+        self.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    @property
+    def host(self) -> str:
+        """The address that the server listens on."""
+        return self.__host
+
+    @property
+    def port(self) -> int:
+        """The port that the server listens on."""
+        return self.__port
+
+    @property
+    def url(self) -> str:
+        """The LDAP URL of the server."""
+        return f"ldap://{self.__host}:{self.__port}"
@@ -0,0 +1,226 @@
+import asyncio
+import socket
+import struct
+import time
+from typing import Dict, Optional, Set, Tuple
+
+from ._base import _BackgroundServer
+from .server import Latency
+
+REQUEST = "request"
+RESPONSE = "response"
+
+# Encrypted streams are forwarded in chunks of this size.
+CHUNK_SIZE = 65536
+
+
+class _Link:
+    """A proxied connection between a client and the server."""
+
+    def __init__(
+        self, client: asyncio.StreamWriter, server: asyncio.StreamWriter
+    ) -> None:
+        self.writers = (client, server)
+        self.handler = asyncio.current_task()
+
+    def close(self, reset: bool = False) -> None:
+        for writer in self.writers:
+            if writer.is_closing():
+                continue
+            if reset:
+                # Zero linger time makes the close send a TCP reset.
+                sock = writer.get_extra_info("socket")
+                if sock is not None:
+                    sock.setsockopt(
+                        socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0)
+                    )
+                writer.transport.abort()
+            else:
+                writer.close()
+
+
+async def _read_unit(reader: asyncio.StreamReader, framed: bool) -> Tuple[bytes, bool]:
+    """
+    Read an LDAP message from the stream. If the stream is not BER encoded
+    (e.g. after StartTLS) a chunk is read instead, and it's not framed
+    from then on.
+    """
+    if not framed:
+        data = await reader.read(CHUNK_SIZE)
+        if not data:
+            raise asyncio.IncompleteReadError(data, None)
+        return data, False
+    tag = await reader.readexactly(1)
+    if tag != b"\x30":
+        return tag + await reader.read(CHUNK_SIZE - 1), False
+    head = await reader.readexactly(1)
+    length = head[0]
+    extra = b""
+    if length & 0x80:
+        extra = await reader.readexactly(length & 0x7F)
+        length = int.from_bytes(extra, "big")
+    return tag + head + extra + await reader.readexactly(length), True
+
+
+class FaultProxy(_BackgroundServer):
+    """
+    A TCP proxy between the clients and a server that injects network
+    faults into the forwarded LDAP messages: latency, limited bandwidth,
+    slow reads, dropped messages, and closed or reset connections. Unlike
+    changing the network interface's queueing discipline, it needs no
+    privileges and does not affect any other traffic. It runs its own
+    asyncio event loop on a background thread, like
+    :class:`StandInServer`, and the faults can be changed any time while
+    it's running.
+
+    >>> from bonsai.testing import FaultProxy, StandInServer
+    >>> with StandInServer() as server, FaultProxy(server.host, server.port) as proxy:
+    ...     client = bonsai.LDAPClient(proxy.url)
+    ...     with client.connect() as conn:
+    ...         proxy.latency = 1.0
+    ...         conn.whoami(timeout=0.5)
+    ...
+    Traceback (most recent call last):
+        ...
+    bonsai.errors.TimeoutError: Timed out. (0xFFFB [-5])
+
+    The stream is split into LDAP messages, and each of them is delayed
+    from its arrival separately, therefore the latency does not add up
+    over the entries of a large search result. Encrypted streams (LDAPS,
+    or after StartTLS) are forwarded in chunks.
+
+    :param str target_host: the address of the server.
+    :param int target_port: the port of the server.
+    :param str host: the address to listen on.
+    :param int port: the port to listen on, a free one is chosen if zero.
+    :param float|callable latency: the delay of every message in seconds, \
+    or a callable that gets the direction of the message (`request` or \
+    `response`) and returns the delay, e.g. to add jitter.
+    :param int bandwidth: the maximum throughput of each direction of a \
+    connection in bytes per second, zero for no limit.
+    :param float read_delay: the pause in seconds before reading every \
+    message from the sender, that makes the sender's buffers fill up.
+    """
+
+    def __init__(
+        self,
+        target_host: str,
+        target_port: int,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: Latency = 0.0,
+        bandwidth: int = 0,
+        read_delay: float = 0.0,
+    ) -> None:
+        super().__init__(host, port)
+        self.__target = (target_host, target_port)
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.read_delay = read_delay
+        #: Discard the messages silently, while the connections stay open.
+        self.drop = False
+        self.__links: Set[_Link] = set()
+        self.__transferred: Dict[str, int] = {REQUEST: 0, RESPONSE: 0}
+
+    def __delay(self, direction: str) -> float:
+        latency = self.latency
+        return latency(direction) if callable(latency) else latency
+
+    async def __send(
+        self,
+        queue: "asyncio.Queue[Optional[Tuple[float, bytes]]]",
+        writer: asyncio.StreamWriter,
+        direction: str,
+        link: _Link,
+    ) -> None:
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                due, data = item
+                wait = due - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                writer.write(data)
+                self.__transferred[direction] += len(data)
+                if self.bandwidth > 0:
+                    await asyncio.sleep(len(data) / self.bandwidth)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            link.close()
+
+    async def __forward(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        direction: str,
+        link: _Link,
+    ) -> None:
+        queue: "asyncio.Queue[Optional[Tuple[float, bytes]]]" = asyncio.Queue()
+        sender = asyncio.ensure_future(self.__send(queue, writer, direction, link))
+        framed = True
+        try:
+            while True:
+                if self.read_delay > 0:
+                    await asyncio.sleep(self.read_delay)
+                data, framed = await _read_unit(reader, framed)
+                if not self.drop:
+                    queue.put_nowait((time.monotonic() + self.__delay(direction), data))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            # Deliver the messages in transit before closing the connection.
+            queue.put_nowait(None)
+            await asyncio.shield(sender)
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            up_reader, up_writer = await asyncio.open_connection(*self.__target)
+        except OSError:
+            writer.close()
+            return
+        link = _Link(writer, up_writer)
+        self.__links.add(link)
+        try:
+            await asyncio.gather(
+                self.__forward(reader, up_writer, REQUEST, link),
+                self.__forward(up_reader, writer, RESPONSE, link),
+            )
+        finally:
+            self.__links.discard(link)
+            link.close()
+
+    async def __disconnect(self, reset: bool) -> None:
+        for link in list(self.__links):
+            link.close(reset)
+
+    async def _shutdown(self) -> None:
+        handlers = [link.handler for link in self.__links if link.handler]
+        await self.__disconnect(False)
+        await asyncio.gather(*handlers, return_exceptions=True)
+
+    def disconnect(self, reset: bool = False) -> None:
+        """
+        Close the current connections both to the clients and the server.
+        The new connections are accepted as usual.
+
+        :param bool reset: close the connections with a TCP reset instead \
+        of the normal closing handshake.
+        :raises RuntimeError: if the proxy is not running.
+        """
+        self._run(self.__disconnect(reset))
+
+    @property
+    def connections(self) -> int:
+        """The number of the open connections."""
+        return len(self.__links)
+
+    @property
+    def transferred(self) -> Dict[str, int]:
+        """The number of the forwarded bytes by direction."""
+        return dict(self.__transferred)
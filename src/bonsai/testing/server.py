@@ -0,0 +1,919 @@
+import asyncio
+import functools
+import itertools
+import threading
+from collections import Counter
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from ..ber import (
+    TAG_ENUMERATED,
+    TAG_SET,
+    BERDecodingError,
+    decode_boolean,
+    decode_integer,
+    decode_tlv,
+    encode_integer,
+    encode_octet_string,
+    encode_sequence,
+    find_control,
+    iter_tlv,
+)
+from ..diff import dn_key, parent_key
+from ..errors import FilterError, InvalidDN
+from ..ldapdn import LDAPDN
+from ..ldapentry import LDAPEntry
+from ..ldapfilter import compile_record_filter, normalise_value
+from ._base import _BackgroundServer
+
+# The stored form of an entry: the normalised key, the DN string, the
+# values keyed by the lower-cased attribute names, and the original
+# attribute names.
+Record = Tuple[str, str, Dict[str, Tuple[Any, ...]], Dict[str, str]]
+Control = Tuple[str, bytes]
+Latency = Union[float, Callable[[str], float]]
+
+PAGED_RESULTS_OID = "1.2.840.113556.1.4.319"
+SORT_REQUEST_OID = "1.2.840.113556.1.4.473"
+SORT_RESPONSE_OID = "1.2.840.113556.1.4.474"
+VLV_REQUEST_OID = "2.16.840.1.113730.3.4.9"
+VLV_RESPONSE_OID = "2.16.840.1.113730.3.4.10"
+WHOAMI_OID = "1.3.6.1.4.1.4203.1.11.3"
+INTEGER_ORDERING_OID = "2.5.13.15"
+
+SUCCESS = 0
+PROTOCOL_ERROR = 2
+SIZELIMIT_EXCEEDED = 4
+COMPARE_FALSE = 5
+COMPARE_TRUE = 6
+AUTH_METHOD_NOT_SUPPORTED = 7
+UNAVAILABLE_CRITICAL_EXTENSION = 12
+NO_SUCH_ATTRIBUTE = 16
+ATTRIBUTE_OR_VALUE_EXISTS = 20
+NO_SUCH_OBJECT = 32
+INVALID_DN_SYNTAX = 34
+INVALID_CREDENTIALS = 49
+UNWILLING_TO_PERFORM = 53
+SORT_CONTROL_MISSING = 60
+NOT_ALLOWED_ON_NON_LEAF = 66
+ENTRY_ALREADY_EXISTS = 68
+
+
+class _ResultError(Exception):
+    """Finish an operation with a non-success result code."""
+
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class _Connection:
+    """The state of a client connection."""
+
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self.writer = writer
+        self.handler = asyncio.current_task()
+        self.bound_dn = ""
+        self.tasks: Dict[int, asyncio.Future] = {}
+        self.pages: Dict[bytes, List[Record]] = {}
+
+    def forget(self, msg_id: int, task: asyncio.Future) -> None:
+        """Remove the finished task of an operation."""
+        self.tasks.pop(msg_id, None)
+
+
+def _escape_value(raw: bytes) -> str:
+    """Escape an assertion value for the string representation of a filter."""
+    try:
+        text = raw.decode("UTF-8")
+    except UnicodeDecodeError:
+        return "".join(f"\\{byte:02x}" for byte in raw)
+    return "".join(f"\\{ord(char):02x}" if char in "*()\\\0" else char for char in text)
+
+
+def _decode_filter(tag: int, content: bytes) -> str:
+    """Convert a BER encoded search filter to its string representation."""
+    if tag in (0xA0, 0xA1):
+        items = "".join(_decode_filter(*item) for item in iter_tlv(content))
+        return f"({'&' if tag == 0xA0 else '|'}{items})"
+    elif tag == 0xA2:
+        inner_tag, inner, _ = decode_tlv(content)
+        return f"(!{_decode_filter(inner_tag, inner)})"
+    elif tag == 0x87:
+        return f"({content.decode('UTF-8')}=*)"
+    elif tag in (0xA3, 0xA5, 0xA6, 0xA8):
+        (_, attr), (_, value) = list(iter_tlv(content))
+        oper = {0xA3: "=", 0xA5: ">=", 0xA6: "<=", 0xA8: "~="}[tag]
+        return f"({attr.decode('UTF-8')}{oper}{_escape_value(value)})"
+    elif tag == 0xA4:
+        (_, attr), (_, substrings) = list(iter_tlv(content))
+        initial = final = ""
+        middle = []
+        for sub_tag, value in iter_tlv(substrings):
+            if sub_tag == 0x80:
+                initial = _escape_value(value)
+            elif sub_tag == 0x81:
+                middle.append(_escape_value(value))
+            else:
+                final = _escape_value(value)
+        return f"({attr.decode('UTF-8')}={'*'.join([initial, *middle, final])})"
+    elif tag == 0xA9:
+        parts = dict(iter_tlv(content))
+        desc = parts.get(0x82, b"").decode("UTF-8")
+        if 0x84 in parts and decode_boolean(parts[0x84]):
+            desc += ":dn"
+        if 0x81 in parts:
+            desc += f":{parts[0x81].decode('UTF-8')}"
+        return f"({desc}:={_escape_value(parts.get(0x83, b''))})"
+    raise BERDecodingError(f"Unknown filter tag: 0x{tag:02x}.")
+
+
+def _decode_controls(content: bytes) -> List[Tuple[str, bool, Optional[bytes]]]:
+    result = []
+    for _, ctrl in iter_tlv(content):
+        parts = list(iter_tlv(ctrl))
+        critical = False
+        value = None
+        for tag, item in parts[1:]:
+            if tag == 0x01:
+                critical = decode_boolean(item)
+            elif tag == 0x04:
+                value = item
+        result.append((parts[0][1].decode("ascii"), critical, value))
+    return result
+
+
+def _decode_value(raw: bytes) -> Any:
+    try:
+        return raw.decode("UTF-8")
+    except UnicodeDecodeError:
+        return raw
+
+
+def _encode_value(value: Any) -> bytes:
+    if isinstance(value, (bytes, bytearray)):
+        return encode_octet_string(bytes(value))
+    elif value is True or value is False:
+        return encode_octet_string("TRUE" if value else "FALSE")
+    return encode_octet_string(str(value))
+
+
+def _result(
+    tag: int, code: int = SUCCESS, message: str = "", extra: bytes = b""
+) -> bytes:
+    return encode_sequence(
+        encode_integer(code, TAG_ENUMERATED),
+        encode_octet_string(b""),
+        encode_octet_string(message),
+        extra,
+        tag=tag,
+    )
+
+
+def _message(msg_id: int, operation: bytes, ctrls: Iterable[Control] = ()) -> bytes:
+    items = [encode_integer(msg_id), operation]
+    encoded = [
+        encode_sequence(encode_octet_string(oid), encode_octet_string(value))
+        for oid, value in ctrls
+    ]
+    if encoded:
+        items.append(encode_sequence(*encoded, tag=0xA0))
+    return encode_sequence(*items)
+
+
+def _make_record(dn: str, attributes: Iterable[Tuple[str, Iterable[Any]]]) -> Record:
+    try:
+        key = dn_key(dn)
+    except InvalidDN:
+        raise _ResultError(INVALID_DN_SYNTAX, f"Invalid DN: {dn}.") from None
+    values: Dict[str, Tuple[Any, ...]] = {}
+    names: Dict[str, str] = {}
+    for attr, vals in attributes:
+        vals = tuple(vals)
+        if vals:
+            values[attr.lower()] = values.get(attr.lower(), ()) + vals
+            names[attr.lower()] = attr
+    return (key, dn, values, names)
+
+
+def _has_value(values: Tuple[Any, ...], value: Any) -> bool:
+    norm = normalise_value(value)
+    return any(normalise_value(item) == norm for item in values)
+
+
+def _order_value(value: Any, rule: Optional[str]) -> Tuple[int, Any]:
+    """Create a comparable sort key from an attribute value."""
+    if rule == INTEGER_ORDERING_OID:
+        try:
+            return (0, int(value))
+        except (TypeError, ValueError):
+            pass
+    norm = normalise_value(value)
+    if isinstance(norm, bytes):
+        return (2, norm)
+    return (1, norm)
+
+
+def _decode_sort(value: bytes) -> List[Tuple[str, Optional[str], bool]]:
+    _, content, _ = decode_tlv(value)
+    keys = []
+    for _, key in iter_tlv(content):
+        parts = list(iter_tlv(key))
+        rule = None
+        reverse = False
+        for tag, item in parts[1:]:
+            if tag == 0x80:
+                rule = item.decode("ascii")
+            elif tag == 0x81:
+                reverse = decode_boolean(item)
+        keys.append((parts[0][1].decode("UTF-8").lower(), rule, reverse))
+    return keys
+
+
+def _sort(
+    records: List[Record], keys: List[Tuple[str, Optional[str], bool]]
+) -> List[Record]:
+    """Sort the records stably, the ones without the attribute go last."""
+    for attr, rule, reverse in reversed(keys):
+        present = [record for record in records if attr in record[2]]
+        missing = [record for record in records if attr not in record[2]]
+        present.sort(
+            key=lambda rec: _order_value(rec[2][attr][0], rule), reverse=reverse
+        )
+        records = present + missing
+    return records
+
+
+def _vlv_window(
+    records: List[Record], value: bytes, sort_key: Tuple[str, Optional[str], bool]
+) -> Tuple[List[Record], bytes]:
+    """Select the entries of a virtual list view request."""
+    _, content, _ = decode_tlv(value)
+    parts = list(iter_tlv(content))
+    before = decode_integer(parts[0][1])
+    after = decode_integer(parts[1][1])
+    target_tag, target = parts[2]
+    count = len(records)
+    if target_tag == 0xA0:
+        (_, offset), (_, content_count) = list(iter_tlv(target))
+        pos = decode_integer(offset)
+        estimate = decode_integer(content_count)
+        if estimate > 1 and count > 1:
+            pos = round((pos - 1) * (count - 1) / (estimate - 1)) + 1
+        pos = max(1, min(count, pos)) if count else 0
+    else:
+        attr, rule, _ = sort_key
+        assertion = _order_value(_decode_value(target), rule)
+        pos = count + 1
+        for idx, record in enumerate(records):
+            vals = record[2].get(attr)
+            if vals and _order_value(vals[0], rule) >= assertion:
+                pos = idx + 1
+                break
+    start = max(0, pos - 1 - before)
+    window = records[start : max(start, pos + after)]
+    response = encode_sequence(
+        encode_integer(pos),
+        encode_integer(count),
+        encode_integer(SUCCESS, TAG_ENUMERATED),
+    )
+    return window, response
+
+
+async def _read_message(reader: asyncio.StreamReader) -> bytes:
+    head = await reader.readexactly(2)
+    length = head[1]
+    extra = b""
+    if length & 0x80:
+        extra = await reader.readexactly(length & 0x7F)
+        length = int.from_bytes(extra, "big")
+    return head + extra + await reader.readexactly(length)
+
+
+def synthetic_entries(
+    count: int,
+    base: str = "ou=people,dc=bonsai,dc=test",
+    value_size: int = 64,
+    photo_size: int = 0,
+) -> Iterator[LDAPEntry]:
+    """
+    Generate a synthetic directory tree: the entries of the base DN and
+    its ancestors, and `count` user entries below the base.
+
+    :param int count: the number of the user entries.
+    :param str base: the DN of the container of the users.
+    :param int value_size: the length of the users' description.
+    :param int photo_size: the size of the users' binary jpegPhoto \
+    attribute, it's omitted if zero.
+    :return: an iterator of the entries, parents first.
+    """
+    rdns = LDAPDN(base).rdns
+    for idx in range(len(rdns) - 1, -1, -1):
+        entry = LDAPEntry(LDAPDN(base)[idx:])
+        attr, value = rdns[idx][0]
+        if attr.lower() == "dc":
+            entry["objectClass"] = ["top", "domain"]
+        elif attr.lower() == "ou":
+            entry["objectClass"] = ["top", "organizationalUnit"]
+        else:
+            entry["objectClass"] = ["top"]
+        entry[attr] = value
+        yield entry
+    text = "Synthetic entry. " * (value_size // 17 + 1)
+    photo = bytes(range(256)) * (photo_size // 256 + 1)
+    for num in range(count):
+        entry = LDAPEntry(f"uid=user{num:06d},{base}")
+        entry["objectClass"] = [
+            "top",
+            "person",
+            "organizationalPerson",
+            "inetOrgPerson",
+        ]
+        entry["uid"] = f"user{num:06d}"
+        entry["cn"] = f"User {num}"
+        entry["sn"] = f"Surname{num % 100}"
+        entry["givenName"] = f"Given{num % 50}"
+        entry["mail"] = f"user{num}@bonsai.test"
+        entry["employeeNumber"] = str(num)
+        entry["departmentNumber"] = f"D{num % 20:03d}"
+        if value_size:
+            entry["description"] = text[:value_size]
+        if photo_size:
+            entry["jpegPhoto"] = photo[:photo_size]
+        yield entry
+
+
+class StandInServer(_BackgroundServer):
+    """
+    An in-process LDAPv3 server that serves a directory tree from memory,
+    for testing and benchmarking the clients without a directory server.
+    It runs its own asyncio event loop on a background thread, therefore
+    it serves both the synchronous and the asynchronous connections of the
+    same process. Use it as a context manager, or call :meth:`start` and
+    :meth:`close`.
+
+    >>> from bonsai.testing import StandInServer, synthetic_entries
+    >>> with StandInServer(synthetic_entries(1000)) as server:
+    ...     client = bonsai.LDAPClient(server.url)
+    ...     with client.connect() as conn:
+    ...         res = conn.search("ou=people,dc=bonsai,dc=test", 1)
+    ...
+    >>> len(res)
+    1000
+
+    The server supports simple bind, search (with paged results,
+    server-side sort and virtual list view controls), add, delete,
+    modify, rename, compare, abandon and the Who am I? extended
+    operation. The search filters are evaluated by :class:`LDAPFilter`.
+    The entries are returned in the order of their addition, and the
+    encoded entries are cached, therefore the cost of serving them is
+    small and constant.
+
+    :param entries: the initial entries of the directory.
+    :param str host: the address to listen on.
+    :param int port: the port to listen on, a free one is chosen if zero.
+    :param float|callable latency: the delay in seconds before the \
+    response of every operation, or a callable that gets the kind of the \
+    operation (e.g. `search`) and returns the delay.
+    :param dict credentials: the passwords of the DNs that can bind. If \
+    it's None, every simple bind is accepted.
+    :param int size_limit: the maximum number of entries returned by a \
+    search without paged results, zero for no limit.
+    """
+
+    def __init__(
+        self,
+        entries: Iterable[LDAPEntry] = (),
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: Latency = 0.0,
+        credentials: Optional[Dict[str, str]] = None,
+        size_limit: int = 0,
+    ) -> None:
+        super().__init__(host, port)
+        self.__lock = threading.RLock()
+        self.__entries: Dict[str, Record] = {}
+        self.__children: Dict[str, Dict[str, None]] = {}
+        self.__encoded: Dict[str, Tuple[Record, bytes]] = {}
+        self.latency = latency
+        self.__credentials = (
+            {dn_key(dn): password for dn, password in credentials.items()}
+            if credentials is not None
+            else None
+        )
+        self.__size_limit = size_limit
+        self.__operations: Counter = Counter()
+        self.__cookies = itertools.count(1)
+        self.__connections: Set[_Connection] = set()
+        self.__handlers: Dict[
+            int, Tuple[str, int, Callable[..., Awaitable[Tuple[bytes, List[Control]]]]]
+        ] = {
+            0x60: ("bind", 0x61, self.__bind),
+            0x63: ("search", 0x65, self.__search),
+            0x66: ("modify", 0x67, self.__modify),
+            0x68: ("add", 0x69, self.__add),
+            0x4A: ("delete", 0x6B, self.__delete),
+            0x6C: ("rename", 0x6D, self.__rename),
+            0x6E: ("compare", 0x6F, self.__compare),
+            0x77: ("extended", 0x78, self.__extended),
+        }
+        self.load(entries)
+
+    def add(self, entry: LDAPEntry) -> None:
+        """
+        Add an entry to the directory, or replace the existing one.
+
+        :param LDAPEntry entry: the entry.
+        """
+        self.__store(_make_record(str(entry.dn), entry.items(exclude_dn=True)))
+
+    def load(self, entries: Iterable[LDAPEntry]) -> int:
+        """
+        Add multiple entries to the directory.
+
+        :param entries: an iterable of entries, parents first.
+        :return: the number of the added entries.
+        :rtype: int
+        """
+        count = 0
+        for entry in entries:
+            self.add(entry)
+            count += 1
+        return count
+
+    def remove(self, dn: Union[str, LDAPDN]) -> bool:
+        """
+        Remove an entry from the directory.
+
+        :param str|LDAPDN dn: the DN of the entry.
+        :return: True, if the entry was in the directory.
+        :rtype: bool
+        """
+        return self.__discard(dn_key(dn)) is not None
+
+    def __store(self, record: Record) -> None:
+        with self.__lock:
+            self.__entries[record[0]] = record
+            child = record[0]
+            while child:
+                parent = parent_key(child)
+                siblings = self.__children.setdefault(parent, {})
+                if child in siblings:
+                    break
+                siblings[child] = None
+                child = parent
+
+    def __discard(self, key: str) -> Optional[Record]:
+        with self.__lock:
+            record = self.__entries.pop(key, None)
+            self.__encoded.pop(key, None)
+            child = key
+            while child and child not in self.__entries:
+                if self.__children.get(child):
+                    break
+                self.__children.pop(child, None)
+                parent = parent_key(child)
+                siblings = self.__children.get(parent, {})
+                siblings.pop(child, None)
+                child = parent
+            return record
+
+    def __get(self, dn: str) -> Record:
+        try:
+            record = self.__entries.get(dn_key(dn))
+        except InvalidDN:
+            raise _ResultError(INVALID_DN_SYNTAX, f"Invalid DN: {dn}.") from None
+        if record is None:
+            raise _ResultError(NO_SUCH_OBJECT, f"No such object: {dn}.")
+        return record
+
+    def __subtree(self, key: str) -> List[Record]:
+        result = [self.__entries[key]] if key in self.__entries else []
+        stack = list(reversed(self.__children.get(key, {})))
+        while stack:
+            child = stack.pop()
+            if child in self.__entries:
+                result.append(self.__entries[child])
+            stack.extend(reversed(self.__children.get(child, {})))
+        return result
+
+    def __root_dse(self) -> Record:
+        contexts = []
+        stack = list(self.__children.get("", {}))
+        while stack:
+            key = stack.pop(0)
+            if key in self.__entries:
+                contexts.append(self.__entries[key][1])
+            else:
+                stack.extend(self.__children.get(key, {}))
+        return _make_record(
+            "",
+            [
+                ("objectClass", ["top"]),
+                ("namingContexts", contexts),
+                ("supportedLDAPVersion", ["3"]),
+                (
+                    "supportedControl",
+                    [PAGED_RESULTS_OID, SORT_REQUEST_OID, VLV_REQUEST_OID],
+                ),
+                ("supportedExtension", [WHOAMI_OID]),
+            ],
+        )
+
+    def __find(self, base: str, scope: int, filter_exp: str) -> List[Record]:
+        try:
+            _, match, with_dn = compile_record_filter(filter_exp)
+            key = dn_key(base)
+        except FilterError as exc:
+            raise _ResultError(PROTOCOL_ERROR, str(exc)) from None
+        except InvalidDN:
+            raise _ResultError(INVALID_DN_SYNTAX, f"Invalid DN: {base}.") from None
+        with self.__lock:
+            if key == "" and scope == 0:
+                records = [self.__root_dse()]
+            elif key not in self.__entries and key not in self.__children:
+                raise _ResultError(NO_SUCH_OBJECT, f"No such object: {base}.")
+            elif scope == 0:
+                records = [self.__entries[key]] if key in self.__entries else []
+            elif scope == 1:
+                records = [
+                    self.__entries[child]
+                    for child in self.__children.get(key, {})
+                    if child in self.__entries
+                ]
+            else:
+                records = self.__subtree(key)
+        return [
+            record
+            for record in records
+            if match(dict(record[2], dn=LDAPDN(record[1])) if with_dn else record[2])
+        ]
+
+    def __encode_entry(
+        self, record: Record, selected: Optional[Set[str]], types_only: bool
+    ) -> bytes:
+        full = selected is None and not types_only
+        if full:
+            cached = self.__encoded.get(record[0])
+            if cached is not None and cached[0] is record:
+                return cached[1]
+        attrs = []
+        for attr, vals in record[2].items():
+            if selected is not None and attr not in selected:
+                continue
+            encoded = () if types_only else tuple(_encode_value(val) for val in vals)
+            attrs.append(
+                encode_sequence(
+                    encode_octet_string(record[3][attr]),
+                    encode_sequence(*encoded, tag=TAG_SET),
+                )
+            )
+        result = encode_sequence(
+            encode_octet_string(record[1]), encode_sequence(*attrs), tag=0x64
+        )
+        if full:
+            self.__encoded[record[0]] = (record, result)
+        return result
+
+    async def __bind(
+        self, conn: _Connection, msg_id: int, op: bytes, ctrls: list
+    ) -> Tuple[bytes, List[Control]]:
+        parts = list(iter_tlv(op))
+        name = parts[1][1].decode("UTF-8")
+        auth_tag, password = parts[2]
+        if auth_tag != 0x80:
+            raise _ResultError(
+                AUTH_METHOD_NOT_SUPPORTED, "Only simple bind is supported."
+            )
+        if name and self.__credentials is not None:
+            if self.__credentials.get(dn_key(name)) != password.decode("UTF-8"):
+                raise _ResultError(INVALID_CREDENTIALS, "Invalid credentials.")
+        conn.bound_dn = name
+        return b"", []
+
+    async def __search(
+        self, conn: _Connection, msg_id: int, op: bytes, ctrls: list
+    ) -> Tuple[bytes, List[Control]]:
+        parts = list(iter_tlv(op))
+        base = parts[0][1].decode("UTF-8")
+        scope = decode_integer(parts[1][1])
+        size_limit = decode_integer(parts[3][1])
+        types_only = decode_boolean(parts[5][1])
+        filter_exp = _decode_filter(*parts[6])
+        attrlist = [value.decode("UTF-8").lower() for _, value in iter_tlv(parts[7][1])]
+        selected: Optional[Set[str]] = None
+        if attrlist and "*" not in attrlist:
+            selected = set(attrlist)
+        resp_ctrls: List[Control] = []
+        paged = find_control(ctrls, PAGED_RESULTS_OID)
+        cookie = b""
+        if paged is not None:
+            (_, page_size), (_, cookie) = list(iter_tlv(decode_tlv(paged)[1]))
+            size = decode_integer(page_size)
+        if cookie:
+            records = conn.pages.pop(cookie, None)
+            if records is None:
+                raise _ResultError(
+                    UNWILLING_TO_PERFORM, "Invalid paged results cookie."
+                )
+        else:
+            records = self.__find(base, scope, filter_exp)
+            sort = find_control(ctrls, SORT_REQUEST_OID)
+            if sort is not None:
+                keys = _decode_sort(sort)
+                records = _sort(records, keys)
+                sort_result = encode_sequence(encode_integer(SUCCESS, TAG_ENUMERATED))
+                resp_ctrls.append((SORT_RESPONSE_OID, sort_result))
+            vlv = find_control(ctrls, VLV_REQUEST_OID)
+            if vlv is not None:
+                if sort is None:
+                    raise _ResultError(SORT_CONTROL_MISSING, "Sort control is missing.")
+                records, response = _vlv_window(records, vlv, keys[0])
+                resp_ctrls.append((VLV_RESPONSE_OID, response))
+        code = SUCCESS
+        if paged is not None:
+            total = len(records)
+            if size == 0:
+                records = []
+                cookie = b""
+            else:
+                rest = records[size:]
+                records = records[:size]
+                cookie = str(next(self.__cookies)).encode("ascii") if rest else b""
+                if rest:
+                    conn.pages[cookie] = rest
+            resp_ctrls.append(
+                (
+                    PAGED_RESULTS_OID,
+                    encode_sequence(encode_integer(total), encode_octet_string(cookie)),
+                )
+            )
+        else:
+            limit = min(
+                (lim for lim in (size_limit, self.__size_limit) if lim > 0), default=0
+            )
+            if limit and len(records) > limit:
+                records = records[:limit]
+                code = SIZELIMIT_EXCEEDED
+        for idx, record in enumerate(records):
+            entry = self.__encode_entry(record, selected, types_only)
+            conn.writer.write(_message(msg_id, entry))
+            if idx % 100 == 99:
+                await conn.writer.drain()
+        if code != SUCCESS:
+            raise _ResultError(code, "Size limit exceeded.")
+        return b"", resp_ctrls
+
+    async def __add(
+        self, conn: _Connection, msg_id: int, op: bytes, ctrls: list
+    ) -> Tuple[bytes, List[Control]]:
+        parts = list(iter_tlv(op))
+        attributes = []
+        for _, attr in iter_tlv(parts[1][1]):
+            (_, name), (_, vals) = list(iter_tlv(attr))
+            values = [_decode_value(val) for _, val in iter_tlv(vals)]
+            attributes.append((name.decode("UTF-8"), values))
+        record = _make_record(parts[0][1].decode("UTF-8"), attributes)
+        with self.__lock:
+            if record[0] in self.__entries:
+                raise _ResultError(ENTRY_ALREADY_EXISTS, "Entry already exists.")
+            parent = parent_key(record[0])
+            ancestor = parent
+            while ancestor and ancestor not in self.__entries:
+                ancestor = parent_key(ancestor)
+            if ancestor != parent:
+                raise _ResultError(NO_SUCH_OBJECT, "Parent entry is missing.")
+            self.__store(record)
+        return b"", []
+
+    async def __delete(
+        self, conn: _Connection, msg_id: int, op: bytes, ctrls: list
+    ) -> Tuple[bytes, List[Control]]:
+        with self.__lock:
+            record = self.__get(op.decode("UTF-8"))
+            if self.__children.get(record[0]):
+                raise _ResultError(NOT_ALLOWED_ON_NON_LEAF, "Entry has children.")
+            self.__discard(record[0])
+        return b"", []
+
+    async def __modify(
+        self, conn: _Connection, msg_id: int, op: bytes, ctrls: list
+    ) -> Tuple[bytes, List[Control]]:
+        parts = list(iter_tlv(op))
+        with self.__lock:
+            key, dn, old_values, old_names = self.__get(parts[0][1].decode("UTF-8"))
+            values = dict(old_values)
+            names = dict(old_names)
+            for _, change in iter_tlv(parts[1][1]):
+                (_, oper), (_, mod) = list(iter_tlv(change))
+                (_, name), (_, raw_vals) = list(iter_tlv(mod))
+                attr = name.decode("UTF-8")
+                lattr = attr.lower()
+                new = tuple(_decode_value(val) for _, val in iter_tlv(raw_vals))
+                current = values.get(lattr, ())
+                oper_code = decode_integer(oper)
+                if oper_code == 0:
+                    for val in new:
+                        if _has_value(current, val):
+                            raise _ResultError(
+                                ATTRIBUTE_OR_VALUE_EXISTS, f"Value exists: {attr}."
+                            )
+                    current += new
+                elif oper_code == 1:
+                    if not current:
+                        raise _ResultError(
+                            NO_SUCH_ATTRIBUTE, f"No such attribute: {attr}."
+                        )
+                    for val in new:
+                        if not _has_value(current, val):
+                            raise _ResultError(
+                                NO_SUCH_ATTRIBUTE, f"No such value: {attr}."
+                            )
+                        norm = normalise_value(val)
+                        current = tuple(
+                            item for item in current if normalise_value(item) != norm
+                        )
+                    if not new:
+                        current = ()
+                elif oper_code == 2:
+                    current = new
+                elif oper_code == 3:
+                    if not current:
+                        raise _ResultError(
+                            NO_SUCH_ATTRIBUTE, f"No such attribute: {attr}."
+                        )
+                    delta = int(new[0])
+                    current = tuple(str(int(item) + delta) for item in current)
+                else:
+                    raise _ResultError(PROTOCOL_ERROR, "Invalid modify operation.")
+                if current:
+                    values[lattr] = current
+                    names.setdefault(lattr, attr)
+                else:
+                    values.pop(lattr, None)
+                    names.pop(lattr, None)
+            self.__store((key, dn, values, names))
+        return b"", []
+
+    async def __rename(
+        self, conn: _Connection, msg_id: int, op: bytes, ctrls: list
+    ) -> Tuple[bytes, List[Control]]:
+        parts = list(iter_tlv(op))
+        new_rdn = parts[1][1].decode("UTF-8")
+        delete_old = decode_boolean(parts[2][1])
+        with self.__lock:
+            key, dn, old_values, names = self.__get(parts[0][1].decode("UTF-8"))
+            if self.__children.get(key):
+                raise _ResultError(NOT_ALLOWED_ON_NON_LEAF, "Entry has children.")
+            try:
+                old_dn = LDAPDN(dn)
+                rdn = LDAPDN(new_rdn).rdns[0]
+                if len(parts) > 3:
+                    parent = str(LDAPDN(parts[3][1].decode("UTF-8")))
+                else:
+                    parent = old_dn[1:]
+            except InvalidDN as exc:
+                raise _ResultError(INVALID_DN_SYNTAX, str(exc)) from None
+            new_dn = f"{new_rdn},{parent}" if parent else new_rdn
+            values = dict(old_values)
+            if delete_old:
+                for attr, value in old_dn.rdns[0]:
+                    norm = normalise_value(value)
+                    remaining = tuple(
+                        item
+                        for item in values.get(attr.lower(), ())
+                        if normalise_value(item) != norm
+                    )
+                    if remaining:
+                        values[attr.lower()] = remaining
+                    else:
+                        values.pop(attr.lower(), None)
+            names = dict(names)
+            for attr, value in rdn:
+                current = values.get(attr.lower(), ())
+                if not _has_value(current, value):
+                    values[attr.lower()] = current + (value,)
+                    names.setdefault(attr.lower(), attr)
+            record = _make_record(new_dn, [])
+            if record[0] in self.__entries:
+                raise _ResultError(ENTRY_ALREADY_EXISTS, "Entry already exists.")
+            self.__discard(key)
+            self.__store((record[0], new_dn, values, names))
+        return b"", []
+
+    async def __compare(
+        self, conn: _Connection, msg_id: int, op: bytes, ctrls: list
+    ) -> Tuple[bytes, List[Control]]:
+        parts = list(iter_tlv(op))
+        record = self.__get(parts[0][1].decode("UTF-8"))
+        (_, attr), (_, value) = list(iter_tlv(parts[1][1]))
+        values = record[2].get(attr.decode("UTF-8").lower())
+        if values is None:
+            raise _ResultError(NO_SUCH_ATTRIBUTE, "No such attribute.")
+        if _has_value(values, _decode_value(value)):
+            raise _ResultError(COMPARE_TRUE, "")
+        raise _ResultError(COMPARE_FALSE, "")
+
+    async def __extended(
+        self, conn: _Connection, msg_id: int, op: bytes, ctrls: list
+    ) -> Tuple[bytes, List[Control]]:
+        parts = dict(iter_tlv(op))
+        if parts.get(0x80) != WHOAMI_OID.encode("ascii"):
+            raise _ResultError(PROTOCOL_ERROR, "Unsupported extended operation.")
+        authzid = f"dn:{conn.bound_dn}" if conn.bound_dn else ""
+        return encode_octet_string(authzid, tag=0x8B), []
+
+    async def __dispatch(
+        self, conn: _Connection, msg_id: int, tag: int, op: bytes, ctrls: list
+    ) -> None:
+        kind, resp_tag, handler = self.__handlers[tag]
+        self.__operations[kind] += 1
+        latency = self.latency(kind) if callable(self.latency) else self.latency
+        if latency > 0:
+            await asyncio.sleep(latency)
+        code = SUCCESS
+        message = ""
+        extra = b""
+        resp_ctrls: List[Control] = []
+        try:
+            supported = (PAGED_RESULTS_OID, SORT_REQUEST_OID, VLV_REQUEST_OID)
+            for oid, critical, _ in ctrls:
+                if critical and oid not in supported:
+                    raise _ResultError(
+                        UNAVAILABLE_CRITICAL_EXTENSION, f"Unsupported control: {oid}."
+                    )
+            extra, resp_ctrls = await handler(conn, msg_id, op, ctrls)
+        except _ResultError as err:
+            code = err.code
+            message = err.message
+        except (BERDecodingError, ValueError, IndexError) as exc:
+            code = PROTOCOL_ERROR
+            message = str(exc)
+        conn.writer.write(
+            _message(msg_id, _result(resp_tag, code, message, extra), resp_ctrls)
+        )
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        conn = _Connection(writer)
+        self.__connections.add(conn)
+        try:
+            while True:
+                data = await _read_message(reader)
+                _, content, _ = decode_tlv(data)
+                items = list(iter_tlv(content))
+                msg_id = decode_integer(items[0][1])
+                tag, op = items[1]
+                ctrls = _decode_controls(items[2][1]) if len(items) > 2 else []
+                if tag == 0x42:
+                    break
+                elif tag == 0x50:
+                    task = conn.tasks.pop(decode_integer(op), None)
+                    if task is not None:
+                        task.cancel()
+                        self.__operations["abandon"] += 1
+                elif tag in self.__handlers:
+                    task = asyncio.ensure_future(
+                        self.__dispatch(conn, msg_id, tag, op, ctrls)
+                    )
+                    conn.tasks[msg_id] = task
+                    task.add_done_callback(functools.partial(conn.forget, msg_id))
+        except (asyncio.IncompleteReadError, ConnectionError, BERDecodingError):
+            pass
+        finally:
+            for task in list(conn.tasks.values()):
+                task.cancel()
+            self.__connections.discard(conn)
+            writer.close()
+
+    async def _shutdown(self) -> None:
+        handlers = []
+        for conn in list(self.__connections):
+            for task in list(conn.tasks.values()):
+                task.cancel()
+            # Closing the transport makes the handler's pending read fail.
+            conn.writer.close()
+            if conn.handler is not None:
+                handlers.append(conn.handler)
+        await asyncio.gather(*handlers, return_exceptions=True)
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    @property
+    def operations(self) -> Dict[str, int]:
+        """The number of the received operations by their kind."""
+        return dict(self.__operations)
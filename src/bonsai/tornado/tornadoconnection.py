@@ -26,6 +26,9 @@ class TornadoLDAPConnection(BaseLDAPConnection):
     def _io_callback(self, fut, msg_id, fd=None, events=None):
         try:
             self._ioloop.remove_handler(self._fileno)
+            if fut.done():
+                # Timed out or cancelled.
+                return
             res = super().get_result(msg_id)
             if res is not None:
                 fut.set_result(res)
@@ -44,19 +47,31 @@ class TornadoLDAPConnection(BaseLDAPConnection):
         except LDAPError as exc:
             fut.set_exception(exc)
 
-    def _timeout_callback(self, fut):
+    def _timeout_callback(self, fut, msg_id):
         self._ioloop.remove_handler(self._fileno)
-        fut.set_exception(gen.TimeoutError())
+        if not fut.done():
+            self._abandon_all((msg_id,))
+            fut.set_exception(gen.TimeoutError())
+
+    def _cancel_callback(self, msg_id, fut):
+        if fut.cancelled():
+            # The operation is still in progress.
+            self._ioloop.remove_handler(self._fileno)
+            if self._timeout is not None:
+                self._ioloop.remove_timeout(self._timeout)
+            self._abandon_all((msg_id,))
 
     def _evaluate(self, msg_id, timeout=None):
+        timeout = self._watchdog_timeout(msg_id, timeout)
         fut = Future()
         callback = partial(self._io_callback, fut, msg_id)
+        fut.add_done_callback(partial(self._cancel_callback, msg_id))
         self._fileno = self.fileno()
         try:
             self._ioloop.add_handler(self._fileno, callback, IOLoop.WRITE | IOLoop.READ)
             if timeout is not None:
                 self._timeout = self._ioloop.call_later(
-                    timeout, self._timeout_callback, fut
+                    timeout, self._timeout_callback, fut, msg_id
                 )
         except FileExistsError as exc:
             # Avoid concurrency problems by registering with
@@ -0,0 +1,210 @@
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from .ldapentry import LDAPEntry
+from .watchdog import OperationInfo
+
+MYPY = False
+
+if MYPY:
+    from .ldapconnection import BaseLDAPConnection
+
+logger = logging.getLogger("bonsai.tracing")
+
+
+def _entry_size(entry: LDAPEntry) -> int:
+    """Approximate the size of an entry's data by the length of its values."""
+    size = len(str(entry.dn))
+    for attr, values in entry.items(exclude_dn=True):
+        size += len(attr)
+        for value in values:
+            size += len(value) if isinstance(value, bytes) else len(str(value))
+    return size
+
+
+class OperationTrace:
+    """
+    The tracing record of an LDAP operation that is passed to the hooks of
+    a :class:`Tracer`. The attributes of the result are set before
+    :meth:`Tracer.on_end` is called.
+    """
+
+    __slots__ = (
+        "conn",
+        "msg_id",
+        "kind",
+        "dn",
+        "scope",
+        "filter_exp",
+        "started",
+        "finished",
+        "c_time",
+        "entries",
+        "size",
+        "result_code",
+        "error",
+        "abandoned",
+        "data",
+    )
+
+    def __init__(self, conn: "BaseLDAPConnection", info: OperationInfo) -> None:
+        #: The connection of the operation.
+        self.conn = conn
+        #: The message ID of the operation.
+        self.msg_id = info.msg_id
+        #: The kind of the operation (see :attr:`OperationInfo.kind`), or
+        #: `open` for opening the connection.
+        self.kind = info.kind
+        #: The DN of the entry (or the base of the search), if there's any.
+        self.dn = info.dn
+        #: The scope of the search operations.
+        self.scope = info.scope
+        #: The filter expression of the search operations.
+        self.filter_exp = info.filter_exp
+        #: The start time of the operation as a :func:`time.monotonic` value.
+        self.started = info.started
+        #: The finish time of the operation as a :func:`time.monotonic` value.
+        self.finished: Optional[float] = None
+        #: The time in seconds spent in the extension module polling and
+        #: processing the results. For synchronous connections it includes
+        #: the blocking wait for the server's response.
+        self.c_time = 0.0
+        #: The number of the received entries, if the operation is a search.
+        self.entries: Optional[int] = None
+        #: The approximate size of the received entries' data (the length
+        #: of the DNs, attribute names and values), if it's known.
+        self.size: Optional[int] = None
+        #: The result code of the operation, zero for success, or None if
+        #: the operation is failed without an LDAP result code.
+        self.result_code: Optional[int] = None
+        #: The exception raised by the operation.
+        self.error: Optional[BaseException] = None
+        #: True, if the operation is abandoned (e.g. timed out or cancelled).
+        self.abandoned = False
+        #: A dictionary for the hooks to store their own data of the trace.
+        self.data: Dict[str, Any] = {}
+
+    @property
+    def elapsed(self) -> Optional[float]:
+        """The time in seconds of the operation, None if it's not finished."""
+        if self.finished is None:
+            return None
+        return self.finished - self.started
+
+    @property
+    def wait_time(self) -> Optional[float]:
+        """
+        The time in seconds of the operation that is not spent in the
+        extension module, e.g. waiting for the event loop.
+        """
+        elapsed = self.elapsed
+        if elapsed is None:
+            return None
+        return max(0.0, elapsed - self.c_time)
+
+    def _add_result(self, result: Any) -> None:
+        if isinstance(result, tuple) and len(result) == 3:
+            # A message of a search that is received one by one.
+            if result[0] == "entry":
+                self.entries = (self.entries or 0) + 1
+                self.size = (self.size or 0) + _entry_size(result[1])
+        elif isinstance(result, list):
+            self.entries = 0
+            self.size = 0
+            for item in result:
+                if isinstance(item, LDAPEntry):
+                    self.entries += 1
+                    self.size += _entry_size(item)
+        elif self.kind == "search":
+            try:
+                # The page of a paged or virtual list view search.
+                self.entries = len(result)
+            except TypeError:
+                pass
+
+    def __repr__(self) -> str:
+        return (
+            f"<OperationTrace {self.kind} msg_id={self.msg_id} dn={self.dn!r}"
+            f" elapsed={self.elapsed} result_code={self.result_code}>"
+        )
+
+
+class Tracer:
+    """
+    Base class of the tracing hooks that can be attached to an
+    :class:`LDAPClient` with :meth:`LDAPClient.set_tracer`. The hooks are
+    called for every operation on the connections of the client: when
+    the connection starts to wait for its result, and when it's finished,
+    failed or abandoned. The exceptions raised by the hooks are logged and
+    ignored. Without a tracer only a single attribute lookup is added to
+    the polling of the results.
+    """
+
+    def on_start(self, trace: OperationTrace) -> None:
+        """
+        Called when the connection starts to wait for the result of an
+        operation.
+
+        :param OperationTrace trace: the trace of the operation.
+        """
+        pass
+
+    def on_end(self, trace: OperationTrace) -> None:
+        """
+        Called when an operation is finished, failed or abandoned.
+
+        :param OperationTrace trace: the trace of the operation.
+        """
+        pass
+
+
+class _TracerGroup(Tracer):
+    """Call the hooks of multiple tracers, isolating their exceptions."""
+
+    def __init__(self, *tracers: Tracer) -> None:
+        self.tracers: Tuple[Tracer, ...] = tracers
+
+    def on_start(self, trace: OperationTrace) -> None:
+        for tracer in self.tracers:
+            try:
+                tracer.on_start(trace)
+            except Exception as exc:
+                logger.warning(f"Exception is raised by the on_start hook: {exc!r}")
+
+    def on_end(self, trace: OperationTrace) -> None:
+        for tracer in self.tracers:
+            try:
+                tracer.on_end(trace)
+            except Exception as exc:
+                logger.warning(f"Exception is raised by the on_end hook: {exc!r}")
+
+
+def _start_trace(
+    tracer: Tracer, conn: "BaseLDAPConnection", info: OperationInfo
+) -> OperationTrace:
+    trace = OperationTrace(conn, info)
+    try:
+        tracer.on_start(trace)
+    except Exception as exc:
+        logger.warning(f"Exception is raised by the on_start hook: {exc!r}")
+    return trace
+
+
+def _end_trace(
+    tracer: Tracer,
+    trace: OperationTrace,
+    error: Optional[BaseException] = None,
+    abandoned: bool = False,
+) -> None:
+    trace.finished = time.monotonic()
+    trace.abandoned = abandoned
+    trace.error = error
+    if error is None and not abandoned:
+        trace.result_code = 0
+    else:
+        trace.result_code = getattr(error, "code", None)
+    try:
+        tracer.on_end(trace)
+    except Exception as exc:
+        logger.warning(f"Exception is raised by the on_end hook: {exc!r}")
@@ -36,17 +36,23 @@ class TrioLDAPConnection(BaseLDAPConnection):
 
     async def _poll(self, msg_id, timeout=None):
         tout_sec = timeout if timeout is not None else math.inf
-        with trio.move_on_after(tout_sec):
-            while True:
-                await trio.lowlevel.wait_writable(self)
-                await trio.lowlevel.wait_readable(self)
-                res = super().get_result(msg_id)
-                if res is not None:
-                    return res
+        try:
+            with trio.move_on_after(tout_sec):
+                while True:
+                    await trio.lowlevel.wait_writable(self)
+                    await trio.lowlevel.wait_readable(self)
+                    res = super().get_result(msg_id)
+                    if res is not None:
+                        return res
+        except trio.Cancelled:
+            # The operation is still in progress.
+            self._abandon_all((msg_id,))
+            raise
+        self._abandon_all((msg_id,))
         raise TimeoutError("Timeout is exceeded")
 
     def _evaluate(self, msg_id, timeout=None):
-        return self._poll(msg_id, timeout)
+        return self._poll(msg_id, self._watchdog_timeout(msg_id, timeout))
 
     async def delete(self, dname, timeout=None, recursive=False):
         try:
@@ -0,0 +1,114 @@
+import time
+from typing import Iterable, List, NamedTuple, Optional
+
+MYPY = False
+
+if MYPY:
+    from .ldapconnection import BaseLDAPConnection
+
+
+class OperationInfo(NamedTuple):
+    """ The details of an in-flight LDAP operation of a connection. """
+
+    #: The message ID of the operation.
+    msg_id: int
+    #: The kind of the operation: `add`, `delete`, `modify`,
+    #: `modify_password`, `rename`, `search`, `stream_search` or `whoami`.
+    kind: str
+    #: The DN of the entry (or the base of the search), if there's any.
+    dn: Optional[str]
+    #: The start time of the operation as a :func:`time.monotonic` value.
+    started: float
+    #: The scope of the search operations.
+    scope: Optional[int] = None
+    #: The filter expression of the search operations.
+    filter_exp: Optional[str] = None
+
+    @property
+    def age(self) -> float:
+        """The time in seconds since the operation is started."""
+        return time.monotonic() - self.started
+
+
+class Watchdog:
+    """
+    A watchdog of the in-flight operations that can be attached to an
+    :class:`LDAPClient` with :meth:`LDAPClient.set_watchdog`. The time
+    limit of waiting for the result of an operation on the connections of
+    the client is capped to the remaining time until the deadline of the
+    operation, therefore the operations that are older than `max_age` are
+    abandoned and fail with timeout error. The connection pools of the
+    client close the connections that have stuck operations, instead of
+    reusing them.
+
+    The searches whose messages are received one by one (persistent
+    search, content synchronisation, DirSync and resumable paged search)
+    are exempt by default, because they can run indefinitely.
+
+    :param float max_age: the deadline of the operations in seconds.
+    :param exempt_kinds: the kinds of operations that are not watched.
+    :raises ValueError: if `max_age` is not positive.
+    """
+
+    def __init__(
+        self, max_age: float, exempt_kinds: Iterable[str] = ("stream_search",)
+    ) -> None:
+        if not isinstance(max_age, (int, float)) or max_age <= 0:
+            raise ValueError("The max_age must be a positive number.")
+        self.__max_age = float(max_age)
+        self.__exempt_kinds = frozenset(exempt_kinds)
+
+    @property
+    def max_age(self) -> float:
+        """The deadline of the operations in seconds."""
+        return self.__max_age
+
+    def remaining(self, info: OperationInfo) -> Optional[float]:
+        """
+        Get the remaining time of an operation until its deadline.
+
+        :param OperationInfo info: the details of the operation.
+        :return: the remaining time in seconds (zero for a stale \
+        operation), or None if the kind of the operation is exempt.
+        :rtype: float
+        """
+        if info.kind in self.__exempt_kinds:
+            return None
+        return max(0.0, self.__max_age - info.age)
+
+    def stale_operations(self, conn: "BaseLDAPConnection") -> List[OperationInfo]:
+        """
+        Get the in-flight operations of a connection that are older than
+        the deadline.
+
+        :param BaseLDAPConnection conn: the connection.
+        :return: the list of the stale operations.
+        :rtype: list
+        """
+        return [op for op in conn.pending_operations if self.remaining(op) == 0.0]
+
+    def is_stuck(self, conn: "BaseLDAPConnection") -> bool:
+        """
+        Check that the connection has any stale operation.
+
+        :param BaseLDAPConnection conn: the connection.
+        :return: True, if the connection has stale operations.
+        :rtype: bool
+        """
+        return not conn.closed and bool(self.stale_operations(conn))
+
+    def check(self, conn: "BaseLDAPConnection") -> List[OperationInfo]:
+        """
+        Abandon the stale operations of a connection, e.g. the ones whose
+        results are never requested. It has to be called from the thread
+        (or event loop) that uses the connection. A caller that still
+        waits for the result of an abandoned operation gets an
+        :class:`bonsai.errors.InvalidMessageID` error.
+
+        :param BaseLDAPConnection conn: the connection.
+        :return: the list of the abandoned operations.
+        :rtype: list
+        """
+        stale = self.stale_operations(conn)
+        conn._abandon_all(op.msg_id for op in stale)
+        return stale
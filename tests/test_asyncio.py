@@ -7,8 +7,9 @@ import pytest
 from conftest import get_config, network_delay
 
 from bonsai import LDAPEntry
-from bonsai.asyncio import AIOConnectionPool
+from bonsai.asyncio import AIOConnectionPool, AIOEntryLoader
 from bonsai.pool import ClosedPool
+from bonsai.testing import StandInServer, synthetic_entries
 import bonsai.errors
 
 if sys.platform == "win32" and sys.version_info.minor >= 8:
@@ -168,6 +169,38 @@ async def test_search_timeout(client):
                 await conn.search(timeout=4.0)
 
 
+@pytest.mark.timeout(18)
+@asyncio_test
+async def test_modify_timeout(client, basedn):
+    """Test rolling back the changes of a timed out modify."""
+    async with client.connect(True) as conn:
+        entry = await conn.search(f"cn=chuck,ou=nerdherd,{basedn}", 0)
+        entry = entry[0]
+        entry["description"] = "timed out"
+        with network_delay(5.1):
+            with pytest.raises(asyncio.TimeoutError):
+                await entry.modify(timeout=4.0)
+        assert entry._status()["description"]["@added"] == ["timed out"]
+        # The changes can be sent again.
+        await entry.modify()
+        del entry["description"]
+        await entry.modify()
+
+
+@pytest.mark.timeout(18)
+@asyncio_test
+async def test_cancel_search(client):
+    """Test that cancelling a search abandons the operation."""
+    async with client.connect(True) as conn:
+        with network_delay(5.1):
+            task = asyncio.ensure_future(conn.search())
+            await asyncio.sleep(1.0)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        assert await conn.search() is not None
+
+
 @asyncio_test
 async def test_paged_search(client, basedn):
     """Test paged results control."""
@@ -284,3 +317,93 @@ async def test_pool_spawn(client):
         _ = await conn.whoami()
     assert pool.idle_connection == 1
     assert pool.shared_connection == 0
+
+
+@asyncio_test
+async def test_entry_loader(client, basedn):
+    """Test batching lookups with AIOEntryLoader."""
+    with pytest.raises(TypeError):
+        _ = AIOEntryLoader(client)
+    async with client.connect(True) as conn:
+        with pytest.raises(ValueError):
+            _ = AIOEntryLoader(conn, max_batch_size=0)
+        loader = AIOEntryLoader(conn, basedn, attrlist=["cn"], max_batch_size=2)
+        res = await asyncio.gather(
+            loader.load("uid", "chuck"),
+            loader.load("uid", "JEFF"),
+            loader.load("uid", "jeff"),
+            loader.load("uid", "missing"),
+        )
+        assert res[0].dn == "cn=chuck,ou=nerdherd,%s" % basedn
+        assert res[0]["cn"] == ["chuck"]
+        assert res[1].dn == res[2].dn == "cn=jeff,ou=nerdherd,%s" % basedn
+        assert res[1] is not res[2]
+        assert res[3] is None
+        assert loader.loads == 4
+        assert loader.searches == 2
+
+
+@asyncio_test
+async def test_entry_loader_pool(client, basedn):
+    """Test batching lookups with AIOEntryLoader on a connection pool."""
+    pool = AIOConnectionPool(client, minconn=1, maxconn=2)
+    try:
+        loader = AIOEntryLoader(pool, filter_exp="(objectClass=person)")
+        res = await loader.load_many("uid", ["skip", "chuck", "lester"])
+        assert [str(ent.dn).split(",")[0] for ent in res] == [
+            "cn=skip",
+            "cn=chuck",
+            "cn=lester",
+        ]
+        assert loader.searches == 1
+    finally:
+        await pool.close()
+
+
+@asyncio_test
+async def test_entry_loader_cancel():
+    """Test that cancelling the batched search cancels the lookups."""
+    with StandInServer(synthetic_entries(10), latency=0.5) as server:
+        client = bonsai.LDAPClient(f"{server.url}/ou=people,dc=bonsai,dc=test")
+        async with client.connect(True, timeout=5.0) as conn:
+            loader = AIOEntryLoader(conn)
+            loads = [
+                asyncio.ensure_future(loader.load("uid", f"user00000{num}"))
+                for num in range(3)
+            ]
+            await asyncio.sleep(0.1)
+            fetches = asyncio.all_tasks() - set(loads) - {asyncio.current_task()}
+            assert len(fetches) == 1
+            fetches.pop().cancel()
+            res = await asyncio.wait_for(
+                asyncio.gather(*loads, return_exceptions=True), 2.0
+            )
+            assert all(isinstance(exc, asyncio.CancelledError) for exc in res)
+            assert loader.searches == 1
+
+
+@asyncio_test
+async def test_get_entries(client, basedn):
+    """Test getting entries by their DNs."""
+    dns = [
+        "cn=%s,ou=nerdherd,%s" % (name, basedn)
+        for name in ("chuck", "missing", "jeff", "skip")
+    ] * 5
+    async with client.connect(True) as conn:
+        res = [item async for item in conn.get_entries(dns, max_pending=4)]
+        assert [dn for dn, _ in res] == dns
+        assert sum(ent is None for _, ent in res) == 5
+        res = [item async for item in conn.get_entries(dns, ordered=False)]
+        assert sorted(dn for dn, _ in res) == sorted(dns)
+        assert sum(ent is None for _, ent in res) == 5
+
+
+@asyncio_test
+async def test_concurrent_operations(client, basedn):
+    """Test awaiting more operations of the same connection concurrently."""
+    async with client.connect(True) as conn:
+        results = await asyncio.gather(
+            *(conn.search("ou=nerdherd,%s" % basedn, 1) for _ in range(10)),
+            conn.whoami(),
+        )
+        assert all(len(res) == len(results[0]) for res in results[:-1])
@@ -0,0 +1,155 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from bonsai import LDAPClient
+from bonsai.bench import (
+    Recorder,
+    Workload,
+    main,
+    parse_mix,
+    percentile,
+    run_tasks,
+    run_threads,
+)
+from bonsai.errors import TimeoutError
+
+
+def test_parse_mix():
+    """ Test parsing the weights of the operations. """
+    assert parse_mix("search") == {"search": 1.0}
+    assert parse_mix("base=70, search=20,modify=10") == {
+        "base": 70.0,
+        "search": 20.0,
+        "modify": 10.0,
+    }
+    with pytest.raises(ValueError):
+        parse_mix("delete=1")
+    with pytest.raises(ValueError):
+        parse_mix("search=0")
+
+
+def test_percentile():
+    """ Test the nearest-rank percentiles. """
+    values = [float(num) for num in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile(values, 99.9) == 100.0
+    assert percentile(values, 0) == 1.0
+    assert percentile([], 50) == 0.0
+
+
+def test_recorder():
+    """ Test recording and summarising the operations. """
+    recorder = Recorder()
+    start = time.perf_counter()
+    recorder.record("search", start, start + 0.002)
+    recorder.record("search", start, start + 0.004)
+    recorder.record("base", start, start + 0.1, TimeoutError("Timed out."))
+    assert recorder.count == 3
+    recorder.stop()
+    report = recorder.report()
+    assert report["total"]["count"] == 3
+    assert report["total"]["errors"] == 1
+    assert report["operations"]["search"]["latency"]["p50"] == pytest.approx(0.002)
+    assert report["operations"]["search"]["latency"]["max"] == pytest.approx(0.004)
+    assert report["operations"]["base"]["errors"] == 1
+    assert report["errors"] == {"TimeoutError": 1}
+    # The operations of the warm-up period are not recorded.
+    recorder = Recorder(warmup=60.0)
+    recorder.record("search", start, start + 0.1)
+    assert recorder.count == 0
+
+
+def test_workload_without_dns():
+    """ Test that base lookups need DNs. """
+    with pytest.raises(ValueError):
+        Workload(LDAPClient(), {"base": 1.0})
+    workload = Workload(LDAPClient(), {"bind": 1.0})
+    assert not workload.needs_connection
+
+
+def test_duration():
+    """ Test that the duration of the measurement must be positive. """
+    workload = Workload(LDAPClient(), {"bind": 1.0})
+    with pytest.raises(ValueError):
+        run_threads(workload, duration=0)
+    with pytest.raises(ValueError):
+        asyncio.run(run_tasks(workload, duration=-1.0))
+    with pytest.raises(SystemExit):
+        main(["--stand-in", "5", "--duration", "0"])
+
+
+def test_positive_arguments():
+    """ Test that the concurrency and the number of requests must be positive. """
+    for args in (["-c", "0"], ["--concurrency", "-2"], ["-n", "0"]):
+        with pytest.raises(SystemExit):
+            main(["--stand-in", "5"] + args)
+
+
+class BrokenWorkload(Workload):
+    def execute(self, kind, rnd, conn=None):
+        raise RuntimeError("Broken workload.")
+
+    async def execute_async(self, kind, rnd, conn=None):
+        raise RuntimeError("Broken workload.")
+
+
+def test_worker_error():
+    """ Test that the errors of the workers besides LDAPErrors are raised. """
+    workload = BrokenWorkload(LDAPClient(), {"bind": 1.0})
+    with pytest.raises(RuntimeError):
+        run_threads(workload, concurrency=2, duration=5.0)
+    with pytest.raises(RuntimeError):
+        asyncio.run(run_tasks(workload, concurrency=2, duration=5.0))
+
+
+@pytest.mark.parametrize("mode", ["thread", "asyncio"])
+def test_main(mode, tmp_path):
+    """ Test running a mixed workload against a stand-in server. """
+    output = tmp_path / "report.json"
+    assert (
+        main(
+            [
+                "--stand-in",
+                "50",
+                "--workload",
+                "bind=1,base=5,search=2,paged=1,modify=2",
+                "--mode",
+                mode,
+                "-c",
+                "4",
+                "-n",
+                "40",
+                "-f",
+                "(uid=user00001*)",
+                "--seed",
+                "1",
+                "-o",
+                str(output),
+            ]
+        )
+        == 0
+    )
+    report = json.loads(output.read_text())
+    assert report["mode"] == mode
+    assert 40 <= report["total"]["count"] < 50
+    assert report["total"]["errors"] == 0
+    assert set(report["operations"]) <= {"bind", "base", "search", "paged", "modify"}
+    assert report["total"]["throughput"] > 0
+    assert report["total"]["latency"]["p99"] >= report["total"]["latency"]["p50"]
+
+
+def test_main_dn_file(tmp_path, capsys):
+    """ Test base lookups from a file of DNs. """
+    dn_file = tmp_path / "dns.txt"
+    dn_file.write_text(
+        "# Users\nuid=user000001,ou=people,dc=bonsai,dc=test\n\n"
+        "uid=missing,ou=people,dc=bonsai,dc=test\n"
+    )
+    args = ["--stand-in", "5", "--workload", "base", "--dn-file", str(dn_file)]
+    assert main(args + ["-n", "10"]) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert report["operations"]["base"]["count"] >= 10
@@ -0,0 +1,148 @@
+import pytest
+
+from bonsai import LDAPEntry
+from bonsai.ber import BERDecodingError, encode_integer, encode_sequence
+from bonsai.checkpoint import (
+    PAGED_RESULTS_OID,
+    SORT_REQUEST_OID,
+    ResumablePagedSearch,
+    SearchCheckpoint,
+    decode_paged_results,
+    encode_paged_results,
+    encode_sort_request,
+)
+from bonsai.errors import UnwillingToPerform
+
+BASE = "dc=bonsai,dc=test"
+UIDS = ["chuck", "jeff", "lester", "morgan", "sarah"]
+
+
+class PagingConnection:
+    """
+    Answer the searches from a list of entries sorted by uid. With
+    `reject_cookies` only the cookies issued by the same object are valid.
+    """
+
+    def __init__(self, reject_cookies=False):
+        self.entries = []
+        for uid in UIDS:
+            entry = LDAPEntry(f"uid={uid},{BASE}")
+            entry["uid"] = [uid]
+            self.entries.append(entry)
+        self.reject_cookies = reject_cookies
+        self.searches = []
+        self.cookies = set()
+
+    def _send_stream_search(self, base, scope, filter_exp, attrlist, timeout, ctrls):
+        self.searches.append((base, scope, filter_exp, attrlist, ctrls))
+        return len(self.searches)
+
+    def _stream_messages(self, msg_id, timeout):
+        filter_exp, _, ctrls = self.searches[msg_id - 1][2:]
+        value = dict((oid, val) for oid, _, val in ctrls)[PAGED_RESULTS_OID]
+        size, cookie = decode_paged_results(value)
+        if cookie and self.reject_cookies and cookie not in self.cookies:
+            raise UnwillingToPerform("Invalid cookie.")
+        entries = self.entries
+        if filter_exp is not None and ">=" in filter_exp:
+            bound = filter_exp.split(">=")[1].rstrip(")")
+            entries = [ent for ent in entries if ent["uid"][0] >= bound]
+        start = int(cookie or 0)
+        for entry in entries[start : start + size]:
+            yield ("entry", entry, [])
+        end = start + size
+        cookie = str(end).encode() if end < len(entries) else b""
+        self.cookies.add(cookie)
+        value = encode_paged_results(0, cookie)
+        yield ("result", True, [(PAGED_RESULTS_OID, False, value)])
+
+
+def test_encode_controls():
+    """ Test encoding the paged results and sort controls. """
+    assert encode_paged_results(100, None) == b"\x30\x05\x02\x01\x64\x04\x00"
+    assert decode_paged_results(encode_paged_results(5, b"abc")) == (5, b"abc")
+    assert encode_sort_request("uid", False) == b"\x30\x07\x30\x05\x04\x03uid"
+    assert (
+        encode_sort_request("uid", True)
+        == b"\x30\x0a\x30\x08\x04\x03uid\x81\x01\xff"
+    )
+    with pytest.raises(BERDecodingError):
+        decode_paged_results(encode_sequence(encode_integer(1)))
+
+
+def test_checkpoint_persistence(tmp_path):
+    """ Test saving and loading a checkpoint. """
+    checkpoint = SearchCheckpoint(
+        base=BASE,
+        scope=2,
+        filter_exp="(uid=*)",
+        attrlist=["uid"],
+        page_size=100,
+        sort_key="uid",
+        bound="jeff",
+        cookie=b"\x00\xff",
+        offset=3,
+        consumed=42,
+        last_value="lester",
+        last_dns=(f"uid=lester,{BASE}",),
+    )
+    assert SearchCheckpoint.loads(checkpoint.dumps()) == checkpoint
+    path = tmp_path / "checkpoint.json"
+    checkpoint.save(path)
+    assert SearchCheckpoint.load(path) == checkpoint
+    assert not (tmp_path / "checkpoint.json.tmp").exists()
+    with pytest.raises(ValueError):
+        SearchCheckpoint.loads('{"cookie": null}')
+    with pytest.raises(ValueError):
+        SearchCheckpoint.loads("[]")
+
+
+def test_resume():
+    """ Test resuming a search in the middle of a page. """
+    conn = PagingConnection()
+    checkpoint = SearchCheckpoint(
+        BASE, 2, None, None, 2, None, None, None, 0, 0, None, ()
+    )
+    search = ResumablePagedSearch(conn, checkpoint)
+    assert [next(search)["uid"][0] for _ in range(3)] == UIDS[:3]
+    checkpoint = search.checkpoint
+    search.close()
+    assert checkpoint.cookie == b"2"
+    assert checkpoint.offset == 1
+    assert checkpoint.consumed == 3
+    search = ResumablePagedSearch.resume(conn, checkpoint)
+    assert [ent["uid"][0] for ent in search] == UIDS[3:]
+    assert search.checkpoint.consumed == len(UIDS)
+    with pytest.raises(TypeError):
+        search.__aiter__()
+
+
+def test_resume_rejected_cookie():
+    """ Test restarting a sorted search when the cookie is rejected. """
+    conn = PagingConnection()
+    checkpoint = SearchCheckpoint(
+        BASE, 2, "(uid=*)", ["cn"], 2, "uid", None, None, 0, 0, None, ()
+    )
+    search = ResumablePagedSearch(conn, checkpoint)
+    assert [next(search)["uid"][0] for _ in range(3)] == UIDS[:3]
+    checkpoint = search.checkpoint
+    search.close()
+    assert checkpoint.last_value == "lester"
+    assert checkpoint.last_dns == (f"uid=lester,{BASE}",)
+    assert conn.searches[0][3] == ["cn", "uid"]
+    assert conn.searches[0][4][1] == (
+        SORT_REQUEST_OID,
+        True,
+        encode_sort_request("uid", False),
+    )
+    conn = PagingConnection(reject_cookies=True)
+    search = ResumablePagedSearch.resume(conn, checkpoint)
+    assert [ent["uid"][0] for ent in search] == UIDS[3:]
+    assert conn.searches[1][2] == "(&(uid=*)(uid>=lester))"
+    checkpoint = search.checkpoint
+    assert checkpoint.bound == "lester"
+    assert checkpoint.consumed == len(UIDS)
+    # Without sort key the error is raised.
+    checkpoint = checkpoint._replace(sort_key=None, cookie=b"1")
+    with pytest.raises(UnwillingToPerform):
+        list(ResumablePagedSearch.resume(conn, checkpoint))
@@ -0,0 +1,204 @@
+import asyncio
+import contextlib
+import threading
+
+import pytest
+
+from bonsai import LDAPEntry, LDAPSearchScope
+from bonsai.asyncio import AIOCrawler
+from bonsai.crawl import Crawler, Shard, child_shards, range_shards
+from bonsai.errors import InsufficientAccess
+from bonsai.pool import ThreadedConnectionPool
+
+BASE = "dc=bonsai,dc=test"
+CHILDREN = [f"ou={ou},{BASE}" for ou in ("a", "b", "c")]
+
+
+class ShardConnection:
+    """ Return the entries of the shards from a dict keyed by the base DN. """
+
+    def __init__(self, data, is_async=False):
+        self.data = data
+        self.is_async = is_async
+
+    def resumable_paged_search(self, base, scope, filter_exp, *args):
+        result = self.data[base]
+        if isinstance(result, Exception):
+            raise result
+        if self.is_async:
+            return AsyncSearch(result)
+        return SyncSearch(result)
+
+
+class SyncSearch:
+    def __init__(self, entries):
+        self.entries = iter(entries)
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self.entries)
+
+    def close(self):
+        self.closed = True
+
+
+class AsyncSearch(SyncSearch):
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await asyncio.sleep(0)
+        try:
+            return next(self.entries)
+        except StopIteration:
+            raise StopAsyncIteration from None
+
+    async def close(self):
+        self.closed = True
+
+
+class ShardPool:
+    """ A pool that counts the spawned and the returned connections. """
+
+    def __init__(self, data, max_connection=2, is_async=False):
+        self.data = data
+        self.max_connection = max_connection
+        self.is_async = is_async
+        self.spawned = 0
+        self.returned = 0
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def _sync_spawn(self):
+        with self.lock:
+            self.spawned += 1
+        try:
+            yield ShardConnection(self.data)
+        finally:
+            with self.lock:
+                self.returned += 1
+
+    @contextlib.asynccontextmanager
+    async def _async_spawn(self):
+        self.spawned += 1
+        try:
+            yield ShardConnection(self.data, True)
+        finally:
+            self.returned += 1
+
+    def spawn(self):
+        if self.is_async:
+            return self._async_spawn()
+        return self._sync_spawn()
+
+
+def make_data():
+    data = {BASE: [LDAPEntry(BASE)]}
+    for base in CHILDREN:
+        data[base] = [LDAPEntry(f"cn=user{num},{base}") for num in range(5)]
+        data[base].append(LDAPEntry(f"CN=shared,{BASE}"))
+    return data
+
+
+def test_child_shards():
+    """ Test partitioning a subtree by the children of the base. """
+    children = [f"ou=a,{BASE}", LDAPEntry(f"ou=b,{BASE}")]
+    shards = child_shards(BASE, children, "(objectclass=person)")
+    assert shards == [
+        Shard(BASE, LDAPSearchScope.BASE, "(objectclass=person)"),
+        Shard(f"ou=a,{BASE}", LDAPSearchScope.SUBTREE, "(objectclass=person)"),
+        Shard(LDAPEntry(f"ou=b,{BASE}").dn, 2, "(objectclass=person)"),
+    ]
+
+
+def test_range_shards():
+    """ Test partitioning a subtree by the ranges of an attribute. """
+    shards = range_shards(BASE, "uid", ["h", "p*"], "objectclass=person")
+    assert [shard.filter_exp for shard in shards] == [
+        "(&(objectclass=person)(!(uid=*)))",
+        "(&(objectclass=person)(uid=*)(!(uid>=h)))",
+        "(&(objectclass=person)(uid>=h)(!(uid>=p\\2A)))",
+        "(&(objectclass=person)(uid>=p\\2A))",
+    ]
+    assert all(shard.base == BASE for shard in shards)
+    shards = range_shards(BASE, "uSNChanged", [], scope=LDAPSearchScope.ONELEVEL)
+    assert shards == [
+        Shard(BASE, LDAPSearchScope.ONELEVEL, "(!(uSNChanged=*))"),
+        Shard(BASE, LDAPSearchScope.ONELEVEL, "(uSNChanged=*)"),
+    ]
+
+
+def test_crawler():
+    """ Test crawling the shards concurrently with deduplication. """
+    data = make_data()
+    pool = ShardPool(data)
+    with pytest.raises(ValueError):
+        _ = Crawler(pool, [], page_size=0)
+    with pytest.raises(ValueError):
+        _ = Crawler(pool, [], max_workers=0)
+    crawler = Crawler(pool, child_shards(BASE, CHILDREN), buffer_size=2)
+    dns = [str(entry.dn) for entry in crawler]
+    assert len(dns) == 17
+    assert len(set(dn.lower() for dn in dns)) == 17
+    assert crawler.duplicates == 2
+    assert pool.spawned == pool.returned == 2
+    shards = child_shards(BASE, CHILDREN)
+    crawler = Crawler(pool, shards, dedup=False, max_workers=1)
+    assert len(list(crawler)) == 19
+    assert crawler.duplicates == 0
+
+
+def test_crawler_close():
+    """ Test that closing the crawl early stops the workers. """
+    data = make_data()
+    pool = ShardPool(data, max_connection=3)
+    crawl = iter(Crawler(pool, child_shards(BASE, CHILDREN), buffer_size=1))
+    assert next(crawl) is not None
+    crawl.close()
+    assert pool.spawned == pool.returned
+
+
+def test_crawler_error():
+    """ Test that the error of a shard is raised. """
+    data = make_data()
+    data[f"ou=b,{BASE}"] = InsufficientAccess("Access denied.")
+    pool = ShardPool(data)
+    with pytest.raises(InsufficientAccess):
+        list(Crawler(pool, child_shards(BASE, CHILDREN)))
+    assert pool.spawned == pool.returned
+
+
+def test_aiocrawler():
+    """ Test crawling the shards with asyncio. """
+
+    async def crawl(pool, shards, **kwargs):
+        return [entry async for entry in AIOCrawler(pool, shards, **kwargs)]
+
+    data = make_data()
+    pool = ShardPool(data, is_async=True)
+    shards = child_shards(BASE, CHILDREN)
+    entries = asyncio.run(crawl(pool, shards, buffer_size=1))
+    assert len(entries) == 17
+    assert pool.spawned == pool.returned == 2
+    data[f"ou=c,{BASE}"] = InsufficientAccess("Access denied.")
+    with pytest.raises(InsufficientAccess):
+        asyncio.run(crawl(pool, shards))
+    assert pool.spawned == pool.returned
+
+
+def test_crawl_directory(client, basedn):
+    """ Test crawling the directory with a threaded connection pool. """
+    with client.connect() as conn:
+        expected = conn.search(basedn, 2, attrlist=["1.1"])
+        children = conn.search(basedn, 1, attrlist=["1.1"])
+    pool = ThreadedConnectionPool(client, maxconn=3)
+    try:
+        crawler = Crawler(pool, child_shards(basedn, children), ["cn"], page_size=2)
+        dns = sorted(str(entry.dn).lower() for entry in crawler)
+        assert dns == sorted(str(entry.dn).lower() for entry in expected)
+        assert crawler.duplicates == 0
+    finally:
+        pool.close()
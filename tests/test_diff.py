@@ -0,0 +1,203 @@
+from io import StringIO
+
+import pytest
+
+from bonsai import LDAPEntry, LDAPChange, LDAPChangeType, LDIFReader, LDIFWriter
+from bonsai.diff import diff_entries, dn_sort_key
+
+
+def create_entry(dn, **attrs):
+    entry = LDAPEntry(dn)
+    for key, value in attrs.items():
+        entry[key] = value
+    return entry
+
+
+def test_dn_sort_key():
+    """ Test creating normalised sort keys from DNs. """
+    assert dn_sort_key("CN=Test, OU=People,dc=bonsai,DC=test") == dn_sort_key(
+        "cn=test,ou=people,dc=bonsai,dc=test"
+    )
+    assert dn_sort_key("ou=people,dc=bonsai,dc=test") < dn_sort_key(
+        "cn=test,ou=people,dc=bonsai,dc=test"
+    )
+    assert dn_sort_key("cn=a+sn=b,dc=test") == dn_sort_key("sn=b+cn=a,dc=test")
+    assert dn_sort_key("") == ()
+
+
+def test_diff_entries():
+    """ Test generating change records between two entry streams. """
+    source = [
+        create_entry("cn=chuck,ou=nerdherd,dc=bonsai,dc=test", cn="chuck", sn="B"),
+        create_entry("ou=nerdherd,dc=bonsai,dc=test", ou="nerdherd"),
+        create_entry("cn=jeff,ou=nerdherd,dc=bonsai,dc=test", cn="jeff"),
+        create_entry("cn=anna,ou=nerdherd,dc=bonsai,dc=test", cn="anna"),
+    ]
+    target = [
+        create_entry("ou=nerdherd,dc=bonsai,dc=test", ou="Nerdherd"),
+        create_entry("cn=morgan,ou=nerdherd,dc=bonsai,dc=test", cn="morgan"),
+        create_entry(
+            "CN=Chuck,ou=nerdherd,dc=bonsai,dc=test",
+            cn="chuck",
+            givenName="Chuck",
+            sn="Bartowski",
+        ),
+        create_entry(
+            "cn=jeff,ou=nerdherd,dc=bonsai,dc=test", cn=["jeff", "jeffster"]
+        ),
+    ]
+    changes = list(diff_entries(source, target, ignore_case=["ou"]))
+    assert [(chg.changetype, str(chg.dn).lower()) for chg in changes] == [
+        (LDAPChangeType.MODIFY, "cn=chuck,ou=nerdherd,dc=bonsai,dc=test"),
+        (LDAPChangeType.MODIFY, "cn=jeff,ou=nerdherd,dc=bonsai,dc=test"),
+        (LDAPChangeType.ADD, "cn=morgan,ou=nerdherd,dc=bonsai,dc=test"),
+        (LDAPChangeType.DELETE, "cn=anna,ou=nerdherd,dc=bonsai,dc=test"),
+    ]
+    chuck = changes[0].entry._status()
+    assert chuck["givenName"]["@status"] == 1
+    assert chuck["givenName"]["@added"] == ["Chuck"]
+    assert chuck["sn"]["@status"] == 2
+    assert list(changes[0].entry["sn"]) == ["Bartowski"]
+    jeff = changes[1].entry._status()
+    assert jeff["cn"]["@added"] == ["jeffster"]
+    assert jeff["cn"]["@deleted"] == []
+    assert changes[2].entry["cn"] == ["morgan"]
+
+
+def test_diff_case_sensitive_values():
+    """ Test that the values are compared case-sensitively by default. """
+    source = [
+        create_entry(
+            "cn=test",
+            cn="test",
+            userPassword="Secret",
+            displayName="john smith",
+            mail=["test@bonsai.test", "Other@Bonsai.test"],
+        )
+    ]
+    target = [
+        create_entry(
+            "cn=test",
+            cn="test",
+            userPassword="secret",
+            displayName="John Smith",
+            mail=["TEST@bonsai.test", "other@bonsai.test"],
+        )
+    ]
+    changes = list(diff_entries(source, target))
+    assert len(changes) == 1
+    status = changes[0].entry._status()
+    assert status["userPassword"]["@status"] == 2
+    assert list(changes[0].entry["userPassword"]) == ["secret"]
+    assert status["displayName"]["@status"] == 2
+    assert list(changes[0].entry["displayName"]) == ["John Smith"]
+    assert "mail" in status
+    changes = list(diff_entries(source, target, ignore_case=["MAIL", "displayName"]))
+    assert len(changes) == 1
+    status = changes[0].entry._status()
+    assert status["userPassword"]["@status"] == 2
+    assert "displayName" not in status
+    assert "mail" not in status
+
+
+def test_diff_deleted_attribute():
+    """ Test removing an attribute entirely. """
+    source = [create_entry("cn=test", cn="test", mail="test@bonsai.test")]
+    target = [create_entry("cn=test", cn="test")]
+    changes = list(diff_entries(source, target))
+    assert len(changes) == 1
+    assert changes[0].entry.deleted_keys == ["mail"]
+
+
+def test_diff_delete_order():
+    """ Test that children are deleted before their parents. """
+    source = [
+        create_entry("ou=a,dc=test", ou="a"),
+        create_entry("cn=x,ou=a,dc=test", cn="x"),
+        create_entry("cn=y,cn=x,ou=a,dc=test", cn="y"),
+    ]
+    changes = list(diff_entries(source, [], buffer_size=1))
+    assert [str(chg.dn) for chg in changes] == [
+        "cn=y,cn=x,ou=a,dc=test",
+        "cn=x,ou=a,dc=test",
+        "ou=a,dc=test",
+    ]
+    assert all(chg.changetype == LDAPChangeType.DELETE for chg in changes)
+
+
+def test_diff_external_sort():
+    """ Test diffing streams that are larger than the sort buffer. """
+    source = [
+        create_entry(f"cn=user{i},dc=test", cn=f"user{i}", uidNumber=i)
+        for i in range(100)
+    ]
+    target = [
+        create_entry(f"cn=user{i},dc=test", cn=f"user{i}", uidNumber=i * (i % 2))
+        for i in reversed(range(1, 101))
+    ]
+    changes = list(diff_entries(source, target, buffer_size=7))
+    adds = [chg for chg in changes if chg.changetype == LDAPChangeType.ADD]
+    mods = [chg for chg in changes if chg.changetype == LDAPChangeType.MODIFY]
+    dels = [chg for chg in changes if chg.changetype == LDAPChangeType.DELETE]
+    assert [str(chg.dn) for chg in adds] == ["cn=user100,dc=test"]
+    assert [str(chg.dn) for chg in dels] == ["cn=user0,dc=test"]
+    assert len(mods) == 49
+    assert all(chg.entry["uidNumber"] == [0] for chg in mods)
+
+
+def test_diff_presorted():
+    """ Test the validation of presorted streams. """
+    entries = [create_entry("cn=b,dc=test", cn="b"), create_entry("cn=a,dc=test")]
+    with pytest.raises(ValueError):
+        _ = list(diff_entries(entries, [], presorted=True))
+    with pytest.raises(ValueError):
+        _ = list(diff_entries(entries + [create_entry("CN=A,dc=test")], []))
+    with pytest.raises(ValueError):
+        _ = list(diff_entries([], [], buffer_size=0))
+    same = list(reversed(entries))
+    assert list(diff_entries(same, same, presorted=True)) == []
+
+
+def test_diff_ldif_roundtrip():
+    """ Test writing the changes into LDIF and reading them back. """
+    source = StringIO(
+        "dn: cn=test,dc=test\ncn: test\nsn: old\nmail: a@test\n\n"
+        "dn: cn=gone,dc=test\ncn: gone\n\n"
+    )
+    target = [
+        create_entry("cn=test,dc=test", cn="test", sn="new", mail=["a@test", "b@test"])
+    ]
+    with StringIO() as out:
+        writer = LDIFWriter(out)
+        for change in diff_entries(LDIFReader(source), target):
+            writer.write_changes(change)
+        content = out.getvalue()
+    assert content == (
+        "dn: cn=test,dc=test\nchangetype: modify\n"
+        "add: mail\nmail: b@test\n-\nreplace: sn\nsn: new\n-\n\n"
+        "dn: cn=gone,dc=test\nchangetype: delete\n\n"
+    )
+    modified = next(LDIFReader(StringIO(content)))
+    assert modified["sn"] == ["new"]
+    assert modified["mail"].added == ["b@test"]
+
+
+def test_change_record():
+    """ Test LDAPChange object. """
+    entry = create_entry("cn=test,dc=test", cn="test")
+    change = LDAPChange(LDAPChangeType.ADD, entry)
+    assert change.changetype == LDAPChangeType.ADD
+    assert change.entry is entry
+    assert change.dn == "cn=test,dc=test"
+    assert repr(change) == "<LDAPChange ADD cn=test,dc=test>"
+    with pytest.raises(TypeError):
+        _ = LDAPChange(0, entry)
+    with pytest.raises(TypeError):
+        _ = LDAPChange(LDAPChangeType.DELETE, "cn=test,dc=test")
+    with pytest.raises(ValueError):
+        _ = LDAPChange(LDAPChangeType.MODDN, entry)
+    with pytest.raises(ValueError):
+        _ = LDAPChange(LDAPChangeType.ADD, entry, "cn=test2,dc=test")
+    change = LDAPChange(LDAPChangeType.MODDN, entry, "cn=test2,dc=test", False)
+    assert change.newdn == "cn=test2,dc=test"
+    assert change.delete_old_rdn is False
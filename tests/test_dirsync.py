@@ -0,0 +1,140 @@
+import uuid
+
+import pytest
+
+from bonsai import LDAPEntry
+from bonsai.ber import (
+    BERDecodingError,
+    encode_integer,
+    encode_octet_string,
+    encode_sequence,
+)
+from bonsai.dirsync import (
+    LDAP_SERVER_DIRSYNC_OID,
+    DirSync,
+    DirSyncFlag,
+    decode_dirsync_response,
+    encode_dirsync_request,
+)
+
+BASE = "dc=bonsai,dc=test"
+
+
+def dirsync_response(more_data, cookie):
+    value = encode_sequence(
+        encode_integer(more_data), encode_integer(0), encode_octet_string(cookie)
+    )
+    return [(LDAP_SERVER_DIRSYNC_OID, True, value)]
+
+
+class RecordedConnection:
+    """ Replay the recorded messages of the searches page by page. """
+
+    def __init__(self, pages):
+        self.pages = list(pages)
+        self.searches = []
+
+    def _send_stream_search(self, *args):
+        self.searches.append(args)
+        return len(self.searches)
+
+    def _stream_messages(self, msg_id, timeout):
+        return iter(self.pages[msg_id - 1])
+
+
+def test_encode_dirsync_request():
+    """ Test encoding the DirSync control. """
+    assert (
+        encode_dirsync_request(DirSyncFlag.INCREMENTAL_VALUES, 0, None)
+        == b"\x30\x0b\x02\x04\x80\x00\x00\x00\x02\x01\x00\x04\x00"
+    )
+    assert (
+        encode_dirsync_request(DirSyncFlag.OBJECT_SECURITY, 1024, b"abc")
+        == b"\x30\x0c\x02\x01\x01\x02\x02\x04\x00\x04\x03abc"
+    )
+
+
+def test_decode_dirsync_response():
+    """ Test decoding the DirSync response control. """
+    assert decode_dirsync_response(dirsync_response(1, b"c1")[0][2]) == (True, b"c1")
+    assert decode_dirsync_response(dirsync_response(0, b"")[0][2]) == (False, b"")
+    with pytest.raises(BERDecodingError):
+        decode_dirsync_response(encode_sequence(encode_integer(0)))
+
+
+def test_dirsync_changes():
+    """ Test mapping the returned objects to changes. """
+    guid = uuid.uuid4()
+    group = LDAPEntry(f"cn=admins,{BASE}")
+    group["objectGUID"] = [guid.bytes_le]
+    group["description"] = ["Administrators"]
+    group["member;range=1-1"] = [f"cn=chuck,{BASE}", f"cn=sarah,{BASE}"]
+    group["member;range=0-0"] = [f"cn=bryce,{BASE}"]
+    group["info"] = []
+    deleted = LDAPEntry(f"cn=larkin\\0ADEL:1234,cn=Deleted Objects,{BASE}")
+    deleted["isDeleted"] = [True]
+    conn = RecordedConnection(
+        [
+            [
+                ("entry", group, []),
+                ("entry", deleted, []),
+                ("result", True, dirsync_response(0, b"c1")),
+            ]
+        ]
+    )
+    dirsync = DirSync(
+        conn, BASE, None, None, DirSyncFlag.INCREMENTAL_VALUES, None, 0, None
+    )
+    changes = list(dirsync)
+    assert len(changes) == 2
+    change = changes[0]
+    assert change.guid == guid
+    assert "objectGUID" not in change.entry
+    assert not change.deleted
+    assert change.entry.dn == group.dn
+    status = change.entry._status()
+    assert status["@deleted_keys"] == ["info"]
+    assert status["description"]["@status"] == 2
+    assert status["description"]["@added"] == ["Administrators"]
+    assert status["member"]["@status"] == 1
+    assert status["member"]["@added"] == [f"cn=chuck,{BASE}", f"cn=sarah,{BASE}"]
+    assert status["member"]["@deleted"] == [f"cn=bryce,{BASE}"]
+    assert changes[1].deleted
+    assert changes[1].guid is None
+    assert dirsync.cookie == b"c1"
+
+
+def test_dirsync_continuation():
+    """ Test continuing the search while the server has more changes. """
+    chuck = LDAPEntry(f"cn=chuck,{BASE}")
+    chuck["sn"] = ["Bartowski"]
+    sarah = LDAPEntry(f"cn=sarah,{BASE}")
+    sarah["sn"] = ["Walker"]
+    conn = RecordedConnection(
+        [
+            [("entry", chuck, []), ("result", True, dirsync_response(1, b"c1"))],
+            [("entry", sarah, []), ("result", True, dirsync_response(0, b"c2"))],
+        ]
+    )
+    dirsync = DirSync(
+        conn, BASE, "(sn=*)", ["sn"], DirSyncFlag.OBJECT_SECURITY, b"c0", 0, None
+    )
+    assert [change.entry.dn for change in dirsync] == [chuck.dn, sarah.dn]
+    assert dirsync.cookie == b"c2"
+    assert len(conn.searches) == 2
+    for search, cookie in zip(conn.searches, (b"c0", b"c1")):
+        assert search[:4] == (BASE, 2, "(sn=*)", ["sn"])
+        oid, critical, value = search[5][0]
+        assert oid == LDAP_SERVER_DIRSYNC_OID
+        assert critical
+        assert value == encode_dirsync_request(DirSyncFlag.OBJECT_SECURITY, 0, cookie)
+
+
+def test_dirsync_missing_response():
+    """ Test that the result without the response control is an error. """
+    conn = RecordedConnection([[("result", True, [])]])
+    dirsync = DirSync(conn, BASE, None, None, 0, None, 0, None)
+    with pytest.raises(BERDecodingError):
+        next(dirsync)
+    with pytest.raises(TypeError):
+        dirsync.__aiter__()
@@ -0,0 +1,119 @@
+import socket
+import time
+
+import pytest
+
+from bonsai import LDAPClient
+from bonsai.errors import ConnectionError, TimeoutError
+from bonsai.testing import FaultProxy, StandInServer, synthetic_entries
+from bonsai.testing._base import _BackgroundServer
+
+BASE = "ou=people,dc=bonsai,dc=test"
+
+
+@pytest.fixture(scope="module")
+def server():
+    """ Start a stand-in server with synthetic entries. """
+    with StandInServer(synthetic_entries(200)) as srv:
+        yield srv
+
+
+@pytest.fixture
+def proxy(server):
+    """ Start a fault injection proxy in front of the server. """
+    with FaultProxy(server.host, server.port) as prx:
+        yield prx
+
+
+def test_forward(proxy):
+    """ Test forwarding the messages without faults. """
+    client = LDAPClient(proxy.url)
+    with client.connect() as conn:
+        assert len(conn.search(BASE, 1)) == 200
+        assert proxy.connections == 1
+    transferred = proxy.transferred
+    assert transferred["request"] > 0
+    assert transferred["response"] > transferred["request"]
+
+
+def test_latency(proxy):
+    """ Test delaying the messages. """
+    client = LDAPClient(proxy.url)
+    with client.connect() as conn:
+        proxy.latency = 0.1
+        start = time.monotonic()
+        assert len(conn.search(BASE, 1)) == 200
+        elapsed = time.monotonic() - start
+        # The latency is not accumulated over the returned entries.
+        assert 0.2 <= elapsed < 2.0
+        proxy.latency = lambda direction: 1.0 if direction == "response" else 0.0
+        with pytest.raises(TimeoutError):
+            conn.whoami(timeout=0.5)
+
+
+def test_bandwidth(proxy):
+    """ Test limiting the bandwidth of the connections. """
+    client = LDAPClient(proxy.url)
+    with client.connect() as conn:
+        before = proxy.transferred["response"]
+        proxy.bandwidth = 100000
+        start = time.monotonic()
+        conn.search(BASE, 1)
+        elapsed = time.monotonic() - start
+        size = proxy.transferred["response"] - before
+        assert size > 20000
+        assert elapsed >= size / 100000 * 0.9
+
+
+def test_read_delay(proxy):
+    """ Test reading the messages slowly. """
+    client = LDAPClient(proxy.url)
+    with client.connect() as conn:
+        proxy.read_delay = 0.005
+        start = time.monotonic()
+        conn.search(BASE, 1)
+        assert time.monotonic() - start >= 200 * 0.005
+
+
+def test_drop(proxy):
+    """ Test discarding the messages. """
+    client = LDAPClient(proxy.url)
+    with client.connect() as conn:
+        proxy.drop = True
+        with pytest.raises(TimeoutError):
+            conn.whoami(timeout=0.3)
+        proxy.drop = False
+        assert conn.whoami(timeout=1.0) == "anonymous"
+
+
+@pytest.mark.parametrize("reset", [False, True])
+def test_disconnect(proxy, reset):
+    """ Test closing and resetting the connections. """
+    client = LDAPClient(proxy.url)
+    conn = client.connect()
+    proxy.disconnect(reset)
+    with pytest.raises(ConnectionError):
+        conn.whoami()
+    conn.close()
+    with client.connect() as conn:
+        assert conn.whoami() == "anonymous"
+
+
+def test_unreachable_server():
+    """ Test proxying to a server that is not listening. """
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    with FaultProxy("127.0.0.1", port) as proxy:
+        client = LDAPClient(proxy.url)
+        with pytest.raises(ConnectionError):
+            client.connect(timeout=2.0)
+    with pytest.raises(RuntimeError):
+        proxy.disconnect()
+
+
+def test_background_server_abstract():
+    """ Test that the base of the servers cannot be instantiated. """
+    with pytest.raises(TypeError):
+        _ = _BackgroundServer()
@@ -401,6 +401,72 @@ def test_search(conn, basedn):
     assert len(res) == len(conn.search())
 
 
+def test_get_entries(conn, basedn):
+    """Test getting entries by their DNs."""
+    dns = [
+        "cn=chuck,ou=nerdherd,%s" % basedn,
+        "cn=missing,ou=nerdherd,%s" % basedn,
+        LDAPDN("cn=jeff,ou=nerdherd,%s" % basedn),
+        "cn=missing,ou=missing,%s" % basedn,
+    ] * 10
+    with pytest.raises(ValueError):
+        _ = conn.get_entries(dns, max_pending=0)
+    res = list(conn.get_entries(dns, attrlist=["cn"], max_pending=3))
+    assert [dn for dn, _ in res] == dns
+    assert [ent["cn"][0] if ent else None for _, ent in res[:4]] == [
+        "chuck",
+        None,
+        "jeff",
+        None,
+    ]
+    assert all(ent.dn == dn for dn, ent in res if ent is not None)
+    # Stopping the iteration early abandons the searches in progress.
+    it = conn.get_entries(dns, max_pending=5)
+    assert next(it)[1] is not None
+    it.close()
+    assert conn.whoami() is not None
+
+
+def test_get_entries_unordered():
+    """Test that only the asyncio connection returns unordered entries."""
+    for conn in (LDAPConnection(LDAPClient()), SimpleAsyncConn(LDAPClient())):
+        with pytest.raises(ValueError):
+            _ = conn.get_entries(["cn=chuck,ou=nerdherd"], ordered=False)
+
+
+def test_prepare_search(conn, basedn):
+    """Test executing a prepared search."""
+    with pytest.raises(ValueError):
+        _ = conn.prepare_search(filter_exp="(uid={0})")
+    with pytest.raises(bonsai.errors.FilterError):
+        _ = conn.prepare_search(filter_exp="(uid={uid}")
+    search = conn.prepare_search(
+        "ou=nerdherd,%s" % basedn,
+        LDAPSearchScope.ONELEVEL,
+        "(&(objectClass=person)(uid={uid}))",
+        ["cn", "uid"],
+        sort_order=["cn"],
+    )
+    assert search.parameters == {"uid"}
+    res = search(uid="chuck")
+    assert len(res) == 1
+    assert res[0]["uid"] == ["chuck"]
+    assert search.execute(uid="jeff")[0]["cn"] == ["jeff"]
+    # The values are escaped.
+    assert search(uid="*") == []
+    assert search(uid="chuck)(uid=*") == []
+    with pytest.raises(TypeError):
+        search()
+    with pytest.raises(TypeError):
+        search(uid="chuck", cn="chuck")
+    res = conn.prepare_search(
+        "ou=nerdherd,%s" % basedn, 1, "(uid=*)", ["uid"], sort_order=["-uid"]
+    )()
+    assert res == conn.search(
+        "ou=nerdherd,%s" % basedn, 1, "(uid=*)", ["uid"], sort_order=["-uid"]
+    )
+
+
 def test_search_ldapdn(conn, basedn):
     """Test searching with LDAPDN object."""
     ldap_dn = LDAPDN(basedn)
@@ -629,9 +695,12 @@ def test_paged_search(conn, basedn):
     while True:
         if len(res) > 2:
             pytest.fail("The size of the page is greater than expected.")
+        cookie = res.cookie
         msgid = res.acquire_next_page()
         if msgid is None:
+            assert cookie is None
             break
+        assert isinstance(cookie, bytes)
         res = conn.get_result(msgid)
         page += 1
     assert page == 3
@@ -670,6 +739,23 @@ def test_paged_search_closed_conn(cfg, basedn):
         _ = res.acquire_next_page()
 
 
+def test_paged_search_close(conn, basedn):
+    """Test releasing an unfinished paged search."""
+    search_dn = "ou=nerdherd,%s" % basedn
+    res = conn.paged_search(search_dn, 1, page_size=1)
+    assert isinstance(next(res), bonsai.LDAPEntry)
+    assert isinstance(res.cookie, bytes)
+    res.close()
+    assert res.cookie is None
+    assert res.acquire_next_page() is None
+    assert list(res) == []
+    res.close()
+    # Break out of an iteration, the dropped iterator is released.
+    for _ in conn.paged_search(search_dn, 1, page_size=1):
+        break
+    assert len(list(conn.paged_search(search_dn, 1, page_size=2))) == 2
+
+
 def test_paged_search_with_auto_acq(cfg, basedn):
     """Test paged results control with automatic page acquiring."""
     client = LDAPClient("ldap://%s" % cfg["SERVER"]["hostname"])
@@ -0,0 +1,175 @@
+from io import StringIO
+
+import pytest
+
+from bonsai import LDAPEntry, LDAPFilter, LDIFReader
+from bonsai.errors import FilterError
+
+
+@pytest.fixture
+def entry():
+    """Create an LDAP entry for evaluating filters."""
+    ent = LDAPEntry("cn=Chuck Bartowski,ou=nerdherd,dc=bonsai,dc=test")
+    ent["cn"] = "Chuck Bartowski"
+    ent["objectClass"] = ["top", "inetOrgPerson"]
+    ent["uidNumber"] = 1000
+    ent["userAccountControl"] = 514
+    ent["mail"] = "chuck@buymore.test"
+    ent["jpegPhoto"] = b"\x00\xff"
+    ent["description"] = "Nerd  Herd"
+    return ent
+
+
+def test_init_params():
+    """ Test constructor parameters for LDAPFilter. """
+    with pytest.raises(TypeError):
+        _ = LDAPFilter(None)
+    flt = LDAPFilter("(cn=test)")
+    assert str(flt) == "(cn=test)"
+    assert repr(flt) == "<LDAPFilter (cn=test)>"
+    assert LDAPFilter("cn=test").match({"cn": ["test"]})
+
+
+@pytest.mark.parametrize(
+    "filter_exp",
+    [
+        "(cn=a",
+        "(cn=a))",
+        "((cn=a))",
+        "(=a)",
+        "(c n=a)",
+        "(cn=a\\zz)",
+        "(cn=a(b)",
+        "(&(cn=a)",
+        "(cn:unknownMatch:=a)",
+        "(:=a)",
+        "(cn:1.2.840.113556.1.4.803:=a)",
+    ],
+)
+def test_invalid_filter(filter_exp):
+    """ Test parsing invalid filter expressions. """
+    with pytest.raises(FilterError):
+        _ = LDAPFilter(filter_exp)
+
+
+@pytest.mark.parametrize(
+    "filter_exp, result",
+    [
+        ("(cn=chuck bartowski)", True),
+        ("(CN=Chuck Bartowski)", True),
+        ("(cn=Chuck)", False),
+        ("(objectClass=inetorgperson)", True),
+        ("(uidNumber=1000)", True),
+        ("(jpegPhoto=\\00\\ff)", True),
+        ("(cn=\\43huck*)", True),
+        ("(sn=*)", False),
+        ("(mail=*)", True),
+    ],
+)
+def test_equality_and_presence(entry, filter_exp, result):
+    """ Test equality and presence filters. """
+    assert LDAPFilter(filter_exp).match(entry) is result
+
+
+@pytest.mark.parametrize(
+    "filter_exp, result",
+    [
+        ("(cn=chuck*)", True),
+        ("(cn=*TOWSKI)", True),
+        ("(cn=*bart*)", True),
+        ("(cn=c*u*k*i)", True),
+        ("(cn=chuck*chuck*)", False),
+        ("(cn=*x*)", False),
+        ("(mail=*@buymore.*)", True),
+    ],
+)
+def test_substring(entry, filter_exp, result):
+    """ Test substring filters. """
+    assert LDAPFilter(filter_exp).match(entry) is result
+
+
+@pytest.mark.parametrize(
+    "filter_exp, result",
+    [
+        ("(uidNumber>=999)", True),
+        ("(uidNumber>=1001)", False),
+        ("(uidNumber<=1000)", True),
+        ("(uidNumber<=200)", False),
+        ("(cn>=bob)", True),
+        ("(cn<=bob)", False),
+        ("(description~=nerd herd)", True),
+        ("(description~=NERDHERD)", True),
+    ],
+)
+def test_ordering_and_approx(entry, filter_exp, result):
+    """ Test ordering and approximate filters. """
+    assert LDAPFilter(filter_exp).match(entry) is result
+
+
+@pytest.mark.parametrize(
+    "filter_exp, result",
+    [
+        ("(cn:caseExactMatch:=Chuck Bartowski)", True),
+        ("(cn:2.5.13.5:=chuck bartowski)", False),
+        ("(cn:=chuck bartowski)", True),
+        ("(uidNumber:integerMatch:=1000)", True),
+        ("(userAccountControl:1.2.840.113556.1.4.803:=2)", True),
+        ("(userAccountControl:1.2.840.113556.1.4.803:=16)", False),
+        ("(userAccountControl:1.2.840.113556.1.4.804:=18)", True),
+        ("(ou:dn:=nerdherd)", True),
+        ("(ou=nerdherd)", False),
+        ("(:dn:caseIgnoreMatch:=BONSAI)", True),
+        ("(:caseIgnoreMatch:=bonsai)", False),
+    ],
+)
+def test_extensible(entry, filter_exp, result):
+    """ Test extensible match filters. """
+    assert LDAPFilter(filter_exp).match(entry) is result
+
+
+@pytest.mark.parametrize(
+    "filter_exp, result",
+    [
+        ("(&(objectClass=top)(cn=chuck*))", True),
+        ("(&(objectClass=top)(cn=morgan*))", False),
+        ("(|(cn=morgan*)(uidNumber>=1000))", True),
+        ("(|(cn=morgan*)(sn=*))", False),
+        ("(!(cn=morgan*))", True),
+        ("(&(!(sn=*))(|(mail=*.test)(mail=*.com)))", True),
+        ("(&)", True),
+        ("(|)", False),
+    ],
+)
+def test_boolean_operators(entry, filter_exp, result):
+    """ Test and, or, not filters. """
+    assert LDAPFilter(filter_exp).match(entry) is result
+
+
+def test_attributes():
+    """ Test attributes property. """
+    flt = LDAPFilter("(&(CN=a*)(|(sn>=b)(ou:dn:=c))(!(objectClass=*)))")
+    assert flt.attributes == {"cn", "sn", "ou", "objectclass"}
+
+
+def test_filter_entries():
+    """ Test filtering an LDIF stream. """
+    text = "".join(
+        f"dn: cn=user{i},dc=bonsai,dc=test\ncn: user{i}\nuidNumber: {i}\n\n"
+        for i in range(20)
+    )
+    flt = LDAPFilter("(&(cn=user1*)(uidNumber<=12))")
+    with StringIO(text) as inp:
+        res = [str(ent.dn) for ent in flt.filter(LDIFReader(inp))]
+    assert res == [
+        "cn=user1,dc=bonsai,dc=test",
+        "cn=user10,dc=bonsai,dc=test",
+        "cn=user11,dc=bonsai,dc=test",
+        "cn=user12,dc=bonsai,dc=test",
+    ]
+
+
+def test_mapping():
+    """ Test evaluating filters on plain dictionaries. """
+    flt = LDAPFilter("(objectclass=person)")
+    assert flt.match({"objectClass": ["top", "person"]})
+    assert not flt.match({"cn": ["person"]})
@@ -3,7 +3,7 @@ import base64
 import os
 
 from io import StringIO, BytesIO
-from bonsai import LDIFReader, LDIFError
+from bonsai import LDIFReader, LDIFError, LDAPChangeType
 
 
 def test_init_params():
@@ -276,3 +276,64 @@ objectClass: posixUser
         assert status["objectClass"]["@added"] == []
         assert status["objectClass"]["@deleted"] == ["posixUser"]
         assert status["@deleted_keys"] == ["gidNumber"]
+
+
+def test_read_changes():
+    """Test reading all types of change records from LDIF-CHANGE."""
+    text = """version: 1
+dn: cn=test,ou=nerdherd,dc=bonsai,dc=test
+cn: test
+
+dn: cn=test,ou=nerdherd,dc=bonsai,dc=test
+changetype: modify
+add: sn
+sn: testing
+-
+
+dn: cn=test,ou=nerdherd,dc=bonsai,dc=test
+changetype: modrdn
+newrdn: cn=test2
+deleteoldrdn: 0
+
+dn: cn=test2,ou=nerdherd,dc=bonsai,dc=test
+changetype: moddn
+newrdn: cn=test3
+deleteoldrdn: 1
+newsuperior: ou=buymore,dc=bonsai,dc=test
+
+dn: cn=test3,ou=buymore,dc=bonsai,dc=test
+changetype: delete
+
+"""
+    with StringIO(text) as test:
+        reader = LDIFReader(test)
+        changes = list(reader.read_changes())
+    assert [chg.changetype for chg in changes] == [
+        LDAPChangeType.ADD,
+        LDAPChangeType.MODIFY,
+        LDAPChangeType.MODDN,
+        LDAPChangeType.MODDN,
+        LDAPChangeType.DELETE,
+    ]
+    assert changes[0].entry["cn"] == ["test"]
+    assert changes[1].entry["sn"].added == ["testing"]
+    assert changes[2].newdn == "cn=test2,ou=nerdherd,dc=bonsai,dc=test"
+    assert changes[2].delete_old_rdn is False
+    assert changes[3].newdn == "cn=test3,ou=buymore,dc=bonsai,dc=test"
+    assert changes[3].delete_old_rdn is True
+    assert changes[4].dn == "cn=test3,ou=buymore,dc=bonsai,dc=test"
+    assert list(changes[4].entry.keys(exclude_dn=True)) == []
+
+
+def test_invalid_changes():
+    """Test reading invalid change records."""
+    with StringIO("dn: cn=test\nchangetype: rename\n") as test:
+        with pytest.raises(LDIFError):
+            _ = list(LDIFReader(test).read_changes())
+    with StringIO("dn: cn=test\nchangetype: modrdn\nnewrdn: cn=test2\n") as test:
+        with pytest.raises(LDIFError):
+            _ = list(LDIFReader(test).read_changes())
+    text = "dn: cn=test\nchangetype: modrdn\nnewrdn: cn=test2\ndeleteoldrdn: 2\n"
+    with StringIO(text) as test:
+        with pytest.raises(LDIFError):
+            _ = list(LDIFReader(test).read_changes())
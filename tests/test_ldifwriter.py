@@ -1,9 +1,11 @@
+import random
+
 import pytest
 
-from base64 import b64decode
+from base64 import b64decode, b64encode
 from io import StringIO, BytesIO
 from bonsai import LDIFWriter
-from bonsai import LDAPEntry, LDAPModOp
+from bonsai import LDAPEntry, LDAPModOp, LDAPChange, LDAPChangeType
 
 
 def test_init_params():
@@ -116,6 +118,172 @@ def test_write_changes():
     assert "-" == lines[lines.index("delete: gidNumber") + 1]
 
 
+def test_write_entry_exact_output():
+    """ Test the exact serialised form of values and folded lines. """
+    ent = LDAPEntry("cn=test")
+    ent["cn"] = "test"
+    ent["description"] = ["a" * 30, " leading space", "trailing ", ":colon"]
+    ent["sn"] = ["line\nbreak", "ascii\x7f"]
+    ent["uidNumber"] = 1000
+    ent["jpegPhoto"] = b"\x00\x01"
+
+    with StringIO() as out:
+        ldif = LDIFWriter(out, max_length=16)
+        ldif.write_entry(ent)
+        content = out.getvalue()
+
+    assert content == (
+        "dn: cn=test\n"
+        "cn: test\n"
+        "description: aaa\n"
+        " aaaaaaaaaaaaaaaa\n"
+        " aaaaaaaaaaa\n"
+        "description:: IG\n"
+        " xlYWRpbmcgc3BhY2\n"
+        " U=\n"
+        "description:: dH\n"
+        " JhaWxpbmcg\n"
+        "description:: Om\n"
+        " NvbG9u\n"
+        "sn:: bGluZQpicmV\n"
+        " haw==\n"
+        "sn: ascii\x7f\n"
+        "uidNumber: 1000\n"
+        "jpegPhoto:: AAE=\n"
+    )
+
+
+def _previous_attr_lines(attrname, attrvalue, max_length):
+    """ The serialisation of the attributes before the faster writer. """
+    for val in attrvalue:
+        if isinstance(val, (bytes, bytearray)):
+            has_not_safe_char = True
+            has_not_safe_init_char = True
+        else:
+            val = str(val)
+            has_not_safe_char = any(
+                char
+                for char in val
+                if ord(char) > 127 or ord(char) in (0x0A, 0x0D, 0x00)
+            ) or val.endswith(" ")
+            has_not_safe_init_char = val[0] in (" ", ":", "<")
+            val = val.encode("UTF-8")
+        if has_not_safe_char or has_not_safe_init_char:
+            val = b64encode(val)
+            name = f"{attrname}:"
+        else:
+            name = attrname
+        line = f"{name}: {val.decode('UTF-8')}"
+        for i in range(0, len(line), max_length):
+            if i != 0:
+                yield f" {line[i : i + max_length]}\n"
+            else:
+                yield f"{line[i : i + max_length]}\n"
+
+
+@pytest.mark.parametrize("max_length", [16, 76, 1000])
+def test_write_entries_identical_output(max_length):
+    """ Test that the output is byte-identical to the previous writer. """
+    rnd = random.Random(1)
+    values = (
+        lambda: bytes(rnd.randrange(256) for _ in range(rnd.randrange(1, 200))),
+        lambda: " leading",
+        lambda: "trailing ",
+        lambda: "ünï😊",
+        lambda: ":colon",
+        lambda: "<less",
+        lambda: "line\nbreak",
+        lambda: "carriage\rreturn",
+        lambda: "null\0char",
+        lambda: rnd.randrange(10**6),
+        lambda: "x" * rnd.randrange(1, 300),
+    )
+    entries = []
+    expected = ["version: 1\n"]
+    for num in range(500):
+        ent = LDAPEntry(f"cn=user{num},ou=people,dc=bonsai,dc=test")
+        for attr in ("cn", "sn", "mail", "description", "jpegPhoto"):
+            vals = [rnd.choice(values)() for _ in range(rnd.randrange(1, 4))]
+            # Drop the duplicates that the entry would reject.
+            ent[attr] = list({repr(val): val for val in vals}.values())
+        entries.append(ent)
+        expected.extend(_previous_attr_lines("dn", (ent.dn,), max_length))
+        for attr, vals in ent.items(exclude_dn=True):
+            expected.extend(_previous_attr_lines(attr, vals, max_length))
+        expected.append("\n")
+
+    with StringIO() as out:
+        LDIFWriter(out, max_length).write_entries(entries)
+        assert out.getvalue() == "".join(expected)
+
+
+def test_write_changes_long_dn():
+    """ Test that a long DN is folded when writing LDIF changes. """
+    ent = LDAPEntry("cn=test,ou=nerdherd,dc=bonsai,dc=test")
+    ent["cn"] = "test"
+
+    with StringIO() as out:
+        ldif = LDIFWriter(out, max_length=20)
+        ldif.write_changes(ent)
+        content = out.getvalue()
+
+    assert content.startswith(
+        "dn: cn=test,ou=nerdh\n erd,dc=bonsai,dc=tes\n t\nchangetype: modify\n"
+    )
+
+
+def test_write_change_records():
+    """ Test writing LDAPChange objects. """
+    ent = LDAPEntry("cn=test")
+    ent["cn"] = "test"
+    ent["objectClass"] = ["top", "person"]
+    with StringIO() as out:
+        ldif = LDIFWriter(out)
+        ldif.write_changes(LDAPChange(LDAPChangeType.ADD, ent))
+        ldif.write_changes(LDAPChange(LDAPChangeType.DELETE, ent))
+        content = out.getvalue()
+    assert content == (
+        "dn: cn=test\nchangetype: add\ncn: test\n"
+        "objectClass: top\nobjectClass: person\n\n"
+        "dn: cn=test\nchangetype: delete\n\n"
+    )
+
+    ent = LDAPEntry("cn=test")
+    ent.change_attribute("mail", LDAPModOp.ADD, "new@bonsai.test")
+    ent.change_attribute("mail", LDAPModOp.DELETE, "old@bonsai.test")
+    with StringIO() as out:
+        ldif = LDIFWriter(out)
+        ldif.write_changes(LDAPChange(LDAPChangeType.MODIFY, ent))
+        content = out.getvalue()
+    assert "add: mail\nmail: new@bonsai.test\n-\n" in content
+    assert "delete: mail\nmail: old@bonsai.test\n-\n" in content
+
+    ent = LDAPEntry("cn=test,ou=nerdherd,dc=bonsai,dc=test")
+    with StringIO() as out:
+        ldif = LDIFWriter(out)
+        ldif.write_changes(
+            LDAPChange(
+                LDAPChangeType.MODDN, ent, "cn=test2,ou=nerdherd,dc=bonsai,dc=test"
+            )
+        )
+        ldif.write_changes(
+            LDAPChange(
+                LDAPChangeType.MODDN,
+                ent,
+                "cn=test,ou=buymore,dc=bonsai,dc=test",
+                delete_old_rdn=False,
+            )
+        )
+        content = out.getvalue()
+    assert content == (
+        "dn: cn=test,ou=nerdherd,dc=bonsai,dc=test\nchangetype: modrdn\n"
+        "newrdn: cn=test2\ndeleteoldrdn: 1\n\n"
+        "dn: cn=test,ou=nerdherd,dc=bonsai,dc=test\nchangetype: modrdn\n"
+        "newrdn: cn=test\ndeleteoldrdn: 0\n"
+        "newsuperior: ou=buymore,dc=bonsai,dc=test\n\n"
+    )
+
+
 def test_output_file():
     """ Test output_file property. """
     out = StringIO()
@@ -0,0 +1,133 @@
+import math
+import time
+
+import pytest
+
+from bonsai import LDAPClient
+from bonsai.errors import NoSuchObjectError
+from bonsai.metrics import Histogram, MetricsRegistry
+from bonsai.tracing import OperationTrace, Tracer, _end_trace
+from bonsai.watchdog import OperationInfo
+
+
+class PhasesConnection:
+    """ A connection with the durations of its opening phases. """
+
+    _connect_times = (0.002, 0.0, 0.02)
+
+
+def make_trace(kind="search", elapsed=0.01, conn=None):
+    info = OperationInfo(2, kind, "dc=test", time.monotonic() - elapsed)
+    return OperationTrace(conn, info)
+
+
+def test_histogram():
+    """ Test observing values with a histogram. """
+    with pytest.raises(ValueError):
+        _ = Histogram([])
+    with pytest.raises(ValueError):
+        _ = Histogram([1.0, 0.5])
+    hist = Histogram([0.1, 1])
+    for value in (0.05, 0.1, 0.5, 3.0):
+        hist.observe(value)
+    assert hist.buckets == [(0.1, 2), (1.0, 3), (math.inf, 4)]
+    assert hist.count == 4
+    assert hist.sum == pytest.approx(3.65)
+    assert hist.as_dict()["buckets"] == hist.buckets
+
+
+def test_set_metrics():
+    """ Test setting the metrics registry of an LDAPClient. """
+    client = LDAPClient()
+    assert client.metrics is None
+    assert client._hooks is None
+    with pytest.raises(TypeError):
+        client.set_metrics(Tracer())
+    metrics = MetricsRegistry()
+    client.metrics = metrics
+    assert client.metrics is metrics
+    assert client._hooks is metrics
+    tracer = Tracer()
+    client.tracer = tracer
+    assert client._hooks.tracers == (tracer, metrics)
+    client.set_metrics(None)
+    assert client._hooks is tracer
+
+
+def test_aggregate():
+    """ Test aggregating the finished traces. """
+    metrics = MetricsRegistry([0.005, 0.05, 5])
+    _end_trace(metrics, make_trace("open", 0.03, PhasesConnection()))
+    trace = make_trace()
+    trace.entries = 3
+    trace.size = 120
+    trace.c_time = 0.004
+    _end_trace(metrics, trace)
+    _end_trace(metrics, make_trace(), NoSuchObjectError("Missing."))
+    _end_trace(metrics, make_trace("delete", 1.0), abandoned=True)
+    snapshot = metrics.snapshot()
+    assert snapshot["operations"]["search"]["success"] == 1
+    assert snapshot["operations"]["search"]["error"] == 1
+    assert snapshot["operations"]["delete"]["abandoned"] == 1
+    assert snapshot["operations"]["search"]["duration"]["buckets"] == [
+        (0.005, 0),
+        (0.05, 2),
+        (5.0, 2),
+        (math.inf, 2),
+    ]
+    assert snapshot["connect_phases"]["init"]["buckets"][0] == (0.005, 1)
+    assert snapshot["connect_phases"]["bind"]["sum"] == pytest.approx(0.02)
+    assert snapshot["errors"] == {"NoSuchObjectError": 1}
+    assert snapshot["received_entries"] == 3
+    assert snapshot["received_bytes"] == 120
+    assert snapshot["processing_time"] == pytest.approx(0.004)
+    metrics.reset()
+    assert metrics.snapshot()["operations"] == {}
+
+
+def test_to_prometheus():
+    """ Test exporting the metrics in the Prometheus text format. """
+    metrics = MetricsRegistry([0.1])
+    trace = make_trace()
+    trace.entries = 2
+    _end_trace(metrics, trace)
+    _end_trace(metrics, make_trace("modify"), NoSuchObjectError("Missing."))
+    text = metrics.to_prometheus(prefix="ldap")
+    lines = text.splitlines()
+    assert "# TYPE ldap_operations_total counter" in lines
+    assert 'ldap_operations_total{operation="search",outcome="success"} 1' in lines
+    assert 'ldap_operations_total{operation="modify",outcome="error"} 1' in lines
+    assert "# TYPE ldap_operation_duration_seconds histogram" in lines
+    assert (
+        'ldap_operation_duration_seconds_bucket{operation="search",le="0.1"} 1'
+        in lines
+    )
+    assert (
+        'ldap_operation_duration_seconds_bucket{operation="search",le="+Inf"} 1'
+        in lines
+    )
+    assert 'ldap_operation_duration_seconds_count{operation="search"} 1' in lines
+    assert 'ldap_errors_total{error="NoSuchObjectError"} 1' in lines
+    assert "ldap_received_entries_total 2" in lines
+    assert text.endswith("\n")
+
+
+def test_metrics(client, basedn):
+    """ Test collecting the metrics of a connection. """
+    metrics = MetricsRegistry()
+    client.metrics = metrics
+    try:
+        with client.connect() as conn:
+            assert len(conn._connect_times) == 3
+            res = conn.search(basedn, 1)
+            with pytest.raises(NoSuchObjectError):
+                conn.delete(f"cn=missing,{basedn}")
+        snapshot = metrics.snapshot()
+        assert snapshot["operations"]["open"]["success"] == 1
+        assert snapshot["operations"]["search"]["success"] == 1
+        assert snapshot["operations"]["delete"]["error"] == 1
+        assert snapshot["connect_phases"]["bind"]["count"] == 1
+        assert snapshot["errors"] == {"NoSuchObjectError": 1}
+        assert snapshot["received_entries"] == len(res)
+    finally:
+        client.metrics = None
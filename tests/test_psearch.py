@@ -0,0 +1,68 @@
+import pytest
+
+from bonsai import LDAPEntry, LDAPError
+from bonsai.ber import (
+    BERDecodingError,
+    encode_integer,
+    encode_octet_string,
+    encode_sequence,
+)
+from bonsai.psearch import ChangeType, decode_entry_change, encode_psearch_request
+
+
+def test_encode_psearch_request():
+    """ Test encoding the persistent search control. """
+    assert (
+        encode_psearch_request(ChangeType.ALL, True, True)
+        == b"\x30\x09\x02\x01\x0f\x01\x01\xff\x01\x01\xff"
+    )
+    assert (
+        encode_psearch_request(ChangeType.ADD | ChangeType.DELETE, False, False)
+        == b"\x30\x09\x02\x01\x03\x01\x01\x00\x01\x01\x00"
+    )
+
+
+def test_decode_entry_change():
+    """ Test decoding the entry change notification control. """
+    value = encode_sequence(encode_integer(1, 0x0A))
+    assert decode_entry_change(value) == (ChangeType.ADD, None, None)
+    value = encode_sequence(
+        encode_integer(8, 0x0A),
+        encode_octet_string("cn=old,dc=bonsai,dc=test"),
+        encode_integer(1024),
+    )
+    assert decode_entry_change(value) == (
+        ChangeType.MODDN,
+        "cn=old,dc=bonsai,dc=test",
+        1024,
+    )
+    value = encode_sequence(encode_integer(4, 0x0A), encode_integer(7))
+    assert decode_entry_change(value) == (ChangeType.MODIFY, None, 7)
+    with pytest.raises(BERDecodingError):
+        decode_entry_change(b"\x30\x00")
+    with pytest.raises(BERDecodingError):
+        decode_entry_change(encode_sequence(encode_integer(16, 0x0A)))
+
+
+def test_persistent_search(client, basedn):
+    """ Test receiving changes with persistent search. """
+    with client.connect() as conn:
+        psearch = conn.persistent_search(basedn, 2, timeout=10)
+        with pytest.raises(TypeError):
+            psearch.__aiter__()
+        try:
+            entry = LDAPEntry(f"cn=psearch,{basedn}")
+            entry["objectClass"] = ["top", "inetOrgPerson"]
+            entry["sn"] = "psearch"
+            with client.connect() as other:
+                other.add(entry)
+                other.delete(entry.dn)
+            ntf = next(psearch)
+        except LDAPError as err:
+            if err.code in (2, 12, 53):
+                pytest.skip("Persistent search is not supported by the server.")
+            raise
+        finally:
+            psearch.close()
+        assert ntf.entry.dn == entry.dn
+        assert ntf.change_type == ChangeType.ADD
@@ -0,0 +1,132 @@
+import asyncio
+from io import StringIO
+
+import pytest
+
+from bonsai import LDAPChange, LDAPChangeType, LDAPEntry, LDIFReader
+from bonsai.errors import AlreadyExists, NoSuchObjectError
+from bonsai.pool import ThreadedConnectionPool
+from bonsai.replay import async_replay_changes, replay_changes
+
+CHANGES = """dn: ou=replay,{basedn}
+objectClass: top
+objectClass: organizationalUnit
+ou: replay
+
+dn: cn=user0,ou=replay,{basedn}
+objectClass: top
+objectClass: inetOrgPerson
+cn: user0
+sn: user0
+
+dn: cn=user1,ou=replay,{basedn}
+objectClass: top
+objectClass: inetOrgPerson
+cn: user1
+sn: user1
+
+dn: cn=user0,ou=replay,{basedn}
+changetype: modify
+replace: sn
+sn: modified
+-
+
+dn: cn=user1,ou=replay,{basedn}
+changetype: modrdn
+newrdn: cn=user2
+deleteoldrdn: 1
+
+dn: cn=user2,ou=replay,{basedn}
+changetype: modify
+add: description
+description: renamed
+-
+
+"""
+
+CLEANUP = """dn: cn=user0,ou=replay,{basedn}
+changetype: delete
+
+dn: cn=user2,ou=replay,{basedn}
+changetype: delete
+
+dn: ou=replay,{basedn}
+changetype: delete
+
+"""
+
+
+def read_changes(text, basedn):
+    with StringIO(text.format(basedn=basedn)) as inp:
+        return list(LDIFReader(inp).read_changes())
+
+
+def check_result(conn, basedn):
+    res = conn.search(f"ou=replay,{basedn}", 2, attrlist=["sn", "description"])
+    entries = {str(ent.dn).split(",")[0]: ent for ent in res}
+    assert set(entries) == {"ou=replay", "cn=user0", "cn=user2"}
+    assert entries["cn=user0"]["sn"] == ["modified"]
+    assert entries["cn=user2"]["description"] == ["renamed"]
+
+
+def test_replay_changes(client, basedn):
+    """Test replaying change records on a connection."""
+    with client.connect() as conn:
+        assert replay_changes(read_changes(CHANGES, basedn), conn, max_pending=4) == 6
+        try:
+            check_result(conn, basedn)
+        finally:
+            assert replay_changes(read_changes(CLEANUP, basedn), conn) == 3
+        assert conn.search(f"ou=replay,{basedn}", 0) == []
+
+
+def test_replay_changes_pool(client, basedn):
+    """Test replaying change records on a connection pool."""
+    pool = ThreadedConnectionPool(client, minconn=2, maxconn=3)
+    try:
+        assert replay_changes(read_changes(CHANGES, basedn), pool) == 6
+        assert pool.idle_connection == 3
+        with pool.spawn() as conn:
+            check_result(conn, basedn)
+    finally:
+        assert replay_changes(read_changes(CLEANUP, basedn), pool) == 3
+        pool.close()
+
+
+def test_replay_errors(client, basedn):
+    """Test error handling of replaying change records."""
+    entry = LDAPEntry(f"cn=missing,ou=replay,{basedn}")
+    changes = [
+        LDAPChange(LDAPChangeType.DELETE, entry),
+        LDAPChange(LDAPChangeType.DELETE, entry),
+    ]
+    errors = []
+    with client.connect() as conn:
+        with pytest.raises(ValueError):
+            replay_changes(changes, conn, max_pending=0)
+        with pytest.raises(NoSuchObjectError):
+            replay_changes(changes, conn)
+        res = replay_changes(changes, conn, on_error=lambda *args: errors.append(args))
+        assert res == 0
+        assert len(errors) == 2
+        assert errors[0][0] is changes[0]
+        assert isinstance(errors[0][1], NoSuchObjectError)
+        with pytest.raises(TypeError):
+            asyncio.run(async_replay_changes(changes, conn))
+
+
+def test_async_replay_changes(client, basedn):
+    """Test replaying change records on an asyncio connection."""
+
+    async def replay():
+        async with client.connect(True) as conn:
+            changes = read_changes(CHANGES, basedn)
+            assert await async_replay_changes(changes, conn, max_pending=4) == 6
+            with pytest.raises(AlreadyExists):
+                await async_replay_changes(changes[:1], conn)
+            with pytest.raises(TypeError):
+                replay_changes(changes, conn)
+            changes = read_changes(CLEANUP, basedn)
+            assert await async_replay_changes(changes, conn) == 3
+
+    asyncio.run(replay())
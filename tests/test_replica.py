@@ -0,0 +1,397 @@
+import threading
+import uuid
+
+import pytest
+
+from bonsai import (
+    FilterError,
+    LDAPChange,
+    LDAPChangeType,
+    LDAPEntry,
+    LDAPModOp,
+    LDAPSearchScope,
+    SizeLimitError,
+)
+from bonsai.replica import LocalReplica
+from bonsai.syncrepl import SyncMode, SyncNotification, SyncState
+
+BASE = "dc=bonsai,dc=test"
+
+
+def make_entry(dn, **attrs):
+    entry = LDAPEntry(dn)
+    for key, vals in attrs.items():
+        entry[key] = vals
+    return entry
+
+
+@pytest.fixture
+def replica():
+    rep = LocalReplica(indexes=("objectClass", "uid"))
+    rep.load(
+        [
+            make_entry(BASE, objectClass=["top", "domain"], dc="bonsai"),
+            make_entry(f"ou=nerdherd,{BASE}", objectClass=["organizationalUnit"]),
+            make_entry(
+                f"cn=chuck,ou=nerdherd,{BASE}",
+                objectClass=["top", "inetOrgPerson"],
+                cn="chuck",
+                sn="Bartowski",
+                uid="chuck",
+                employeeNumber=1,
+            ),
+            make_entry(
+                f"cn=sarah,ou=nerdherd,{BASE}",
+                objectClass=["top", "inetOrgPerson"],
+                cn="sarah",
+                sn="Walker",
+                uid="sarah",
+                employeeNumber=2,
+            ),
+            make_entry(
+                f"cn=group,{BASE}",
+                objectClass=["groupOfNames"],
+                member=[f"cn=chuck,ou=nerdherd,{BASE}"],
+            ),
+        ]
+    )
+    return rep
+
+
+def dns(result):
+    return sorted(str(entry.dn) for entry in result)
+
+
+def test_load(replica):
+    """ Test loading entries into the replica. """
+    assert len(replica) == 5
+    assert f"CN=Chuck,OU=nerdherd,{BASE}" in replica
+    assert "cn=morgan,dc=bonsai,dc=test" not in replica
+    assert replica.load([make_entry(f"cn=casey,{BASE}", cn="casey"), "x"]) == 1
+    assert len(replica) == 6
+    assert replica.indexes == ("objectclass", "uid")
+    with pytest.raises(TypeError):
+        replica.add({"dn": BASE})
+
+
+def test_scopes(replica):
+    """ Test searching with different scopes. """
+    assert len(replica.search()) == 5
+    assert dns(replica.search(BASE, LDAPSearchScope.BASE)) == [BASE]
+    assert dns(replica.search(BASE, LDAPSearchScope.ONELEVEL)) == [
+        f"cn=group,{BASE}",
+        f"ou=nerdherd,{BASE}",
+    ]
+    assert dns(replica.search(f"ou=nerdherd,{BASE}", 2)) == [
+        f"cn=chuck,ou=nerdherd,{BASE}",
+        f"cn=sarah,ou=nerdherd,{BASE}",
+        f"ou=nerdherd,{BASE}",
+    ]
+    assert replica.search(f"ou=missing,{BASE}", 2) == []
+    assert replica.search(f"cn=chuck,{BASE}", 0) == []
+
+
+def test_filters(replica):
+    """ Test searching with indexed and not indexed filters. """
+    assert dns(replica.search(BASE, 2, "(uid=CHUCK)")) == [
+        f"cn=chuck,ou=nerdherd,{BASE}"
+    ]
+    assert len(replica.search(BASE, 2, "(objectClass=inetOrgPerson)")) == 2
+    assert len(replica.search(BASE, 1, "(objectClass=inetOrgPerson)")) == 0
+    assert dns(replica.search(BASE, 2, "(|(uid=sarah)(member=*))")) == [
+        f"cn=group,{BASE}",
+        f"cn=sarah,ou=nerdherd,{BASE}",
+    ]
+    assert dns(replica.search(BASE, 2, "(&(objectClass=person)(sn=walker))")) == []
+    assert dns(replica.search(BASE, 2, "(&(objectClass=*)(employeeNumber>=2))")) == [
+        f"cn=sarah,ou=nerdherd,{BASE}"
+    ]
+    assert len(replica.search(BASE, 2, "(!(uid=chuck))")) == 4
+    assert len(replica.search(BASE, 2, "(SN=b*)")) == 1
+    assert len(replica.search(BASE, 2, "(ou:dn:=nerdherd)")) == 3
+    with pytest.raises(FilterError):
+        replica.search(BASE, 2, "(uid=chuck")
+
+
+def test_result_entries(replica):
+    """ Test the attributes of the returned entries. """
+    entry = replica.get(f"cn=chuck,ou=nerdherd,{BASE}")
+    assert isinstance(entry, LDAPEntry)
+    assert entry["sn"] == ["Bartowski"]
+    assert entry["employeeNumber"] == [1]
+    entry["sn"] = "Carmichael"
+    assert replica.get(f"cn=chuck,ou=nerdherd,{BASE}")["sn"] == ["Bartowski"]
+    result = replica.search(f"cn=chuck,ou=nerdherd,{BASE}", 0, attrlist=["CN", "uid"])
+    assert set(result[0].keys()) == {"dn", "cn", "uid"}
+    result = replica.search(f"cn=chuck,ou=nerdherd,{BASE}", 0, attrlist=["1.1"])
+    assert set(result[0].keys()) == {"dn"}
+    assert replica.get(f"cn=morgan,{BASE}") is None
+
+
+def test_sizelimit(replica):
+    """ Test the size limit of the search. """
+    assert len(replica.search(BASE, 2, sizelimit=5)) == 5
+    with pytest.raises(SizeLimitError):
+        replica.search(BASE, 2, sizelimit=2)
+
+
+def test_remove(replica):
+    """ Test removing entries and the indexes. """
+    assert replica.remove(f"cn=chuck,ou=nerdherd,{BASE}")
+    assert not replica.remove(f"cn=chuck,ou=nerdherd,{BASE}")
+    assert replica.search(BASE, 2, "(uid=chuck)") == []
+    assert len(replica.search(BASE, 2, "(objectClass=inetOrgPerson)")) == 1
+    # Entries below a missing base are still found.
+    assert replica.remove(f"ou=nerdherd,{BASE}")
+    assert dns(replica.search(f"ou=nerdherd,{BASE}", 1)) == [
+        f"cn=sarah,ou=nerdherd,{BASE}"
+    ]
+    assert replica.remove(f"cn=sarah,ou=nerdherd,{BASE}")
+    assert len(replica.search()) == 2
+    replica.clear()
+    assert len(replica) == 0
+    assert replica.search() == []
+
+
+def test_apply_changes(replica):
+    """ Test applying LDAPChange objects. """
+    replica.apply(
+        LDAPChange(LDAPChangeType.ADD, make_entry(f"cn=morgan,{BASE}", uid="morgan"))
+    )
+    assert len(replica.search(BASE, 2, "(uid=morgan)")) == 1
+    entry = LDAPEntry(f"cn=sarah,ou=nerdherd,{BASE}")
+    entry.change_attribute("sn", LDAPModOp.REPLACE, "Bartowski")
+    entry.change_attribute("mail", LDAPModOp.ADD, "sarah@bonsai.test")
+    entry.change_attribute("uid", LDAPModOp.DELETE, "sarah")
+    entry.change_attribute("employeeNumber", LDAPModOp.DELETE)
+    replica.apply(LDAPChange(LDAPChangeType.MODIFY, entry))
+    sarah = replica.get(entry.dn)
+    assert sarah["sn"] == ["Bartowski"]
+    assert sarah["mail"] == ["sarah@bonsai.test"]
+    assert "uid" not in sarah
+    assert "employeeNumber" not in sarah
+    assert replica.search(BASE, 2, "(uid=sarah)") == []
+    replica.apply(
+        LDAPChange(
+            LDAPChangeType.MODDN,
+            LDAPEntry(f"ou=nerdherd,{BASE}"),
+            f"ou=buymore,{BASE}",
+        )
+    )
+    assert dns(replica.search(f"ou=buymore,{BASE}", 2)) == [
+        f"cn=chuck,ou=buymore,{BASE}",
+        f"cn=sarah,ou=buymore,{BASE}",
+        f"ou=buymore,{BASE}",
+    ]
+    assert replica.get(f"ou=buymore,{BASE}")["ou"] == ["buymore"]
+    assert replica.search(f"ou=nerdherd,{BASE}", 2) == []
+    replica.apply(LDAPChange(LDAPChangeType.DELETE, LDAPEntry(f"cn=group,{BASE}")))
+    assert replica.search(BASE, 2, "(member=*)") == []
+
+
+def test_apply_notifications(replica):
+    """ Test applying the notifications of a content synchronization. """
+    entry_uuid = uuid.uuid4()
+    entry = make_entry(f"cn=morgan,{BASE}", uid="morgan")
+    replica.apply(SyncNotification(SyncState.ADD, entry_uuid, entry.dn, entry, None))
+    assert f"cn=morgan,{BASE}" in replica
+    entry = make_entry(f"cn=grimes,{BASE}", uid="morgan")
+    replica.apply(
+        SyncNotification(SyncState.MODIFY, entry_uuid, entry.dn, entry, b"c")
+    )
+    assert f"cn=morgan,{BASE}" not in replica
+    assert dns(replica.search(BASE, 2, "(uid=morgan)")) == [f"cn=grimes,{BASE}"]
+    replica.apply(SyncNotification(SyncState.DELETE, entry_uuid, None, None, None))
+    assert replica.search(BASE, 2, "(uid=morgan)") == []
+    replica.apply(SyncNotification(SyncState.REFRESH_DONE, None, None, None, b"c"))
+    assert len(replica) == 5
+    with pytest.raises(TypeError):
+        replica.apply(entry)
+    with pytest.raises(ValueError):
+        replica.apply(SyncNotification(SyncState.ADD, entry_uuid, None, None, None))
+
+
+def test_concurrent_access(replica):
+    """ Test searching while other threads are changing the replica. """
+    errors = []
+
+    def writer(num):
+        try:
+            for i in range(200):
+                dn = f"cn=user{num}-{i},ou=nerdherd,{BASE}"
+                replica.add(make_entry(dn, objectClass=["inetOrgPerson"]))
+                replica.remove(dn)
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=writer, args=(num,)) for num in range(4)]
+    for thr in threads:
+        thr.start()
+    for _ in range(200):
+        replica.search(BASE, 2, "(objectClass=inetOrgPerson)")
+    for thr in threads:
+        thr.join()
+    assert not errors
+    assert len(replica) == 5
+
+
+def test_populate(client, basedn):
+    """ Test populating the replica and comparing the results with the server. """
+    replica = LocalReplica()
+    with client.connect() as conn:
+        count = replica.populate(conn, basedn, 2, page_size=2)
+        assert count == len(replica) == len(conn.search(basedn, 2))
+        for filter_exp in ("(objectClass=person)", "(cn=c*)", "(!(uid=*))"):
+            expected = conn.search(basedn, 2, filter_exp)
+            result = replica.search(basedn, 2, filter_exp)
+            assert dns(result) == dns(expected)
+            assert {str(ent.dn): dict(ent) for ent in result} == {
+                str(ent.dn): dict(ent) for ent in expected
+            }
+
+
+def test_snapshot(replica, tmp_path):
+    """ Test saving and restoring a snapshot of the replica. """
+    entry_uuid = uuid.uuid4()
+    entry = make_entry(
+        f"cn=morgan,{BASE}",
+        objectClass=["person"],
+        uid="morgan",
+        data=[b"\x00\xff"],
+    )
+    replica.apply(SyncNotification(SyncState.ADD, entry_uuid, entry.dn, entry, b"c1"))
+    path = str(tmp_path / "replica.db")
+    replica.save(path)
+    # Saving again replaces the file.
+    replica.save(path)
+    restored = LocalReplica.restore(path)
+    assert len(restored) == len(replica)
+    assert restored.indexes == replica.indexes
+    assert restored.cookie == b"c1"
+    assert restored.highest_usn is None
+    morgan = restored.get(entry.dn)
+    assert morgan["data"] == [b"\x00\xff"]
+    assert "data" in morgan.keys()
+    assert dns(restored.search(BASE, 2, "(uid=chuck)")) == [
+        f"cn=chuck,ou=nerdherd,{BASE}"
+    ]
+    restored.apply(SyncNotification(SyncState.DELETE, entry_uuid, None, None, None))
+    assert f"cn=morgan,{BASE}" not in restored
+    restored = LocalReplica.restore(path, indexes=("cn",))
+    assert restored.indexes == ("cn",)
+    with pytest.raises(FileNotFoundError):
+        LocalReplica.restore(str(tmp_path / "missing.db"))
+    with open(tmp_path / "invalid.db", "wb") as fileobj:
+        fileobj.write(b"invalid" * 100)
+    with pytest.raises(ValueError):
+        LocalReplica.restore(str(tmp_path / "invalid.db"))
+
+
+class FakeConsumer:
+    def __init__(self, notifications, cookie, refresh_deletes):
+        self.notifications = notifications
+        self.cookie = cookie
+        self.refresh_deletes = refresh_deletes
+
+    def __iter__(self):
+        return iter(self.notifications)
+
+
+class FakeConnection:
+    def __init__(self, result):
+        self.result = result
+        self.calls = []
+
+    def sync_search(self, *args, **kwargs):
+        self.calls.append(("sync_search", args))
+        return self.result
+
+    def paged_search(self, *args, **kwargs):
+        self.calls.append(("paged_search", args))
+        return self.result
+
+
+def test_synchronize(replica):
+    """ Test catching up with content synchronization. """
+    chuck_uuid = uuid.uuid4()
+    chuck = make_entry(
+        f"cn=chuck,ou=nerdherd,{BASE}", objectClass=["person"], sn="Carmichael"
+    )
+    morgan = make_entry(f"cn=morgan,{BASE}", objectClass=["person"])
+    conn = FakeConnection(
+        FakeConsumer(
+            [
+                SyncNotification(SyncState.MODIFY, chuck_uuid, chuck.dn, chuck, None),
+                SyncNotification(SyncState.ADD, uuid.uuid4(), morgan.dn, morgan, None),
+                SyncNotification(
+                    SyncState.PRESENT, None, LDAPEntry(BASE).dn, LDAPEntry(BASE), None
+                ),
+                SyncNotification(SyncState.REFRESH_DONE, None, None, None, b"c1"),
+            ],
+            b"c1",
+            False,
+        )
+    )
+    # Present phase: the not reported entries are deleted.
+    assert replica.synchronize(conn, BASE, 2) == 5
+    assert conn.calls[0][1][:6] == (BASE, 2, None, None, SyncMode.REFRESH_ONLY, None)
+    assert dns(replica.search()) == [
+        f"cn=chuck,ou=nerdherd,{BASE}",
+        f"cn=morgan,{BASE}",
+        BASE,
+    ]
+    assert replica.get(chuck.dn)["sn"] == ["Carmichael"]
+    assert replica.cookie == b"c1"
+    conn = FakeConnection(
+        FakeConsumer(
+            [SyncNotification(SyncState.DELETE, chuck_uuid, None, None, b"c2")],
+            b"c2",
+            True,
+        )
+    )
+    assert replica.synchronize(conn, BASE, 2) == 1
+    assert conn.calls[0][1][5] == b"c1"
+    assert dns(replica.search()) == [f"cn=morgan,{BASE}", BASE]
+    assert replica.cookie == b"c2"
+
+
+def test_synchronize_usn():
+    """ Test catching up with the uSNChanged attribute. """
+    replica = LocalReplica()
+    replica.load(
+        [
+            make_entry(f"cn=chuck,{BASE}", uSNChanged=["1024"]),
+            make_entry(f"cn=sarah,{BASE}", uSNChanged=["2048"]),
+        ]
+    )
+    assert replica.highest_usn == 2048
+    conn = FakeConnection([make_entry(f"cn=chuck,{BASE}", uSNChanged=["2050"])])
+    assert replica.synchronize(conn, BASE, 2, "objectClass=person", ["cn"]) == 1
+    assert conn.calls[0][0] == "paged_search"
+    assert conn.calls[0][1][2] == "(&(objectClass=person)(uSNChanged>=2049))"
+    assert conn.calls[0][1][3] == ["cn", "uSNChanged"]
+    assert replica.highest_usn == 2050
+    assert len(replica) == 2
+
+
+def test_synchronize_live(client, basedn, tmp_path):
+    """ Test restoring a snapshot and catching up with the server. """
+    replica = LocalReplica()
+    dname = f"cn=snapshot,{basedn}"
+    with client.connect() as conn:
+        replica.populate(conn, basedn, 2, attrlist=["*", "entryUUID"])
+        replica.synchronize(conn)
+        assert replica.cookie is not None
+        path = str(tmp_path / "replica.db")
+        replica.save(path)
+        entry = make_entry(dname, objectClass=["top", "inetOrgPerson"], sn="snap")
+        conn.add(entry)
+        try:
+            restored = LocalReplica.restore(path)
+            assert restored.synchronize(conn) >= 1
+            assert dname in restored
+            assert dns(restored.search(basedn, 2)) == dns(conn.search(basedn, 2))
+        finally:
+            conn.delete(dname)
+        assert restored.synchronize(conn) >= 1
+        assert dname not in restored
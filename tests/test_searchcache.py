@@ -0,0 +1,299 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from bonsai import LDAPClient, LDAPEntry, LDAPSearchScope
+from bonsai.errors import TimeoutError
+from bonsai.pool import ThreadedConnectionPool
+from bonsai.searchcache import SearchCache, SearchCoalescer
+
+
+def make_result(*dns):
+    result = []
+    for dn in dns:
+        entry = LDAPEntry(dn)
+        entry["cn"] = dn.split(",")[0][3:]
+        result.append(entry)
+    return result
+
+
+def fill_cache(cache):
+    for base, scope in (
+        ("dc=bonsai,dc=test", LDAPSearchScope.SUBTREE),
+        ("dc=bonsai,dc=test", LDAPSearchScope.ONELEVEL),
+        ("dc=bonsai,dc=test", LDAPSearchScope.BASE),
+        ("ou=nerdherd,dc=bonsai,dc=test", LDAPSearchScope.SUBTREE),
+        ("cn=chuck,ou=nerdherd,dc=bonsai,dc=test", LDAPSearchScope.BASE),
+    ):
+        cache._put((base, scope), base, scope, make_result(base), cache._generation)
+
+
+def test_init_params():
+    """ Test constructor parameters for SearchCache. """
+    with pytest.raises(ValueError):
+        _ = SearchCache(maxsize=0)
+    with pytest.raises(ValueError):
+        _ = SearchCache(maxsize=1.5)
+    with pytest.raises(ValueError):
+        _ = SearchCache(ttl=0)
+    cache = SearchCache(10, 5)
+    assert cache.maxsize == 10
+    assert cache.ttl == 5.0
+    assert len(cache) == 0
+
+
+def test_set_search_cache():
+    """ Test setting the search cache of an LDAPClient. """
+    client = LDAPClient()
+    assert client.search_cache is None
+    with pytest.raises(TypeError):
+        client.set_search_cache({})
+    cache = SearchCache()
+    client.search_cache = cache
+    assert client.search_cache is cache
+    client.set_search_cache(None)
+    assert client.search_cache is None
+
+
+def test_get_and_put():
+    """ Test storing and getting cached results. """
+    cache = SearchCache()
+    assert cache._get("key", None) is None
+    res = make_result("cn=chuck,dc=bonsai,dc=test")
+    cache._put("key", "dc=bonsai,dc=test", 2, res, cache._generation)
+    res[0]["cn"] = "morgan"
+    cached = cache._get("key", None)
+    assert cached[0]["cn"] == ["chuck"]
+    assert cached[0].dn == "cn=chuck,dc=bonsai,dc=test"
+    assert cached[0]["cn"].status == 0
+    cached[0]["cn"] = "casey"
+    assert cache._get("key", None)[0]["cn"] == ["chuck"]
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_stale_generation():
+    """ Test that results of searches started before an invalidation are dropped. """
+    cache = SearchCache()
+    generation = cache._generation
+    cache.invalidate("cn=other,dc=test")
+    cache._put("key", "dc=bonsai,dc=test", 2, [], generation)
+    assert len(cache) == 0
+
+
+def test_lru_eviction():
+    """ Test evicting the least recently used result. """
+    cache = SearchCache(maxsize=2)
+    cache._put("a", "dc=test", 0, [], cache._generation)
+    cache._put("b", "dc=test", 0, [], cache._generation)
+    assert cache._get("a", None) == []
+    cache._put("c", "dc=test", 0, [], cache._generation)
+    assert len(cache) == 2
+    assert cache.evictions == 1
+    assert cache._get("b", None) is None
+    assert cache._get("a", None) == []
+
+
+def test_ttl():
+    """ Test expiring cached results. """
+    cache = SearchCache(ttl=0.1)
+    cache._put("key", "dc=test", 0, [], cache._generation)
+    assert cache._get("key", None) == []
+    time.sleep(0.2)
+    assert cache._get("key", None) is None
+    assert len(cache) == 0
+
+
+@pytest.mark.parametrize(
+    "dn, remaining",
+    [
+        (
+            "cn=casey,ou=nerdherd,dc=bonsai,dc=test",
+            {
+                ("dc=bonsai,dc=test", LDAPSearchScope.ONELEVEL),
+                ("dc=bonsai,dc=test", LDAPSearchScope.BASE),
+                ("cn=chuck,ou=nerdherd,dc=bonsai,dc=test", LDAPSearchScope.BASE),
+            },
+        ),
+        (
+            "CN=Chuck,OU=Nerdherd,DC=bonsai,DC=test",
+            {
+                ("dc=bonsai,dc=test", LDAPSearchScope.ONELEVEL),
+                ("dc=bonsai,dc=test", LDAPSearchScope.BASE),
+            },
+        ),
+        (
+            "ou=nerdherd,dc=bonsai,dc=test",
+            {("dc=bonsai,dc=test", LDAPSearchScope.BASE)},
+        ),
+        ("dc=bonsai,dc=test", set()),
+        (
+            "dc=other,dc=test",
+            {
+                ("dc=bonsai,dc=test", LDAPSearchScope.SUBTREE),
+                ("dc=bonsai,dc=test", LDAPSearchScope.ONELEVEL),
+                ("dc=bonsai,dc=test", LDAPSearchScope.BASE),
+                ("ou=nerdherd,dc=bonsai,dc=test", LDAPSearchScope.SUBTREE),
+                ("cn=chuck,ou=nerdherd,dc=bonsai,dc=test", LDAPSearchScope.BASE),
+            },
+        ),
+    ],
+)
+def test_invalidate(dn, remaining):
+    """ Test invalidating cached results by the search scope. """
+    cache = SearchCache()
+    fill_cache(cache)
+    cache.invalidate(dn)
+    assert {
+        key for key in remaining if cache._get(key, None) is not None
+    } == remaining
+    assert len(cache) == len(remaining)
+
+
+def test_clear():
+    """ Test clearing the cache. """
+    cache = SearchCache()
+    fill_cache(cache)
+    generation = cache._generation
+    cache.clear()
+    assert len(cache) == 0
+    assert cache._generation != generation
+
+
+def test_search(client, basedn):
+    """ Test caching search results and invalidating them by writes. """
+    cache = SearchCache()
+    client.set_search_cache(cache)
+    try:
+        with client.connect() as conn:
+            res = conn.search(basedn, 1)
+            assert cache.misses == 1
+            assert conn.search(basedn, 1) == res
+            assert cache.hits == 1
+            entry = LDAPEntry(f"cn=cache,{basedn}")
+            entry["objectClass"] = ["top", "inetOrgPerson"]
+            entry["sn"] = "cache"
+            conn.add(entry)
+            try:
+                res = conn.search(basedn, 1)
+                assert cache.misses == 2
+                assert any(ent.dn == entry.dn for ent in res)
+                ent = conn.search(f"cn=cache,{basedn}", 0)[0]
+                assert ent.connection is conn
+                ent["sn"] = "modified"
+                ent.modify()
+                assert conn.search(f"cn=cache,{basedn}", 0)[0]["sn"] == ["modified"]
+            finally:
+                conn.delete(entry.dn)
+            assert conn.search(f"cn=cache,{basedn}", 0) == []
+    finally:
+        client.set_search_cache(None)
+
+
+def test_set_search_coalescer():
+    """ Test setting the search coalescer of an LDAPClient. """
+    client = LDAPClient()
+    assert client.search_coalescer is None
+    with pytest.raises(TypeError):
+        client.set_search_coalescer(SearchCache())
+    coalescer = SearchCoalescer()
+    client.search_coalescer = coalescer
+    assert client.search_coalescer is coalescer
+    assert (coalescer.requests, coalescer.coalesced, coalescer.in_flight) == (0, 0, 0)
+
+
+def test_coalesce_threads(client, basedn):
+    """ Test coalescing searches of a threaded connection pool. """
+    coalescer = SearchCoalescer()
+    client.set_search_coalescer(coalescer)
+    pool = ThreadedConnectionPool(client, minconn=4, maxconn=4)
+
+    def search(_):
+        with pool.spawn() as conn:
+            res = conn.search(basedn, 2)
+            assert all(ent.connection is conn for ent in res)
+            return sorted(str(ent.dn) for ent in res)
+
+    try:
+        with ThreadPoolExecutor(4) as executor:
+            results = list(executor.map(search, range(20)))
+        assert all(res == results[0] for res in results)
+        assert coalescer.requests == 20
+        assert coalescer.in_flight == 0
+    finally:
+        pool.close()
+        client.set_search_coalescer(None)
+
+
+def test_coalesce_asyncio(client, basedn):
+    """ Test coalescing searches of asyncio tasks. """
+    coalescer = SearchCoalescer()
+    client.set_search_coalescer(coalescer)
+
+    async def search():
+        async with client.connect(True) as conn:
+            results = await asyncio.gather(*(conn.search(basedn, 2) for _ in range(10)))
+            assert coalescer.coalesced == 9
+            assert all(len(res) == len(results[0]) for res in results)
+            # Every caller gets its own entries.
+            assert len({id(res[0]) for res in results}) == 10
+
+    try:
+        asyncio.run(search())
+        assert coalescer.in_flight == 0
+    finally:
+        client.set_search_coalescer(None)
+
+
+class FakeConnection:
+    def __init__(self, is_async):
+        self.is_async = is_async
+
+
+def test_coalesce_timeout():
+    """ Test that waiting for a stuck search in progress times out. """
+    coalescer = SearchCoalescer()
+    release = threading.Event()
+    started = threading.Event()
+
+    def stuck_search():
+        started.set()
+        release.wait()
+        return make_result("cn=chuck,dc=bonsai,dc=test")
+
+    with ThreadPoolExecutor(1) as executor:
+        leader = executor.submit(
+            coalescer._run, "key", FakeConnection(False), stuck_search
+        )
+        started.wait()
+        start = time.monotonic()
+        with pytest.raises(TimeoutError):
+            coalescer._run("key", FakeConnection(False), stuck_search, 0.2)
+        assert time.monotonic() - start < 2.0
+        release.set()
+        assert len(leader.result()) == 1
+    assert coalescer.in_flight == 0
+
+
+def test_coalesce_timeout_asyncio():
+    """ Test that waiting for a stuck async search in progress times out. """
+    coalescer = SearchCoalescer()
+
+    async def stuck_search():
+        await asyncio.sleep(0.5)
+        return make_result("cn=chuck,dc=bonsai,dc=test")
+
+    async def main():
+        conn = FakeConnection(True)
+        leader = asyncio.ensure_future(coalescer._run("key", conn, stuck_search))
+        await asyncio.sleep(0)
+        with pytest.raises(TimeoutError):
+            await coalescer._run("key", conn, stuck_search, 0.1)
+        # The timeout of a follower does not cancel the shared search.
+        assert len(await leader) == 1
+        assert coalescer.coalesced == 1
+
+    asyncio.run(main())
+    assert coalescer.in_flight == 0
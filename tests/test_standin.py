@@ -0,0 +1,285 @@
+import asyncio
+import time
+
+import pytest
+
+import bonsai
+from bonsai import LDAPClient, LDAPEntry
+from bonsai.errors import (
+    AlreadyExists,
+    AuthenticationError,
+    NoSuchObjectError,
+    NotAllowedOnNonleaf,
+    SizeLimitError,
+)
+from bonsai.ldapconnection import BaseLDAPConnection
+from bonsai.testing import StandInServer, synthetic_entries
+
+BASE = "ou=people,dc=bonsai,dc=test"
+ADMIN = "cn=admin,dc=bonsai,dc=test"
+
+
+@pytest.fixture(scope="module")
+def server():
+    """ Start a stand-in server with synthetic entries. """
+    with StandInServer(
+        synthetic_entries(120), credentials={ADMIN: "secret"}, size_limit=100
+    ) as srv:
+        yield srv
+
+
+@pytest.fixture
+def client(server):
+    """ Create a client for the stand-in server. """
+    cli = LDAPClient(server.url)
+    cli.set_credentials("SIMPLE", user=ADMIN, password="secret")
+    return cli
+
+
+def test_synthetic_entries():
+    """ Test generating synthetic entries. """
+    entries = list(synthetic_entries(5, base="ou=test", photo_size=16))
+    assert str(entries[0].dn) == "ou=test"
+    assert str(entries[1].dn) == "uid=user000000,ou=test"
+    assert len(entries) == 6
+    assert len(entries[1]["jpegPhoto"][0]) == 16
+    assert entries[3]["uid"][0] == "user000002"
+
+
+def test_start_close():
+    """ Test starting and closing the server. """
+    srv = StandInServer()
+    srv.start()
+    try:
+        assert srv.port != 0
+        assert srv.url == f"ldap://127.0.0.1:{srv.port}"
+        with pytest.raises(RuntimeError):
+            srv.start()
+    finally:
+        srv.close()
+    srv.close()
+
+
+def test_load_remove():
+    """ Test changing the entries of the server directly. """
+    srv = StandInServer(synthetic_entries(3))
+    assert len(srv) == 6
+    entry = LDAPEntry(f"cn=extra,{BASE}")
+    entry["objectClass"] = ["top", "person"]
+    entry["cn"] = "extra"
+    srv.add(entry)
+    assert len(srv) == 7
+    assert srv.remove(f"CN=Extra,{BASE}")
+    assert not srv.remove(f"cn=extra,{BASE}")
+
+
+def test_search(client):
+    """ Test searching on the stand-in server. """
+    with client.connect() as conn:
+        assert conn.whoami() == f"dn:{ADMIN}"
+        assert len(conn.search(BASE, 1, "(uid=user00000*)")) == 10
+        assert len(conn.search("dc=bonsai,dc=test", 2, "(employeeNumber>=110)")) == 10
+        res = conn.search(BASE, 0)
+        assert res[0]["objectClass"] == ["top", "organizationalUnit"]
+        res = conn.search(BASE, 1, "(&(uid=user000003)(!(cn=x)))", ["cn", "mail"])
+        assert res[0]["cn"] == ["User 3"]
+        assert "sn" not in res[0]
+        assert conn.search(f"ou=missing,{BASE}", 1) == []
+        with pytest.raises(SizeLimitError):
+            conn.search(BASE, 1)
+
+
+def test_paged_search(client):
+    """ Test paged results control on the stand-in server. """
+    with client.connect() as conn:
+        res = conn.paged_search(BASE, 1, page_size=50)
+        assert len(list(res)) == 120
+
+
+def test_sort_vlv(client):
+    """ Test the server-side sort and virtual list view controls. """
+    with client.connect() as conn:
+        res = conn.search(BASE, 1, "(uid=user00000*)", sort_order=["-uid"])
+        assert [entry["uid"][0] for entry in res[:3]] == [
+            "user000009",
+            "user000008",
+            "user000007",
+        ]
+        res, ctrl = conn.virtual_list_search(
+            BASE,
+            1,
+            attrlist=["uid"],
+            sort_order=["uid"],
+            offset=10,
+            before_count=1,
+            after_count=1,
+            est_list_count=0,
+        )
+        assert [entry["uid"][0] for entry in res] == [
+            "user000008",
+            "user000009",
+            "user000010",
+        ]
+        assert ctrl["target_position"] == 10
+        assert ctrl["list_count"] == 120
+        res, ctrl = conn.virtual_list_search(
+            BASE,
+            1,
+            attrlist=["uid"],
+            sort_order=["uid"],
+            attrvalue="user000100",
+            before_count=0,
+            after_count=0,
+        )
+        assert res[0]["uid"] == ["user000100"]
+        assert ctrl["target_position"] == 101
+
+
+def test_write_operations(client):
+    """ Test add, modify, rename and delete on the stand-in server. """
+    with client.connect() as conn:
+        entry = LDAPEntry(f"cn=new,{BASE}")
+        entry["objectClass"] = ["top", "person"]
+        entry["cn"] = "new"
+        entry["sn"] = "New"
+        conn.add(entry)
+        with pytest.raises(AlreadyExists):
+            conn.add(entry)
+        entry["sn"] = "Changed"
+        entry["description"] = ["a", "b"]
+        entry.modify()
+        entry["description"].remove("a")
+        entry.modify()
+        res = conn.search(f"cn=new,{BASE}", 0)[0]
+        assert res["sn"] == ["Changed"]
+        assert res["description"] == ["b"]
+        entry.rename(f"cn=renamed,{BASE}")
+        assert conn.search(f"cn=renamed,{BASE}", 0)[0]["cn"] == ["renamed"]
+        conn.delete(f"cn=renamed,{BASE}")
+        with pytest.raises(NoSuchObjectError):
+            conn.delete(f"cn=renamed,{BASE}")
+        with pytest.raises(NotAllowedOnNonleaf):
+            conn.delete(BASE)
+
+
+def test_bind_failure(server):
+    """ Test binding with invalid credentials. """
+    client = LDAPClient(server.url)
+    client.set_credentials("SIMPLE", user=ADMIN, password="wrong")
+    with pytest.raises(AuthenticationError):
+        client.connect()
+
+
+def test_latency(client, server):
+    """ Test delaying the responses of the server. """
+    server.latency = lambda kind: 1.0 if kind == "search" else 0.0
+    try:
+        with client.connect() as conn:
+            with pytest.raises(bonsai.TimeoutError):
+                conn.search(BASE, 0, timeout=0.2)
+    finally:
+        server.latency = 0.0
+    assert server.operations["search"] >= 1
+
+
+def test_async_concurrent_searches(client):
+    """ Test concurrent searches on the same asynchronous connection. """
+
+    async def search():
+        async with client.connect(True) as conn:
+            return await asyncio.gather(
+                *(conn.search(BASE, 1, f"(uid=user00001{num})") for num in range(10))
+            )
+
+    res = asyncio.run(search())
+    assert [str(entries[0]["uid"][0]) for entries in res] == [
+        f"user00001{num}" for num in range(10)
+    ]
+
+
+class PollingConnection(BaseLDAPConnection):
+    """ Asynchronous connection that returns the message IDs to poll. """
+
+    def __init__(self, client):
+        super().__init__(client, True)
+
+    def _evaluate(self, msg_id, timeout=None):
+        return msg_id
+
+
+def test_bind_releases_gil(client):
+    """ Test that waiting for the bind response does not block the server. """
+    # The server's thread has to run while the client waits.
+    with client.connect(timeout=2.0) as conn:
+        assert conn.whoami() == f"dn:{ADMIN}"
+
+
+def test_search_result_received_earlier(client, server):
+    """ Test getting a search result that is received by an earlier poll. """
+    start = server.operations.get("search", 0)
+    # The second search is answered after the first one, so polling it
+    # receives the first one's result too.
+    server.latency = lambda kind: (
+        0.2 if kind == "search" and server.operations["search"] > start + 1 else 0.0
+    )
+    try:
+        conn = PollingConnection(client)
+        msg_id = conn.open()
+        while conn.get_result(msg_id) is None:
+            pass
+        first = conn.search(BASE, 1, "(uid=user000001)")
+        second = conn.search(BASE, 1, "(uid=user000002)")
+        results = {}
+        deadline = time.monotonic() + 5.0
+        for msg_id in (second, first):
+            while results.get(msg_id) is None and time.monotonic() < deadline:
+                results[msg_id] = conn.get_result(msg_id)
+        assert results[second][0]["uid"] == ["user000002"]
+        assert results[first] is not None
+        assert results[first][0]["uid"] == ["user000001"]
+        conn.close()
+    finally:
+        server.latency = 0.0
+
+
+def test_prepare_search_plan(client):
+    """ Test that a prepared search reuses its parameters between executions. """
+    with client.connect(timeout=5.0) as conn:
+        search = conn.prepare_search(
+            BASE, 1, "(uid={uid})", ["uid"], sort_order=["uid"]
+        )
+        for num in (3, 7, 3):
+            res = search(uid=f"user00000{num}")
+            assert res == conn.search(BASE, 1, f"(uid=user00000{num})", ["uid"])
+        assert search(uid="user*") == []
+        # Only the placeholders and the parentheses are checked locally.
+        for template in (
+            "(memberOf:1.2.840.113556.1.4.1941:={dn})",
+            "(cn:dn:2.5.13.3:={value})",
+            "(sn:caseIgnoreOrderingMatch:={value})",
+        ):
+            assert conn.prepare_search(BASE, 1, template).parameters
+        for template in ("(uid={uid}", "(uid={uid}))(", ")(uid={uid})("):
+            with pytest.raises(bonsai.errors.FilterError):
+                _ = conn.prepare_search(BASE, 1, template)
+
+
+def test_paged_search_close_no_wait(client, server):
+    """ Test that releasing a paged search does not wait for the server. """
+    start = server.operations.get("search", 0)
+    # Only the request that discards the result set is slow.
+    server.latency = lambda kind: (
+        5.0 if kind == "search" and server.operations["search"] > start + 1 else 0.0
+    )
+    try:
+        with client.connect() as conn:
+            res = conn.paged_search(BASE, 1, page_size=2)
+            assert isinstance(next(res), LDAPEntry)
+            assert res.cookie
+            begin = time.monotonic()
+            res.close()
+            assert time.monotonic() - begin < 1.0
+            assert res.cookie is None
+            assert conn.whoami() is not None
+    finally:
+        server.latency = 0.0
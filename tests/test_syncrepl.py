@@ -0,0 +1,174 @@
+import asyncio
+import uuid
+
+import pytest
+
+from bonsai import LDAPEntry
+from bonsai.ber import (
+    BERDecodingError,
+    decode_sequence,
+    decode_tlv,
+    encode_boolean,
+    encode_integer,
+    encode_octet_string,
+    encode_sequence,
+)
+from bonsai.syncrepl import (
+    SyncMode,
+    SyncState,
+    decode_sync_done,
+    decode_sync_info,
+    decode_sync_state,
+    encode_sync_request,
+)
+
+UUID = uuid.UUID("c975c901-6cea-4b6f-8319-d67f45449506")
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (0, b"\x02\x01\x00"),
+        (127, b"\x02\x01\x7f"),
+        (128, b"\x02\x02\x00\x80"),
+        (-128, b"\x02\x01\x80"),
+        (-129, b"\x02\x02\xff\x7f"),
+        (65536, b"\x02\x03\x01\x00\x00"),
+    ],
+)
+def test_encode_integer(value, expected):
+    """ Test encoding integers. """
+    assert encode_integer(value) == expected
+
+
+def test_long_form_length():
+    """ Test encoding and decoding values with long form length. """
+    value = encode_octet_string(b"x" * 300)
+    assert value[:4] == b"\x04\x82\x01\x2c"
+    tag, content, end = decode_tlv(value)
+    assert (tag, content, end) == (0x04, b"x" * 300, 304)
+
+
+def test_decode_errors():
+    """ Test decoding malformed values. """
+    with pytest.raises(BERDecodingError):
+        decode_tlv(b"\x04\x05abc")
+    with pytest.raises(BERDecodingError):
+        decode_tlv(b"\x04")
+    with pytest.raises(BERDecodingError):
+        decode_sequence(b"\x31\x00")
+    with pytest.raises(BERDecodingError):
+        decode_sequence(b"\x30\x00\x00")
+
+
+def test_encode_sync_request():
+    """ Test encoding the sync request control. """
+    assert encode_sync_request(SyncMode.REFRESH_ONLY) == b"\x30\x03\x0a\x01\x01"
+    assert (
+        encode_sync_request(SyncMode.REFRESH_AND_PERSIST, b"rid=000", True)
+        == b"\x30\x0f\x0a\x01\x03\x04\x07rid=000\x01\x01\xff"
+    )
+
+
+def test_decode_sync_state():
+    """ Test decoding the sync state control. """
+    value = encode_sequence(
+        encode_integer(1, 0x0A),
+        encode_octet_string(UUID.bytes),
+        encode_octet_string(b"cookie"),
+    )
+    assert decode_sync_state(value) == (SyncState.ADD, UUID, b"cookie")
+    value = encode_sequence(encode_integer(3, 0x0A), encode_octet_string(UUID.bytes))
+    assert decode_sync_state(value) == (SyncState.DELETE, UUID, None)
+    with pytest.raises(BERDecodingError):
+        decode_sync_state(encode_sequence(encode_integer(1, 0x0A)))
+
+
+def test_decode_sync_done():
+    """ Test decoding the sync done control. """
+    assert decode_sync_done(b"\x30\x00") == (None, False)
+    value = encode_sequence(encode_octet_string(b"cookie"), encode_boolean(True))
+    assert decode_sync_done(value) == (b"cookie", True)
+
+
+def test_decode_sync_info():
+    """ Test decoding the choices of the sync info message. """
+    value = encode_octet_string(b"new", 0x80)
+    assert decode_sync_info(value) == (0, b"new", False, [])
+    value = encode_sequence(encode_octet_string(b"c1"), tag=0xA1)
+    assert decode_sync_info(value) == (1, b"c1", True, [])
+    value = encode_sequence(encode_boolean(False), tag=0xA2)
+    assert decode_sync_info(value) == (2, None, False, [])
+    value = encode_sequence(
+        encode_octet_string(b"c2"),
+        encode_boolean(True),
+        encode_sequence(encode_octet_string(UUID.bytes), tag=0x31),
+        tag=0xA3,
+    )
+    assert decode_sync_info(value) == (3, b"c2", True, [UUID])
+    with pytest.raises(BERDecodingError):
+        decode_sync_info(b"\xa4\x00")
+
+
+def test_refresh_only(client, basedn):
+    """ Test refreshOnly synchronization and resuming it from a cookie. """
+    with client.connect() as conn:
+        consumer = conn.sync_search(basedn, 2, mode=SyncMode.REFRESH_ONLY)
+        notifications = list(consumer)
+        assert consumer.refresh_done
+        assert consumer.cookie is not None
+        assert notifications[-1].state == SyncState.REFRESH_DONE
+        added = [ntf for ntf in notifications if ntf.state == SyncState.ADD]
+        assert len(added) == len(conn.search(basedn, 2))
+        assert all(isinstance(ntf.entry, LDAPEntry) for ntf in added)
+        entry = LDAPEntry(f"cn=syncrepl,{basedn}")
+        entry["objectClass"] = ["top", "inetOrgPerson"]
+        entry["sn"] = "syncrepl"
+        conn.add(entry)
+        try:
+            consumer = conn.sync_search(
+                basedn, 2, mode=SyncMode.REFRESH_ONLY, cookie=consumer.cookie
+            )
+            changes = [
+                ntf
+                for ntf in consumer
+                if ntf.state in (SyncState.ADD, SyncState.MODIFY)
+            ]
+            assert [str(ntf.dn) for ntf in changes] == [str(entry.dn)]
+        finally:
+            conn.delete(entry.dn)
+
+
+def test_refresh_and_persist(client, basedn):
+    """ Test receiving changes in refreshAndPersist mode with asyncio. """
+
+    async def sync():
+        async with client.connect(True) as conn:
+            consumer = conn.sync_search(basedn, 2, attrlist=["cn"])
+            async for ntf in consumer:
+                if ntf.state == SyncState.REFRESH_DONE:
+                    break
+            entry = LDAPEntry(f"cn=persist,{basedn}")
+            entry["objectClass"] = ["top", "inetOrgPerson"]
+            entry["sn"] = "persist"
+            async with client.connect(True) as other:
+                await other.add(entry)
+                await other.delete(entry.dn)
+            states = []
+            async for ntf in consumer:
+                states.append((ntf.state, str(ntf.dn)))
+                if ntf.state == SyncState.DELETE:
+                    break
+            await consumer.close()
+            assert states[0] == (SyncState.ADD, str(entry.dn))
+
+    asyncio.run(asyncio.wait_for(sync(), 10.0))
+
+
+def test_iteration_type(client, basedn):
+    """ Test that a synchronous consumer cannot be used with async for. """
+    with client.connect() as conn:
+        consumer = conn.sync_search(basedn, 2, mode=SyncMode.REFRESH_ONLY)
+        with pytest.raises(TypeError):
+            consumer.__aiter__()
+        consumer.close()
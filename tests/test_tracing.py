@@ -0,0 +1,146 @@
+import time
+
+import pytest
+
+from bonsai import LDAPClient, LDAPEntry
+from bonsai.errors import NoSuchObjectError, TimeoutError
+from bonsai.tracing import OperationTrace, Tracer, _end_trace, _entry_size
+from bonsai.watchdog import OperationInfo
+
+
+class RecordingTracer(Tracer):
+    """ Collect the started and the finished traces. """
+
+    def __init__(self):
+        self.started = []
+        self.finished = []
+
+    def on_start(self, trace):
+        self.started.append(trace)
+
+    def on_end(self, trace):
+        self.finished.append(trace)
+
+
+class FailingTracer(Tracer):
+    def on_end(self, trace):
+        raise RuntimeError("Broken hook.")
+
+
+def make_trace(kind="search"):
+    info = OperationInfo(2, kind, "dc=test", time.monotonic() - 1.0, 2, "(cn=*)")
+    return OperationTrace(None, info)
+
+
+def test_set_tracer():
+    """ Test setting the tracer of an LDAPClient. """
+    client = LDAPClient()
+    assert client.tracer is None
+    with pytest.raises(TypeError):
+        client.set_tracer(object())
+    tracer = Tracer()
+    client.tracer = tracer
+    assert client.tracer is tracer
+    client.set_tracer(None)
+    assert client.tracer is None
+
+
+def test_trace_results():
+    """ Test collecting the results of an operation into its trace. """
+    entry = LDAPEntry("cn=test,dc=test")
+    entry["cn"] = ["test"]
+    entry["jpegPhoto"] = [b"\x00\x01\x02"]
+    assert _entry_size(entry) == 15 + 2 + 4 + 9 + 3
+    trace = make_trace()
+    assert trace.elapsed is None
+    assert trace.wait_time is None
+    trace._add_result([entry, entry, "ldap://referral"])
+    assert trace.entries == 2
+    assert trace.size == 2 * _entry_size(entry)
+    trace = make_trace("stream_search")
+    trace._add_result(("entry", entry, []))
+    trace._add_result(("intermediate", None, []))
+    assert trace.entries == 1
+    assert trace.size == _entry_size(entry)
+    trace = make_trace("delete")
+    trace._add_result(True)
+    assert trace.entries is None
+
+
+def test_end_trace():
+    """ Test finishing the traces. """
+    tracer = RecordingTracer()
+    trace = make_trace()
+    trace.c_time = 0.25
+    _end_trace(tracer, trace)
+    assert tracer.finished == [trace]
+    assert trace.result_code == 0
+    assert trace.elapsed >= 1.0
+    assert trace.wait_time == pytest.approx(trace.elapsed - 0.25)
+    trace = make_trace()
+    _end_trace(tracer, trace, NoSuchObjectError("Missing."))
+    assert trace.result_code == 0x20
+    assert isinstance(trace.error, NoSuchObjectError)
+    trace = make_trace()
+    _end_trace(tracer, trace, abandoned=True)
+    assert trace.abandoned
+    assert trace.result_code is None
+    # The errors of the hooks are not propagated.
+    _end_trace(FailingTracer(), make_trace())
+
+
+def test_opentelemetry_tracer():
+    """ Test creating OpenTelemetry spans from the traces. """
+    pytest.importorskip("opentelemetry.sdk")
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+        InMemorySpanExporter,
+    )
+    from opentelemetry.trace import StatusCode
+
+    from bonsai.otel import OpenTelemetryTracer
+
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    tracer = OpenTelemetryTracer(provider)
+    trace = make_trace()
+    tracer.on_start(trace)
+    trace.entries = 3
+    _end_trace(tracer, trace)
+    trace = make_trace("modify")
+    tracer.on_start(trace)
+    _end_trace(tracer, trace, TimeoutError("Timeout."))
+    spans = exporter.get_finished_spans()
+    assert [span.name for span in spans] == ["LDAP search", "LDAP modify"]
+    assert spans[0].attributes["ldap.filter"] == "(cn=*)"
+    assert spans[0].attributes["ldap.entries"] == 3
+    assert spans[0].attributes["ldap.result_code"] == 0
+    assert spans[1].status.status_code == StatusCode.ERROR
+    assert spans[0].end_time - spans[0].start_time >= 1e9
+
+
+def test_tracing(client, basedn):
+    """ Test tracing the operations of a connection. """
+    tracer = RecordingTracer()
+    client.tracer = tracer
+    try:
+        with client.connect() as conn:
+            res = conn.search(basedn, 1, "(objectclass=*)")
+            with pytest.raises(NoSuchObjectError):
+                conn.delete(f"cn=missing,{basedn}")
+        kinds = [trace.kind for trace in tracer.finished]
+        assert kinds == ["open", "search", "delete"]
+        assert tracer.started == tracer.finished
+        search = tracer.finished[1]
+        assert search.dn == basedn
+        assert search.scope == 1
+        assert search.filter_exp == "(objectclass=*)"
+        assert search.entries == len(res)
+        assert search.size > 0
+        assert search.result_code == 0
+        assert 0 <= search.c_time <= search.elapsed
+        assert tracer.finished[2].result_code == 0x20
+    finally:
+        client.tracer = None
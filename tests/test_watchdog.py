@@ -0,0 +1,142 @@
+import time
+
+import pytest
+from conftest import network_delay
+
+from bonsai import LDAPClient
+from bonsai.errors import InvalidMessageID, TimeoutError
+from bonsai.pool import ConnectionPool
+from bonsai.watchdog import OperationInfo, Watchdog
+
+
+class OperationsConnection:
+    """ A connection with the given in-flight operations. """
+
+    def __init__(self, *operations):
+        self.operations = list(operations)
+        self.closed = False
+        self.abandoned = []
+
+    @property
+    def pending_operations(self):
+        return list(self.operations)
+
+    def _abandon_all(self, msg_ids):
+        for msg_id in msg_ids:
+            self.abandoned.append(msg_id)
+            self.operations = [op for op in self.operations if op.msg_id != msg_id]
+
+    def close(self):
+        self.closed = True
+
+
+class OperationsClient(LDAPClient):
+    """ A client that creates OperationsConnection objects. """
+
+    def connect(self, is_async=False, timeout=None, **kwargs):
+        return OperationsConnection()
+
+
+def operation(msg_id, kind, age):
+    return OperationInfo(msg_id, kind, "cn=test", time.monotonic() - age)
+
+
+def test_init_params():
+    """ Test constructor parameters for Watchdog. """
+    with pytest.raises(ValueError):
+        _ = Watchdog(0)
+    with pytest.raises(ValueError):
+        _ = Watchdog("1")
+    assert Watchdog(2).max_age == 2.0
+
+
+def test_set_watchdog():
+    """ Test setting the watchdog of an LDAPClient. """
+    client = LDAPClient()
+    assert client.watchdog is None
+    with pytest.raises(TypeError):
+        client.set_watchdog(10)
+    watchdog = Watchdog(10)
+    client.watchdog = watchdog
+    assert client.watchdog is watchdog
+    client.set_watchdog(None)
+    assert client.watchdog is None
+
+
+def test_stale_operations():
+    """ Test finding and abandoning the stale operations. """
+    watchdog = Watchdog(10)
+    conn = OperationsConnection(
+        operation(1, "search", 1),
+        operation(2, "modify", 20),
+        operation(3, "stream_search", 30),
+    )
+    assert watchdog.remaining(conn.operations[0]) == pytest.approx(9, abs=0.5)
+    assert watchdog.remaining(conn.operations[1]) == 0.0
+    assert watchdog.remaining(conn.operations[2]) is None
+    assert [op.msg_id for op in watchdog.stale_operations(conn)] == [2]
+    assert watchdog.is_stuck(conn)
+    assert [op.msg_id for op in watchdog.check(conn)] == [2]
+    assert conn.abandoned == [2]
+    assert not watchdog.is_stuck(conn)
+    watchdog = Watchdog(10, exempt_kinds=())
+    assert [op.msg_id for op in watchdog.check(conn)] == [3]
+    conn.closed = True
+    conn.operations.append(operation(4, "add", 40))
+    assert not watchdog.is_stuck(conn)
+
+
+def test_pool_quarantine():
+    """ Test that the pool closes the connections with stuck operations. """
+    client = OperationsClient()
+    pool = ConnectionPool(client, minconn=1, maxconn=2)
+    pool.open()
+    conn = pool.get()
+    conn.operations.append(operation(1, "search", 20))
+    pool.put(conn)
+    assert pool.idle_connection == 1
+    client.watchdog = Watchdog(10)
+    assert pool.get() is not conn
+    assert conn.closed
+    assert pool.quarantined == 1
+    conn = pool.get()
+    conn.operations.append(operation(2, "delete", 20))
+    pool.put(conn)
+    assert conn.closed
+    assert pool.idle_connection == 0
+    assert pool.quarantined == 2
+    pool.close()
+
+
+def test_pending_operations(client, basedn):
+    """ Test the snapshot of the in-flight operations and the watchdog. """
+    with client.connect() as conn:
+        assert conn.pending_operations == []
+        msg_id = conn._send_get_entry(basedn, None, None)
+        ops = conn.pending_operations
+        assert [(op.msg_id, op.kind, op.dn) for op in ops] == [
+            (msg_id, "search", basedn)
+        ]
+        assert ops[0].age >= 0
+        conn.get_result(msg_id, 10)
+        assert conn.pending_operations == []
+        watchdog = Watchdog(0.1)
+        msg_id = conn._send_get_entry(basedn, None, None)
+        time.sleep(0.2)
+        assert [op.msg_id for op in watchdog.check(conn)] == [msg_id]
+        assert conn.pending_operations == []
+        with pytest.raises(InvalidMessageID):
+            conn.get_result(msg_id)
+
+
+def test_watchdog_timeout(client, basedn):
+    """ Test that the watchdog's deadline limits the waiting for results. """
+    client.watchdog = Watchdog(3.0)
+    try:
+        with client.connect() as conn:
+            with network_delay(6.1):
+                with pytest.raises(TimeoutError):
+                    _ = conn.search(basedn, 1)
+            assert conn.pending_operations == []
+    finally:
+        client.watchdog = None